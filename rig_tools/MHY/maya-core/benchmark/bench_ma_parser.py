@@ -0,0 +1,280 @@
+"""
+Benchmarks the Maya ASCII parser on a generated .ma file.
+
+Compares the indexed parser, which scans the file once and answers
+all queries from the index, against the legacy parser, which read all
+lines into memory and re-scanned them with regexes for every query.
+Renaming is compared against the legacy rename, which replaced every
+renamed node on every line one str.replace at a time.
+
+Usage:
+
+.. code:: bash
+
+    python bench_ma_parser.py --size 500 --renames 200 --memory
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Add the maya-core and python-core packages if not in the path yet
+root = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+for path in (os.path.join(root, 'py'),
+             os.path.join(os.path.dirname(root), 'python-core', 'py')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import mhy.maya.ma_parser as ma_parser
+
+
+NODE_BLOCK = '''createNode transform -n "{name}_grp" -p "rig_grp";
+\trename -uid "{i}";
+\tsetAttr ".t" -type "double3" {i} 0 0 ;
+createNode joint -n "{name}_JNT" -p "{name}_grp";
+\tsetAttr ".nts" -type "string" "joint {i}; created by \\"bench\\"";
+\tsetAttr -s 4 ".wm";
+\tsetAttr ".jo" -type "double3" 0 90 0 ;
+createNode file -n "{name}_file";
+\tsetAttr ".ftn" -type "string"
+\t\t"/textures/{name}.png";
+'''
+
+DATA_LINE = '\t\t{0} {0} {0} {0} {0} {0} {0} {0} {0} {0}\n'
+
+
+def write_ma_file(file_path, size, data_lines=20):
+    """Writes a synthetic Maya ASCII file of about the given size in MB.
+    Each node group has a data block of a number of lines, like
+    the point and weight data making up most of production files.
+
+    Returns:
+        int: The number of node groups written.
+    """
+    size = size * 1024 * 1024
+    count = 0
+    with open(file_path, 'w') as f:
+        f.write('//Maya ASCII 2018 scene\n')
+        f.write('file -r -ns "rig" -rfn "rigRN" "/path/to/rig.ma";\n')
+        f.write('requires maya "2018";\n')
+        f.write('currentUnit -l centimeter -a degree -t ntsc;\n')
+        f.write('createNode transform -n "rig_grp";\n')
+        f.write('createNode script -n "sceneConfigurationScriptNode";\n')
+        f.write('\tsetAttr ".b" -type "string" '
+                '"playbackOptions -min 1 -max 120 -ast 1 -aet 200 ";\n')
+        f.write('\tsetAttr ".st" 6;\n')
+        while f.tell() < size:
+            name = 'L_node{}'.format(count)
+            f.write(NODE_BLOCK.format(name=name, i=count))
+            if data_lines:
+                f.write('\tsetAttr -s {} ".w[0:{}]"\n'.format(
+                    data_lines * 10, data_lines * 10 - 1))
+                for i in range(data_lines):
+                    f.write(DATA_LINE.format(0.5 + i))
+                f.write('\t\t;\n')
+            count += 1
+        for i in range(1, count):
+            f.write('connectAttr "L_node{}_grp.t" "L_node{}_grp.t";\n'.format(
+                i - 1, i))
+    return count
+
+
+def _legacy_get_lines(file_path):
+    with open(file_path) as f:
+        return f.readlines()
+
+
+def _legacy_get_nodes(lines, pattern, type_='(.*)'):
+    nodes = []
+    matcher = 'createNode {} (-n|-name) "([a-zA-Z0-9_]*{}[a-zA-Z0-9_]*)"'
+    matcher = matcher.format(type_, pattern)
+    for line in lines:
+        test = re.match(matcher, line)
+        if test:
+            nodes.append(test.groups()[-1])
+    return nodes
+
+
+def _legacy_get_playback_options(lines):
+    data = {}
+    for i, line in enumerate(lines):
+        if re.search(r'.*"sceneConfigurationScriptNode".*', line):
+            tokens = lines[i + 1].split()
+            for j, token in enumerate(tokens):
+                if token == '-min':
+                    data['minTime'] = float(tokens[j + 1])
+                elif token == '-max':
+                    data['maxTime'] = float(tokens[j + 1])
+    return data
+
+
+def _legacy_get_textures(lines):
+    textures = set()
+    for i, line in enumerate(lines):
+        if not line.startswith('createNode file '):
+            continue
+        for line in lines[i + 1:i + 100]:
+            if not re.match(r'\s', line):
+                break
+            tokens = line.split('"')
+            if len(tokens) > 2 and \
+               tokens[-2].split('.')[-1].lower() in ma_parser.TEXTURE_EXTS:
+                textures.add(tokens[-2])
+                break
+    return sorted(textures)
+
+
+def _legacy_replace_node_names(file_path, out_path, text_dict):
+    new_lines = []
+    nodes = {}
+    with open(file_path, 'r') as f:
+        for line in f.readlines():
+            if line.startswith('createNode'):
+                name = None
+                tokens = line.split()
+                for i, t in enumerate(tokens):
+                    if t == '-n' or t == '-name':
+                        name = tokens[i + 1].split('"')[1]
+                        break
+                if name:
+                    new_name = name
+                    for old, new in text_dict.items():
+                        new_name = new_name.replace(old, new)
+                    if name != new_name:
+                        nodes[name] = new_name
+            if nodes:
+                for old, new in nodes.items():
+                    line = line.replace(old, new)
+            new_lines.append(line)
+    with open(out_path, 'w+') as f:
+        f.writelines(new_lines)
+
+
+def _time(func, memory, *args):
+    """Returns the time, the peak memory in MB and the result of
+    a function call. The memory is only traced if requested, as
+    tracing slows down the call."""
+    t = time.time()
+    result = func(*args)
+    t = time.time() - t
+    peak = 0
+    if memory and tracemalloc:
+        tracemalloc.start()
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 1024.0 / 1024.0
+        tracemalloc.stop()
+    return t, peak, result
+
+
+def run(size=50, renames=200, data_lines=20, memory=False):
+    """Runs the benchmark.
+
+    Args:
+        size (int): The size of the generated file in MB.
+        renames (int): The number of node groups to rename.
+        data_lines (int): The number of data lines per node group.
+        memory (bool): If True, trace the peak memory of each parser.
+
+    Returns:
+        dict: The benchmark results.
+    """
+    root = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(root, 'scene.ma')
+        count = write_ma_file(file_path, size, data_lines=data_lines)
+        text_dict = dict(
+            ('L_node{}_'.format(i), 'R_node{}_'.format(i))
+            for i in range(0, count, max(count // renames, 1)))
+
+        def legacy_queries():
+            lines = _legacy_get_lines(file_path)
+            return (len(_legacy_get_nodes(lines, 'JNT', 'joint')),
+                    len(_legacy_get_nodes(lines, 'file')),
+                    _legacy_get_playback_options(lines),
+                    len(_legacy_get_textures(lines)))
+
+        def queries():
+            parser = ma_parser.MAParser(file_path)
+            return (len(parser.get_nodes('JNT', 'joint')),
+                    len(parser.get_nodes('file')),
+                    parser.get_playback_options(),
+                    len(parser.get_textures()))
+
+        legacy_query_time, legacy_query_memory, legacy_result = _time(
+            legacy_queries, memory)
+        query_time, query_memory, query_result = _time(queries, memory)
+        assert legacy_result[:2] == query_result[:2]
+        connection_time, _, connections = _time(
+            lambda: list(ma_parser.MAParser(file_path).iter_connections()),
+            False)
+
+        copy_path = os.path.join(root, 'scene_copy.ma')
+        legacy_rename_time, legacy_rename_memory, _ = _time(
+            _legacy_replace_node_names, memory, file_path, copy_path,
+            text_dict)
+        rename_time, rename_memory, _ = _time(
+            lambda: ma_parser.MAParser(file_path).replace_node_names(
+                text_dict), memory)
+
+        return {
+            'size': os.path.getsize(file_path) / 1024.0 / 1024.0,
+            'nodes': count * 3,
+            'renames': len(text_dict),
+            'joints': query_result[0],
+            'connections': len(connections),
+            'legacy_query': legacy_query_time,
+            'legacy_query_memory': legacy_query_memory,
+            'query': query_time,
+            'query_memory': query_memory,
+            'query_speedup': legacy_query_time / max(query_time, 1e-9),
+            'connection': connection_time,
+            'legacy_rename': legacy_rename_time,
+            'legacy_rename_memory': legacy_rename_memory,
+            'rename': rename_time,
+            'rename_memory': rename_memory,
+            'rename_speedup': legacy_rename_time / max(rename_time, 1e-9)}
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, default=50)
+    parser.add_argument('--renames', type=int, default=200)
+    parser.add_argument('--data-lines', type=int, default=20)
+    parser.add_argument(
+        '--memory', action='store_true',
+        help='Trace the peak memory. Needs Python 3.')
+    args = parser.parse_args()
+
+    result = run(
+        size=args.size, renames=args.renames, data_lines=args.data_lines,
+        memory=args.memory)
+    print('File size:        {size:.1f}MB'.format(**result))
+    print('Nodes:            {nodes}'.format(**result))
+    print('Renamed groups:   {renames}'.format(**result))
+    print('Legacy queries:   {legacy_query:.2f}s, '
+          '{legacy_query_memory:.1f}MB peak'.format(**result))
+    print('Indexed queries:  {query:.2f}s, '
+          '{query_memory:.1f}MB peak'.format(**result))
+    print('Query speedup:    {query_speedup:.1f}x'.format(**result))
+    print('Connections:      {connections} in '
+          '{connection:.2f}s'.format(**result))
+    print('Legacy rename:    {legacy_rename:.2f}s, '
+          '{legacy_rename_memory:.1f}MB peak'.format(**result))
+    print('Single-pass:      {rename:.2f}s, '
+          '{rename_memory:.1f}MB peak'.format(**result))
+    print('Rename speedup:   {rename_speedup:.1f}x'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmarks exporting the attribute data of nodes on a generated scene.
+
+Compares the attribute snapshot used by DependencyNode.export(), which
+walks the plugs of each node once, against the legacy export, which
+created an Attribute instance per plug and queried the connections of
+every plug. Both exports must give the same data.
+
+Runs in mayapy.
+
+Usage:
+
+.. code:: bash
+
+    mayapy bench_nodezoo_export.py --rigs 200
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the maya-core and python-core packages if not in the path yet
+root = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+for path in (os.path.join(root, 'py'),
+             os.path.join(os.path.dirname(root), 'python-core', 'py')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def build_scene(rigs):
+    """Builds a scene of small rigs. Each rig has a joint chain driven
+    through math nodes, unit conversions and a set driven key.
+
+    Returns:
+        list: The names of the generated nodes.
+    """
+    from maya import cmds
+
+    cmds.file(newFile=True, force=True)
+    nodes = []
+    for i in range(rigs):
+        ctrl = cmds.createNode('transform', name='rig{}_CTRL'.format(i))
+        cmds.addAttr(ctrl, longName='blend', keyable=True,
+                     minValue=0, maxValue=1)
+        cmds.addAttr(ctrl, longName='mode', attributeType='enum',
+                     enumName='fk:ik', keyable=True)
+        nodes.append(ctrl)
+        parent = None
+        for j in range(3):
+            cmds.select(clear=True)
+            joint = cmds.joint(name='rig{}_{}_JNT'.format(i, j))
+            if parent:
+                cmds.parent(joint, parent)
+            parent = joint
+            nodes.append(joint)
+
+            mult = cmds.createNode(
+                'multiplyDivide', name='rig{}_{}_MD'.format(i, j))
+            cmds.connectAttr(ctrl + '.translate', mult + '.input1')
+            cmds.connectAttr(ctrl + '.blend', mult + '.input2X')
+            # the angle to linear connections add unit conversions
+            cmds.connectAttr(mult + '.output', joint + '.rotate')
+            cmds.connectAttr(ctrl + '.rotateX', joint + '.translateY')
+            nodes.append(mult)
+
+        cmds.setDrivenKeyframe(
+            parent + '.scaleX', currentDriver=ctrl + '.blend',
+            driverValue=0, value=1)
+        cmds.setDrivenKeyframe(
+            parent + '.scaleX', currentDriver=ctrl + '.blend',
+            driverValue=1, value=2)
+        nodes.extend(cmds.listConnections(parent + '.scaleX', source=True))
+    return nodes
+
+
+def _legacy_export_attrs(node, with_connection=True):
+    """The export of DependencyNode._export_attrs() before snapshots."""
+    from mhy.maya.nodezoo.attribute import Attribute
+    from mhy.maya.nodezoo.snapshot import IGNORE_ATTRS
+
+    attrs = node.attributes_to_export
+    if attrs is None:
+        attrs = node.top_level_attrs()
+    ignore = node.attributes_to_ignore
+    data = []
+    for attr in attrs:
+        if not isinstance(attr, Attribute):
+            if attr in ignore or attr in IGNORE_ATTRS:
+                continue
+            if not node.has_attr(attr):
+                continue
+            attr = Attribute(node, attr)
+        if ignore and not all(iga not in attr.name for iga in ignore):
+            continue
+        attr_data = attr.export(
+            withConnection=with_connection, isNested=True, ignore=ignore)
+        if attr_data:
+            data.append(attr_data)
+    return data
+
+
+def run(rigs=200, with_connection=True):
+    """Runs the benchmark.
+
+    Args:
+        rigs (int): The number of rigs to generate.
+        with_connection (bool): If export connection data.
+
+    Returns:
+        dict: The benchmark results.
+    """
+    from mhy.maya.nodezoo.node import Node
+    import mhy.maya.nodezoo.snapshot as snapshot
+
+    names = build_scene(rigs)
+    nodes = [Node(x) for x in names]
+    for node in nodes:
+        # export all the top level attributes
+        node.set_export_attr(None)
+
+    t = time.time()
+    legacy_data = [_legacy_export_attrs(x, with_connection) for x in nodes]
+    legacy_time = time.time() - t
+
+    snapshot.clear_cache()
+    t = time.time()
+    data = [x._export_attrs(with_connection=with_connection) for x in nodes]
+    snapshot_time = time.time() - t
+    assert data == legacy_data, 'The snapshot data differs from the legacy.'
+
+    t = time.time()
+    for x in nodes:
+        x._export_attrs(with_connection=with_connection)
+    cached_time = time.time() - t
+
+    return {
+        'nodes': len(nodes),
+        'attributes': sum(len(x) for x in data),
+        'legacy': legacy_time,
+        'snapshot': snapshot_time,
+        'cached': cached_time,
+        'speedup': legacy_time / max(cached_time, 1e-9)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--rigs', type=int, default=200)
+    parser.add_argument('--no-connections', action='store_true')
+    args = parser.parse_args()
+
+    import maya.standalone
+    maya.standalone.initialize()
+    try:
+        result = run(
+            rigs=args.rigs, with_connection=not args.no_connections)
+    finally:
+        maya.standalone.uninitialize()
+    print('Nodes:             {nodes}'.format(**result))
+    print('Top level attrs:   {attributes}'.format(**result))
+    print('Legacy export:     {legacy:.2f}s'.format(**result))
+    print('Snapshot export:   {snapshot:.2f}s'.format(**result))
+    print('Cached snapshot:   {cached:.2f}s'.format(**result))
+    print('Speedup:           {speedup:.1f}x'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
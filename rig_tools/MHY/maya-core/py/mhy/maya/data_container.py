@@ -0,0 +1,563 @@
+"""
+A columnar binary container for nodezoo node data.
+
+JSON node data files (.nzd/.gnzd) store large numeric lists such as
+skinCluster weights as text, which makes them slow to write and parse.
+The binary container (.bnzd) keeps the node data structure in a JSON
+header and moves large numeric lists into typed little-endian arrays:
+
+    + magic (4 bytes) ``NZB1``
+    + header size (uint32)
+    + JSON header, padded to 8 bytes
+    + array data chunks, each padded to 8 bytes
+
+Numeric lists in the node data are replaced by ``{"__nzb__": index}``
+in the header. Each array entry in the header describes its element
+type, length and chunks. Arrays with mostly zero values (e.g. skin
+weights) are stored sparse as (index, value) pairs. Chunks are
+compressed with zlib individually, so they can be decoded one at a time.
+Uncompressed containers can be memory-mapped and read without copying.
+
+Float arrays are stored as float64 by default so that conversions from
+JSON data files are lossless. Pass ``float_type='<f4'`` to store them
+as float32 instead.
+
+This module doesn't depend on Maya. ``read_data_file()`` in the nodezoo
+pipeline reads containers and JSON data files alike.
+
+Usage:
+
+.. code:: python
+
+    write_node_data({'nodes': [data]}, '/path/to/skin.bnzd')
+    data = read_node_data('/path/to/skin.bnzd')
+
+    with NodeDataReader('/path/to/skin.bnzd') as reader:
+        weights = reader.get_array(0)
+
+    convert_data_file('/path/to/skin.gnzd')
+"""
+
+import os
+import sys
+import gzip
+import json
+import math
+import mmap
+import zlib
+import array
+import struct
+
+
+__all__ = [
+    'NodeDataReader', 'write_node_data', 'read_node_data',
+    'is_binary_data_file', 'convert_data_file']
+
+
+BINARY_EXT = '.bnzd'
+MAGIC = b'NZB1'
+VERSION = 1
+
+# the key of array references in the header data
+ARRAY_KEY = '__nzb__'
+
+# lists shorter than this are kept in the JSON header
+MIN_ARRAY_SIZE = 64
+
+# the number of elements per chunk
+CHUNK_SIZE = 65536
+
+_ALIGN = 8
+_HEADER_SIZE = struct.Struct('<I')
+_IS_BIG_ENDIAN = sys.byteorder == 'big'
+
+if sys.version_info[0] < 3:
+    integer_types = (int, long)  # noqa: F821
+else:
+    integer_types = (int,)
+
+
+def _find_typecode(codes, itemsize):
+    """Returns the first array typecode of an item size, or None."""
+    for code in codes:
+        try:
+            if array.array(code).itemsize == itemsize:
+                return code
+        except ValueError:
+            continue
+
+
+# (element type : array typecode) pairs of the supported element types.
+# Types not supported by the array module on this platform are skipped.
+_TYPECODES = {
+    '<f4': 'f',
+    '<f8': 'd',
+    '<u2': _find_typecode('HIL', 2),
+    '<u4': _find_typecode('HILQ', 4),
+    '<i8': _find_typecode('ilq', 8),
+}
+_TYPECODES = dict((k, v) for k, v in _TYPECODES.items() if v)
+
+_INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _pad(size):
+    """Returns the padding size to align a size."""
+    return -size % _ALIGN
+
+
+def _to_bytes(values):
+    """Returns the little-endian bytes of an array."""
+    if _IS_BIG_ENDIAN:
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    if hasattr(values, 'tobytes'):
+        return values.tobytes()
+    return values.tostring()
+
+
+def _from_bytes(typecode, data):
+    """Returns an array from little-endian bytes."""
+    values = array.array(typecode)
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:
+        values.fromstring(bytes(data))
+    if _IS_BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _get_element_type(values, float_type):
+    """Returns the element type to store a list of values,
+    or None if the list should stay in the JSON header."""
+    value_type = type(values[0])
+    if value_type is float:
+        if all(type(x) is float for x in values):
+            return float_type
+    elif value_type in integer_types:
+        if all(type(x) in integer_types for x in values) and \
+           _INT64_RANGE[0] <= min(values) and \
+           max(values) <= _INT64_RANGE[1]:
+            return '<i8'
+
+
+def _is_zero(value):
+    """Returns True if a value can be left out of a sparse array.
+    Negative zeros are kept to stay lossless."""
+    return value == 0 and math.copysign(1.0, value) > 0
+
+
+class _Writer(object):
+    """Collects the arrays of node data and writes the container."""
+
+    def __init__(self, compress, float_type, sparse, min_array_size,
+                 chunk_size):
+        if float_type not in ('<f4', '<f8'):
+            raise ValueError('Invalid float type: {}'.format(float_type))
+        self.compress = compress
+        self.float_type = float_type
+        self.sparse = sparse
+        self.min_array_size = max(min_array_size, 1)
+        self.chunk_size = chunk_size
+        self.arrays = []
+        self.chunks = []
+        self.offset = 0
+
+    def encode(self, data):
+        """Returns the header data with arrays replaced by references."""
+        if isinstance(data, dict):
+            return type(data)((k, self.encode(v)) for k, v in data.items())
+        elif isinstance(data, (list, tuple)):
+            if len(data) >= self.min_array_size:
+                element_type = _get_element_type(data, self.float_type)
+                if element_type in _TYPECODES:
+                    return {ARRAY_KEY: self.add_array(data, element_type)}
+            return [self.encode(x) for x in data]
+        return data
+
+    def add_array(self, values, element_type):
+        """Adds an array and returns its index."""
+        entry = {'type': element_type, 'length': len(values)}
+        typecode = _TYPECODES[element_type]
+
+        indices = None
+        if self.sparse:
+            indices = [i for i, x in enumerate(values) if not _is_zero(x)]
+            itemsize = array.array(typecode).itemsize
+            index_type = '<u2' if len(values) <= 0xFFFF else '<u4'
+            index_size = 2 if index_type == '<u2' else 4
+            if index_type not in _TYPECODES or \
+               len(indices) * (itemsize + index_size) >= \
+               len(values) * itemsize:
+                indices = None
+
+        if indices is not None:
+            entry['indices'] = self.add_block(
+                array.array(_TYPECODES[index_type], indices), index_type)
+            values = [values[i] for i in indices]
+        entry['values'] = self.add_block(
+            array.array(typecode, values), element_type)
+
+        self.arrays.append(entry)
+        return len(self.arrays) - 1
+
+    def add_block(self, values, element_type):
+        """Splits an array into chunks and returns the block entry."""
+        chunks = []
+        for start in range(0, len(values), self.chunk_size):
+            data = _to_bytes(values[start:start + self.chunk_size])
+            if self.compress:
+                data = zlib.compress(data)
+            chunks.append([
+                self.offset, len(data),
+                min(self.chunk_size, len(values) - start)])
+            self.chunks.append(data + b'\0' * _pad(len(data)))
+            self.offset += len(data) + _pad(len(data))
+        return {'type': element_type, 'chunks': chunks}
+
+    def write(self, data, file_path):
+        """Writes node data to a container file."""
+        header = {
+            'version': VERSION,
+            'codec': 'zlib' if self.compress else 'raw',
+            'data': self.encode(data),
+            'arrays': self.arrays}
+        header = json.dumps(header).encode('utf-8')
+        header += b' ' * _pad(len(MAGIC) + _HEADER_SIZE.size + len(header))
+
+        with open(file_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_HEADER_SIZE.pack(len(header)))
+            f.write(header)
+            for chunk in self.chunks:
+                f.write(chunk)
+
+
+def write_node_data(data, file_path, compress=True, float_type='<f8',
+                    sparse=True, min_array_size=MIN_ARRAY_SIZE,
+                    chunk_size=CHUNK_SIZE):
+    """
+    Write node data to a binary container file.
+
+    Args:
+        data(dict): The node data to write. Must be JSON serializable.
+        file_path(str): The output file path.
+        compress(bool): If compress the array chunks. Uncompressed
+            containers can be read without copying the array data.
+        float_type(str): The element type of float arrays,
+            '<f8' (lossless) or '<f4'.
+        sparse(bool): If store arrays with mostly zero values sparse.
+        min_array_size(int): Numeric lists shorter than this are kept
+            in the JSON header.
+        chunk_size(int): The number of elements per chunk.
+
+    Returns:
+        str: The output file path.
+    """
+    writer = _Writer(
+        compress=compress, float_type=float_type, sparse=sparse,
+        min_array_size=min_array_size, chunk_size=chunk_size)
+    writer.write(data, file_path)
+    return file_path
+
+
+def is_binary_data_file(file_path):
+    """
+    Check if a file is a binary node data container.
+
+    Args:
+        file_path(str): A file path
+
+    Returns:
+        bool
+
+    """
+    if not os.path.isfile(file_path):
+        return False
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class NodeDataReader(object):
+    """
+    Reads a binary node data container.
+
+    Arrays are decoded on demand, so individual arrays can be accessed
+    without decoding the whole file.
+    """
+
+    def __init__(self, file_path, use_mmap=True):
+        """
+        Args:
+            file_path(str): The container file path.
+            use_mmap(bool): If memory-map the file instead of
+                reading it to memory.
+
+        """
+        self.__path = file_path
+        with open(file_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise IOError(
+                    'Not a binary node data file: {}'.format(file_path))
+            size = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))[0]
+            self.__header = json.loads(f.read(size).decode('utf-8'))
+            self.__data_start = len(MAGIC) + _HEADER_SIZE.size + size
+
+            if self.__header.get('version', 0) > VERSION:
+                raise IOError(
+                    'Unsupported binary node data version: {}'.format(
+                        self.__header.get('version')))
+
+            self.__buffer = None
+            if use_mmap and os.path.getsize(file_path) > self.__data_start:
+                self.__buffer = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                self.__buffer = f.read()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return 'NodeDataReader ({}: {} arrays)'.format(
+            self.__path, self.array_count)
+
+    __str__ = __repr__
+
+    @property
+    def path(self):
+        """
+        The container file path.
+
+        :type: str
+        """
+        return self.__path
+
+    @property
+    def compressed(self):
+        """
+        If True, the array chunks are compressed.
+
+        :type: bool
+        """
+        return self.__header['codec'] == 'zlib'
+
+    @property
+    def header_data(self):
+        """
+        The node data with arrays replaced by ``{"__nzb__": index}``.
+
+        :type: dict
+        """
+        return self.__header['data']
+
+    @property
+    def array_count(self):
+        """
+        The number of arrays in the container.
+
+        :type: int
+        """
+        return len(self.__header['arrays'])
+
+    def close(self):
+        """Closes the memory-mapped file."""
+        if isinstance(self.__buffer, mmap.mmap):
+            self.__buffer.close()
+        self.__buffer = None
+
+    def get_array_info(self, index):
+        """
+        Get the header entry of an array.
+
+        Args:
+            index(int): The array index.
+
+        Returns:
+            dict: The element type, length and blocks of the array.
+
+        """
+        return self.__header['arrays'][index]
+
+    def __read_chunk(self, element_type, chunk):
+        """Returns the decoded values of a chunk."""
+        if self.__buffer is None:
+            raise IOError('Reader is closed: {}'.format(self.__path))
+        start = self.__data_start + chunk[0]
+        data = self.__buffer[start:start + chunk[1]]
+        if self.compressed:
+            data = zlib.decompress(data)
+        return _from_bytes(_TYPECODES[element_type], data)
+
+    def iter_chunks(self, index, block='values'):
+        """
+        Decode the chunks of an array block one at a time.
+
+        Args:
+            index(int): The array index.
+            block(str): 'values', or 'indices' of a sparse array.
+
+        Yields:
+            array.array: The values of a chunk.
+
+        """
+        block = self.get_array_info(index)[block]
+        for chunk in block['chunks']:
+            yield self.__read_chunk(block['type'], chunk)
+
+    def __read_block(self, index, block):
+        """Returns all the values of an array block."""
+        info = self.get_array_info(index)[block]
+        values = array.array(_TYPECODES[info['type']])
+        for chunk in self.iter_chunks(index, block):
+            values.extend(chunk)
+        return values
+
+    def get_array(self, index):
+        """
+        Get the dense values of an array.
+
+        Args:
+            index(int): The array index.
+
+        Returns:
+            array.array
+
+        """
+        info = self.get_array_info(index)
+        values = self.__read_block(index, 'values')
+        if 'indices' not in info:
+            return values
+
+        dense = array.array(values.typecode, [0]) * info['length']
+        for i, value in zip(self.__read_block(index, 'indices'), values):
+            dense[i] = value
+        return dense
+
+    def get_sparse_array(self, index):
+        """
+        Get the non-zero indices and values of an array.
+
+        Args:
+            index(int): The array index.
+
+        Returns:
+            tuple: The indices and values as array.array. Indices are
+                None if the array is stored dense.
+
+        """
+        indices = None
+        if 'indices' in self.get_array_info(index):
+            indices = self.__read_block(index, 'indices')
+        return indices, self.__read_block(index, 'values')
+
+    def get_array_view(self, index):
+        """
+        Get a memoryview of an array in the mapped file without copying.
+        Only available for dense arrays in uncompressed containers
+        stored in a single chunk. Release the view before closing
+        the reader.
+
+        Args:
+            index(int): The array index.
+
+        Returns:
+            memoryview or None: None if the array can't be viewed
+                in place.
+
+        """
+        info = self.get_array_info(index)
+        chunks = info['values']['chunks']
+        if self.compressed or 'indices' in info or len(chunks) != 1 or \
+           _IS_BIG_ENDIAN or not hasattr(memoryview, 'cast') or \
+           not isinstance(self.__buffer, mmap.mmap):
+            return
+        start = self.__data_start + chunks[0][0]
+        view = memoryview(self.__buffer)[start:start + chunks[0][1]]
+        return view.cast(_TYPECODES[info['values']['type']])
+
+    def decode(self, data):
+        """
+        Decode the array references in a part of the header data.
+
+        Args:
+            data: A part of header_data, e.g. the data of one node.
+
+        Returns:
+            The data with array references replaced by lists.
+
+        """
+        if isinstance(data, dict):
+            if len(data) == 1 and ARRAY_KEY in data:
+                return self.get_array(data[ARRAY_KEY]).tolist()
+            return dict((k, self.decode(v)) for k, v in data.items())
+        elif isinstance(data, list):
+            return [self.decode(x) for x in data]
+        return data
+
+    def read(self):
+        """
+        Read the node data with all arrays decoded to lists.
+
+        Returns:
+            dict
+
+        """
+        return self.decode(self.header_data)
+
+
+def read_node_data(file_path):
+    """
+    Read the node data from a binary container file.
+
+    Args:
+        file_path(str): The container file path.
+
+    Returns:
+        dict
+
+    """
+    with NodeDataReader(file_path) as reader:
+        return reader.read()
+
+
+def convert_data_file(file_path, output_path=None, verify=True, **kwargs):
+    """
+    Convert a .nzd/.gnzd node data file to a binary container file.
+
+    Args:
+        file_path(str): The source data file path.
+        output_path(str): The output file path. If None, the source
+            path with the binary extension is used.
+        verify(bool): If read back the written file and check it
+            matches the source data. Skipped for float32 arrays,
+            which are not lossless.
+        **kwargs: Keyword arguments passed to write_node_data().
+
+    Returns:
+        str: The output file path.
+
+    Raises:
+        ValueError: If the written data doesn't match the source data.
+
+    """
+    if output_path is None:
+        output_path = os.path.splitext(file_path)[0] + BINARY_EXT
+    if file_path.endswith('.gnzd'):
+        with gzip.open(file_path, 'r') as f:
+            data = json.loads(f.read().decode('utf-8'))
+    else:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+    write_node_data(data, output_path, **kwargs)
+    if verify and kwargs.get('float_type', '<f8') == '<f8' and \
+       read_node_data(output_path) != data:
+        raise ValueError(
+            'Converted data does not match the source: {}'.format(
+                file_path))
+    return output_path
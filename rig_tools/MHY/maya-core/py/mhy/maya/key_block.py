@@ -0,0 +1,403 @@
+"""
+The keys of an animation curve in parallel arrays.
+
+A key block keeps one array per key field instead of one dict per key:
+
+    + inputs: The key times (in ui time units) or unitless inputs.
+    + values: The key values in internal units.
+    + in_types, out_types: The tangent type enums.
+    + in_x, in_y, out_x, out_y: The tangent vectors in internal units.
+      Optional, tangents are computed by Maya from the types if missing.
+    + locked: If the in and out tangents of each key are locked.
+
+The data encoding is columnar: each field is a flat number list, and
+a field with the same value on every key is stored as a single value.
+Flat lists are stored as typed arrays by the binary data container.
+
+This module doesn't depend on Maya. See ``AnimCurve.get_key_block()``
+and ``AnimCurve.set_key_block()`` for reading and writing curves.
+
+Usage:
+
+.. code:: python
+
+    block = curve.get_key_block()
+    data = block.to_data()
+    other_curve.set_key_block(KeyBlock.from_data(data))
+"""
+
+import array
+
+
+__all__ = ['KeyBlock']
+
+
+# the data key of each field, matching the keyTangent flags
+_DATA_KEYS = (
+    ('inputs', 'input'),
+    ('values', 'value'),
+    ('in_types', 'itt'),
+    ('out_types', 'ott'),
+    ('in_x', 'ix'),
+    ('in_y', 'iy'),
+    ('out_x', 'ox'),
+    ('out_y', 'oy'),
+    ('locked', 'lock'))
+
+_TANGENT_FIELDS = ('in_x', 'in_y', 'out_x', 'out_y')
+
+
+def _expand(value, count):
+    """Returns a list of a value per key from a list or a single value."""
+    if isinstance(value, (list, tuple, array.array)):
+        if len(value) != count:
+            raise ValueError(
+                'Expected {} values, got {}.'.format(count, len(value)))
+        return value
+    return [value] * count
+
+
+def _compact(values):
+    """Returns a single value if all the values are the same,
+    otherwise the values in a list."""
+    if values and values.count(values[0]) == len(values):
+        return values[0]
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+class KeyBlock(object):
+    """
+    The keys of an animation curve in parallel arrays.
+    """
+
+    def __init__(self, inputs, values, in_types, out_types,
+                 in_x=None, in_y=None, out_x=None, out_y=None, locked=None):
+        """
+        Args:
+            inputs(list): The key inputs.
+            values(list): The key values.
+            in_types(list or int): The in tangent types, or a single type
+                for all keys.
+            out_types(list or int): The out tangent types, or a single type
+                for all keys.
+            in_x, in_y, out_x, out_y(list or None): The tangent vectors.
+                Must be all given or all None.
+            locked(list or bool or None): The tangent lock states.
+                Defaults to locked.
+
+        Raises:
+            ValueError: If the arrays are of different lengths or only
+                some tangents are given.
+
+        """
+        count = len(inputs)
+        self.__inputs = array.array('d', inputs)
+        self.__values = array.array('d', _expand(values, count))
+        self.__in_types = array.array('i', _expand(in_types, count))
+        self.__out_types = array.array('i', _expand(out_types, count))
+
+        tangents = (in_x, in_y, out_x, out_y)
+        if all(x is None for x in tangents):
+            tangents = (None,) * 4
+        elif any(x is None for x in tangents):
+            raise ValueError('Tangents must be all given or all None.')
+        else:
+            tangents = tuple(
+                array.array('d', _expand(x, count)) for x in tangents)
+        self.__in_x, self.__in_y, self.__out_x, self.__out_y = tangents
+
+        if locked is None:
+            locked = True
+        self.__locked = array.array('b', _expand(locked, count))
+
+    def __repr__(self):
+        return 'KeyBlock ({} key(s))'.format(len(self))
+
+    __str__ = __repr__
+
+    def __len__(self):
+        return len(self.__inputs)
+
+    def __eq__(self, other):
+        if not isinstance(other, KeyBlock):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name, _ in _DATA_KEYS)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    # --- constructors
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Create a block from the data of to_data().
+
+        Args:
+            data(dict): The key block data.
+
+        Returns:
+            KeyBlock
+
+        """
+        kwargs = dict(
+            (name, data[key]) for name, key in _DATA_KEYS if key in data)
+        return cls(**kwargs)
+
+    @classmethod
+    def from_keys(cls, keys):
+        """
+        Create a block from a list of key dicts, each with an input, a
+        value, tangent types (itt, ott) and optional tangents (it, ot).
+        This is the key format of the exported curve data before
+        key blocks.
+
+        Args:
+            keys(list): A list of key dicts.
+
+        Returns:
+            KeyBlock
+
+        """
+        return cls.from_key_dict(
+            [(key.get('input'), key) for key in keys])
+
+    @classmethod
+    def from_key_dict(cls, keys):
+        """
+        Create a block from (input : key dict) pairs, as returned by
+        to_key_dict().
+
+        Args:
+            keys(dict or list): The (input : key dict) pairs.
+
+        Returns:
+            KeyBlock
+
+        """
+        if isinstance(keys, dict):
+            keys = keys.items()
+        keys = sorted((float(input_), key) for input_, key in keys)
+        kwargs = {
+            'inputs': [x[0] for x in keys],
+            'values': [x[1]['value'] for x in keys],
+            'in_types': [x[1]['itt'] for x in keys],
+            'out_types': [x[1]['ott'] for x in keys]}
+        if keys and all(
+                x[1].get('it') is not None and x[1].get('ot') is not None
+                for x in keys):
+            kwargs['in_x'] = [x[1]['it'][0] for x in keys]
+            kwargs['in_y'] = [x[1]['it'][1] for x in keys]
+            kwargs['out_x'] = [x[1]['ot'][0] for x in keys]
+            kwargs['out_y'] = [x[1]['ot'][1] for x in keys]
+        return cls(**kwargs)
+
+    # --- properties
+
+    @property
+    def inputs(self):
+        """
+        The key inputs.
+
+        :type: array.array
+        """
+        return self.__inputs
+
+    @property
+    def values(self):
+        """
+        The key values.
+
+        :type: array.array
+        """
+        return self.__values
+
+    @property
+    def in_types(self):
+        """
+        The in tangent types.
+
+        :type: array.array
+        """
+        return self.__in_types
+
+    @property
+    def out_types(self):
+        """
+        The out tangent types.
+
+        :type: array.array
+        """
+        return self.__out_types
+
+    @property
+    def in_x(self):
+        """
+        The in tangent x values, or None.
+
+        :type: array.array
+        """
+        return self.__in_x
+
+    @property
+    def in_y(self):
+        """
+        The in tangent y values, or None.
+
+        :type: array.array
+        """
+        return self.__in_y
+
+    @property
+    def out_x(self):
+        """
+        The out tangent x values, or None.
+
+        :type: array.array
+        """
+        return self.__out_x
+
+    @property
+    def out_y(self):
+        """
+        The out tangent y values, or None.
+
+        :type: array.array
+        """
+        return self.__out_y
+
+    @property
+    def locked(self):
+        """
+        The tangent lock states.
+
+        :type: array.array
+        """
+        return self.__locked
+
+    @property
+    def has_tangents(self):
+        """
+        If the block has tangent vectors.
+
+        :type: bool
+        """
+        return self.__in_x is not None
+
+    # --- conversions
+
+    def get_range(self, lower=None, upper=None):
+        """
+        Returns the keys with inputs in an inclusive range.
+
+        Args:
+            lower(float or None): The lower bound.
+            upper(float or None): The upper bound.
+
+        Returns:
+            KeyBlock
+
+        """
+        indices = [
+            i for i, x in enumerate(self.__inputs)
+            if (lower is None or x >= lower) and
+            (upper is None or x <= upper)]
+        kwargs = {}
+        for name, _ in _DATA_KEYS:
+            values = getattr(self, name)
+            if values is not None:
+                kwargs[name] = [values[i] for i in indices]
+        return KeyBlock(**kwargs)
+
+    def scale_values(self, scale, tangents=True):
+        """
+        Returns a copy with the values and tangent y values scaled,
+        e.g. for converting between unit systems.
+
+        Args:
+            scale(float): The scale factor.
+            tangents(bool): If False, only scale the values.
+
+        Returns:
+            KeyBlock
+
+        """
+        kwargs = dict(
+            (name, getattr(self, name)) for name, _ in _DATA_KEYS)
+        kwargs['values'] = [x * scale for x in self.__values]
+        if tangents and self.has_tangents:
+            kwargs['in_y'] = [x * scale for x in self.__in_y]
+            kwargs['out_y'] = [x * scale for x in self.__out_y]
+        return KeyBlock(**kwargs)
+
+    def to_data(self, tangents=True):
+        """
+        Returns the columnar data of this block.
+
+        Args:
+            tangents(bool): If False, leave out the tangent vectors and
+                lock states.
+
+        Returns:
+            dict
+
+        """
+        data = {}
+        for name, key in _DATA_KEYS:
+            if not tangents and (name in _TANGENT_FIELDS or
+                                 name == 'locked'):
+                continue
+            values = getattr(self, name)
+            if values is None:
+                continue
+            if name in ('inputs', 'values'):
+                data[key] = values.tolist()
+            else:
+                data[key] = _compact(values)
+        if 'lock' in data and not isinstance(data['lock'], list):
+            data['lock'] = bool(data['lock'])
+        return data
+
+    def to_keys(self):
+        """
+        Returns a list of key dicts, in the format of from_keys().
+
+        Returns:
+            list
+
+        """
+        keys = []
+        for input_, key in self.to_key_dict(ordered=True):
+            key['input'] = input_
+            keys.append(key)
+        return keys
+
+    def to_key_dict(self, ordered=False):
+        """
+        Returns the keys as (input : key dict) pairs.
+
+        Args:
+            ordered(bool): If True, return a list of pairs in key order.
+
+        Returns:
+            dict or list
+
+        """
+        pairs = []
+        for i, input_ in enumerate(self.__inputs):
+            key = {
+                'value': self.__values[i],
+                'itt': self.__in_types[i],
+                'ott': self.__out_types[i]}
+            if self.has_tangents:
+                key['it'] = (self.__in_x[i], self.__in_y[i])
+                key['ot'] = (self.__out_x[i], self.__out_y[i])
+            pairs.append((input_, key))
+        if ordered:
+            return pairs
+        return dict(pairs)
@@ -0,0 +1,426 @@
+"""
+Batch processing of Maya ASCII files without Maya.
+
+``rewrite_files()`` streams text replacements through many .ma files in
+a process pool. Each file is rewritten in a single pass with constant
+memory, and the outputs are replaced atomically.
+
+``DependencyScanner`` collects the referenced files and textures of the
+.ma files in a directory tree into a dependency graph. The results are
+cached by file modification time, so a re-scan only parses the files
+changed since the last scan.
+
+Usage:
+
+.. code:: python
+
+    results = rewrite_files(
+        find_ma_files('/path/to/assets'), {'D:/old': 'D:/new'},
+        output_folder='/path/to/output', root_dir='/path/to/assets')
+
+    scanner = DependencyScanner('/path/to/cache.json')
+    scanner.scan('/path/to/assets')
+    print(scanner.get_dependents('/path/to/textures/skin.png'))
+    scanner.save()
+"""
+
+import os
+import sys
+import json
+import ntpath
+import tempfile
+import traceback
+import multiprocessing
+
+import mhy.maya.ma_parser as ma_parser
+
+
+__all__ = [
+    'find_ma_files', 'resolve_path', 'rewrite_files', 'RewriteResult',
+    'DependencyScanner']
+
+
+try:
+    DEFAULT_WORKERS = max(multiprocessing.cpu_count() - 1, 1)
+except NotImplementedError:
+    DEFAULT_WORKERS = 1
+
+CACHE_VERSION = 1
+
+
+def find_ma_files(root_dir, recursive=True):
+    """Returns the Maya ASCII files in a directory.
+
+    Args:
+        root_dir (str): A directory path.
+        recursive (bool): If True, also search the sub directories.
+
+    Returns:
+        list: A sorted list of file paths.
+    """
+    files = []
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        for file_name in file_names:
+            if file_name.endswith('.ma'):
+                files.append(os.path.join(dir_path, file_name))
+        if not recursive:
+            break
+    return sorted(files)
+
+
+def resolve_path(path, base_dir):
+    """Resolves a file path found in a Maya ASCII file.
+    Environment variables are expanded and relative paths are
+    resolved from a base directory.
+
+    Args:
+        path (str): A file path.
+        base_dir (str): The directory of relative paths.
+
+    Returns:
+        str: A normalized absolute path.
+    """
+    path = os.path.expanduser(os.path.expandvars(path))
+    # windows paths are kept as is on other platforms
+    if not os.path.isabs(path) and not ntpath.isabs(path):
+        path = os.path.join(base_dir, path)
+    return os.path.normpath(path)
+
+
+def _set_executable():
+    """Starts worker processes with mayapy instead of the Maya
+    executable when running in a Maya session."""
+    name, ext = os.path.splitext(os.path.basename(sys.executable))
+    if name.lower() == 'maya':
+        mayapy = os.path.join(
+            os.path.dirname(sys.executable), 'mayapy' + ext)
+        if os.path.isfile(mayapy):
+            multiprocessing.set_executable(mayapy)
+
+
+def _map(func, items, workers):
+    """Maps a function over a list of items in a process pool.
+    The results are in item order."""
+    if not workers or len(items) < 2:
+        return [func(x) for x in items]
+    _set_executable()
+    pool = multiprocessing.Pool(min(workers, len(items)))
+    try:
+        return pool.map(func, items, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class RewriteResult(object):
+    """The result of rewriting a file."""
+
+    def __init__(self, file_path, output_path):
+        self.file_path = file_path
+        self.output_path = output_path
+        self.count = 0
+        self.error = None
+
+    def __repr__(self):
+        if self.error:
+            return 'RewriteResult ({}: failed)'.format(self.file_path)
+        return 'RewriteResult ({}: {} replacement(s))'.format(
+            self.file_path, self.count)
+
+    __str__ = __repr__
+
+    @property
+    def success(self):
+        """If True, the file is rewritten.
+
+        :type: bool
+        """
+        return self.error is None
+
+
+def _rewrite(task):
+    """Rewrites a file in a worker process."""
+    file_path, output_path, replacements, whole_word = task
+    result = RewriteResult(file_path, output_path)
+    try:
+        result.count = ma_parser.rewrite_file(
+            file_path, output_path, replacements, whole_word=whole_word)
+    except Exception:
+        result.error = traceback.format_exc()
+    return result
+
+
+def rewrite_files(files, replacements, output_folder=None, root_dir=None,
+                  whole_word=False, workers=DEFAULT_WORKERS):
+    """Replaces strings in Maya ASCII files in a process pool.
+    The rewritten files keep the permission bits of the source files.
+
+    Args:
+        files (list): A list of .ma file paths.
+        replacements (dict): (old string : new string) pairs. The old
+            strings must not span lines.
+        output_folder (str or None): The folder to save the rewritten
+            files to. If None, the files are rewritten in place.
+        root_dir (str or None): If not None, the output files keep their
+            path relative to this directory. Otherwise the files are
+            saved directly in the output folder.
+        whole_word (bool): If True, only replace whole node names.
+        workers (int): The number of worker processes. If 0, the files
+            are rewritten in the calling process.
+
+    Returns:
+        list: A list of RewriteResult in file order.
+    """
+    replacements = dict(
+        (k.encode('utf-8') if not isinstance(k, bytes) else k,
+         v.encode('utf-8') if not isinstance(v, bytes) else v)
+        for k, v in replacements.items())
+    # raises on invalid replacements before starting any worker
+    ma_parser.compile_name_matcher(replacements, whole_word=whole_word)
+
+    tasks = []
+    for file_path in files:
+        output_path = file_path
+        if output_folder:
+            if root_dir:
+                output_path = os.path.relpath(file_path, root_dir)
+            else:
+                output_path = os.path.basename(file_path)
+            output_path = os.path.join(output_folder, output_path)
+            dir_name = os.path.dirname(output_path)
+            if not os.path.isdir(dir_name):
+                os.makedirs(dir_name)
+        tasks.append((file_path, output_path, replacements, whole_word))
+
+    return _map(_rewrite, tasks, workers)
+
+
+def _scan(file_path):
+    """Parses the dependencies of a file in a worker process."""
+    try:
+        parser = ma_parser.MAParser(file_path)
+        return parser.get_references(), parser.get_textures(), None
+    except Exception:
+        return [], [], traceback.format_exc()
+
+
+class DependencyScanner(object):
+    """
+    Builds a dependency graph of the referenced files and textures
+    of Maya ASCII files.
+    """
+
+    def __init__(self, cache_path=None):
+        """
+        Args:
+            cache_path (str or None): A json file caching the scan
+                results. Loaded if it exists.
+        """
+        self.__cache_path = cache_path
+        # (file path : entry) pairs
+        self.__files = {}
+        if cache_path and os.path.isfile(cache_path):
+            self.load(cache_path)
+
+    @property
+    def files(self):
+        """The scanned file paths.
+
+        :type: list
+        """
+        return sorted(self.__files)
+
+    @property
+    def errors(self):
+        """(file path : error message) pairs of files failed parsing.
+
+        :type: dict
+        """
+        return dict(
+            (k, v['error']) for k, v in self.__files.items() if v['error'])
+
+    def load(self, cache_path):
+        """Loads the scan results from a cache file.
+        Caches of another version are ignored.
+
+        Args:
+            cache_path (str): A json file path.
+
+        Returns:
+            None
+        """
+        with open(cache_path) as f:
+            data = json.load(f)
+        if data.get('version') == CACHE_VERSION:
+            self.__files = data['files']
+
+    def save(self, cache_path=None):
+        """Saves the scan results to a cache file. An existing cache file
+        keeps its permission bits.
+
+        Args:
+            cache_path (str or None): A json file path.
+                Defaults to the cache path of this scanner.
+
+        Returns:
+            None
+        """
+        cache_path = cache_path or self.__cache_path
+        if not cache_path:
+            raise ValueError('No cache path to save to.')
+        dir_name = os.path.dirname(os.path.abspath(cache_path))
+        fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(
+                    {'version': CACHE_VERSION, 'files': self.__files}, f)
+            ma_parser.replace_file(tmp_path, cache_path)
+        except BaseException:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def scan(self, root_dir=None, files=None, workers=DEFAULT_WORKERS):
+        """Scans Maya ASCII files. Files unchanged since they were
+        last scanned are skipped.
+
+        Args:
+            root_dir (str or None): A directory to scan recursively.
+                Cached files under this directory that no longer
+                exist are removed.
+            files (list or None): The file paths to scan. Defaults to
+                all the .ma files under the root directory.
+            workers (int): The number of worker processes. If 0, the
+                files are parsed in the calling process.
+
+        Returns:
+            list: The file paths parsed in this scan.
+        """
+        if files is None:
+            if root_dir is None:
+                raise ValueError('No files to scan.')
+            files = find_ma_files(root_dir)
+        files = [os.path.normpath(os.path.abspath(x)) for x in files]
+
+        if root_dir is not None:
+            root_dir = os.path.normpath(os.path.abspath(root_dir))
+            existing = set(files)
+            for file_path in list(self.__files):
+                if file_path not in existing and \
+                   file_path.startswith(root_dir + os.sep):
+                    del self.__files[file_path]
+
+        changed = []
+        stats = {}
+        for file_path in files:
+            stat = os.stat(file_path)
+            entry = self.__files.get(file_path)
+            if entry and entry['mtime'] == stat.st_mtime and \
+               entry['size'] == stat.st_size:
+                continue
+            changed.append(file_path)
+            stats[file_path] = stat
+
+        results = _map(_scan, changed, workers)
+        for file_path, (references, textures, error) in zip(
+                changed, results):
+            base_dir = os.path.dirname(file_path)
+            self.__files[file_path] = {
+                'mtime': stats[file_path].st_mtime,
+                'size': stats[file_path].st_size,
+                'references': [resolve_path(x, base_dir) for x in references],
+                'textures': [resolve_path(x, base_dir) for x in textures],
+                'error': error}
+
+        return changed
+
+    def __walk(self, file_path, recursive):
+        """Yields a file and, if recursive, the scanned files it
+        references, each only once."""
+        visited = set()
+        stack = [resolve_path(file_path, os.getcwd())]
+        while stack:
+            file_path = stack.pop()
+            if file_path in visited:
+                continue
+            visited.add(file_path)
+            entry = self.__files.get(file_path)
+            if entry is None:
+                continue
+            yield entry
+            if recursive:
+                stack.extend(reversed(entry['references']))
+
+    def get_references(self, file_path, recursive=False):
+        """Returns the files referenced by a file.
+
+        Args:
+            file_path (str): A scanned file path.
+            recursive (bool): If True, include the files referenced by
+                the scanned referenced files.
+
+        Returns:
+            list: A sorted list of file paths.
+        """
+        references = set()
+        for entry in self.__walk(file_path, recursive):
+            references.update(entry['references'])
+        return sorted(references)
+
+    def get_textures(self, file_path, recursive=False):
+        """Returns the textures used by a file.
+
+        Args:
+            file_path (str): A scanned file path.
+            recursive (bool): If True, include the textures used by
+                the scanned referenced files.
+
+        Returns:
+            list: A sorted list of texture paths.
+        """
+        textures = set()
+        for entry in self.__walk(file_path, recursive):
+            textures.update(entry['textures'])
+        return sorted(textures)
+
+    def get_dependents(self, file_path, recursive=False):
+        """Returns the scanned files depending on a file or texture.
+
+        Args:
+            file_path (str): A file or texture path.
+            recursive (bool): If True, include the files referencing
+                the dependent files.
+
+        Returns:
+            list: A sorted list of file paths.
+        """
+        dependents = {}
+        for path, entry in self.__files.items():
+            for dependency in entry['references'] + entry['textures']:
+                dependents.setdefault(dependency, set()).add(path)
+
+        result = set()
+        stack = [resolve_path(file_path, os.getcwd())]
+        while stack:
+            for path in dependents.get(stack.pop(), ()):
+                if path not in result:
+                    result.add(path)
+                    if recursive:
+                        stack.append(path)
+        return sorted(result)
+
+    def get_missing(self):
+        """Returns the dependencies that don't exist on disk.
+
+        Returns:
+            dict: (file path : missing dependency paths) pairs.
+        """
+        exists = {}
+        missing = {}
+        for file_path, entry in self.__files.items():
+            for dependency in entry['references'] + entry['textures']:
+                if dependency not in exists:
+                    exists[dependency] = os.path.isfile(dependency)
+                if not exists[dependency]:
+                    missing.setdefault(file_path, []).append(dependency)
+        return missing
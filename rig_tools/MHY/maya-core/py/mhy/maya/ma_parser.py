@@ -1,16 +1,296 @@
 """
 A parser class for extracting and modifying data in a
 Maya ASCII file without opening it.
+
+The file is tokenized once into an index of its statements:
+
+    + file: The file reference commands in the header.
+    + requires, currentUnit and fileInfo commands.
+    + createNode: The node blocks with their byte offsets. The setAttr
+      and addAttr commands inside a node block are read on demand.
+    + connectAttr: The byte offsets of the connection commands.
+
+All queries are answered from the index, so the file is only
+scanned once no matter how many queries are made.
 """
 
 import os
 import re
+import io
+import sys
+import array
+import shutil
+import tempfile
 
 import mhy.python.core.logger as logger
 
 TEXTURE_EXTS = set(('tga', 'jpg', 'png'))
 MAYA_EXTS = set(('ma', 'mb'))
 
+# the number of bytes read at a time
+CHUNK_SIZE = 1 << 23
+
+# the permission bits masked from new files, read once as os.umask()
+# can only be read by setting it, which is not thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# the array type of file offsets, 64 bit integers where supported
+_OFFSET_TYPE = 'q' if sys.version_info[0] >= 3 else 'L'
+
+# matches quoted strings in a line
+_STRING = re.compile(br'"(?:[^"\\]|\\.)*"')
+# matches the first line of top-level commands. Commands inside
+# node blocks and continuation lines are indented.
+# Single-line createNode commands without escaped strings are
+# matched with their node type and flags.
+_TOP_LEVEL = re.compile(
+    br'^(?:createNode[ \t]+([^\s;"]+)'
+    br'((?:[ \t]+(?:-\w+|"[^"\\\n]*"))*)[ \t]*;[ \t\r]*$|[^\s/][^\n]*)',
+    re.M)
+_NODE_FLAG = re.compile(br'-(n|name|p|parent)\s+"([^"\\]*)"')
+_CONNECTION = re.compile(br'connectAttr(?:[^;"]|"(?:[^"\\]|\\.)*")*;')
+_INDEXED_COMMANDS = set((
+    b'createNode', b'file', b'requires', b'currentUnit', b'fileInfo'))
+# matches the tokens of a statement: quoted strings or words
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s;]+)')
+_PLAYBACK_OPTION = re.compile(r'-(min|max|ast|aet)\s+([-+0-9.eE]+)')
+_NAME_CHARS = 'a-zA-Z0-9_'
+
+_PLAYBACK_KEYS = {
+    'min': 'minTime',
+    'max': 'maxTime',
+    'ast': 'animationStartTime',
+    'aet': 'animationEndTime',
+}
+
+# compiled node name patterns of get_nodes()
+_PATTERN_CACHE = {}
+
+
+def _unescape(text):
+    """Returns the value of a quoted MEL string."""
+    if '\\' not in text:
+        return text
+    return re.sub(r'\\(.)', lambda m: {
+        'n': '\n', 't': '\t'}.get(m.group(1), m.group(1)), text)
+
+
+def tokenize(statement):
+    """Splits a MEL statement into tokens. Quoted strings are unescaped.
+
+    Args:
+        statement (str): A MEL statement.
+
+    Returns:
+        list: A list of (token, is_string) tuples.
+    """
+    tokens = []
+    for match in _TOKEN.finditer(statement):
+        if match.group(2) is not None:
+            tokens.append((match.group(2), False))
+        else:
+            tokens.append((_unescape(match.group(1)), True))
+    return tokens
+
+
+def _get_flag_value(tokens, *flags):
+    """Returns the token after a flag, or None."""
+    for i, (token, is_string) in enumerate(tokens[:-1]):
+        if not is_string and token in flags:
+            return tokens[i + 1][0]
+
+
+def _is_statement_end(line):
+    """Returns True if a line ends a statement with a semicolon
+    outside of strings."""
+    if b'"' in line:
+        line = _STRING.sub(b'""', line)
+    return line.rstrip().endswith(b';')
+
+
+def replace_file(src, dst, mode_path=None):
+    """Moves a file to a destination, replacing it atomically
+    where the platform supports it.
+
+    The moved file gets the permission bits of the mode path if given,
+    otherwise of the replaced destination file, otherwise the default
+    permission bits of new files. Temp files are created owner-only.
+
+    Args:
+        src (str): The source file path.
+        dst (str): The destination file path.
+        mode_path (str or None): A file to copy the permission bits from.
+
+    Returns:
+        None
+    """
+    if mode_path is None and os.path.isfile(dst):
+        mode_path = dst
+    if mode_path is not None and os.path.isfile(mode_path):
+        shutil.copymode(mode_path, src)
+    else:
+        os.chmod(src, 0o666 & ~_UMASK)
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        if os.path.isfile(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class MANode(object):
+    """A createNode block in a Maya ASCII file."""
+
+    __slots__ = ('type_name', 'name', 'parent', 'start', 'end')
+
+    def __init__(self, type_name, name, parent, start, end):
+        self.type_name = type_name
+        self.name = name
+        self.parent = parent
+        # the byte offsets of the node block
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return 'MANode ({}: {})'.format(self.type_name, self.name)
+
+    __str__ = __repr__
+
+
+class MAIndex(object):
+    """An index of the statements in a Maya ASCII file."""
+
+    def __init__(self):
+        # file reference commands as (tokens, start offset) pairs
+        self.files = []
+        self.requires = []
+        self.units = []
+        self.file_info = []
+        self.nodes = []
+        # (node name : first node index) pairs
+        self.node_names = {}
+        # the start offsets of connectAttr commands
+        self.connections = array.array(_OFFSET_TYPE)
+        self.size = 0
+
+    @classmethod
+    def build(cls, stream, chunk_size=CHUNK_SIZE):
+        """Builds the index by reading a binary stream once.
+
+        The stream is read in chunks and only the first line of each
+        top-level command is looked at, so the setAttr commands inside
+        node blocks cost no Python work.
+
+        Args:
+            stream (file): A binary file object.
+            chunk_size (int): The number of bytes read at a time.
+
+        Returns:
+            MAIndex
+        """
+        index = cls()
+        buf = b''
+        # the offset of the buffer in the file
+        base = 0
+        node = None
+
+        while True:
+            chunk = stream.read(chunk_size)
+            buf += chunk
+            if chunk:
+                # only scan complete lines
+                cut = buf.rfind(b'\n') + 1
+                if not cut:
+                    continue
+            else:
+                cut = len(buf)
+
+            keep = cut
+            for match in _TOP_LEVEL.finditer(buf, 0, cut):
+                start = match.start()
+                # a top-level command ends the current node block
+                if node is not None:
+                    node.end = base + start
+                    node = None
+
+                if match.group(1) is not None:
+                    node = index.__add_node(
+                        match.group(1), match.group(2), base + start)
+                    continue
+
+                line = match.group()
+                if line.startswith(b'connectAttr'):
+                    index.connections.append(base + start)
+                    continue
+                if line.split(None, 1)[0] not in _INDEXED_COMMANDS:
+                    continue
+
+                end = match.end()
+                while end < cut and not _is_statement_end(buf[start:end]):
+                    # a command split into multiple lines
+                    end = buf.find(b'\n', end + 1, cut)
+                    if end < 0:
+                        end = cut
+                if end >= cut and chunk and \
+                   not _is_statement_end(buf[start:end]):
+                    # the command continues in the next chunk
+                    keep = start
+                    break
+
+                node = index.__add_statement(
+                    buf[start:end].decode('utf-8', 'replace'), base + start)
+
+            buf = buf[keep:]
+            base += keep
+            if not chunk:
+                break
+
+        if node is not None:
+            node.end = base
+        index.size = base
+        return index
+
+    def __add_node(self, type_name, flags, start):
+        """Indexes a single-line createNode command without tokenizing it.
+        Returns the new node."""
+        flags = dict(_NODE_FLAG.findall(flags))
+        name = flags.get(b'n', flags.get(b'name'))
+        parent = flags.get(b'p', flags.get(b'parent'))
+        return self.__append_node(MANode(
+            type_name.decode('utf-8'),
+            None if name is None else name.decode('utf-8', 'replace'),
+            None if parent is None else parent.decode('utf-8', 'replace'),
+            start, start))
+
+    def __append_node(self, node):
+        self.node_names.setdefault(node.name, len(self.nodes))
+        self.nodes.append(node)
+        return node
+
+    def __add_statement(self, text, start):
+        """Indexes a top-level statement.
+        Returns the new node if it's a createNode statement."""
+        command = text.split(None, 1)[0]
+        if command == 'createNode':
+            tokens = tokenize(text)
+            if len(tokens) < 2:
+                return
+            node = MANode(
+                tokens[1][0],
+                _get_flag_value(tokens, '-n', '-name'),
+                _get_flag_value(tokens, '-p', '-parent'),
+                start, start)
+            return self.__append_node(node)
+        elif command == 'file':
+            self.files.append((tokenize(text), start))
+        elif command == 'requires':
+            self.requires.append(tokenize(text))
+        elif command == 'currentUnit':
+            self.units.append(tokenize(text))
+        elif command == 'fileInfo':
+            self.file_info.append(tokenize(text))
+
 
 class MAParser(object):
     """
@@ -18,29 +298,60 @@ class MAParser(object):
     """
 
     def __init__(self, file_path, file_contents=None):
-        self.file_contents = []
+        self.file_contents = None
         if file_contents:
-            self.file_contents = file_contents.split('\n')
+            if not isinstance(file_contents, bytes):
+                file_contents = file_contents.encode('utf-8')
+            self.file_contents = file_contents
         elif not file_path.endswith('.ma'):
             raise ValueError('This is not a Maya ASCII file: ' + file_path)
         self.__path = file_path
+        self.__index = None
 
     def __get_copy_path(self):
         head, ext = os.path.splitext(self.__path)
         return head + '_copy' + ext
 
-    def __get_lines(self):
+    def __open(self):
+        """Returns a binary stream of the file contents."""
         if self.file_contents:
-            return self.file_contents
-
+            return io.BytesIO(self.file_contents)
         if not os.path.isfile(self.__path):
             raise ValueError('File not found: ' + self.__path)
+        return open(self.__path, 'rb')
+
+    @property
+    def index(self):
+        """The statement index of this file, built on first access.
+
+        :type: MAIndex
+        """
+        if self.__index is None:
+            with self.__open() as f:
+                self.__index = MAIndex.build(f)
+        return self.__index
 
-        with open(self.__path) as f:
-            lines = f.readlines()
-            self.file_contents = lines
+    def refresh(self):
+        """Clears the index so the file is parsed again on next query.
 
-        return lines
+        Returns:
+            None
+        """
+        self.__index = None
+
+    def __read_spans(self, spans, read_ahead=CHUNK_SIZE):
+        """Yields the bytes of ascending byte spans in the file.
+        Close spans are read at once."""
+        with self.__open() as f:
+            buf = b''
+            # the offset of the buffer in the file
+            base = 0
+            for start, end in spans:
+                if start < base or end > base + len(buf):
+                    f.seek(start)
+                    buf = f.read(max(end - start, read_ahead))
+                    base = start
+                yield buf[start - base:end - base]
 
     def get_units(self):
         """Returns all the units used in this file.
@@ -53,22 +364,123 @@ class MAParser(object):
             'linear': None,
             'time': None}
 
-        lines = self.__get_lines()
-        for line in lines:
-            if line.startswith('currentUnit'):
-                tokens = line[:-2].split()
-                for i, t in enumerate(tokens):
-                    if t in ('-l', '-linear'):
-                        units['linear'] = tokens[i + 1]
-                    elif t in ('-a', '-angle'):
-                        units['angle'] = tokens[i + 1]
-                    elif t in ('-t', '-time'):
-                        units['time'] = tokens[i + 1]
-            if line.startswith('createNode'):
-                break
+        for tokens in self.index.units:
+            for key, flags in (
+                    ('linear', ('-l', '-linear')),
+                    ('angle', ('-a', '-angle')),
+                    ('time', ('-t', '-time'))):
+                value = _get_flag_value(tokens, *flags)
+                if value is not None:
+                    units[key] = value
 
         return units
 
+    def get_requires(self):
+        """Returns the plugins required by this file.
+
+        Returns:
+            list: A list of (plugin name, version) tuples.
+        """
+        requires = []
+        for tokens in self.index.requires:
+            args = []
+            tokens = iter(tokens[1:])
+            for token, is_string in tokens:
+                if not is_string and token.startswith('-'):
+                    # skip flags such as -nodeType and their values
+                    next(tokens, None)
+                else:
+                    args.append(token)
+            if args:
+                requires.append((args[0], args[1] if len(args) > 1 else None))
+        return requires
+
+    def get_file_info(self):
+        """Returns the file info of this file.
+
+        Returns:
+            dict
+        """
+        info = {}
+        for tokens in self.index.file_info:
+            args = [x for x, is_string in tokens[1:] if is_string]
+            if len(args) > 1:
+                info[args[0]] = args[1]
+        return info
+
+    def iter_nodes(self, type_=None):
+        """Iterates over the nodes created in this file.
+
+        Args:
+            type_ (str): If not None, only iterate over nodes of this type.
+
+        Yields:
+            MANode
+        """
+        for node in self.index.nodes:
+            if type_ is None or node.type_name == type_:
+                yield node
+
+    def get_node(self, name):
+        """Returns the first node of a name, or None.
+
+        Args:
+            name (str): A node name.
+
+        Returns:
+            MANode or None
+        """
+        index = self.index.node_names.get(name)
+        if index is not None:
+            return self.index.nodes[index]
+
+    def get_node_block(self, node):
+        """Returns the createNode block of a node, including the setAttr
+        and addAttr commands inside.
+
+        Args:
+            node (MANode or str): A node or node name.
+
+        Returns:
+            str
+        """
+        if not isinstance(node, MANode):
+            node = self.get_node(node)
+            if node is None:
+                return ''
+        block = next(self.__read_spans([(node.start, node.end)], 0))
+        return block.decode('utf-8', 'replace')
+
+    def iter_connections(self):
+        """Iterates over the connections in this file.
+
+        Yields:
+            tuple: The (source plug, destination plug) of a connection.
+        """
+        with self.__open() as f:
+            buf = b''
+            # the offset of the buffer in the file
+            base = 0
+            for start in self.index.connections:
+                match = None
+                if base <= start < base + len(buf):
+                    match = _CONNECTION.match(buf, start - base)
+                if match is None:
+                    # the connections are mostly consecutive,
+                    # read the next ones at once
+                    f.seek(start)
+                    buf = f.read(CHUNK_SIZE)
+                    base = start
+                    match = _CONNECTION.match(buf)
+                    if match is None:
+                        continue
+
+                plugs = [
+                    _unescape(x[1:-1].decode('utf-8', 'replace'))
+                    for x in _STRING.findall(match.group())]
+                if len(plugs) > 1:
+                    yield plugs[0], plugs[1]
+
     def get_nodes(self, pattern, type_='(.*)'):
         """Returns a list of node names that matches a given regex pattern.
 
@@ -79,19 +491,30 @@ class MAParser(object):
         Returns:
             list: A list of node names found.
         """
-        lines = self.__get_lines()
+        key = (pattern, type_)
+        matchers = _PATTERN_CACHE.get(key)
+        if matchers is None:
+            matchers = (
+                re.compile('(?:{})$'.format(type_)),
+                re.compile('[{0}]*{1}[{0}]*$'.format(_NAME_CHARS, pattern)))
+            _PATTERN_CACHE[key] = matchers
+        type_matcher, name_matcher = matchers
+
         nodes = []
-        matcher = 'createNode {} (-n|-name) "([a-zA-Z0-9_]*{}[a-zA-Z0-9_]*)"'
-        matcher = matcher.format(type_, pattern)
-        for line in lines:
-            test = re.match(matcher, line)
-            if test:
-                nodes.append(test.groups()[-1])
+        for node in self.index.nodes:
+            if node.name is not None and \
+               type_matcher.match(node.type_name) and \
+               name_matcher.match(node.name):
+                nodes.append(node.name)
         return nodes
 
     def replace_node_names(self, text_dict, as_copy=True):
         """Replaces node names in a MA file based on a dictionary.
 
+        The text replacements are applied to each node name created in
+        the file. Then all the occurrences of the renamed nodes, from
+        the first renamed createNode on, are replaced in a single pass.
+
         Args:
             text_dict (dict): A dict containing {old_text: new_text} pairs.
             as_copy (bool): If true, save the processed file as a separate copy.
@@ -102,44 +525,30 @@ class MAParser(object):
         if not os.path.isfile(self.__path):
             raise ValueError('File not found: ' + self.__path)
 
-        new_lines = []
         nodes = {}
-        changed = False
-
-        with open(self.__path, 'r') as f:
-            for line in f.readlines():
-
-                if line.startswith('createNode'):
-                    name = None
-                    new_name = None
-                    tokens = line.split()
-                    for i, t in enumerate(tokens):
-                        if t == '-n' or t == '-name':
-                            name = tokens[i + 1].split('"')[1]
-                            break
-                    if name:
-                        new_name = name
-                        for old, new in text_dict.iteritems():
-                            new_name = new_name.replace(old, new)
-                        if name != new_name:
-                            nodes[name] = new_name
-                            changed = True
-
-                if len(nodes) > 0:
-                    new_line = line
-                    for old, new in nodes.iteritems():
-                        new_line = new_line.replace(old, new)
-                    new_lines.append(new_line)
-                else:
-                    new_lines.append(line)
-
-        if changed:
-            path = self.__get_copy_path() if as_copy else self.__path
-            with open(path, 'w+') as f:
-                f.writelines(new_lines)
-            logger.info('Saved file: ' + path)
-        else:
+        start = None
+        for node in self.index.nodes:
+            if not node.name:
+                continue
+            new_name = node.name
+            for old, new in text_dict.items():
+                new_name = new_name.replace(old, new)
+            if new_name != node.name:
+                nodes[node.name] = new_name
+                if start is None:
+                    start = node.start
+
+        if not nodes:
             logger.info('No changes were made: ' + self.__path)
+            return
+
+        path = self.__get_copy_path() if as_copy else self.__path
+        replacements = dict(
+            (k.encode('utf-8'), v.encode('utf-8')) for k, v in nodes.items())
+        rewrite_file(self.__path, path, replacements, start=start)
+        if path == self.__path:
+            self.refresh()
+        logger.info('Saved file: ' + path)
 
     def get_textures(self):
         """
@@ -148,47 +557,14 @@ class MAParser(object):
         Returns:
             list: A list of texture file paths.
         """
-        lines = self.__get_lines()
-        length = len(lines)
-
         textures = set()
-        i = 0
-        while i != length - 1:
-            line = lines[i]
-
-            # No more createNode commands after
-            if line.startswith('connectAttr') or line.startswith('setAttr'):
-                break
-
-            # Only look for createNode commands
-            if not line.startswith('createNode'):
-                i += 1
-                continue
-            # Only look for file nodes
-            elif line.split()[1] != 'file':
-                i += 1
-                continue
-
-            i += 1
-            line = lines[i]
-            maxIter = 100
-            it = 0
-            while it < maxIter and re.match(r'\s', line):
-                tokens = line.split('"')
-                found = False
-                if len(tokens) > 2:
-                    path = tokens[-2]
-                    ext = path.split('.')[-1]
-                    if ext.lower() in TEXTURE_EXTS:
-                        textures.add(path)
-                        found = True
-                if found:
+        spans = [(x.start, x.end) for x in self.iter_nodes('file')]
+        for block in self.__read_spans(spans):
+            for string in _STRING.findall(block):
+                path = _unescape(string[1:-1].decode('utf-8', 'replace'))
+                if path.split('.')[-1].lower() in TEXTURE_EXTS:
+                    textures.add(path)
                     break
-                i += 1
-                line = lines[i]
-                it += 1
-
-            i += 1
 
         return sorted(list(textures))
 
@@ -198,32 +574,14 @@ class MAParser(object):
         Returns:
             list: A list of reference paths
         """
-        lines = self.__get_lines()
-        length = len(lines)
-
         references = set()
-        i = 0
-        while i != length - 1:
-            line = lines[i]
-
-            # No more file commands after requires
-            if line.startswith('requires') or line.startswith('createNode'):
-                break
-
-            # Only look for file commands
-            if not line.startswith('file'):
-                i += 1
-                continue
-
-            tokens = line.split('"')
-            if len(tokens) > 2:
-                path = tokens[-2]
-                ext = path.split('.')[-1]
-                if ext.lower() in MAYA_EXTS:
+        for tokens, _ in self.index.files:
+            strings = [x for x, is_string in tokens if is_string]
+            if strings:
+                path = strings[-1]
+                if path.split('.')[-1].lower() in MAYA_EXTS:
                     references.add(path)
 
-            i += 1
-
         return sorted(list(references))
 
     def get_playback_options(self):
@@ -233,8 +591,6 @@ class MAParser(object):
             dict: keys are "minTime", "maxTime",
                 "animationStartTime", "animationEndTime"
         """
-        lines = self.__get_lines()
-
         data = {
             'minTime': 0,
             'maxTime': 0,
@@ -242,20 +598,115 @@ class MAParser(object):
             'animationEndTime': 0
         }
 
-        for i, line in enumerate(lines):
-            if re.search(r'.*"sceneConfigurationScriptNode".*', line):
-                line = lines[i + 2]
-                tokens = line.split()
-
-                for j, token in enumerate(tokens):
-                    if token == '-min':
-                        data['minTime'] = float(tokens[j + 1])
-                    elif token == '-max':
-                        data['maxTime'] = float(tokens[j + 1])
-                    elif token == '-ast':
-                        data['animationStartTime'] = float(tokens[j + 1])
-                    elif token == '-aet':
-                        data['animationEndTime'] = float(tokens[j + 1])
-                break
+        block = self.get_node_block('sceneConfigurationScriptNode')
+        for key, value in _PLAYBACK_OPTION.findall(block):
+            data[_PLAYBACK_KEYS[key]] = float(value)
 
         return data
+
+
+def _get_trie_pattern(trie):
+    """Returns a regex pattern matching the names in a trie."""
+    alternatives = []
+    for char in sorted(x for x in trie if x):
+        alternatives.append(re.escape(char) + _get_trie_pattern(trie[char]))
+    optional = b'' in trie
+    if not alternatives:
+        return b''
+    if len(alternatives) == 1 and not optional:
+        return alternatives[0]
+    pattern = b'(?:' + b'|'.join(alternatives) + b')'
+    if optional:
+        pattern += b'?'
+    return pattern
+
+
+def compile_name_matcher(names, whole_word=True):
+    """Compiles a regex matching any of the given node names.
+
+    The names are factored into a trie pattern, so matching doesn't
+    slow down with the number of names.
+
+    Args:
+        names (list): A list of node names as bytes.
+        whole_word (bool): If True, only match whole node names.
+            Otherwise match any occurrence of the names.
+
+    Returns:
+        re.Pattern
+    """
+    trie = {}
+    for name in names:
+        if not name:
+            raise ValueError('Can\'t match an empty name.')
+        node = trie
+        for i in range(len(name)):
+            node = node.setdefault(name[i:i + 1], {})
+        node[b''] = None
+    if not trie:
+        raise ValueError('No names to match.')
+
+    if not whole_word:
+        return re.compile(_get_trie_pattern(trie))
+    name_chars = _NAME_CHARS.encode('utf-8')
+    return re.compile(
+        b'(?<![' + name_chars + b'])' + _get_trie_pattern(trie) +
+        b'(?![' + name_chars + b'])')
+
+
+def rewrite_file(src, dst, replacements, start=0, whole_word=True,
+                 chunk_size=CHUNK_SIZE):
+    """Streams a file to a destination path, replacing node names in
+    a single pass. The destination is replaced atomically.
+
+    Args:
+        src (str): The source file path.
+        dst (str): The destination file path. Can be the source path.
+        replacements (dict): (old name : new name) pairs as bytes.
+        start (int): The byte offset of a line from which the names
+            are replaced.
+        whole_word (bool): If True, only replace whole node names.
+            Otherwise replace any occurrence of the names, which must
+            not span lines.
+        chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+        int: The number of replacements made.
+    """
+    matcher = compile_name_matcher(
+        replacements.keys(), whole_word=whole_word)
+    count = [0]
+
+    def replace(match):
+        count[0] += 1
+        return replacements[match.group()]
+
+    dst_dir = os.path.dirname(os.path.abspath(dst))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=dst_dir, prefix='.' + os.path.basename(dst), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out, open(src, 'rb') as f:
+            # copy the lines before the start offset as is
+            while start > 0:
+                chunk = f.read(min(chunk_size, start))
+                if not chunk:
+                    break
+                out.write(chunk)
+                start -= len(chunk)
+
+            buf = b''
+            while True:
+                chunk = f.read(chunk_size)
+                buf += chunk
+                # names never span lines
+                cut = buf.rfind(b'\n') + 1 if chunk else len(buf)
+                out.write(matcher.sub(replace, buf[:cut]))
+                buf = buf[cut:]
+                if not chunk:
+                    break
+        replace_file(tmp_path, dst, mode_path=src)
+    except BaseException:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count[0]
@@ -10,7 +10,10 @@ def refresh():
     import imp
     import inspect
     from mhy.maya.nodezoo._manager import _NODE_TYPE_LIB
+    from mhy.maya.nodezoo.node.node_ import clear_cache
 
+    # The reloaded classes replace the cached instances and their callbacks
+    clear_cache(remove_callbacks=True)
     root_module = 'mhy.maya.nodezoo'
     _NODE_TYPE_LIB.clear()
     for key, value in sys.modules.items():
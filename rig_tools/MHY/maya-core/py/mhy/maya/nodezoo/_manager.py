@@ -1 +1,2 @@
 _NODE_TYPE_LIB = {}
+_NODE_CLASS_CACHE = {}
@@ -41,17 +41,32 @@ def get_api_object(name):
     if sel.length() == 0:
         raise ObjectNotFoundError('No object matches {}'.format(name))
 
+    return get_selection_object(sel, 0)
+
+
+def get_selection_object(sel, index):
+    """
+    Get the MDagPath or MObject of an item in a selection list
+
+    Args:
+        sel(OpenMaya.MSelectionList):
+        index(int):
+
+    Returns:
+        OpenMaya.MDagPath or OpenMaya.MObject
+
+    """
     try:
         # Try to get dag node first because it keeps the hierarchy information
         dag = OpenMaya.MDagPath()
-        sel.getDagPath(0, dag)
+        sel.getDagPath(index, dag)
         dag_node = dag.node()
         if not dag_node or not dag_node.hasFn(OpenMaya.MFn.kDagNode):
             raise RuntimeError
         return dag
     except RuntimeError:
         obj = OpenMaya.MObject()
-        sel.getDependNode(0, obj)
+        sel.getDependNode(index, obj)
         return obj
 
 
@@ -3,10 +3,13 @@ Nodezoo class for animation curves
 """
 import maya.OpenMayaAnim as OpenMayaAnim
 import maya.OpenMaya as OpenMaya
+import maya.api.OpenMaya as OpenMaya2
+import maya.api.OpenMayaAnim as OpenMayaAnim2
 import maya.cmds as cmds
 from mhy.maya.utils import undoable
 from mhy.maya.nodezoo.node import DependencyNode
 from mhy.maya.nodezoo.attribute import Attribute
+from mhy.maya.key_block import KeyBlock
 
 
 
@@ -65,36 +68,12 @@ class AnimCurve(DependencyNode):
         Maya doesn't allow user set up key frames using plug directly so it has
         to be query and set through key frame api functions
         Returns:
-            (list): data of keys frames
+            (dict): The key block data of the keys. See KeyBlock.to_data()
         """
-        data = []
-        x_util = OpenMaya.MScriptUtil(0.0)
-        x_ptr = x_util.asFloatPtr()
-        y_util = OpenMaya.MScriptUtil(0.0)
-        y_ptr = y_util.asFloatPtr()
-        for index in range(self.num_keys):
-            key_data = dict()
-            input_data = self.get_input(index)
-            key_data['input'] = input_data
-            value = self.get_value(index)
-            key_data['value'] = value
-            in_tangent_type = self.get_in_tangent_type(index)
-            out_tangent_type = self.get_out_tangent_type(index)
-            key_data['itt'] = in_tangent_type
-            key_data['ott'] = out_tangent_type
-
-            self.fn_node.getTangent(index, x_ptr, y_ptr, True)
-            x = x_util.getFloat(x_ptr)
-            y = y_util.getFloat(y_ptr)
-            key_data['it'] = (x, y)
-
-            self.fn_node.getTangent(index, x_ptr, y_ptr, False)
-            x = x_util.getFloat(x_ptr)
-            y = y_util.getFloat(y_ptr)
-            key_data['ot'] = (x, y)
-
-            data.append(key_data)
-        return data
+        block = self.get_key_block()
+        if not len(block):
+            return {}
+        return block.to_data()
 
     def get_keys_data(self):
         """
@@ -102,65 +81,21 @@ class AnimCurve(DependencyNode):
         Returns:
             dict: Key data dictionary. Key frame will be key of this dict
         """
-        data = {}
-        x_util = OpenMaya.MScriptUtil(0.0)
-        x_ptr = x_util.asFloatPtr()
-        y_util = OpenMaya.MScriptUtil(0.0)
-        y_ptr = y_util.asFloatPtr()
-        for index in range(self.num_keys):
-            key_data = dict()
-            input_data = self.get_input(index)
-            value = self.get_value(index)
-            key_data['value'] = value
-            in_tangent_type = self.get_in_tangent_type(index)
-            out_tangent_type = self.get_out_tangent_type(index)
-            key_data['itt'] = in_tangent_type
-            key_data['ott'] = out_tangent_type
-
-            self.fn_node.getTangent(index, x_ptr, y_ptr, True)
-            x = x_util.getFloat(x_ptr)
-            y = y_util.getFloat(y_ptr)
-            key_data['it'] = (x, y)
-
-            self.fn_node.getTangent(index, x_ptr, y_ptr, False)
-            x = x_util.getFloat(x_ptr)
-            y = y_util.getFloat(y_ptr)
-            key_data['ot'] = (x, y)
-
-            data[input_data] = key_data
-        return data
+        return self.__to_ui_block(self.get_key_block()).to_key_dict()
 
     @undoable
     def set_keys_data(self, data, merge=True, set_tangent_val=True):
-        remaining_key = None
-        if not merge:
-            num_keys = self.num_keys
-            if num_keys:
-                for i in range(num_keys-1):
-                    cmds.cutKey(self.name, index=(0, 0))
-            remaining_key = self.get_keys()
-
-        for idx, (key, key_data) in enumerate(data.items()):
-            key = float(key)
-            value = key_data.get('value')
-            itt = key_data.get('itt')
-            ott = key_data.get('ott')
-            it = key_data.get('it')
-            ot = key_data.get('ot')
-            self.add_key(key, value, itt, ott)
-            if set_tangent_val:
-                locked = self.get_tangent_locked(key=key)
-                self.set_tangent_locked(key=key, locked=locked)
-                self.set_tangent(key=key, x=it[0], y=it[1], in_tangent=True)
-                self.set_tangent(key=key, x=ot[0], y=ot[1], in_tangent=False)
-                self.set_tangent_locked(key=key, locked=locked)
-
-            # For the first iter, if remove remaining keys if necessary
-            if idx == 0 and remaining_key is not None:
-                for rem in remaining_key:
-                    if abs(rem - key) > 0.001:
-                        self.delete_key(rem)
-                remaining_key = list()
+        """
+        Set the keys from a key data dictionary of get_keys_data().
+        Args:
+            data(dict): Key data dictionary
+            merge(bool): If keep the existing keys
+            set_tangent_val(bool): If set the tangent values of the keys
+
+        """
+        block = self.__from_ui_block(KeyBlock.from_key_dict(
+            self.__get_tangent_enums(data.items())))
+        self.__set_keys(block, replace=not merge, set_tangents=set_tangent_val)
 
     @undoable
     def load(self, data, make_connections=True, rename=False, replace=True):
@@ -176,35 +111,198 @@ class AnimCurve(DependencyNode):
 
         """
         DependencyNode.load(self, data, make_connections, rename)
-        remaining_key = None
+        keys_data = data.get('additional')
+        if not keys_data:
+            return
+        if isinstance(keys_data, dict):
+            block = KeyBlock.from_data(keys_data)
+        else:
+            # key list exported before key blocks
+            keys = [(x.get('input'), x) for x in keys_data]
+            block = self.__from_ui_block(
+                KeyBlock.from_key_dict(self.__get_tangent_enums(keys)))
+        self.__set_keys(block, replace=replace)
+
+    def __set_keys(self, block, replace=True, set_tangents=True):
+        """
+        Set the keys from a key block in the undo queue. The api edits of
+        set_key_block() can't be undone, so the keys are set by commands
+        while undo is on.
+        Args:
+            block(KeyBlock): A key block
+            replace(bool): If remove the existing keys not in the block
+            set_tangents(bool): If set the tangent values and lock states
+
+        """
+        if not cmds.undoInfo(query=True, state=True):
+            self.set_key_block(block, replace=replace, set_tangents=set_tangents)
+            return
+
+        ui_block = self.__to_ui_block(block)
+        keys = [float(x) for x in ui_block.inputs]
+        for i, key in enumerate(keys):
+            self.add_key(
+                key, ui_block.values[i],
+                ui_block.in_types[i], ui_block.out_types[i])
+            if set_tangents and ui_block.has_tangents:
+                self.set_tangent_locked(key=key, locked=False)
+                self.set_tangent(
+                    key=key, x=ui_block.in_x[i], y=ui_block.in_y[i],
+                    in_tangent=True)
+                self.set_tangent(
+                    key=key, x=ui_block.out_x[i], y=ui_block.out_y[i],
+                    in_tangent=False)
+                self.set_tangent_locked(
+                    key=key, locked=bool(ui_block.locked[i]))
+
+        # the keys are removed last as removing all keys deletes the curve
+        if replace and keys:
+            for key in self.get_keys():
+                if all(abs(key - x) > 0.001 for x in keys):
+                    self.delete_key(key)
+
+    def _get_api2_fn(self):
+        """Returns the api 2.0 function set of this curve, for bulk
+        key access."""
+        sel = OpenMaya2.MSelectionList()
+        sel.add(self.name)
+        return OpenMayaAnim2.MFnAnimCurve(sel.getDependNode(0))
+
+    def get_key_block(self, tangents=True):
+        """
+        Get all the keys in a key block. Inputs of time input curves are
+        in ui time unit, values and tangents are in internal units.
+        Args:
+            tangents(bool): If query the tangent values and lock states
+
+        Returns:
+            KeyBlock: The keys of this curve
+
+        """
+        fn = self._get_api2_fn()
+        indices = range(fn.numKeys)
+        if fn.isUnitlessInput:
+            inputs = [fn.unitlessInput(i) for i in indices]
+        else:
+            unit = OpenMaya2.MTime.uiUnit()
+            inputs = [fn.input(i).asUnits(unit) for i in indices]
+
+        kwargs = {
+            'inputs': inputs,
+            'values': [fn.value(i) for i in indices],
+            'in_types': [fn.inTangentType(i) for i in indices],
+            'out_types': [fn.outTangentType(i) for i in indices]}
+        if tangents:
+            in_tangents = [fn.getTangentXY(i, True) for i in indices]
+            out_tangents = [fn.getTangentXY(i, False) for i in indices]
+            kwargs['in_x'] = [x[0] for x in in_tangents]
+            kwargs['in_y'] = [x[1] for x in in_tangents]
+            kwargs['out_x'] = [x[0] for x in out_tangents]
+            kwargs['out_y'] = [x[1] for x in out_tangents]
+            kwargs['locked'] = [fn.tangentsLocked(i) for i in indices]
+        return KeyBlock(**kwargs)
+
+    def set_key_block(self, block, replace=True, set_tangents=True):
+        """
+        Set the keys from a key block through the api function set instead of
+        a command per key. Note the api edits are not in the undo queue,
+        set_keys_data() and load() set the keys by commands while undo is on.
+        Args:
+            block(KeyBlock or dict): A key block or the data of a key block
+            replace(bool): If remove the existing keys not in the block
+            set_tangents(bool): If set the tangent values and lock states of
+                the block. Otherwise the tangents are computed from the
+                tangent types.
+
+        """
+        if isinstance(block, dict):
+            block = KeyBlock.from_data(block)
+        fn = self._get_api2_fn()
+        if fn.isUnitlessInput:
+            inputs = list(block.inputs)
+        else:
+            unit = OpenMaya2.MTime.uiUnit()
+            inputs = [OpenMaya2.MTime(x, unit) for x in block.inputs]
+
         if replace:
-            num_keys = self.num_keys
-            if num_keys:
-                for i in range(num_keys-1):
-                    cmds.cutKey(self.name, index=(0, 0))
-            remaining_key = self.get_keys()
-
-        keys_data = data.get('additional', [])
-        for idx, key_data in enumerate(keys_data):
-            input_data = float(key_data.get('input'))
-            value = key_data.get('value')
-            itt = key_data.get('itt')
-            ott = key_data.get('ott')
-            it = key_data.get('it')
-            ot = key_data.get('ot')
-            self.add_key(input_data, value, itt, ott)
-            locked = self.get_tangent_locked(key=input_data)
-            self.set_tangent_locked(key=input_data, locked=locked)
-            self.set_tangent(key=input_data, x=it[0], y=it[1], in_tangent=True)
-            self.set_tangent(key=input_data, x=ot[0], y=ot[1], in_tangent=False)
-            self.set_tangent_locked(key=input_data, locked=locked)
-
-            # For the first iter, if remove remaining keys if necessary
-            if idx == 0 and remaining_key is not None:
-                for rem in remaining_key:
-                    if abs(rem - input_data) > 0.001:
-                        self.delete_key(rem)
-                remaining_key = list()
+            keep = set(fn.find(x) for x in inputs)
+            for index in reversed(range(fn.numKeys)):
+                if index not in keep:
+                    fn.remove(index)
+
+        for i, input_value in enumerate(inputs):
+            index = fn.find(input_value)
+            if index is None:
+                fn.addKey(
+                    input_value, block.values[i],
+                    block.in_types[i], block.out_types[i])
+            else:
+                fn.setValue(index, block.values[i])
+                fn.setInTangentType(index, block.in_types[i])
+                fn.setOutTangentType(index, block.out_types[i])
+
+        if not set_tangents or not block.has_tangents:
+            return
+        for i, input_value in enumerate(inputs):
+            index = fn.find(input_value)
+            fn.setTangentsLocked(index, False)
+            fn.setTangent(
+                index, block.in_x[i], block.in_y[i], True, None, False)
+            fn.setTangent(
+                index, block.out_x[i], block.out_y[i], False, None, False)
+            fn.setTangentsLocked(index, bool(block.locked[i]))
+
+    @property
+    def ui_value_scale(self):
+        """
+        The scale converting key values from internal units to ui units.
+        Returns:
+            float: The unit scale of the output type
+        """
+        curve_type = self.fn_node.animCurveType()
+        if curve_type in (OpenMayaAnim.MFnAnimCurve.kAnimCurveTA,
+                          OpenMayaAnim.MFnAnimCurve.kAnimCurveUA):
+            return OpenMaya2.MAngle(1.0).asUnits(OpenMaya2.MAngle.uiUnit())
+        elif curve_type in (OpenMayaAnim.MFnAnimCurve.kAnimCurveTL,
+                            OpenMayaAnim.MFnAnimCurve.kAnimCurveUL):
+            return OpenMaya2.MDistance(1.0).asUnits(
+                OpenMaya2.MDistance.uiUnit())
+        elif curve_type in (OpenMayaAnim.MFnAnimCurve.kAnimCurveTT,
+                            OpenMayaAnim.MFnAnimCurve.kAnimCurveUT):
+            return OpenMaya2.MTime(1.0, OpenMaya2.MTime.kSeconds).asUnits(
+                OpenMaya2.MTime.uiUnit())
+        return 1.0
+
+    def __to_ui_block(self, block):
+        """Returns a key block with values in ui units. The legacy key data
+        formats store values in ui units and tangents in internal units."""
+        scale = self.ui_value_scale
+        if scale == 1.0:
+            return block
+        return block.scale_values(scale, tangents=False)
+
+    def __from_ui_block(self, block):
+        """Returns a key block with values in internal units."""
+        scale = self.ui_value_scale
+        if scale == 1.0:
+            return block
+        return block.scale_values(1.0 / scale, tangents=False)
+
+    @staticmethod
+    def __get_tangent_enums(keys):
+        """Returns (input, key data) pairs with tangent type names
+        converted to enums."""
+        names = dict((v, k) for k, v in AnimCurve.TangentType.items())
+        result = []
+        for input_value, key_data in keys:
+            key_data = dict(key_data)
+            for attr in ('itt', 'ott'):
+                tangent_type = key_data.get(attr)
+                if not isinstance(tangent_type, int):
+                    key_data[attr] = names.get(
+                        tangent_type, OpenMayaAnim.MFnAnimCurve.kTangentGlobal)
+            result.append((input_value, key_data))
+        return result
 
     def delete_key(self, key):
         """
@@ -13,6 +13,11 @@ from mhy.maya.nodezoo.node.mesh import Mesh
 from mhy.maya.nodezoo.constant import DataFormat
 from mhy.python.core.utils import increment_name
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class BlendShape(DependencyNode):
     __NODETYPE__ = 'blendShape'
@@ -446,6 +451,13 @@ class BlendShape(DependencyNode):
         # set the component targets to default vtx[1:numVtx]
         component_attr.value = ["vtx[{}]".format(i) for i in range(num_vtx)]
 
+        if numpy is not None:
+            result_point_array = self.__solve_pose_space_delta(
+                skin_mesh, target_points, points_attr, threshold)
+            points_attr.value = result_point_array
+            component_attr.value = ['vtx[{}]'.format(i) for i in range(num_vtx)]
+            return
+
         # extract point arrays from orig mesh, skin mesh and target mesh
         base_mesh = skin_mesh.get_intermediate_sibling()
         base_points = base_mesh.get_points(space='object')
@@ -537,3 +549,45 @@ class BlendShape(DependencyNode):
         points_attr.value = result_point_array
         component_attr.value = result_component_list
 
+    @staticmethod
+    def __solve_pose_space_delta(skin_mesh, target_points, points_attr,
+                                 threshold):
+        """
+        Solve the pose space deltas of all the sculpted vertices at once.
+
+        The skinned position of a vertex moves linearly with its target delta,
+        so the delta moving it to the sculpt target is solved from the
+        skinned positions at unit x, y and z deltas.
+
+        Args:
+            skin_mesh(Mesh): The output mesh of this blend shape
+            target_points(list or array): The sculpt target points
+            points_attr(Attribute): The input points attribute of the target item
+            threshold(float): The minimum delta value that will be valid for calculation
+
+        Returns:
+            list: The input points of the target item
+
+        """
+        num_vtx = skin_mesh.num_vertices
+        skin_points = skin_mesh.get_point_array(space='object')
+        target_points = numpy.asarray(target_points, dtype=numpy.float64)
+        count = min(len(skin_points), len(target_points))
+        offsets = target_points[:count] - skin_points[:count]
+        vtx_ids = numpy.nonzero(
+            numpy.sqrt((offsets ** 2).sum(axis=1)) > threshold)[0]
+
+        # the skinned offsets of unit deltas in rows
+        axes = numpy.empty((len(vtx_ids), 3, 3))
+        for i, unit in enumerate(((1, 0, 0), (0, 1, 0), (0, 0, 1))):
+            points_attr.value = [unit] * num_vtx
+            axes[:, i] = skin_mesh.get_point_array(
+                space='object')[vtx_ids] - skin_points[vtx_ids]
+        deltas = numpy.einsum(
+            'ni,nij->nj', offsets[vtx_ids], numpy.linalg.pinv(axes))
+
+        result_point_array = [[0, 0, 0, 1]] * num_vtx
+        for i, delta in zip(vtx_ids.tolist(), deltas.tolist()):
+            result_point_array[i] = delta
+        return result_point_array
+
@@ -6,6 +6,7 @@ import maya.OpenMaya as OpenMaya
 from mhy.maya.nodezoo.attribute import Attribute
 from mhy.maya.nodezoo.constant import DataFormat
 from mhy.maya.nodezoo.node import Node
+from mhy.maya.nodezoo.snapshot import AttributeSnapshot
 import mhy.maya.nodezoo.constant as const
 
 from mhy.python.core.compatible import classproperty
@@ -602,7 +603,7 @@ class DependencyNode(Node):
         """
         target_node = Node(target_node)
         if connected_nodes:
-            connected_nodes = [Node(x) for x in connected_nodes]
+            connected_nodes = Node.from_names(connected_nodes)
 
         # move destination connections:
         if destination:
@@ -750,63 +751,24 @@ class DependencyNode(Node):
         return data
 
     def _export_attrs(self, with_connection=True, attrs=None):
+        """
+        Export the attribute data of this node. The plugs are walked once
+        by an AttributeSnapshot instead of exporting Attribute instances.
+        Args:
+            with_connection(bool): If export the connections of the attributes
+            attrs(list or None): The attributes to export.
+                Defaults to attributes_to_export, or all the top level
+                attributes if it is None.
+
+        Returns:
+            list: The data of each exported attribute
+
+        """
         if attrs is None:
-            if self.attributes_to_export is not None:
-                attrs = self.attributes_to_export
-            else:
-                attrs = self.top_level_attrs()
-
-        ignore_attrs = (
-            'binMembership',
-            'boundary',
-            'caching',
-            'containerType',
-            'creationDate',
-            'creator',
-            'currentDisplayLayer',
-            'currentRenderLayer',
-            'customTreatment',
-            'doubleSided',
-            'face',
-            'ghostFrames',
-            'nodeState',
-            'outStippleThreshold',
-            'overrideEnabled',
-            'overridePlayback',
-            'playFromCache',
-            'rmbCommand',
-            'rotateQuaternion',
-            'rotateQuaternionW',
-            'rotateQuaternionX',
-            'rotateQuaternionY',
-            'rotateQuaternionZ',
-            'springDamping',
-            'springRestLength',
-            'springStiffness',
-            'templateName',
-            'templatePath',
-            'useComponentPivot',
-            'viewName'
-        )
-        data = []
-        for attr in attrs:
-            if not isinstance(attr, Attribute):
-                if attr in self.attributes_to_ignore \
-                        or attr in ignore_attrs:
-                    continue
-                if not self.has_attr(attr):
-                    continue
-                attr = Attribute(self, attr)
-            if self.attributes_to_ignore and \
-                    not all(iga not in attr.name for iga in self.attributes_to_ignore):
-                continue
-            attr_data = attr.export(
-                withConnection=with_connection,
-                isNested=True,
-                ignore=self.attributes_to_ignore)
-            if attr_data:
-                data.append(attr_data)
-        return data
+            attrs = self.attributes_to_export
+        snapshot = AttributeSnapshot(with_connection=with_connection)
+        return snapshot.export_node(
+            self, attrs=attrs, ignore=self.attributes_to_ignore)
 
     def export_creation_data(self):
         """
@@ -1,13 +1,64 @@
 """
 This modules contains Mesh class and its api methods
 """
+import ctypes
+import numbers
+
 import maya.cmds as cmds
 import maya.OpenMaya as OpenMaya
+import maya.api.OpenMaya as OpenMaya2
 
 from mhy.maya.nodezoo.node import DagNode
 import mhy.maya.nodezoo.utils as utils
 import mhy.maya.maya_math as math
 
+try:
+    import numpy
+    import mhy.maya.spatial_index as spatial_index
+except ImportError:
+    # array access and batched surface queries require numpy
+    numpy = None
+    spatial_index = None
+
+
+def _check_numpy():
+    """Raises if numpy is not available."""
+    if numpy is None:
+        raise RuntimeError('Mesh array access requires numpy.')
+
+
+def _to_list(values):
+    """Returns a flat list of python numbers from an array or a list."""
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+    return list(values)
+
+
+def _get_raw_float_array(pointer, count):
+    """Returns a numpy array viewing a float buffer of a Maya API object
+    without copying. The view is only valid until the object changes."""
+    if not count:
+        return numpy.zeros(0, dtype=numpy.float32)
+    buffer_type = ctypes.c_float * count
+    return numpy.frombuffer(
+        buffer_type.from_address(int(pointer)), dtype=numpy.float32)
+
+
+def _get_matrix_array(matrix):
+    """Returns an MMatrix in a numpy array (4 x 4)."""
+    return numpy.array(
+        [[matrix(i, j) for j in range(4)] for i in range(4)])
+
+
+def _is_point_list(points):
+    """Checks if points are a list of (x, y, z) number sequences."""
+    if not isinstance(points, (list, tuple)):
+        return False
+    for each in points:
+        if not isinstance(each, (list, tuple)) or len(each) != 3 or \
+           not all(isinstance(x, numbers.Real) for x in each):
+            return False
+    return True
 
 class Mesh(DagNode):
     __NODETYPE__ = 'mesh'
@@ -19,35 +70,50 @@ class Mesh(DagNode):
         kFace = 13
 
     @classmethod
-    def create(cls, vertex_positions, polygon_vertices, parent=None, name=None,
-               uvs=None, assigned_uvs=None):
-        mesh = OpenMaya.MFnMesh()
-        num_vertices = len(vertex_positions)
-        num_polygons = len(polygon_vertices)
-
-        polygon_counts = OpenMaya.MIntArray()
-        polygon_connects = OpenMaya.MIntArray()
-        for i in polygon_vertices:
-            polygon_counts.append(len(i))
-            for j in i:
-                polygon_connects.append(j)
-
-        vertex_array = OpenMaya.MFloatPointArray()
-        for p in vertex_positions:
-            point = OpenMaya.MFloatPoint(p[0], p[1], p[2])
-            vertex_array.append(point)
+    def create(cls, vertex_positions=None, polygon_vertices=None, parent=None,
+               name=None, uvs=None, assigned_uvs=None, points=None,
+               polygon_counts=None, polygon_connects=None):
+        """
+        Create a mesh from either nested vertex positions and polygon vertex
+        lists, or the flat arrays of export_creation_data. The geometry is
+        passed to Maya in a single api call.
 
-        if parent and cmds.objExists(parent):
-            parent = DagNode(parent)
+        Args:
+            vertex_positions(list): A list of [x, y, z] points
+            polygon_vertices(list): A list of vertex index lists
+            parent(str or None): The parent transform
+            name(str or None): The name of the mesh shape
+            uvs(tuple or None): The u list and v list
+            assigned_uvs(tuple or None): The uv counts and uv ids
+            points(list or array): The flat [x, y, z, ...] points
+            polygon_counts(list or array): The number of vertices of
+                each polygon
+            polygon_connects(list or array): The vertex ids of all polygons
 
-            obj = mesh.create(num_vertices, num_polygons,
-                              vertex_array, polygon_counts,
-                              polygon_connects, parent.object())
+        Returns:
+            Mesh: The created mesh shape
+        """
+        if points is None:
+            points = [x for p in vertex_positions for x in p[:3]]
+            polygon_counts = [len(i) for i in polygon_vertices]
+            polygon_connects = [j for i in polygon_vertices for j in i]
+        if numpy is not None:
+            points = numpy.asarray(points, dtype=numpy.float64)
+            points = points.reshape(-1, 3).tolist()
         else:
-            obj = mesh.create(num_vertices, num_polygons,
-                              vertex_array, polygon_counts,
-                              polygon_connects)
-        mesh = Mesh(obj)
+            points = _to_list(points)
+            points = [points[i:i + 3] for i in range(0, len(points), 3)]
+
+        parent_object = OpenMaya2.MObject.kNullObj
+        if parent and cmds.objExists(parent):
+            sel = OpenMaya2.MSelectionList()
+            sel.add(DagNode(parent).long_name)
+            parent_object = sel.getDependNode(0)
+
+        obj = OpenMaya2.MFnMesh().create(
+            OpenMaya2.MPointArray(points), _to_list(polygon_counts),
+            _to_list(polygon_connects), parent=parent_object)
+        mesh = Mesh(OpenMaya2.MFnDagNode(obj).fullPathName())
 
         if mesh.type_name == 'transform':
             # mesh.create will return transform node if parent
@@ -165,6 +231,167 @@ class Mesh(DagNode):
         current_face.getTriangle(tri_id, point_array, vert_id_list, OpenMaya.MSpace.kWorld)
         return (vert_id_list[0], u), (vert_id_list[1], v), (vert_id_list[2], w)
 
+    def _get_api2_fn(self):
+        """Returns the api 2.0 function set of this mesh, for bulk
+        array access."""
+        sel = OpenMaya2.MSelectionList()
+        sel.add(self.long_name)
+        return OpenMaya2.MFnMesh(sel.getDagPath(0))
+
+    # ------------------------------------------------------------------------
+    # Array methods
+    # ------------------------------------------------------------------------
+
+    def get_point_array(self, space='world'):
+        """Returns the vertex points in a contiguous float64 array (n x 3).
+
+        Object and world space points are read directly from the point
+        buffer of the mesh, without a python object per point.
+
+        Args:
+            space (str): transform space in which to get the points.
+
+        Returns:
+            numpy.ndarray
+        """
+        _check_numpy()
+        space = utils.get_space(space)
+        if space not in (OpenMaya.MSpace.kObject,
+                         OpenMaya.MSpace.kTransform,
+                         OpenMaya.MSpace.kWorld):
+            points = self._get_api2_fn().getPoints(space)
+            return numpy.array(
+                points, dtype=numpy.float64).reshape(-1, 4)[:, :3].copy()
+
+        count = self.fn_node.numVertices()
+        points = _get_raw_float_array(self.fn_node.getRawPoints(), count * 3)
+        points = points.reshape(count, 3).astype(numpy.float64)
+        if space == OpenMaya.MSpace.kWorld:
+            matrix = _get_matrix_array(self.dag_path.inclusiveMatrix())
+            points = points.dot(matrix[:3, :3]) + matrix[3, :3]
+        return points
+
+    def set_point_array(self, points, space='world'):
+        """Sets the vertex points from an array (n x 3) in one api call.
+
+        Args:
+            points (array): The points to set.
+            space (str): transform space in which to set the points.
+
+        Returns:
+            None
+        """
+        _check_numpy()
+        points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+        self._get_api2_fn().setPoints(
+            OpenMaya2.MPointArray(points.tolist()), utils.get_space(space))
+
+    def get_normal_array(self, angle_weighted=False, space='world'):
+        """Returns the vertex normals in a contiguous float64 array (n x 3).
+
+        Args:
+            angle_weighted (bool): If true, normals are computed by an average
+                of surrounding face normals weighted by the angle subtended by
+                the face at the vertex.
+            space (str): transform space in which to get the normals.
+
+        Returns:
+            numpy.ndarray
+        """
+        _check_numpy()
+        normals = self._get_api2_fn().getVertexNormals(
+            angle_weighted, utils.get_space(space))
+        return numpy.array(normals, dtype=numpy.float64).reshape(-1, 3)
+
+    def get_face_arrays(self):
+        """Returns the polygon vertex counts and the vertex ids of all
+        polygons in int32 arrays.
+
+        Returns:
+            tuple: The polygon counts and polygon connects.
+        """
+        _check_numpy()
+        counts, connects = self._get_api2_fn().getVertices()
+        return (numpy.array(counts, dtype=numpy.int32),
+                numpy.array(connects, dtype=numpy.int32))
+
+    def get_uv_arrays(self, uv_set=None):
+        """Returns the uvs and their assignment to polygon vertices.
+
+        Args:
+            uv_set (str): The uv set to use. If None, use current uv set.
+
+        Returns:
+            tuple: The uvs in a float64 array (n x 2), and the uv counts
+                and uv ids in int32 arrays. None if there's no uv set.
+        """
+        _check_numpy()
+        if uv_set is None:
+            uv_set = self.get_current_uv_set()
+            if not uv_set:
+                return
+        fn_mesh = self._get_api2_fn()
+        u_array, v_array = fn_mesh.getUVs(uv_set)
+        uv_counts, uv_ids = fn_mesh.getAssignedUVs(uv_set)
+        uvs = numpy.empty((len(u_array), 2))
+        uvs[:, 0] = u_array
+        uvs[:, 1] = v_array
+        return (uvs, numpy.array(uv_counts, dtype=numpy.int32),
+                numpy.array(uv_ids, dtype=numpy.int32))
+
+    def get_spatial_index(self, space='world'):
+        """Returns a spatial index of this mesh for batched closest
+        point, closest vertex and radius queries.
+
+        Indexes are cached by topology and points, so getting the index
+        of an unchanged mesh again skips the build.
+
+        Args:
+            space (str): transform space in which to index the points.
+
+        Returns:
+            MeshSpatialIndex
+        """
+        if spatial_index is None:
+            raise RuntimeError('Spatial index requires numpy.')
+        return spatial_index.get_mesh_index(
+            self.get_point_array(space=space), *self.get_face_arrays())
+
+    def get_closest_uvs(self, points, uv_set=None, closest=None):
+        """Returns the uvs of the closest points on this mesh to
+        world space points.
+
+        Args:
+            points (array): A list of points (n x 3).
+            uv_set (str): The uv set to use. If None, use current uv set.
+            closest (tuple): The result of ``closest_points()`` of the
+                spatial index for the points, if already queried.
+
+        Returns:
+            array: The uvs (n x 2). NaN where the closest face
+                has no uvs.
+        """
+        if uv_set is None:
+            uv_set = self.get_current_uv_set()
+        index = self.get_spatial_index()
+        if closest is None:
+            closest = index.closest_points(points)
+        _, triangle_ids, weights, _ = closest
+
+        uv_data = self.get_uv_arrays(uv_set) if uv_set else None
+        if uv_data is None or not len(uv_data[0]):
+            return numpy.full((len(triangle_ids), 2), numpy.nan)
+        uvs, uv_counts, uv_ids = uv_data
+        polygon_counts = self.get_face_arrays()[0]
+        # the uv id of each face vertex, faces have all or no uvs
+        corner_uvs = numpy.full(polygon_counts.sum(), -1, dtype=numpy.int64)
+        corner_uvs[numpy.repeat(uv_counts > 0, polygon_counts)] = uv_ids
+
+        uv_ids = corner_uvs[index.triangle_corners[triangle_ids]]
+        result = numpy.einsum('ni,nij->nj', weights, uvs[uv_ids])
+        result[(uv_ids < 0).any(axis=1)] = numpy.nan
+        return result
+
     @property
     def num_polygons(self):
         """
@@ -211,6 +438,13 @@ class Mesh(DagNode):
         Query vertices indexes for all polygons in a list
         Returns:
         """
+        if numpy is not None:
+            counts, connects = self.get_face_arrays()
+            connects = connects.tolist()
+            ends = numpy.cumsum(counts).tolist()
+            return [connects[end - count:end]
+                    for count, end in zip(counts.tolist(), ends)]
+
         num_polygon = self.num_polygons
         vtx_index_array = OpenMaya.MIntArray()
         polygon_vertices_list = []
@@ -233,6 +467,8 @@ class Mesh(DagNode):
         Returns:
             MPointArray
         """
+        if as_list and numpy is not None:
+            return self.get_point_array(space=space).tolist()
         points = OpenMaya.MPointArray()
         self.fn_node.getPoints(points, utils.get_space(space))
         if not as_list:
@@ -249,12 +485,17 @@ class Mesh(DagNode):
         TODO support undo
 
         Args:
-            points (MPointArray): The points to set.
+            points (MPointArray or list or array): The points to set.
             space (str): transform space in which to set the points.
 
         Returns:
             None
         """
+        if numpy is not None and (
+                isinstance(points, numpy.ndarray) or
+                _is_point_list(points)):
+            self.set_point_array(points, space=space)
+            return
         if isinstance(points, (list, tuple)):
             point_array = OpenMaya.MPointArray()
             for each in points:
@@ -311,16 +552,8 @@ class Mesh(DagNode):
             uv_set = self.get_current_uv_set()
             if not uv_set:
                 return
-        u_array = OpenMaya.MFloatArray()
-        v_array = OpenMaya.MFloatArray()
-        self.fn_node.getUVs(u_array, v_array, uv_set)
-        u_list = []
-        v_list = []
-        for i in range(u_array.length()):
-            u_list.append(u_array[i])
-        for i in range(v_array.length()):
-            v_list.append(v_array[i])
-        return u_list, v_list
+        u_array, v_array = self._get_api2_fn().getUVs(uv_set)
+        return list(u_array), list(v_array)
 
     def get_assigned_uvs(self, uv_set=None):
         """
@@ -335,16 +568,8 @@ class Mesh(DagNode):
             uv_set = self.get_current_uv_set()
             if not uv_set:
                 return
-        uv_counts_array = OpenMaya.MIntArray()
-        uv_ids_array = OpenMaya.MIntArray()
-        self.fn_node.getAssignedUVs(uv_counts_array, uv_ids_array, uv_set)
-        uv_counts_list = []
-        uv_ids_list = []
-        for i in range(uv_counts_array.length()):
-            uv_counts_list.append(uv_counts_array[i])
-        for i in range(uv_ids_array.length()):
-            uv_ids_list.append(uv_ids_array[i])
-        return uv_counts_list, uv_ids_list
+        uv_counts, uv_ids = self._get_api2_fn().getAssignedUVs(uv_set)
+        return list(uv_counts), list(uv_ids)
 
     def clear_uvs(self, uv_set=None):
         """
@@ -376,13 +601,8 @@ class Mesh(DagNode):
             uv_set = self.get_current_uv_set()
             if not uv_set:
                 return
-        u_array = OpenMaya.MFloatArray()
-        for u in u_list:
-            u_array.append(u)
-        v_array = OpenMaya.MFloatArray()
-        for v in v_list:
-            v_array.append(v)
-        self.fn_node.setUVs(u_array, v_array, uv_set)
+        self._get_api2_fn().setUVs(
+            _to_list(u_list), _to_list(v_list), uv_set)
 
     def assign_uvs(self, uv_counts_list, uv_ids_list, uv_set=None):
         """
@@ -402,26 +622,35 @@ class Mesh(DagNode):
             uv_set = self.get_current_uv_set()
             if not uv_set:
                 return
-        uv_counts_array = OpenMaya.MIntArray()
-        for u in uv_counts_list:
-            uv_counts_array.append(u)
-        uv_ids_array = OpenMaya.MIntArray()
-        for v in uv_ids_list:
-            uv_ids_array.append(v)
-        self.fn_node.assignUVs(uv_counts_array, uv_ids_array, uv_set)
+        self._get_api2_fn().assignUVs(
+            _to_list(uv_counts_list), _to_list(uv_ids_list), uv_set)
 
     def export_creation_data(self):
+        """
+        Export the data to create this mesh. The geometry is stored in flat
+        number lists (points, polygon counts and polygon connects), which the
+        binary data container stores as typed arrays.
+
+        Returns:
+            dict: The creation data
+        """
         data = {}
-        vtx_array = OpenMaya.MFloatPointArray()
-        self.fn_node.getPoints(vtx_array, OpenMaya.MSpace.kObject)
-        vertex_positions = []
-        for i in range(vtx_array.length()):
-            vertex_positions.append([vtx_array[i].x, vtx_array[i].y, vtx_array[i].z])
-        polygon_vertices = self.polygon_vertices
+        if numpy is not None:
+            points = self.get_point_array(space='object').ravel().tolist()
+            polygon_counts, polygon_connects = [
+                x.tolist() for x in self.get_face_arrays()]
+        else:
+            fn_mesh = self._get_api2_fn()
+            points = [
+                x for p in fn_mesh.getPoints(OpenMaya2.MSpace.kObject)
+                for x in (p.x, p.y, p.z)]
+            polygon_counts, polygon_connects = [
+                list(x) for x in fn_mesh.getVertices()]
 
         parent = self.get_parent()
-        data['vertex_positions'] = vertex_positions
-        data['polygon_vertices'] = polygon_vertices
+        data['points'] = points
+        data['polygon_counts'] = polygon_counts
+        data['polygon_connects'] = polygon_connects
         current_uvs = self.get_uvs()
         assigned_uvs = self.get_assigned_uvs()
         if current_uvs:
@@ -448,6 +677,11 @@ class Mesh(DagNode):
 
 
         """
+        if spatial_index is not None:
+            # query all the vertices at once
+            index = other_mesh.get_spatial_index()
+            return index.get_association(self.get_point_array())
+
         mesh_iter = OpenMaya.MItMeshVertex(self.dag_path)
         mesh_iter.reset()
         vertex_association = {}
@@ -20,15 +20,238 @@ import maya.OpenMaya as OpenMaya
 
 # Package imports
 from mhy.python.core.compatible import format_arg_spec
-from mhy.maya.nodezoo._manager import _NODE_TYPE_LIB
-from mhy.maya.nodezoo.exceptions import NodeClassInitError, MayaObjectError
-from mhy.maya.nodezoo._mayaUtils import get_api_object, is_valid_m_object_handle
-from mhy.maya.nodezoo.constant import kMObjectHandleStr, kMFnNodeStr, nodezoo_tag_attr
+from mhy.maya.nodezoo._manager import _NODE_TYPE_LIB, _NODE_CLASS_CACHE
+from mhy.maya.nodezoo.exceptions import NodeClassInitError, MayaObjectError, \
+    ObjectNotFoundError
+from mhy.maya.nodezoo._mayaUtils import get_api_object, get_selection_object, \
+    is_valid_m_object_handle
+from mhy.maya.nodezoo.constant import kMObjectHandleStr, kMFnNodeStr, \
+    kMDagPathStr, nodezoo_tag_attr
 
 NODE_TYPE_ATTR = '__NODETYPE__'
 CUSTOM_TYPE_ATTR = '__CUSTOMTYPE__'
 
 
+def _get_mobject_and_internal_data(node):
+    """Returns the MObject of an api object and the internal data of
+    a Node instance wrapping it."""
+    data = {}
+    if isinstance(node, OpenMaya.MDagPath):
+        data['MDagPath'] = node
+        node = node.node()
+        data['MObjectHandle'] = OpenMaya.MObjectHandle(node)
+
+    elif isinstance(node, OpenMaya.MObjectHandle):
+        data['MObjectHandle'] = node
+        node = node.object()
+        if node.hasFn(OpenMaya.MFn.kDagNode):
+            dag_path = OpenMaya.MDagPath()
+            OpenMaya.MDagPath.getAPathTo(node, dag_path)
+            data['MDagPath'] = dag_path
+
+    elif isinstance(node, OpenMaya.MObject):
+        data['MObjectHandle'] = OpenMaya.MObjectHandle(node)
+        if node.hasFn(OpenMaya.MFn.kDagNode):
+            dag_path = OpenMaya.MDagPath()
+            OpenMaya.MDagPath.getAPathTo(node, dag_path)
+            data['MDagPath'] = dag_path
+    else:
+        raise NodeClassInitError('{} is not supported object.'
+                                 'supported objects are MDagPath'
+                                 'and MObject'.format(node))
+    return node, data
+
+
+class _NodeCache(object):
+    """
+    Identity map of the Node instances, so wrapping the same maya node
+    again returns the existing instance instead of resolving the node
+    and its class again.
+
+    Instances are mapped by the hash code of their MObjectHandle, and
+    names by the hash code of the node they resolved to. A hit is only
+    returned if the instance is still valid, its dag path still leads to
+    the node and, for names, the node is still called by the name.
+    Node deleted and renamed callbacks evict the entries of the changed
+    nodes, and reparented callbacks the entries of the whole hierarchy
+    below the reparented node.
+    Instanced dag nodes are not cached as their instances share an MObject.
+    """
+
+    def __init__(self):
+        # (hash code : Node instance) pairs
+        self.__nodes = {}
+        # (name : hash code) pairs and their (hash code : names) reverse map
+        self.__names = {}
+        self.__node_names = {}
+        self.__callback_ids = []
+
+    def __len__(self):
+        return len(self.__nodes)
+
+    @staticmethod
+    def _get_names(node):
+        """Returns the short and long names a cached node is called by."""
+        data = node.internal_data
+        dag_path = data.get(kMDagPathStr)
+        if dag_path is not None:
+            if not dag_path.isValid():
+                return ()
+            return dag_path.partialPathName(), dag_path.fullPathName()
+        handle = data[kMObjectHandleStr]
+        return OpenMaya.MFnDependencyNode(handle.object()).name(),
+
+    def get(self, obj, dag_path=None):
+        """
+        Returns the cached instance of an MObject, or None.
+        Args:
+            obj(MObject): A node object
+            dag_path(MDagPath or None): A fresh dag path of the node.
+                The cached instance is dropped if its path differs.
+
+        Returns:
+            Node or None: The cached instance
+
+        """
+        handle = OpenMaya.MObjectHandle(obj)
+        node = self.__nodes.get(handle.hashCode())
+        if node is None:
+            return
+        data = node.internal_data
+        cached_handle = data[kMObjectHandleStr]
+        if is_valid_m_object_handle(cached_handle) and \
+           cached_handle.object() == obj:
+            cached_path = data.get(kMDagPathStr)
+            if cached_path is None:
+                return node
+            if cached_path.isValid() and (
+                    dag_path is None or
+                    cached_path.fullPathName() == dag_path.fullPathName()):
+                return node
+        self.evict(handle.hashCode())
+
+    def get_by_name(self, name):
+        """Returns the cached instance a name resolved to, or None."""
+        if '.' in name:
+            name = name.split('.')[0]
+        key = self.__names.get(name)
+        if key is None:
+            return
+        node = self.__nodes.get(key)
+        if node is not None and \
+           is_valid_m_object_handle(node.internal_data[kMObjectHandleStr]) \
+           and name in self._get_names(node):
+            return node
+        self.__names.pop(name, None)
+
+    def add(self, node, name=None):
+        """
+        Cache a Node instance, and optionally a name resolved to it.
+        Args:
+            node(Node): A new Node instance
+            name(str or None): The name resolved to the node
+
+        Returns:
+            Node: The cached instance
+
+        """
+        data = node.internal_data
+        dag_path = data.get(kMDagPathStr)
+        if dag_path is not None and dag_path.isInstanced():
+            return node
+        if not self.__callback_ids:
+            self.__add_callbacks()
+        key = data[kMObjectHandleStr].hashCode()
+        self.__nodes[key] = node
+        if name:
+            if '.' in name:
+                name = name.split('.')[0]
+            self.__names[name] = key
+            self.__node_names.setdefault(key, set()).add(name)
+        return node
+
+    def evict(self, key, names_only=False):
+        """
+        Remove a node and its names from the cache.
+        Args:
+            key(int): The hash code of the node
+            names_only(bool): If only remove the names of the node
+
+        """
+        if not names_only:
+            self.__nodes.pop(key, None)
+        for name in self.__node_names.pop(key, ()):
+            if self.__names.get(name) == key:
+                del self.__names[name]
+
+    def clear(self, remove_callbacks=False):
+        """
+        Clear the cache.
+        Args:
+            remove_callbacks(bool): If remove the maya callbacks as well
+
+        """
+        self.__nodes.clear()
+        self.__names.clear()
+        self.__node_names.clear()
+        if remove_callbacks:
+            for callback_id in self.__callback_ids:
+                OpenMaya.MMessage.removeCallback(callback_id)
+            self.__callback_ids = []
+
+    # --- callbacks
+
+    def __add_callbacks(self):
+        self.__callback_ids = [
+            OpenMaya.MDGMessage.addNodeRemovedCallback(
+                self.__node_removed, 'dependNode'),
+            OpenMaya.MNodeMessage.addNameChangedCallback(
+                OpenMaya.MObject(), self.__node_renamed),
+            OpenMaya.MDagMessage.addParentAddedCallback(self.__dag_changed),
+            OpenMaya.MDagMessage.addParentRemovedCallback(self.__dag_changed),
+            OpenMaya.MSceneMessage.addCallback(
+                OpenMaya.MSceneMessage.kBeforeNew, self.__scene_changed),
+            OpenMaya.MSceneMessage.addCallback(
+                OpenMaya.MSceneMessage.kBeforeOpen, self.__scene_changed)]
+
+    def __node_removed(self, obj, *args):
+        if self.__nodes:
+            self.evict(OpenMaya.MObjectHandle(obj).hashCode())
+
+    def __node_renamed(self, obj, *args):
+        if self.__names:
+            self.evict(OpenMaya.MObjectHandle(obj).hashCode(), names_only=True)
+
+    def __dag_changed(self, child, *args):
+        if not self.__nodes:
+            return
+        # the cached paths of all the nodes below the child are stale
+        pending = [child.node()]
+        while pending:
+            obj = pending.pop()
+            self.evict(OpenMaya.MObjectHandle(obj).hashCode())
+            fn_node = OpenMaya.MFnDagNode(obj)
+            for i in range(fn_node.childCount()):
+                pending.append(fn_node.child(i))
+
+    def __scene_changed(self, *args):
+        self.clear()
+
+
+_NODE_CACHE = _NodeCache()
+
+
+def clear_cache(remove_callbacks=False):
+    """
+    Clear the cached Node instances and node classes.
+    Args:
+        remove_callbacks(bool): If remove the maya callbacks of the cache
+
+    """
+    _NODE_CACHE.clear(remove_callbacks=remove_callbacks)
+    _NODE_CLASS_CACHE.clear()
+
+
 class _NodeMeta(type):
     """
     Metaclass that register node types to a cached dictionary
@@ -48,6 +271,7 @@ class _NodeMeta(type):
                          NODE_TYPE_ATTR, CUSTOM_TYPE_ATTR, class_name))
 
             _NODE_TYPE_LIB[node_type] = cls_obj
+            _NODE_CLASS_CACHE.clear()
         return cls_obj
 
     def __repr__(cls):
@@ -72,38 +296,12 @@ class Node(six.with_metaclass(_NodeMeta)):
             **kwargs:
         """
 
-        def _get_mobject_and_internal_data(node):
-            data = {}
-            if isinstance(node, OpenMaya.MDagPath):
-                data['MDagPath'] = node
-                node = node.node()
-                data['MObjectHandle'] = OpenMaya.MObjectHandle(node)
-
-            elif isinstance(node, OpenMaya.MObjectHandle):
-                data['MObjectHandle'] = node
-                node = node.object()
-                if node.hasFn(OpenMaya.MFn.kDagNode):
-                    dag_path = OpenMaya.MDagPath()
-                    OpenMaya.MDagPath.getAPathTo(node, dag_path)
-                    data['MDagPath'] = dag_path
-
-            elif isinstance(node, OpenMaya.MObject):
-                data['MObjectHandle'] = OpenMaya.MObjectHandle(node)
-                if node.hasFn(OpenMaya.MFn.kDagNode):
-                    dag_path = OpenMaya.MDagPath()
-                    OpenMaya.MDagPath.getAPathTo(node, dag_path)
-                    data['MDagPath'] = dag_path
-            else:
-                raise NodeClassInitError('{} is not supported object.'
-                                         'supported objects are MDagPath'
-                                         'and MObject'.format(node))
-            return node, data
-
         assert args, 'Required one argument, got None'
         assert len(args) == 1, 'Required one argument, got {}'.format(len(args))
         arg_obj = args[0]
 
         obj = None
+        name = None
         # We support Node instance duplication
         if isinstance(arg_obj, Node):
             if 'MObjectHandle' in arg_obj.__internal_data:
@@ -114,19 +312,94 @@ class Node(six.with_metaclass(_NodeMeta)):
         elif hasattr(arg_obj, '__module__') and arg_obj.__module__.startswith('maya.OpenMaya'):
             obj = arg_obj
         elif isinstance(arg_obj, six.string_types):
+            node = _NODE_CACHE.get_by_name(arg_obj)
+            if node is not None:
+                return node
+            name = arg_obj
             obj = get_api_object(arg_obj)
         else:
             raise NodeClassInitError('{} is not either a Node object or string'.format(arg_obj))
-        obj, internal_data = _get_mobject_and_internal_data(obj)
-        node_cls = Node._get_cls_from_object(obj)
-        target_cls = object.__new__(node_cls)
-        target_cls.__internal_data = internal_data
-        return target_cls
+        return Node._from_api_object(obj, name=name)
 
     # ------------------------------------------------------------------------
     # Class methods
     # ------------------------------------------------------------------------
 
+    @staticmethod
+    def _from_api_object(obj, name=None):
+        """
+        Get the Node instance of an api object. The cached instance is
+        returned if the node is already wrapped.
+        Args:
+            obj(MObject or MDagPath or MObjectHandle): An api object
+            name(str or None): The name resolved to the api object
+
+        Returns:
+            Node: The Node instance
+
+        """
+        obj, internal_data = _get_mobject_and_internal_data(obj)
+        node = _NODE_CACHE.get(obj, dag_path=internal_data.get(kMDagPathStr))
+        if node is None:
+            node_cls = Node._get_cls_from_object(obj)
+            node = object.__new__(node_cls)
+            node.__internal_data = internal_data
+        return _NODE_CACHE.add(node, name=name)
+
+    @classmethod
+    def from_names(cls, names):
+        """
+        Get the Node instances of many names. The names not cached yet are
+        resolved through one selection list instead of one per name.
+
+          Example Usage:
+
+          >>> joints = Node.from_names(cmds.ls(type='joint'))
+
+        Args:
+            names(list): Node names. Other objects are passed to Node().
+
+        Returns:
+            list: The Node instances in the order of the names
+
+        Raises:
+            ObjectNotFoundError: If a name matches no object or
+                more than one object
+
+        """
+        nodes = [None] * len(names)
+        # (name : indices) pairs of the names to resolve
+        pending = {}
+        for i, name in enumerate(names):
+            if not isinstance(name, six.string_types):
+                nodes[i] = Node(name)
+                continue
+            node = _NODE_CACHE.get_by_name(name)
+            if node is None:
+                pending.setdefault(name, []).append(i)
+            else:
+                nodes[i] = node
+
+        sel = OpenMaya.MSelectionList()
+        for name, indices in pending.items():
+            node_name = name.split('.')[0]
+            count = sel.length()
+            # uuids are resolved by Node()
+            if node_name and ('->' in node_name or '-' not in node_name):
+                try:
+                    sel.add(node_name)
+                except RuntimeError:
+                    raise ObjectNotFoundError('No object named {}'.format(name))
+            if sel.length() == count + 1:
+                node = Node._from_api_object(
+                    get_selection_object(sel, count), name=name)
+            else:
+                # ambiguous names and objects already in the selection list
+                node = Node(name)
+            for i in indices:
+                nodes[i] = node
+        return nodes
+
     @classmethod
     def _pre_creation_callback(cls, *args, **kwargs):
         return args, kwargs
@@ -287,6 +560,8 @@ class Node(six.with_metaclass(_NodeMeta)):
             attr = '{}.{}'.format(node, nodezoo_tag_attr)
             cmds.setAttr(attr, typ, type='string')
             cmds.setAttr(attr, lock=True)
+            # The cached instance is of the class before tagging
+            _NODE_CACHE.evict(Node(node).maya_handle.hashCode())
             return cls(node)
         else:
             raise RuntimeError('{} is not a custom node type.'.format(cls))
@@ -428,6 +703,10 @@ class Node(six.with_metaclass(_NodeMeta)):
                 type_name = dep_node.typeName()
             if type_name in _NODE_TYPE_LIB:
                 return _NODE_TYPE_LIB[type_name]
+            # The fallback classes only depend on the node type
+            cls = _NODE_CLASS_CACHE.get(type_name)
+            if cls is not None:
+                return cls
             if obj.hasFn(OpenMaya.MFn.kTransform):
                 cls = _NODE_TYPE_LIB['transform']
             elif obj.hasFn(OpenMaya.MFn.kWeightGeometryFilt) or obj.hasFn(OpenMaya.MFn.kGeometryFilt):
@@ -436,6 +715,7 @@ class Node(six.with_metaclass(_NodeMeta)):
                 cls = _NODE_TYPE_LIB['dagNode']
             elif obj.hasFn(OpenMaya.MFn.kDependencyNode):
                 cls = _NODE_TYPE_LIB['dependencyNode']
+            _NODE_CLASS_CACHE[type_name] = cls
         else:
             raise RuntimeError(
                 "Could not determine type for object of type {}".format(obj.apiTypeStr)
@@ -9,12 +9,22 @@ import maya.cmds as cmds
 import maya.mel as mel
 import maya.OpenMayaAnim as OpenMayaAnim
 import maya.OpenMaya as OpenMaya
+import maya.api.OpenMaya as OpenMaya2
+import maya.api.OpenMayaAnim as OpenMayaAnim2
 
 import mhy.python.core.utils as pyutil
 from mhy.maya.nodezoo.node import Node, GeometryFilter, DependencyNode, DagNode
 from mhy.maya.nodezoo.constant import DataFormat, SurfaceAssociation
 from mhy.maya.nodezoo.node.mesh import Mesh
 
+try:
+    import numpy
+    from mhy.maya.weight_matrix import WeightMatrix
+except ImportError:
+    # bulk weight access requires numpy
+    numpy = None
+    WeightMatrix = None
+
 
 MISSING_INF_GRP = '__MISSING_INFS__'
 
@@ -292,7 +302,110 @@ class SkinCluster(GeometryFilter):
 
         return data
 
+    def _get_weight_api_objects(self):
+        """
+        Get the api 2.0 objects to access the weights of all components
+        in bulk.
+
+        Returns:
+            tuple: The MFnSkinCluster, the MDagPath of the deformed shape,
+                the complete component MObject and the number of
+                components. The component is None if the shape type
+                is not supported.
+
+        """
+        sel = OpenMaya2.MSelectionList()
+        sel.add(self.name)
+        sel.add(self.output_objects[0].dag_path.fullPathName())
+        fn_skin = OpenMayaAnim2.MFnSkinCluster(sel.getDependNode(0))
+        dag = sel.getDagPath(1)
+
+        component = None
+        count = 0
+        if dag.hasFn(OpenMaya2.MFn.kMesh):
+            count = OpenMaya2.MFnMesh(dag).numVertices
+            fn_comp = OpenMaya2.MFnSingleIndexedComponent()
+            component = fn_comp.create(OpenMaya2.MFn.kMeshVertComponent)
+            fn_comp.setCompleteData(count)
+        elif dag.hasFn(OpenMaya2.MFn.kNurbsCurve):
+            count = OpenMaya2.MFnNurbsCurve(dag).numCVs
+            fn_comp = OpenMaya2.MFnSingleIndexedComponent()
+            component = fn_comp.create(OpenMaya2.MFn.kCurveCVComponent)
+            fn_comp.setCompleteData(count)
+        elif dag.hasFn(OpenMaya2.MFn.kNurbsSurface):
+            fn_surface = OpenMaya2.MFnNurbsSurface(dag)
+            count = fn_surface.numCVsInU * fn_surface.numCVsInV
+            fn_comp = OpenMaya2.MFnDoubleIndexedComponent()
+            component = fn_comp.create(OpenMaya2.MFn.kSurfaceCVComponent)
+            fn_comp.setCompleteData(
+                fn_surface.numCVsInU, fn_surface.numCVsInV)
+        return fn_skin, dag, component, count
+
+    def get_weight_matrix(self):
+        """
+        Get the weights of all components as a sparse weight matrix.
+        The weights are queried in one api call. Requires numpy.
+
+        Returns:
+            WeightMatrix
+
+        """
+        if WeightMatrix is None:
+            raise RuntimeError('Weight matrix requires numpy.')
+        influences = self.influences
+        fn_skin, dag, component, _ = self._get_weight_api_objects()
+        if component is None:
+            weights = self.get_weights_data()
+        else:
+            weights = numpy.array(fn_skin.getWeights(dag, component)[0])
+        return WeightMatrix.from_dense(weights, influences)
+
+    def set_weight_matrix(self, matrix, normalize=False):
+        """
+        Set the weights of all components from a sparse weight matrix.
+        Influences not in this skin cluster yet are added first, then the
+        weights are set in one api call. Requires numpy.
+
+        Args:
+            matrix(WeightMatrix): The weights to set.
+            normalize(bool): If True, normalize the weights of each
+                component after setting.
+
+        Raises:
+            ValueError: If influences with weights are missing in the
+                scene or the component count doesn't match.
+
+        """
+        if WeightMatrix is None:
+            raise RuntimeError('Weight matrix requires numpy.')
+        influences = self.influences
+        for inf in matrix.influences:
+            if inf not in influences and cmds.objExists(inf):
+                self.add_influence(inf, weight=0)
+        influences = self.influences
+        matrix = matrix.reorder(influences)
+
+        fn_skin, dag, component, count = self._get_weight_api_objects()
+        if component is None:
+            self._set_weight_data_by_plugs(
+                matrix.to_list(), (influences, self.influence_indexes()))
+            return
+        if count != matrix.num_vertices:
+            raise ValueError(
+                'Component count mismatch: {} has {}, data has {}'.format(
+                    dag.partialPathName(), count, matrix.num_vertices))
+
+        influence_indices = OpenMaya2.MIntArray(range(len(influences)))
+        weights = OpenMaya2.MDoubleArray(matrix.to_dense().ravel().tolist())
+        fn_skin.setWeights(
+            dag, component, influence_indices, weights, normalize)
+
     def get_weights_data(self):
+        if WeightMatrix is not None:
+            fn_skin, dag, component, _ = self._get_weight_api_objects()
+            if component is not None:
+                return list(fn_skin.getWeights(dag, component)[0])
+
         dag = self.output_objects[0].dag_path
         num_influences = len(self.influences)
         inf_count_util = OpenMaya.MScriptUtil(num_influences)
@@ -352,6 +465,27 @@ class SkinCluster(GeometryFilter):
         influence_names, influences_indexes = influences
         if not influence_names:
             return
+
+        # set the weights in bulk if all the influences are in place
+        if WeightMatrix is not None and \
+           set(influence_names).issubset(self.influences):
+            matrix = WeightMatrix.from_dense(data, influence_names)
+            if matrix.num_vertices == self._get_weight_api_objects()[3]:
+                self.set_weight_matrix(matrix)
+                return
+        self._set_weight_data_by_plugs(data, influences, index_map)
+
+    def _set_weight_data_by_plugs(self, data, influences, index_map=None):
+        """
+        Set weight data to skin cluster weight plugs one by one.
+        Args:
+            data(list): A list of weights of length (num_components * num_influences)
+            influences(tuple): Influence tuple: influence names and indexes
+            index_map(None or dict):
+        Returns:
+
+        """
+        influence_names, influences_indexes = influences
         num_influences = len(influence_names)
         num_components = int(len(data)/num_influences)
 
@@ -381,8 +515,9 @@ class SkinCluster(GeometryFilter):
             data:
             name_map:
             filter_func(callable): A callable object will be used to check the influence as filter
-            normalize(bool): If true, will assign weight using maya.cmds.skinPercent
-            so the weight will be normalized automatically
+            normalize(bool): If true, the other weights of each vertex are scaled
+            so the weight will be normalized automatically. Without numpy, weights
+            are assigned using maya.cmds.skinPercent
             weight_threshold(float): Skip setting weight under a given value
 
         """
@@ -399,6 +534,13 @@ class SkinCluster(GeometryFilter):
             OpenMaya.MGlobal.displayError("Failed to find weightList data")
             return
 
+        if WeightMatrix is not None:
+            self._merge_weight_matrix(
+                WeightMatrix.from_data(data), name_map=name_map,
+                filter_func=filter_func, normalize=normalize,
+                weight_threshold=weight_threshold)
+            return
+
         influence_map = {inf: idx for inf, idx in zip(inf_idx_lists[0], inf_idx_lists[1])}
         num_inf = len(influence_map)
         outputs = self.output_objects
@@ -437,6 +579,52 @@ class SkinCluster(GeometryFilter):
                 else:
                     self.weightList[vtx_index].weights[target_index].value = value
 
+    def _merge_weight_matrix(self, matrix, name_map=None, filter_func=None,
+                             normalize=True, weight_threshold=None):
+        """
+        Merge weights with array math. See merge() for the arguments.
+        """
+        if not self.output_objects:
+            return
+
+        names = {}
+        for inf in matrix.influences:
+            if filter_func is not None and not filter_func(inf):
+                continue
+            key = inf
+            if name_map is not None:
+                key = name_map.get(key, key)
+            if not cmds.objExists(key):
+                # If the influence object is not in the scene, skip
+                continue
+            names[inf] = key
+        if not names:
+            return
+
+        matrix = matrix.rename(names)
+        influences = self.influences
+        for key in names.values():
+            if key not in influences:
+                self.add_influence(key)
+
+        current = self.get_weight_matrix()
+        if matrix.num_vertices > current.num_vertices:
+            matrix = WeightMatrix(
+                matrix.indptr[:current.num_vertices + 1],
+                matrix.indices[:matrix.indptr[current.num_vertices]],
+                matrix.data[:matrix.indptr[current.num_vertices]],
+                matrix.influences)
+        elif matrix.num_vertices < current.num_vertices:
+            OpenMaya.MGlobal.displayError(
+                "Weight data has {} components, {} has {}".format(
+                    matrix.num_vertices, self.name, current.num_vertices))
+            return
+
+        merged = current.merge(
+            matrix, influences=list(names.values()),
+            weight_threshold=weight_threshold, normalize=normalize)
+        self.set_weight_matrix(merged)
+
     @classmethod
     def _pre_creation_callback(cls, *args, **kwargs):
         return args, kwargs
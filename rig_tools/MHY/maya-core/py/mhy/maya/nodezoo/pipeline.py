@@ -0,0 +1,402 @@
+"""
+Pipelined reading and writing of nodezoo data files.
+
+Extracting node data needs Maya and runs on the main thread, but
+serialization, compression and disk I/O don't. ``ExportPipeline`` writes
+data files on background worker threads while the main thread extracts
+the next node. The number of pending files is bounded, so the main
+thread blocks instead of piling up node data in memory.
+
+On the import side, ``iter_data_files()`` reads and decompresses the
+next files in the background while the main thread applies the
+current one. ``iter_prefetched()`` does the same for any iterator,
+e.g. streamed node records.
+
+Usage:
+
+.. code:: python
+
+    with ExportPipeline(workers=2) as pipeline:
+        for node in nodes:
+            pipeline.submit({'nodes': [node.export()]}, path, compress=True)
+    print(pipeline.report())
+
+    for file_path, data, error in iter_data_files(paths):
+        ...
+"""
+
+import os
+import json
+import gzip
+import time
+import threading
+import traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import mhy.maya.data_container as container
+from mhy.python.core.compatible import gzip_export
+
+
+__all__ = [
+    'read_data_file', 'write_data_file', 'ExportPipeline', 'ExportResult',
+    'iter_data_files', 'iter_prefetched']
+
+
+DEFAULT_WORKERS = 2
+
+
+def read_data_file(file_path):
+    """
+    Query the dictionary information from a data file path.
+    Binary container files are detected by their file header.
+    Args:
+        file_path(str):
+
+    Returns:
+        dict: Data
+
+    """
+    if container.is_binary_data_file(file_path):
+        data = container.read_node_data(file_path)
+    elif file_path.endswith('.gnzd'):
+        with gzip.open(file_path, 'r') as f:
+            json_bytes = f.read()
+        json_obj = json_bytes.decode('utf-8')
+        data = json.loads(json_obj)
+    else:
+        with open(file_path) as f:
+            data = json.load(f)
+    return data
+
+
+def write_data_file(data, file_path, compress=True):
+    """
+    Write data to a data file path. The format is resolved from the
+    file extension: a binary container for .bnzd files, otherwise
+    gzip compressed or indented json.
+    Args:
+        data(dict): The data to write
+        file_path(str): A disk file path
+        compress(bool): If compress data before writing to the disk
+
+    """
+    dir_name = os.path.dirname(file_path)
+    if dir_name and not os.path.isdir(dir_name):
+        try:
+            os.makedirs(dir_name)
+        except OSError:
+            # created by another worker in the meantime
+            if not os.path.isdir(dir_name):
+                raise
+
+    if file_path.endswith(container.BINARY_EXT):
+        container.write_node_data(data, file_path, compress=compress)
+    elif compress:
+        gzip_export(json.dumps(data), file_path)
+    else:
+        with open(file_path, "w") as f:
+            f.write(json.dumps(data, indent=4))
+
+
+class ExportResult(object):
+    """The result of writing a data file."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.error = None
+        self.time = 0
+
+    def __repr__(self):
+        if self.error:
+            return 'ExportResult ({}: failed)'.format(self.file_path)
+        return 'ExportResult ({}: {:.2f}s)'.format(self.file_path, self.time)
+
+    __str__ = __repr__
+
+    @property
+    def success(self):
+        """
+        If True, the file is written.
+
+        :type: bool
+        """
+        return self.error is None
+
+
+class ExportPipeline(object):
+    """
+    Writes data files on background worker threads.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=None):
+        """
+        Args:
+            workers(int): The number of worker threads. If 0, files are
+                written on the calling thread.
+            max_pending(int or None): The max number of files waiting
+                to be written before submit() blocks.
+                Defaults to twice the number of workers.
+
+        """
+        self.__workers = max(int(workers), 0)
+        if max_pending is None:
+            max_pending = self.__workers * 2
+        self.__queue = queue.Queue(maxsize=max(max_pending, 1))
+        self.__threads = []
+        self.__results = []
+        self.__start_time = time.time()
+        self.__time = None
+
+        for _ in range(self.__workers):
+            thread = threading.Thread(target=self.__worker)
+            thread.daemon = True
+            thread.start()
+            self.__threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.join()
+
+    @property
+    def results(self):
+        """
+        The results of all submitted files in submission order.
+
+        :type: list
+        """
+        return list(self.__results)
+
+    @property
+    def failed(self):
+        """
+        The results of files failed writing.
+
+        :type: list
+        """
+        return [x for x in self.__results if x.error is not None]
+
+    @property
+    def time(self):
+        """
+        The wall-clock time from creation until all files are written,
+        or until now if the pipeline is not joined yet.
+
+        :type: float
+        """
+        if self.__time is not None:
+            return self.__time
+        return time.time() - self.__start_time
+
+    @staticmethod
+    def __write(data, result, compress):
+        """Writes a data file and records the result."""
+        start = time.time()
+        try:
+            write_data_file(data, result.file_path, compress=compress)
+        except Exception:
+            result.error = traceback.format_exc()
+        result.time = time.time() - start
+
+    def __worker(self):
+        """Writes data files from the queue until a stop token."""
+        while True:
+            task = self.__queue.get()
+            try:
+                if task is None:
+                    return
+                self.__write(*task)
+            finally:
+                self.__queue.task_done()
+
+    def submit(self, data, file_path, compress=True):
+        """
+        Queue node data to be written to a file. Blocks while the
+        pipeline is full.
+
+        Args:
+            data(dict): The data to write. Must not be edited afterwards.
+            file_path(str): A disk file path
+            compress(bool): If compress data before writing to the disk
+
+        Returns:
+            ExportResult: The result, filled in once the file is written.
+
+        """
+        if self.__time is not None:
+            raise RuntimeError('Export pipeline is already joined.')
+        result = ExportResult(file_path)
+        self.__results.append(result)
+        if self.__workers:
+            self.__queue.put((data, result, compress))
+        else:
+            self.__write(data, result, compress)
+        return result
+
+    def join(self):
+        """
+        Wait for all submitted files to be written and stop the workers.
+
+        Returns:
+            list: The results of all submitted files.
+
+        """
+        if self.__time is None:
+            for _ in self.__threads:
+                self.__queue.put(None)
+            for thread in self.__threads:
+                thread.join()
+            self.__time = time.time() - self.__start_time
+        return self.results
+
+    def report(self):
+        """
+        Returns:
+            str: A summary of the written and failed files.
+
+        """
+        lines = ['Exported {} of {} file(s) in {:.2f}s'.format(
+            len(self.__results) - len(self.failed), len(self.__results),
+            self.time)]
+        for result in self.failed:
+            lines.append('Failed exporting {}:\n{}'.format(
+                result.file_path, result.error))
+        return '\n'.join(lines)
+
+
+def iter_data_files(files, workers=DEFAULT_WORKERS, prefetch=None):
+    """
+    Read data files in order while prefetching the next files
+    on background threads.
+
+    Args:
+        files(list): A list of data file paths.
+        workers(int): The number of reader threads. If 0, files are
+            read on demand on the calling thread.
+        prefetch(int or None): The max number of files read ahead.
+            Defaults to the number of workers.
+
+    Yields:
+        tuple: The file path, the data (None if failed) and
+            the error message (None if succeeded).
+
+    """
+    files = list(files)
+
+    def read(file_path):
+        try:
+            return read_data_file(file_path), None
+        except Exception:
+            return None, traceback.format_exc()
+
+    if not workers:
+        for file_path in files:
+            data, error = read(file_path)
+            yield file_path, data, error
+        return
+
+    slots = [None] * len(files)
+    events = [threading.Event() for _ in files]
+    # limits the number of files read but not consumed yet
+    window = threading.Semaphore(max(prefetch or workers, 1))
+    lock = threading.Lock()
+    state = {'next': 0, 'stop': False}
+
+    def worker():
+        while True:
+            # slots are taken in file order so the next file to consume
+            # is always read first
+            with lock:
+                window.acquire()
+                i = state['next']
+                if state['stop'] or i >= len(files):
+                    window.release()
+                    return
+                state['next'] += 1
+            slots[i] = read(files[i])
+            events[i].set()
+
+    threads = []
+    for _ in range(min(workers, len(files))):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    try:
+        for i, file_path in enumerate(files):
+            events[i].wait()
+            data, error = slots[i]
+            slots[i] = None
+            window.release()
+            yield file_path, data, error
+    finally:
+        state['stop'] = True
+        for _ in threads:
+            window.release()
+
+
+def iter_prefetched(iterable, prefetch=DEFAULT_WORKERS):
+    """
+    Iterate over an iterable on a background thread, keeping up to
+    a number of items ready ahead of the caller.
+
+    Args:
+        iterable(iterable): The items to iterate over. Must not need
+            the main thread.
+        prefetch(int): The max number of items read ahead. If 0, the
+            items are read on the calling thread.
+
+    Yields:
+        The items of the iterable. Exceptions raised by the iterable
+        are re-raised on the calling thread.
+
+    """
+    if not prefetch:
+        for item in iterable:
+            yield item
+        return
+
+    items = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # gives up once the caller stops iterating
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((done, e))
+            return
+        put((done, None))
+
+    thread = threading.Thread(target=worker)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,417 @@
+"""
+Batched attribute snapshots for exporting node data.
+
+``AttributeSnapshot`` exports the attributes of a node in the data
+structure of ``Attribute.export()``. It walks the plugs of the node once
+and reads them through the api directly instead of creating an
+Attribute instance per plug:
+
+    + The kind, name and writable state of static attributes are cached
+      per attribute, so each attribute of a node type is only inspected
+      once per session.
+    + The ignore lists are compiled into sets and regular expressions
+      once per list.
+    + Nodes without connections skip all connection queries, and only
+      connected plugs are queried for their sources and destinations.
+
+Usage:
+
+.. code:: python
+
+    snapshot = AttributeSnapshot(with_connection=True)
+    attr_data = snapshot.export_node(node, attrs=['envelope', 'weightList'])
+"""
+
+import re
+
+import maya.OpenMaya as OpenMaya
+
+from mhy.maya.nodezoo.attribute import Attribute
+from mhy.maya.nodezoo.attribute.attribute_ import \
+    get_plug_from_object_and_attr_name
+from mhy.maya.nodezoo.exceptions import MayaAttributeError
+
+
+__all__ = ['IGNORE_ATTRS', 'AttributeSnapshot', 'clear_cache']
+
+
+# The attributes that are never exported when listed by name
+IGNORE_ATTRS = frozenset((
+    'binMembership',
+    'boundary',
+    'caching',
+    'containerType',
+    'creationDate',
+    'creator',
+    'currentDisplayLayer',
+    'currentRenderLayer',
+    'customTreatment',
+    'doubleSided',
+    'face',
+    'ghostFrames',
+    'nodeState',
+    'outStippleThreshold',
+    'overrideEnabled',
+    'overridePlayback',
+    'playFromCache',
+    'rmbCommand',
+    'rotateQuaternion',
+    'rotateQuaternionW',
+    'rotateQuaternionX',
+    'rotateQuaternionY',
+    'rotateQuaternionZ',
+    'springDamping',
+    'springRestLength',
+    'springStiffness',
+    'templateName',
+    'templatePath',
+    'useComponentPivot',
+    'viewName'
+))
+
+# The attribute kinds, matching the Attribute classes
+_COMPOUND = 'compound'
+_NUMERIC = 'numeric'
+_ENUM = 'enum'
+_UNIT = 'unit'
+_MATRIX = 'matrix'
+_TYPED = 'typed'
+_NO_VALUE = 'none'
+_UNKNOWN = 'unknown'
+
+_NUMERIC_READERS = {
+    OpenMaya.MFnNumericData.kBoolean: OpenMaya.MPlug.asBool,
+    OpenMaya.MFnNumericData.kByte: OpenMaya.MPlug.asInt,
+    OpenMaya.MFnNumericData.kChar: OpenMaya.MPlug.asChar,
+    OpenMaya.MFnNumericData.kShort: OpenMaya.MPlug.asShort,
+    OpenMaya.MFnNumericData.kInt: OpenMaya.MPlug.asInt,
+    OpenMaya.MFnNumericData.kLong: OpenMaya.MPlug.asInt,
+    OpenMaya.MFnNumericData.kDouble: OpenMaya.MPlug.asDouble,
+    OpenMaya.MFnNumericData.kFloat: OpenMaya.MPlug.asFloat,
+}
+
+# (attribute hash code : (attribute handle, attribute info)) pairs
+# of static attributes
+_ATTRIBUTE_CACHE = {}
+
+# (ignore list : (ignore set, ignore matcher)) pairs
+_IGNORE_CACHE = {}
+
+
+def clear_cache():
+    """
+    Clear the cached attribute infos and ignore lists. Call this after
+    unloading a plug-in, as the attributes of its node types are gone.
+
+    """
+    _ATTRIBUTE_CACHE.clear()
+    _IGNORE_CACHE.clear()
+
+
+def _get_kind(attr):
+    """Returns the kind and the data type of an attribute,
+    in the class order of Attribute.__new__()."""
+    if attr.hasFn(OpenMaya.MFn.kCompoundAttribute):
+        return _COMPOUND, None
+    elif attr.hasFn(OpenMaya.MFn.kEnumAttribute):
+        return _ENUM, None
+    elif attr.hasFn(OpenMaya.MFn.kNumericAttribute):
+        return _NUMERIC, OpenMaya.MFnNumericAttribute(attr).unitType()
+    elif attr.hasFn(OpenMaya.MFn.kGenericAttribute):
+        return _NO_VALUE, None
+    elif attr.hasFn(OpenMaya.MFn.kMatrixAttribute):
+        return _MATRIX, None
+    elif attr.hasFn(OpenMaya.MFn.kLightDataAttribute):
+        return _NO_VALUE, None
+    elif attr.hasFn(OpenMaya.MFn.kUnitAttribute):
+        return _UNIT, OpenMaya.MFnUnitAttribute(attr).unitType()
+    elif attr.hasFn(OpenMaya.MFn.kTypedAttribute):
+        return _TYPED, None
+    elif attr.hasFn(OpenMaya.MFn.kMessageAttribute):
+        return _NO_VALUE, None
+    return _UNKNOWN, None
+
+
+def _get_attribute_info(plug):
+    """
+    Get the info of the attribute of a plug. The infos of static
+    attributes are cached as they are shared by all the nodes of a type.
+    Args:
+        plug(MPlug): A plug
+
+    Returns:
+        tuple: The kind, data type, long name and writable state
+
+    """
+    attr = plug.attribute()
+    handle = None
+    if not plug.isDynamic():
+        handle = OpenMaya.MObjectHandle(attr)
+        cached = _ATTRIBUTE_CACHE.get(handle.hashCode())
+        # hash codes can collide, make sure it is the same attribute
+        if cached is not None and cached[0].isValid() and \
+           cached[0].object() == attr:
+            return cached[1]
+
+    fn_attr = OpenMaya.MFnAttribute(attr)
+    kind, data_type = _get_kind(attr)
+    info = (kind, data_type, str(fn_attr.name()), fn_attr.isWritable())
+    if handle is not None:
+        _ATTRIBUTE_CACHE[handle.hashCode()] = (handle, info)
+    return info
+
+
+def _get_ignore(ignore):
+    """Returns the set and the substring matcher of an ignore list."""
+    key = tuple(ignore or ())
+    result = _IGNORE_CACHE.get(key)
+    if result is None:
+        matcher = None
+        if key:
+            matcher = re.compile('|'.join(re.escape(x) for x in key))
+        result = (frozenset(key), matcher)
+        _IGNORE_CACHE[key] = result
+    return result
+
+
+def _get_plug_name(plug):
+    """Returns the long attribute path of a plug, e.g. weightList[0].weights"""
+    return str(plug.partialName(False, False, False, False, False, True))
+
+
+def _get_node_name(obj):
+    """Returns the short name of a node, as DependencyNode.name does."""
+    if obj.hasFn(OpenMaya.MFn.kDagNode):
+        return str(OpenMaya.MFnDagNode(obj).partialPathName())
+    return str(OpenMaya.MFnDependencyNode(obj).name())
+
+
+def _get_short_name(plug):
+    """Returns the node.attribute name of a plug, as Attribute.short_name"""
+    return '{}.{}'.format(_get_node_name(plug.node()), _get_plug_name(plug))
+
+
+def _get_conversion_factor(obj):
+    """Returns the factor of a unitConversion node, or None."""
+    fn_node = OpenMaya.MFnDependencyNode(obj)
+    if fn_node.typeName() != 'unitConversion':
+        return
+    try:
+        return fn_node.findPlug('conversionFactor', True).asDouble()
+    except RuntimeError:
+        return
+
+
+def _read_value(plug, info):
+    """
+    Read the value of a plug, as the value property of its Attribute class.
+    Args:
+        plug(MPlug): A plug which is not an array or compound
+        info(tuple): The attribute info of the plug
+
+    Returns:
+        The plug value
+
+    Raises:
+        NotImplementedError: If the data type is not supported
+
+    """
+    kind, data_type = info[0], info[1]
+    if kind == _NUMERIC:
+        reader = _NUMERIC_READERS.get(data_type)
+        if reader is None:
+            raise NotImplementedError(
+                'No implementation for data type {}'.format(data_type))
+        return reader(plug)
+    elif kind == _ENUM:
+        return plug.asInt()
+    elif kind == _UNIT:
+        if data_type == OpenMaya.MFnUnitAttribute.kDistance:
+            return plug.asMDistance().value()
+        elif data_type == OpenMaya.MFnUnitAttribute.kAngle:
+            return plug.asMAngle().asDegrees()
+        elif data_type == OpenMaya.MFnUnitAttribute.kTime:
+            return plug.asMTime().value()
+        raise NotImplementedError(
+            "Not implementation has been made for given data type")
+    elif kind == _MATRIX:
+        matrix = OpenMaya.MFnMatrixData(plug.asMObject()).matrix()
+        return [matrix[i][j] for i in range(4) for j in range(4)]
+    elif kind == _TYPED:
+        # typed data has many special cases, read by the attribute class
+        return Attribute(plug).value
+
+
+def _find_plug(node, attr_name):
+    """Find a plug on a node, as Attribute(node, attr_name) does."""
+    if '.' not in attr_name and '[' not in attr_name:
+        try:
+            plug = node.fn_node.findPlug(attr_name, True)
+            # There's possible maya bug if find the plug incorrectly
+            if '[-1]' not in plug.name():
+                return plug
+        except RuntimeError:
+            pass
+    return get_plug_from_object_and_attr_name(node, attr_name)
+
+
+class AttributeSnapshot(object):
+    """
+    Export the attribute data of nodes by walking their plugs once.
+    """
+
+    def __init__(self, with_connection=True):
+        """
+        Args:
+            with_connection(bool): If export the connections of the plugs
+
+        """
+        self.__with_connection = with_connection
+        self.__has_connections = False
+        self.__matcher = None
+
+    def export_node(self, node, attrs=None, ignore=None):
+        """
+        Export the attribute data of a node. The data is the same as
+        exporting an Attribute instance of each attribute.
+        Args:
+            node(DependencyNode): The node to export
+            attrs(list or None): Attribute names or Attribute instances to
+                export. If None, export all the top level attributes.
+            ignore(list or None): The attributes to ignore. Attribute names
+                are ignored if in this list or IGNORE_ATTRS, and plugs are
+                ignored if their name contains any of the items.
+
+        Returns:
+            list: The data of each exported attribute
+
+        """
+        ignore_set, self.__matcher = _get_ignore(ignore)
+        self.__has_connections = False
+        if self.__with_connection:
+            plugs = OpenMaya.MPlugArray()
+            try:
+                node.fn_node.getConnections(plugs)
+            except RuntimeError:
+                pass
+            self.__has_connections = plugs.length() > 0
+
+        data = []
+        for plug in self.__iter_plugs(node, attrs, ignore_set):
+            if self.__is_ignored(plug):
+                continue
+            attr_data = self.__export_plug(plug)
+            if attr_data:
+                data.append(attr_data)
+        return data
+
+    def __iter_plugs(self, node, attrs, ignore_set):
+        """Yields the top level plugs to export."""
+        if attrs is None:
+            fn_node = node.fn_node
+            obj = node.object()
+            for i in range(fn_node.attributeCount()):
+                plug = OpenMaya.MPlug(obj, fn_node.attribute(i))
+                if not plug.isChild():
+                    yield plug
+            return
+
+        for attr in attrs:
+            if isinstance(attr, Attribute):
+                yield attr.__plug__
+                continue
+            if attr in ignore_set or attr in IGNORE_ATTRS:
+                continue
+            if not node.fn_node.hasAttribute(attr):
+                continue
+            yield _find_plug(node, attr)
+
+    def __is_ignored(self, plug):
+        return self.__matcher is not None and \
+            self.__matcher.search(_get_plug_name(plug)) is not None
+
+    def __export_plug(self, plug):
+        """Export a plug as Attribute.export() with isNested=True."""
+        info = _get_attribute_info(plug)
+        if plug.isArray():
+            data = self.__export_array(plug)
+        elif info[0] == _COMPOUND:
+            data = self.__export_compound(plug)
+        elif info[0] == _UNKNOWN:
+            raise MayaAttributeError('Unable to create class based on type')
+        else:
+            data = self.__export_value(plug, info)
+
+        # Only if the data is not empty we need to export it as an item
+        if data:
+            if plug.isElement():
+                data['index'] = plug.logicalIndex()
+            else:
+                data['name'] = info[2]
+        return data
+
+    def __export_array(self, plug):
+        plug.evaluateNumElements()
+        indices = OpenMaya.MIntArray()
+        plug.getExistingArrayAttributeIndices(indices)
+        elements = []
+        for i in indices:
+            element_data = self.__export_plug(plug.elementByLogicalIndex(i))
+            if element_data:
+                elements.append(element_data)
+        if elements:
+            return {'array': elements}
+        return {}
+
+    def __export_compound(self, plug):
+        children = []
+        for i in range(plug.numChildren()):
+            child = plug.child(i)
+            if self.__is_ignored(child):
+                continue
+            child_data = self.__export_plug(child)
+            if child_data:
+                children.append(child_data)
+        if children:
+            return {'children': children}
+        return {}
+
+    def __export_value(self, plug, info):
+        data = {}
+        if info[3]:
+            try:
+                value = _read_value(plug, info)
+                if value is not None:
+                    data['value'] = value
+            except NotImplementedError:
+                # Some attributes should not be exported
+                pass
+
+        if self.__has_connections and plug.isConnected():
+            self.__export_connections(plug, data)
+        return data
+
+    def __export_connections(self, plug, data):
+        source = plug.source()
+        if not source.isNull():
+            data['src'] = _get_short_name(source)
+            conversion = plug.sourceWithConversion()
+            if _get_short_name(conversion) != data['src']:
+                factor = _get_conversion_factor(conversion.node())
+                if factor is not None:
+                    data['unit_conversion'] = factor
+
+        destinations = OpenMaya.MPlugArray()
+        plug.destinations(destinations)
+        if not destinations.length():
+            return
+        conversions = OpenMaya.MPlugArray()
+        plug.destinationsWithConversions(conversions)
+        data['destinations'] = []
+        for i in range(min(destinations.length(), conversions.length())):
+            dest_data = {'dst': _get_short_name(destinations[i])}
+            if _get_short_name(conversions[i]) != dest_data['dst']:
+                factor = _get_conversion_factor(conversions[i].node())
+                if factor is not None:
+                    dest_data['unit_conversion'] = [factor]
+            data['destinations'].append(dest_data)
@@ -0,0 +1,284 @@
+"""
+Streaming reader of nodezoo data files.
+
+``read_data_file()`` decodes a whole data file before any node can be
+applied. ``iter_node_data()`` instead yields the node records of a data
+file one at a time, so only one node is held in memory:
+
+    + json files (.nzd/.gnzd) are scanned incrementally. The nodes are
+      located with a lightweight scanner and only decoded when needed.
+    + binary containers (.bnzd) decode the arrays of one node at a time.
+
+Nodes can be filtered by name and type. Filtered out nodes are skipped
+without being decoded.
+
+Usage:
+
+.. code:: python
+
+    for data in iter_node_data('/path/to/body.gnzd', types=['skinCluster']):
+        Node.load_data(data)
+"""
+
+import re
+import json
+import gzip
+
+import mhy.maya.data_container as container
+
+
+__all__ = ['iter_node_data', 'match_node']
+
+
+# the number of bytes read at a time
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(br'[ \t\n\r]*')
+_STRUCTURE = re.compile(br'["\[\]{}]')
+_STRING_END = re.compile(br'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_PRIMITIVE = re.compile(br'[^,\]}\s]+')
+
+_FILTER_KEYS = ('name', 'type')
+
+
+def match_node(name, type_name, names=None, types=None, filter_func=None):
+    """
+    Check if a node passes the node filters.
+
+    Args:
+        name(str or None): The node name.
+        type_name(str or None): The node type name.
+        names(set or None): If not None, the node names to keep.
+        types(set or None): If not None, the node types to keep.
+        filter_func(callable or None): If not None, a callable taking
+            the node name and type, returning True to keep the node.
+
+    Returns:
+        bool
+
+    """
+    if names is not None and name not in names:
+        return False
+    if types is not None and type_name not in types:
+        return False
+    if filter_func is not None and not filter_func(name, type_name):
+        return False
+    return True
+
+
+class _JsonScanner(object):
+    """Scans a json byte stream without decoding skipped values."""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = b''
+        self.pos = 0
+        # the start of the buffer to keep when reading more data
+        self.mark = None
+
+    def fill(self):
+        """Reads the next chunk into the buffer.
+        Returns False at the end of the stream."""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        keep = self.pos if self.mark is None else self.mark
+        if keep:
+            self.buffer = self.buffer[keep:]
+            self.pos -= keep
+            if self.mark is not None:
+                self.mark -= keep
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        """Skips whitespaces and returns the next character,
+        or an empty string at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos:self.pos + 1]
+            if not self.fill():
+                return b''
+
+    def expect(self, char):
+        """Consumes an expected character."""
+        if self.peek() != char:
+            raise ValueError('Invalid node data: expected {!r} at {}'.format(
+                char.decode('utf-8'), self.pos))
+        self.pos += 1
+
+    def read_string(self, decode=True):
+        """Consumes a string and returns its decoded value."""
+        while True:
+            match = _STRING_END.match(self.buffer, self.pos + 1)
+            if match:
+                start = self.pos
+                self.pos = match.end()
+                if decode:
+                    return json.loads(
+                        self.buffer[start:self.pos].decode('utf-8'))
+                return
+            if not self.fill():
+                raise ValueError('Invalid node data: unterminated string')
+
+    def skip_value(self, filter_keys=None, accept=None):
+        """Consumes a value without decoding it.
+
+        If filter_keys is given, the string values of these keys in the
+        value object are collected. Once all of them are found (or at
+        the end of the value), accept is called with the collected
+        values. If it returns False, the skipped bytes are released
+        early.
+        """
+        char = self.peek()
+        if char == b'"':
+            self.read_string(decode=False)
+            return
+        if char not in (b'{', b'['):
+            while True:
+                match = _PRIMITIVE.match(self.buffer, self.pos)
+                if not match:
+                    raise ValueError(
+                        'Invalid node data at {}'.format(self.pos))
+                if match.end() < len(self.buffer) or not self.fill():
+                    self.pos = match.end()
+                    return
+
+        found = {}
+        pending = filter_keys is not None
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                if not self.fill():
+                    raise ValueError('Invalid node data: unexpected end')
+                continue
+
+            self.pos = match.start()
+            char = match.group()
+            if char == b'"':
+                if not pending or depth != 1:
+                    self.read_string(decode=False)
+                    continue
+                key = self.read_string()
+                if key in filter_keys and key not in found and \
+                   self.peek() == b':':
+                    self.pos += 1
+                    if self.peek() == b'"':
+                        found[key] = self.read_string()
+                    else:
+                        found[key] = None
+                    if len(found) == len(filter_keys):
+                        pending = False
+                        if not accept(found):
+                            self.mark = None
+            elif char in (b'{', b'['):
+                depth += 1
+                self.pos += 1
+            else:
+                depth -= 1
+                self.pos += 1
+                if depth == 0:
+                    if pending and not accept(found):
+                        self.mark = None
+                    return
+
+    def iter_nodes(self, accept):
+        """Yields the decoded node data accepted by a callable
+        taking the node name and type."""
+        def accept_node(found):
+            return accept(found.get('name'), found.get('type'))
+
+        self.expect(b'{')
+        while True:
+            char = self.peek()
+            if char == b'}':
+                return
+            elif char == b',':
+                self.pos += 1
+                continue
+            elif char != b'"':
+                raise ValueError(
+                    'Invalid node data: expected a key at {}'.format(
+                        self.pos))
+
+            key = self.read_string()
+            self.expect(b':')
+            if key != 'nodes' or self.peek() != b'[':
+                self.skip_value()
+                continue
+
+            self.pos += 1
+            while True:
+                char = self.peek()
+                if char == b']':
+                    self.pos += 1
+                    break
+                elif char == b',':
+                    self.pos += 1
+                    continue
+                elif char == b'':
+                    raise ValueError('Invalid node data: unexpected end')
+
+                self.mark = self.pos
+                if char != b'{':
+                    # not a node, skip it
+                    self.mark = None
+                    self.skip_value()
+                    continue
+                self.skip_value(filter_keys=_FILTER_KEYS, accept=accept_node)
+                if self.mark is not None:
+                    data = self.buffer[self.mark:self.pos]
+                    self.mark = None
+                    yield json.loads(data.decode('utf-8'))
+
+
+def iter_node_data(file_path, names=None, types=None, filter_func=None,
+                   chunk_size=CHUNK_SIZE):
+    """
+    Yield the node records of a data file one at a time.
+
+    Args:
+        file_path(str): A .nzd, .gnzd or binary container file path.
+        names(list or None): If not None, only yield nodes of these names.
+        types(list or None): If not None, only yield nodes of these types.
+        filter_func(callable or None): If not None, a callable taking
+            the node name and type, returning True to yield the node.
+        chunk_size(int): The number of bytes read at a time.
+
+    Yields:
+        dict: The data of a node.
+
+    Raises:
+        ValueError: If the file content is not valid node data.
+
+    """
+    if names is not None:
+        names = set(names)
+    if types is not None:
+        types = set(types)
+
+    def accept(name, type_name):
+        return match_node(
+            name, type_name, names=names, types=types,
+            filter_func=filter_func)
+
+    if container.is_binary_data_file(file_path):
+        with container.NodeDataReader(file_path) as reader:
+            for data in reader.header_data.get('nodes') or []:
+                if isinstance(data, dict) and \
+                   accept(data.get('name'), data.get('type')):
+                    yield reader.decode(data)
+        return
+
+    if file_path.endswith('.gnzd'):
+        stream = gzip.open(file_path, 'rb')
+    else:
+        stream = open(file_path, 'rb')
+    with stream:
+        scanner = _JsonScanner(stream, chunk_size=chunk_size)
+        for data in scanner.iter_nodes(accept):
+            yield data
@@ -1,11 +1,12 @@
 import maya.cmds
 import maya.mel
 import maya.OpenMaya as OpenMaya
-import json
-import gzip
 from mhy.maya.nodezoo.node import Node
-from mhy.python.core.compatible import gzip_export
+import mhy.maya.nodezoo.pipeline as pipeline
+import mhy.maya.nodezoo.stream as stream
+from mhy.maya.nodezoo.pipeline import read_data_file, write_data_file
 import os
+import traceback
 from six import string_types
 
 
@@ -21,34 +22,13 @@ SPACE_MAP = {
 
 def ls(*args, **kwargs):
     s = maya.cmds.ls(*args, **kwargs)
-    return [Node(i) for i in s if '[' not in i]
+    return Node.from_names([i for i in s if '[' not in i])
 
 
 def delete(nodes):
     maya.cmds.delete([node.name for node in nodes])
 
 
-def read_data_file(file_path):
-    """
-    Query the dictionary information from a data file path
-    Args:
-        file_path(str):
-
-    Returns:
-        dict: Data
-
-    """
-    if file_path.endswith('.gnzd'):
-        with gzip.open(file_path, 'r') as f:
-            json_bytes = f.read()
-        json_obj = json_bytes.decode('utf-8')
-        data = json.loads(json_obj)
-    else:
-        with open(file_path) as f:
-            data = json.load(f)
-    return data
-
-
 def get_space(space):
     """Returns the propery space value in OpenMaya.MSpace"""
     if not isinstance(space, int):
@@ -81,9 +61,12 @@ def inspect_data_file(file_path):
 
 def export_node_data_to_multiple_files(nodes, directory, compress=True,
                                        connection_data=True, creation_data=True,
-                                       additional_data=True, ui=False, *args, **kwargs):
+                                       additional_data=True, ui=False,
+                                       workers=pipeline.DEFAULT_WORKERS, *args, **kwargs):
     """
-    Export nodes to multiple disk files
+    Export nodes to multiple disk files.
+    Node data is extracted on the main thread, while serialization,
+    compression and disk writes run on background worker threads.
     Args:
         nodes(list): A list of Nodes
         directory(str): A disk directory path the multiple files will be saved under
@@ -92,40 +75,59 @@ def export_node_data_to_multiple_files(nodes, directory, compress=True,
         creation_data(bool): If export creation data
         additional_data(bool): If export additional data
         ui(bool): If activate maya progress bar
+        workers(int): The number of threads writing files. If 0, write
+            files on the main thread
         *args:
         **kwargs:
 
+    Returns:
+        list: A list of ExportResult of each file
 
     """
     if compress:
-        ext = ".nzd"
-    else:
         ext = ".gnzd"
+    else:
+        ext = ".nzd"
     g_main_progress_bar = None
     if ui:
         g_main_progress_bar = maya.mel.eval('$tmp = $gMainProgressBar')
         maya.cmds.progressBar(g_main_progress_bar, e=True, beginProgress=True, isInterruptable=False,
                               status="Exporting nodes ...", maxValue=len(nodes))
+    export_pipeline = pipeline.ExportPipeline(workers=workers)
     try:
         for i in nodes:
+            i = Node(i)
             file_path = os.path.join(directory, i.name + ext)
-            export_node_data([i], file_path, compress, connection_data, creation_data,
-                             additional_data, ui=False, *args, **kwargs)
             if ui:
                 maya.cmds.progressBar(g_main_progress_bar, e=True, step=1,
                                       status="Exporting `{}`...".format(i.name))
-    except Exception as e:
-        OpenMaya.MGlobal.displayError(str(e))
+            try:
+                data = i.export(connection_data=connection_data, creation_data=creation_data,
+                                additional_data=additional_data, *args, **kwargs)
+            except Exception as e:
+                OpenMaya.MGlobal.displayError(
+                    "Failed exporting `{}`: {}".format(i.name, e))
+                continue
+            export_pipeline.submit({'nodes': [data]}, file_path, compress=compress)
     finally:
+        export_pipeline.join()
         if ui:
             maya.cmds.progressBar(g_main_progress_bar, e=True, endProgress=True)
 
+    for result in export_pipeline.failed:
+        OpenMaya.MGlobal.displayError(
+            "Failed exporting '{}': {}".format(result.file_path, result.error))
+    OpenMaya.MGlobal.displayInfo(export_pipeline.report().splitlines()[0])
+    return export_pipeline.results
+
 
 def export_node_data(nodes, file_path, compress=True, connection_data=True,
                      creation_data=True, additional_data=True,
-                     ui=False, *args, **kwargs):
+                     ui=False, export_pipeline=None, *args, **kwargs):
     """
-    Export nodes to single disk files
+    Export nodes to single disk files.
+    If the file path ends with the binary extension (.bnzd), a binary
+    container file is written.
 
     Args:
         nodes(list): A list of Nodes
@@ -135,6 +137,8 @@ def export_node_data(nodes, file_path, compress=True, connection_data=True,
         creation_data(bool): If export creation data
         additional_data(bool): If export additional data
         ui(bool): If activate maya progress bar
+        export_pipeline(ExportPipeline or None): If not None, the file is
+            written on the pipeline workers instead
         *args:
         **kwargs:
 
@@ -166,17 +170,10 @@ def export_node_data(nodes, file_path, compress=True, connection_data=True,
             maya.cmds.progressBar(g_main_progress_bar, e=True, step=1,
                                   status="Writing file(s) to disk `{}`...")
 
-        dir_name = os.path.dirname(file_path)
-        if not os.path.isdir(dir_name):
-            os.makedirs(dir_name)
-        if compress:
-            json_obj = json.dumps(data_to_export)
-            gzip_export(json_obj, file_path)
-        else:
-            json_obj = json.dumps(data_to_export, indent=4)
-
-            with open(file_path, "w") as f:
-                f.write(json_obj)
+        if export_pipeline is not None:
+            export_pipeline.submit(data_to_export, file_path, compress=compress)
+            return
+        write_data_file(data_to_export, file_path, compress=compress)
         OpenMaya.MGlobal.displayInfo("Exported data to: '{}'".format(file_path))
     except Exception as e:
         OpenMaya.MGlobal.displayError(str(e))
@@ -192,21 +189,51 @@ def import_node_data(
         name_map=None,
         namespace_map=None,
         ui=False,
+        names=None,
+        types=None,
+        filter_func=None,
+        prefetch=pipeline.DEFAULT_WORKERS,
         **kwargs):
+    """
+    Import nodes from file(s). Nodes are streamed from the files one at
+    a time, and the next nodes are read on a background thread while the
+    current node is applied.
+    Args:
+        files(list or str): One or multiple data files
+        create_node(bool): If create nodes missing in the scene
+        make_connections(bool): If make connections
+        name_map(dict or None):
+        namespace_map(dict or None):
+        ui(bool): If activate maya progress bar
+        names(list or None): If not None, only import nodes of these names
+        types(list or None): If not None, only import nodes of these types
+        filter_func(callable or None): If not None, a callable taking the
+            node name and type, returning True to import the node
+        prefetch(int): The number of nodes read ahead. If 0, read
+            files on the main thread
+        **kwargs:
+
+    Returns:
+        list: Imported nodes
 
-    node_data_to_import = load_node_data_from_file(files)
+    """
+    files = _get_existing_files(files)
     created_nodes = []
-    num_nodes = len(node_data_to_import) or 1
     g_main_progress_bar = None
     if ui:
         g_main_progress_bar = maya.mel.eval('$tmp = $gMainProgressBar')
         maya.cmds.progressBar(g_main_progress_bar, e=True, beginProgress=True, isInterruptable=False,
-                              status="Importing nodes ...", maxValue=num_nodes)
+                              status="Importing nodes ...", maxValue=len(files) or 1)
+    current_file = None
     try:
-        for data in node_data_to_import:
+        for file_path, data in _iter_node_records(
+                files, names=names, types=types,
+                filter_func=filter_func, prefetch=prefetch):
             node_name = data.get('name', "")
             if g_main_progress_bar:
-                maya.cmds.progressBar(g_main_progress_bar, e=True, step=1,
+                step = int(file_path != current_file)
+                current_file = file_path
+                maya.cmds.progressBar(g_main_progress_bar, e=True, step=step,
                                       status="Importing `{}`...".format(node_name))
             node = Node.load_data(data,
                                   create_node=create_node,
@@ -224,33 +251,81 @@ def import_node_data(
     return created_nodes
 
 
-def load_node_data_from_file(files):
-    """
-    Get the node data only from file(s).
-    Args:
-        files(list or str): One or multiple data files
-
-    Returns:
-        list: A list of data files
-
-    """
+def _get_existing_files(files):
+    """Returns the existing file paths of one or multiple files."""
     if isinstance(files, string_types):
         files = [files]
-    all_node_datas = []
+    existing_files = []
     for file_path in files:
         file_path = file_path.replace('\\', '/')
         if not os.path.exists(file_path):
             OpenMaya.MGlobal.displayWarning("{} doesnt exist".format(file_path))
             continue
-        data = read_data_file(file_path)
-        if not data:
+        existing_files.append(file_path)
+    return existing_files
+
+
+def _stream_node_records(files, **kwargs):
+    """Yields the file path, node data and error of each node in the
+    data files. Doesn't need the main thread."""
+    for file_path in files:
+        try:
+            for data in stream.iter_node_data(file_path, **kwargs):
+                yield file_path, data, None
+        except Exception:
+            yield file_path, None, traceback.format_exc()
+
+
+def _iter_node_records(files, prefetch=pipeline.DEFAULT_WORKERS, **kwargs):
+    """Yields the file path and data of each node in the data files,
+    reading ahead on a background thread."""
+    records = pipeline.iter_prefetched(
+        _stream_node_records(files, **kwargs), prefetch=prefetch)
+    for file_path, data, error in records:
+        if error:
+            OpenMaya.MGlobal.displayError(
+                "Failed reading '{}': {}".format(file_path, error))
             continue
-        node_datas = data.get('nodes')
-        if node_datas:
-            for nodeData in node_datas:
-                if not isinstance(nodeData, dict):
-                    continue
-                all_node_datas.append(nodeData)
-    return all_node_datas
+        yield file_path, data
+
+
+def iter_node_data_from_files(files, names=None, types=None, filter_func=None,
+                              prefetch=pipeline.DEFAULT_WORKERS):
+    """
+    Iterate over the node data in file(s) one node at a time, without
+    loading whole files into memory.
+    Args:
+        files(list or str): One or multiple data files
+        names(list or None): If not None, only yield nodes of these names
+        types(list or None): If not None, only yield nodes of these types
+        filter_func(callable or None): If not None, a callable taking the
+            node name and type, returning True to yield the node
+        prefetch(int): The number of nodes read ahead on a background
+            thread. If 0, read files on the calling thread
+
+    Yields:
+        dict: The data of a node
+
+    """
+    for _, data in _iter_node_records(
+            _get_existing_files(files), names=names, types=types,
+            filter_func=filter_func, prefetch=prefetch):
+        yield data
+
+
+def load_node_data_from_file(files, names=None, types=None, filter_func=None):
+    """
+    Get the node data only from file(s).
+    Args:
+        files(list or str): One or multiple data files
+        names(list or None): If not None, only load nodes of these names
+        types(list or None): If not None, only load nodes of these types
+        filter_func(callable or None): If not None, a callable taking the
+            node name and type, returning True to load the node
 
+    Returns:
+        list: A list of data files
 
+    """
+    return list(iter_node_data_from_files(
+        files, names=names, types=types, filter_func=filter_func))
@@ -0,0 +1,665 @@
+"""
+A spatial index of mesh vertices and triangles backed by NumPy arrays.
+
+``MeshSpatialIndex`` builds two bounding volume hierarchies from the
+vertex and polygon arrays of a mesh, one over the vertices and one over
+the triangles. The hierarchies are built from Morton-sorted primitives
+in fixed size leaves, and all queries are batched: a whole array of
+query points walks the tree one level at a time as vectorized NumPy
+operations, so there's no Python work per query point. Closest queries
+first test the neighbors of each point in Morton order, which bounds
+the tree walk to a few leaves.
+
+Supported queries:
+
+    + closest_vertices(): The closest vertex to each point.
+    + vertices_in_radius(): The vertices within a radius of each point.
+    + closest_points(): The closest point on the surface to each point,
+      with its triangle and barycentric weights.
+    + get_barycentric_coords(): The triangle vertices and weights of the
+      closest surface points, as used by surface association.
+
+``get_mesh_index()`` caches indexes by mesh topology and point hash, so
+querying the same mesh again skips the build, and a deformed mesh
+reuses the triangulation of its topology.
+
+This module doesn't depend on Maya. See ``Mesh.get_spatial_index()``
+for indexing mesh nodes.
+
+Usage:
+
+.. code:: python
+
+    index = get_mesh_index(points, polygon_counts, polygon_connects)
+    vertex_ids, weights = index.get_barycentric_coords(other_points)
+"""
+
+import hashlib
+import collections
+
+import numpy
+
+
+__all__ = [
+    'MeshSpatialIndex', 'triangulate', 'closest_points_on_triangles',
+    'get_mesh_index', 'clear_cache']
+
+
+# the number of primitives in a tree leaf
+LEAF_SIZE = 8
+# the number of query points processed at a time
+BATCH_SIZE = 4096
+# the max number of indexes kept by get_mesh_index()
+CACHE_SIZE = 8
+
+# the bits per axis of morton codes
+_MORTON_BITS = 21
+# keeps boxes at the bound distance despite rounding errors
+_TOLERANCE = 1 + 1e-9
+
+
+def triangulate(polygon_counts, polygon_connects):
+    """Fan-triangulates polygons.
+
+    Args:
+        polygon_counts (array): The number of vertices of each polygon.
+        polygon_connects (array): The vertex ids of all polygons.
+
+    Returns:
+        tuple: The vertex ids (n x 3), the polygon ids (n) and the
+            face-vertex ids (n x 3) of the triangles.
+    """
+    counts = numpy.asarray(polygon_counts, dtype=numpy.int64)
+    connects = numpy.asarray(polygon_connects, dtype=numpy.int64)
+    if len(counts) and counts.min() < 3:
+        raise ValueError('Polygons need at least 3 vertices.')
+    if counts.sum() != len(connects):
+        raise ValueError('Polygon counts don\'t match polygon connects.')
+
+    tri_counts = counts - 2
+    num_triangles = int(tri_counts.sum())
+    faces = numpy.repeat(numpy.arange(len(counts)), tri_counts)
+    starts = numpy.repeat(numpy.cumsum(counts) - counts, tri_counts)
+    # the index of each triangle in its polygon
+    local = numpy.arange(num_triangles) - numpy.repeat(
+        numpy.cumsum(tri_counts) - tri_counts, tri_counts)
+
+    corners = numpy.empty((num_triangles, 3), dtype=numpy.int64)
+    corners[:, 0] = starts
+    corners[:, 1] = starts + local + 1
+    corners[:, 2] = starts + local + 2
+    return connects[corners], faces, corners
+
+
+def _dot(a, b):
+    return numpy.einsum('ij,ij->i', a, b)
+
+
+def closest_points_on_triangles(points, a, b, c):
+    """Returns the closest points on triangles to points.
+
+    Args:
+        points (array): The query points (n x 3).
+        a (array): The first vertex positions of the triangles (n x 3).
+        b (array): The second vertex positions of the triangles (n x 3).
+        c (array): The third vertex positions of the triangles (n x 3).
+
+    Returns:
+        tuple: The closest points (n x 3) and their barycentric
+            weights (n x 3) of the triangle vertices.
+    """
+    ab = b - a
+    ac = c - a
+    ap = points - a
+    bp = points - b
+    cp = points - c
+    d1 = _dot(ab, ap)
+    d2 = _dot(ac, ap)
+    d3 = _dot(ab, bp)
+    d4 = _dot(ac, bp)
+    d5 = _dot(ab, cp)
+    d6 = _dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    weights = numpy.empty((len(points), 3))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # inside the triangle
+        denom = 1.0 / (va + vb + vc)
+        v = vb * denom
+        w = vc * denom
+        weights[:, 0] = 1.0 - v - w
+        weights[:, 1] = v
+        weights[:, 2] = w
+
+        # the voronoi regions of edges and vertices as (mask, edge
+        # parameter, vertex i, vertex j). They are applied from the
+        # lowest priority so the first matching region wins.
+        regions = (
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+             (d4 - d3) / ((d4 - d3) + (d5 - d6)), 1, 2),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), d2 / (d2 - d6), 0, 2),
+            ((d6 >= 0) & (d5 <= d6), None, 2, None),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), d1 / (d1 - d3), 0, 1),
+            ((d3 >= 0) & (d4 <= d3), None, 1, None),
+            ((d1 <= 0) & (d2 <= 0), None, 0, None))
+        for mask, t, i, j in regions:
+            if not mask.any():
+                continue
+            weights[mask] = 0
+            if t is None:
+                weights[mask, i] = 1
+            else:
+                weights[mask, i] = 1 - t[mask]
+                weights[mask, j] = t[mask]
+
+    # degenerate triangles snap to their closest vertex
+    invalid = ~numpy.isfinite(weights).all(axis=1)
+    if invalid.any():
+        dists = numpy.stack([
+            _dot(x[invalid], x[invalid]) for x in (ap, bp, cp)], axis=1)
+        weights[invalid] = 0
+        weights[invalid, dists.argmin(axis=1)] = 1
+
+    closest = (a * weights[:, 0:1] + b * weights[:, 1:2] +
+               c * weights[:, 2:3])
+    return closest, weights
+
+
+def _part_bits(x):
+    """Spreads the bits of integers 3 positions apart."""
+    x = x & numpy.uint64(0x1fffff)
+    for shift, mask in ((32, 0x1f00000000ffff),
+                        (16, 0x1f0000ff0000ff),
+                        (8, 0x100f00f00f00f00f),
+                        (4, 0x10c30c30c30c30c3),
+                        (2, 0x1249249249249249)):
+        x = (x | (x << numpy.uint64(shift))) & numpy.uint64(mask)
+    return x
+
+
+def _morton_codes(points, lower, size):
+    """Returns the morton codes of points in a bounding box.
+    Points outside of the box are clamped to it."""
+    scale = (1 << _MORTON_BITS) - 1
+    cells = numpy.clip((points - lower) / size * scale, 0, scale)
+    cells = cells.astype(numpy.uint64)
+    return (_part_bits(cells[:, 0]) |
+            (_part_bits(cells[:, 1]) << numpy.uint64(1)) |
+            (_part_bits(cells[:, 2]) << numpy.uint64(2)))
+
+
+class _Tree(object):
+    """
+    A bounding volume hierarchy of primitive boxes.
+
+    The leaves hold runs of Morton-sorted primitives. The tree is a
+    complete binary tree stored in heap order, so the children of node
+    i are 2i+1 and 2i+2, and all the leaves are on the last level.
+    """
+
+    def __init__(self, lower, upper, leaf_size=LEAF_SIZE):
+        count = len(lower)
+        num_leaves = max(-(-count // leaf_size), 1)
+        depth = int(numpy.ceil(numpy.log2(num_leaves))) if num_leaves > 1 \
+            else 0
+        num_leaves = 1 << depth
+
+        self.leaf_size = leaf_size
+        # the frame of the morton codes
+        self.frame = (numpy.zeros(3), numpy.ones(3))
+        codes = numpy.zeros(count, dtype=numpy.uint64)
+        if count:
+            centers = (lower + upper) * 0.5
+            frame_lower = centers.min(axis=0)
+            frame_size = centers.max(axis=0) - frame_lower
+            frame_size[frame_size == 0] = 1
+            self.frame = (frame_lower, frame_size)
+            codes = _morton_codes(centers, *self.frame)
+        order = numpy.argsort(codes, kind='stable')
+        # the primitive ids and their codes in morton order
+        self.order = order
+        self.codes = codes[order]
+
+        # the primitive ids of each leaf, padded with -1
+        primitives = numpy.full(num_leaves * leaf_size, -1, dtype=numpy.int64)
+        primitives[:count] = order
+        self.primitives = primitives.reshape(num_leaves, leaf_size)
+
+        # empty boxes are never within reach of any point
+        leaf_lower = numpy.full((num_leaves * leaf_size, 3), numpy.inf)
+        leaf_upper = numpy.full((num_leaves * leaf_size, 3), -numpy.inf)
+        leaf_lower[:count] = lower[order]
+        leaf_upper[:count] = upper[order]
+        levels = [(leaf_lower.reshape(num_leaves, leaf_size, 3).min(axis=1),
+                   leaf_upper.reshape(num_leaves, leaf_size, 3).max(axis=1))]
+        while len(levels[-1][0]) > 1:
+            level_lower, level_upper = levels[-1]
+            levels.append((level_lower.reshape(-1, 2, 3).min(axis=1),
+                           level_upper.reshape(-1, 2, 3).max(axis=1)))
+
+        self.lower = numpy.concatenate([x[0] for x in reversed(levels)])
+        self.upper = numpy.concatenate([x[1] for x in reversed(levels)])
+        self.depth = depth
+        self.first_leaf = num_leaves - 1
+
+    def guess(self, points):
+        """Returns a leaf sized run of primitives (n x leaf size) around
+        each point in morton order, padded with -1. The primitives
+        are mostly close to the point, so they make a cheap first
+        bound of the closest primitive distance."""
+        count = len(self.order)
+        window = min(self.leaf_size, count)
+        primitives = numpy.full(
+            (len(points), self.leaf_size), -1, dtype=numpy.int64)
+        if window:
+            positions = numpy.searchsorted(
+                self.codes, _morton_codes(points, *self.frame))
+            starts = numpy.clip(positions - window // 2, 0, count - window)
+            primitives[:, :window] = self.order[
+                starts[:, None] + numpy.arange(window)]
+        return primitives
+
+    def box_distances(self, points, nodes, farthest=False):
+        """Returns the squared distances from points to node boxes.
+        If farthest is True, returns the squared distances to the
+        farthest box corners instead."""
+        below = self.lower[nodes] - points
+        above = points - self.upper[nodes]
+        if farthest:
+            delta = numpy.maximum(-below, -above)
+        else:
+            delta = numpy.maximum(numpy.maximum(below, above), 0)
+        return _dot(delta, delta)
+
+    def find_leaves(self, points, bounds, tighten=False):
+        """Returns the (point id, leaf id) pairs of leaf boxes within
+        a squared distance bound of each point, and the squared
+        distances to the leaf boxes.
+
+        If tighten is True, only the leaves that may hold the closest
+        primitive of each point are returned. Every primitive in a box
+        is within the distance of the farthest box corner, so the bound
+        of a point shrinks to the closest farthest corner of the boxes
+        visited on each level.
+        """
+        count = len(points)
+        if tighten:
+            bounds = numpy.array(bounds, dtype=numpy.float64)
+        # the pairs stay sorted by point id
+        queries = numpy.arange(count)
+        nodes = numpy.zeros(count, dtype=numpy.int64)
+        for level in range(self.depth + 1):
+            query_points = points[queries]
+            if tighten:
+                starts = numpy.flatnonzero(
+                    numpy.diff(queries, prepend=-1))
+                farthest = numpy.minimum.reduceat(
+                    self.box_distances(query_points, nodes, farthest=True),
+                    starts)
+                ids = queries[starts]
+                bounds[ids] = numpy.minimum(bounds[ids], farthest)
+            dists = self.box_distances(query_points, nodes)
+            within = dists <= bounds[queries] * _TOLERANCE
+            queries = queries[within]
+            nodes = nodes[within]
+            dists = dists[within]
+            if level == self.depth or not len(queries):
+                break
+            queries = numpy.repeat(queries, 2)
+            nodes = (nodes[:, None] * 2 + [1, 2]).ravel()
+        return queries, nodes - self.first_leaf, dists
+
+
+def _reduce_min(queries, dists, count):
+    """Returns the position of the min distance of each query in the
+    input arrays, or -1 for queries without a distance."""
+    order = numpy.lexsort((dists, queries))
+    queries = queries[order]
+    first = numpy.ones(len(queries), dtype=bool)
+    first[1:] = queries[1:] != queries[:-1]
+    result = numpy.full(count, -1, dtype=numpy.int64)
+    result[queries[first]] = order[first]
+    return result
+
+
+def _hash_arrays(*arrays):
+    """Returns a digest of the contents of arrays."""
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = numpy.ascontiguousarray(array)
+        digest.update(str(array.dtype).encode('utf-8'))
+        digest.update(str(array.shape).encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class MeshSpatialIndex(object):
+    """
+    A spatial index of the vertices and triangles of a mesh.
+    """
+
+    def __init__(self, points, polygon_counts, polygon_connects,
+                 leaf_size=LEAF_SIZE, triangulation=None):
+        """
+        Args:
+            points (array): The vertex positions (n x 3).
+            polygon_counts (array): The number of vertices of each polygon.
+            polygon_connects (array): The vertex ids of all polygons.
+            leaf_size (int): The number of primitives in a tree leaf.
+            triangulation (tuple or None): The result of triangulate() of
+                this topology, if already computed.
+        """
+        self.__points = numpy.array(points, dtype=numpy.float64)
+        self.__points.shape = (-1, 3)
+        if triangulation is None:
+            triangulation = triangulate(polygon_counts, polygon_connects)
+        self.__triangles, self.__triangle_faces, self.__triangle_corners = \
+            triangulation
+        if len(self.__triangles) and \
+           self.__triangles.max() >= len(self.__points):
+            raise ValueError('Polygon connects out of vertex range.')
+
+        self.__vertex_tree = _Tree(self.__points, self.__points, leaf_size)
+        corners = self.__points[self.__triangles]
+        self.__triangle_tree = _Tree(
+            corners.min(axis=1), corners.max(axis=1), leaf_size)
+
+    @property
+    def points(self):
+        """The vertex positions (n x 3).
+
+        :type: numpy.ndarray
+        """
+        return self.__points
+
+    @property
+    def triangles(self):
+        """The vertex ids of the triangles (n x 3).
+
+        :type: numpy.ndarray
+        """
+        return self.__triangles
+
+    @property
+    def triangle_faces(self):
+        """The polygon id of each triangle.
+
+        :type: numpy.ndarray
+        """
+        return self.__triangle_faces
+
+    @property
+    def triangle_corners(self):
+        """The face-vertex ids of the triangles (n x 3), for looking up
+        per face-vertex data like uvs.
+
+        :type: numpy.ndarray
+        """
+        return self.__triangle_corners
+
+    @property
+    def num_vertices(self):
+        """
+        :type: int
+        """
+        return len(self.__points)
+
+    @property
+    def num_triangles(self):
+        """
+        :type: int
+        """
+        return len(self.__triangles)
+
+    @staticmethod
+    def __as_points(points):
+        points = numpy.asarray(points, dtype=numpy.float64)
+        return points.reshape(-1, 3)
+
+    @staticmethod
+    def __batches(count):
+        for start in range(0, count, BATCH_SIZE):
+            yield start, min(start + BATCH_SIZE, count)
+
+    @staticmethod
+    def __find_closest(tree, points, func):
+        """Returns the point ids and the result of func for the
+        primitives that may be the closest to each point. The morton
+        order neighbors of each point are searched first to bound
+        the search in the tree."""
+        queries = numpy.arange(len(points))
+        result = func(points, queries, tree.guess(points))
+        bounds = result[0].min(axis=1)
+
+        found, leaves, _ = tree.find_leaves(points, bounds, tighten=True)
+        found_result = func(points, found, tree.primitives[leaves])
+        return (numpy.concatenate([queries, found]),
+                [numpy.concatenate(x) for x in zip(result, found_result)])
+
+    def __vertex_distances(self, points, queries, vertices):
+        """Returns the squared distances (k x leaf size) from query
+        points to vertices (k x leaf size, padded with -1), and the
+        vertices."""
+        delta = self.__points[vertices] - points[queries][:, None]
+        dists = numpy.einsum('ijk,ijk->ij', delta, delta)
+        dists[vertices < 0] = numpy.inf
+        return dists, vertices
+
+    def closest_vertices(self, points):
+        """Returns the closest vertex to each point.
+
+        Args:
+            points (array): The query points (n x 3).
+
+        Returns:
+            tuple: The vertex ids (n) and distances (n).
+        """
+        points = self.__as_points(points)
+        vertex_ids = numpy.full(len(points), -1, dtype=numpy.int64)
+        distances = numpy.full(len(points), numpy.inf)
+        if not self.num_vertices:
+            return vertex_ids, distances
+
+        tree = self.__vertex_tree
+        for start, end in self.__batches(len(points)):
+            batch = points[start:end]
+            queries, (dists, vertices) = self.__find_closest(
+                tree, batch, self.__vertex_distances)
+            columns = dists.argmin(axis=1)
+            rows = numpy.arange(len(queries))
+            dists = dists[rows, columns]
+            best = _reduce_min(queries, dists, len(batch))
+            vertex_ids[start:end] = vertices[best, columns[best]]
+            distances[start:end] = numpy.sqrt(dists[best])
+
+        return vertex_ids, distances
+
+    def vertices_in_radius(self, points, radius):
+        """Returns the vertices within a radius of each point.
+
+        Args:
+            points (array): The query points (n x 3).
+            radius (float or array): The radius, or the radius of
+                each point.
+
+        Returns:
+            tuple: The vertex ids of point i are indices[indptr[i]:
+                indptr[i + 1]], sorted by distance, as the indptr (n + 1),
+                indices and distances arrays.
+        """
+        points = self.__as_points(points)
+        bounds = numpy.broadcast_to(
+            numpy.asarray(radius, dtype=numpy.float64) ** 2, len(points))
+
+        query_ids = []
+        vertex_ids = []
+        distances = []
+        tree = self.__vertex_tree
+        for start, end in self.__batches(len(points)):
+            batch = points[start:end]
+            queries, leaves, _ = tree.find_leaves(batch, bounds[start:end])
+            dists, vertices = self.__vertex_distances(
+                batch, queries, tree.primitives[leaves])
+            rows, columns = numpy.nonzero(
+                dists <= bounds[start:end][queries][:, None])
+            query_ids.append(queries[rows] + start)
+            vertex_ids.append(vertices[rows, columns])
+            distances.append(dists[rows, columns])
+
+        if not query_ids:
+            return (numpy.zeros(len(points) + 1, dtype=numpy.int64),
+                    numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0))
+        query_ids = numpy.concatenate(query_ids)
+        vertex_ids = numpy.concatenate(vertex_ids)
+        distances = numpy.concatenate(distances)
+        order = numpy.lexsort((vertex_ids, distances, query_ids))
+        indptr = numpy.zeros(len(points) + 1, dtype=numpy.int64)
+        numpy.cumsum(
+            numpy.bincount(query_ids, minlength=len(points)), out=indptr[1:])
+        return indptr, vertex_ids[order], numpy.sqrt(distances[order])
+
+    def __triangle_distances(self, points, queries, triangles):
+        """Returns the squared distances (k x leaf size) from query
+        points to triangles (k x leaf size, padded with -1), the
+        triangles, the closest points and their weights."""
+        shape = triangles.shape
+        triangles = triangles.ravel()
+        valid = triangles >= 0
+        corners = self.__points[self.__triangles[triangles[valid]]]
+        points = numpy.repeat(points[queries], shape[1], axis=0)[valid]
+
+        closest = numpy.zeros((len(triangles), 3))
+        weights = numpy.zeros((len(triangles), 3))
+        closest[valid], weights[valid] = closest_points_on_triangles(
+            points, corners[:, 0], corners[:, 1], corners[:, 2])
+        dists = numpy.full(len(triangles), numpy.inf)
+        delta = closest[valid] - points
+        dists[valid] = _dot(delta, delta)
+        return (dists.reshape(shape), triangles.reshape(shape),
+                closest.reshape(shape + (3,)), weights.reshape(shape + (3,)))
+
+    def closest_points(self, points):
+        """Returns the closest point on the mesh surface to each point.
+
+        Args:
+            points (array): The query points (n x 3).
+
+        Returns:
+            tuple: The closest points (n x 3), the triangle ids (n),
+                the barycentric weights (n x 3) of the triangle vertices
+                and the distances (n).
+        """
+        points = self.__as_points(points)
+        count = len(points)
+        closest = numpy.zeros((count, 3))
+        triangle_ids = numpy.full(count, -1, dtype=numpy.int64)
+        weights = numpy.zeros((count, 3))
+        distances = numpy.full(count, numpy.inf)
+        if not self.num_triangles:
+            return closest, triangle_ids, weights, distances
+
+        tree = self.__triangle_tree
+        for start, end in self.__batches(count):
+            batch = points[start:end]
+            queries, (dists, triangles, points_, weights_) = \
+                self.__find_closest(tree, batch, self.__triangle_distances)
+            columns = dists.argmin(axis=1)
+            rows = numpy.arange(len(queries))
+            best = _reduce_min(queries, dists[rows, columns], len(batch))
+            rows, columns = rows[best], columns[best]
+            closest[start:end] = points_[rows, columns]
+            triangle_ids[start:end] = triangles[rows, columns]
+            weights[start:end] = weights_[rows, columns]
+            distances[start:end] = numpy.sqrt(dists[rows, columns])
+
+        return closest, triangle_ids, weights, distances
+
+    def get_barycentric_coords(self, points):
+        """Returns the barycentric coordinates of the closest surface
+        points to points.
+
+        Args:
+            points (array): The query points (n x 3).
+
+        Returns:
+            tuple: The triangle vertex ids (n x 3) and their
+                weights (n x 3).
+        """
+        _, triangle_ids, weights, _ = self.closest_points(points)
+        return self.__triangles[triangle_ids], weights
+
+    def get_association(self, points):
+        """Returns the surface association of points, in the format of
+        ``Mesh.get_vtx_association_with_distance()``.
+
+        Args:
+            points (array): The query points (n x 3).
+
+        Returns:
+            dict: (point id : ((vertex id, weight), ) * 3) pairs.
+        """
+        vertex_ids, weights = self.get_barycentric_coords(points)
+        return dict(
+            (i, tuple(zip(ids, w))) for i, (ids, w) in enumerate(
+                zip(vertex_ids.tolist(), weights.tolist())))
+
+
+# the cached triangulations and indexes by key
+_TOPOLOGY_CACHE = collections.OrderedDict()
+_INDEX_CACHE = collections.OrderedDict()
+
+
+def _cache_get(cache, key, func):
+    """Returns a cached value, computing it if missing. The least
+    recently used values are dropped over the cache size."""
+    value = cache.pop(key, None)
+    if value is None:
+        value = func()
+    cache[key] = value
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def get_mesh_index(points, polygon_counts, polygon_connects,
+                   leaf_size=LEAF_SIZE):
+    """Returns a spatial index of a mesh. Indexes are cached by the
+    hash of the mesh topology and points, and triangulations are
+    cached by topology.
+
+    Args:
+        points (array): The vertex positions (n x 3).
+        polygon_counts (array): The number of vertices of each polygon.
+        polygon_connects (array): The vertex ids of all polygons.
+        leaf_size (int): The number of primitives in a tree leaf.
+
+    Returns:
+        MeshSpatialIndex
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    counts = numpy.asarray(polygon_counts, dtype=numpy.int64)
+    connects = numpy.asarray(polygon_connects, dtype=numpy.int64)
+    topology_key = _hash_arrays(counts, connects)
+    key = (topology_key, _hash_arrays(points), leaf_size)
+
+    def build():
+        triangulation = _cache_get(
+            _TOPOLOGY_CACHE, topology_key,
+            lambda: triangulate(counts, connects))
+        return MeshSpatialIndex(
+            points, counts, connects, leaf_size=leaf_size,
+            triangulation=triangulation)
+
+    return _cache_get(_INDEX_CACHE, key, build)
+
+
+def clear_cache():
+    """Clears the cached indexes and triangulations.
+
+    Returns:
+        None
+    """
+    _TOPOLOGY_CACHE.clear()
+    _INDEX_CACHE.clear()
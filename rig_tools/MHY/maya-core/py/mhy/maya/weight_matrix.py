@@ -0,0 +1,558 @@
+"""
+A sparse weight matrix of vertices x influences backed by NumPy arrays.
+
+The matrix is stored in CSR (compressed sparse row) layout:
+
+    + indptr: The start of each vertex row in indices and data,
+      of length num_vertices + 1.
+    + indices: The influence (column) index of each weight.
+    + data: The weight values.
+
+Columns are identified by influence names, so matrices can be re-ordered
+and merged by name. Operations like prune, normalize and influence
+capping are vectorized and return new matrices.
+
+This module doesn't depend on Maya. See ``SkinCluster.get_weight_matrix()``
+and ``SkinCluster.set_weight_matrix()`` for reading and writing skin
+clusters.
+
+Usage:
+
+.. code:: python
+
+    matrix = WeightMatrix.from_dense(weights, ['jntA', 'jntB', 'jntC'])
+    matrix = matrix.prune(0.001).limit_influences(4).normalize()
+    weights = matrix.to_list()
+"""
+
+import numpy
+
+
+__all__ = ['WeightMatrix']
+
+
+INDEX_TYPE = numpy.int32
+WEIGHT_TYPE = numpy.float64
+
+
+class WeightMatrix(object):
+    """
+    A CSR sparse matrix of vertices x influences.
+    """
+
+    def __init__(self, indptr, indices, data, influences):
+        """
+        Args:
+            indptr(array_like): The row pointers.
+            indices(array_like): The influence index of each weight.
+                Must be sorted within each row.
+            data(array_like): The weight values.
+            influences(list): The influence names.
+
+        Raises:
+            ValueError: If the arrays don't describe a valid matrix.
+
+        """
+        self.__indptr = numpy.asarray(indptr, dtype=INDEX_TYPE)
+        self.__indices = numpy.asarray(indices, dtype=INDEX_TYPE)
+        self.__data = numpy.asarray(data, dtype=WEIGHT_TYPE)
+        self.__influences = list(influences)
+        self.__influence_index = dict(
+            (x, i) for i, x in enumerate(self.__influences))
+
+        if len(self.__influence_index) != len(self.__influences):
+            raise ValueError('Duplicated influence names.')
+        if self.__indptr.ndim != 1 or not self.__indptr.size or \
+           self.__indptr[0] != 0 or \
+           self.__indptr[-1] != self.__indices.size or \
+           self.__indices.size != self.__data.size:
+            raise ValueError('Invalid CSR arrays.')
+        if self.__indices.size and (
+                self.__indices.min() < 0 or
+                self.__indices.max() >= len(self.__influences)):
+            raise ValueError('Influence index out of range.')
+
+    def __repr__(self):
+        return 'WeightMatrix ({} vertices x {} influences, {} weights)'.format(
+            self.num_vertices, self.num_influences, self.nnz)
+
+    __str__ = __repr__
+
+    # --- constructors
+
+    @classmethod
+    def from_dense(cls, weights, influences, tolerance=0.0):
+        """
+        Create a matrix from dense weights.
+
+        Args:
+            weights(array_like): A 2D array of (num_vertices, num_influences),
+                or a flat list of length num_vertices * num_influences as
+                returned by SkinCluster.get_weights_data().
+            influences(list): The influence names.
+            tolerance(float): Weights with an absolute value not greater
+                than this are left out.
+
+        Returns:
+            WeightMatrix
+
+        """
+        num_influences = len(influences)
+        weights = numpy.asarray(weights, dtype=WEIGHT_TYPE)
+        if not num_influences:
+            return cls.from_coo([], [], [], 0, influences)
+        weights = weights.reshape(-1, num_influences)
+        rows, cols = numpy.nonzero(numpy.abs(weights) > tolerance)
+        return cls.from_coo(
+            rows, cols, weights[rows, cols], weights.shape[0], influences)
+
+    @classmethod
+    def from_coo(cls, rows, cols, values, num_vertices, influences):
+        """
+        Create a matrix from (row, column, value) triplets.
+
+        Args:
+            rows(array_like): The vertex index of each weight.
+            cols(array_like): The influence index of each weight.
+            values(array_like): The weight values.
+            num_vertices(int): The number of vertices.
+            influences(list): The influence names.
+
+        Returns:
+            WeightMatrix
+
+        Raises:
+            ValueError: If a (row, column) pair is duplicated.
+
+        """
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        cols = numpy.asarray(cols, dtype=numpy.int64)
+        values = numpy.asarray(values, dtype=WEIGHT_TYPE)
+
+        order = numpy.argsort(rows * len(influences) + cols, kind='stable')
+        rows = rows[order]
+        cols = cols[order]
+        if rows.size > 1 and numpy.any(
+                (rows[1:] == rows[:-1]) & (cols[1:] == cols[:-1])):
+            raise ValueError('Duplicated weights.')
+
+        indptr = numpy.zeros(num_vertices + 1, dtype=INDEX_TYPE)
+        numpy.cumsum(
+            numpy.bincount(rows, minlength=num_vertices), out=indptr[1:])
+        return cls(indptr, cols, values[order], influences)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Create a matrix from exported skin cluster data.
+
+        Args:
+            data(dict): The data from SkinCluster.export().
+
+        Returns:
+            WeightMatrix
+
+        """
+        influence_names = data['influences'][0]
+        return cls.from_dense(data['weights'], influence_names)
+
+    def copy(self):
+        """
+        Returns:
+            WeightMatrix: A copy of this matrix.
+
+        """
+        return WeightMatrix(
+            self.__indptr.copy(), self.__indices.copy(),
+            self.__data.copy(), self.__influences)
+
+    # --- properties
+
+    @property
+    def indptr(self):
+        """
+        The row pointers.
+
+        :type: numpy.ndarray
+        """
+        return self.__indptr
+
+    @property
+    def indices(self):
+        """
+        The influence index of each weight.
+
+        :type: numpy.ndarray
+        """
+        return self.__indices
+
+    @property
+    def data(self):
+        """
+        The weight values.
+
+        :type: numpy.ndarray
+        """
+        return self.__data
+
+    @property
+    def influences(self):
+        """
+        The influence names.
+
+        :type: list
+        """
+        return list(self.__influences)
+
+    @property
+    def num_vertices(self):
+        """
+        :type: int
+        """
+        return self.__indptr.size - 1
+
+    @property
+    def num_influences(self):
+        """
+        :type: int
+        """
+        return len(self.__influences)
+
+    @property
+    def shape(self):
+        """
+        (num_vertices, num_influences)
+
+        :type: tuple
+        """
+        return self.num_vertices, self.num_influences
+
+    @property
+    def nnz(self):
+        """
+        The number of stored weights.
+
+        :type: int
+        """
+        return self.__data.size
+
+    # --- queries
+
+    def influence_index(self, influence):
+        """
+        Get the column index of an influence.
+
+        Args:
+            influence(str): An influence name.
+
+        Returns:
+            int or None: None if the influence is not in this matrix.
+
+        """
+        return self.__influence_index.get(influence)
+
+    def get_rows(self):
+        """
+        Returns:
+            numpy.ndarray: The vertex index of each stored weight.
+
+        """
+        return numpy.repeat(
+            numpy.arange(self.num_vertices), numpy.diff(self.__indptr))
+
+    def get_vertex_weights(self, vertex):
+        """
+        Get the weights of a vertex.
+
+        Args:
+            vertex(int): A vertex index.
+
+        Returns:
+            tuple: The influence indexes and weight values.
+
+        """
+        start, end = self.__indptr[vertex], self.__indptr[vertex + 1]
+        return self.__indices[start:end], self.__data[start:end]
+
+    def get_influence_weights(self, influence):
+        """
+        Get the weights of an influence on all vertices.
+
+        Args:
+            influence(str or int): An influence name or column index.
+
+        Returns:
+            numpy.ndarray: The dense weights of length num_vertices.
+
+        """
+        if not isinstance(influence, (int, numpy.integer)):
+            influence = self.__influence_index[influence]
+        weights = numpy.zeros(self.num_vertices, dtype=WEIGHT_TYPE)
+        mask = self.__indices == influence
+        weights[self.get_rows()[mask]] = self.__data[mask]
+        return weights
+
+    def get_row_sums(self):
+        """
+        Returns:
+            numpy.ndarray: The total weight of each vertex.
+
+        """
+        return numpy.bincount(
+            self.get_rows(), weights=self.__data,
+            minlength=self.num_vertices)
+
+    def get_influence_counts(self):
+        """
+        Returns:
+            numpy.ndarray: The number of stored weights of each vertex.
+
+        """
+        return numpy.diff(self.__indptr)
+
+    def to_dense(self):
+        """
+        Returns:
+            numpy.ndarray: A 2D array of (num_vertices, num_influences).
+
+        """
+        dense = numpy.zeros(self.shape, dtype=WEIGHT_TYPE)
+        dense[self.get_rows(), self.__indices] = self.__data
+        return dense
+
+    def to_list(self):
+        """
+        Returns:
+            list: The flat weights of length num_vertices * num_influences,
+                as returned by SkinCluster.get_weights_data().
+
+        """
+        return self.to_dense().ravel().tolist()
+
+    def is_equivalent(self, other, tolerance=1e-9):
+        """
+        Check if another matrix has the same weights for the
+        same influences, ignoring the influence order.
+
+        Args:
+            other(WeightMatrix): Another matrix.
+            tolerance(float): The weight tolerance.
+
+        Returns:
+            bool
+
+        """
+        if self.num_vertices != other.num_vertices or \
+           set(self.__influences) != set(other.influences):
+            return False
+        other = other.reorder(self.__influences)
+        return numpy.allclose(
+            self.to_dense(), other.to_dense(), rtol=0, atol=tolerance)
+
+    # --- operations
+
+    def __filter(self, mask):
+        """Returns a new matrix with only the weights in a mask."""
+        rows = self.get_rows()[mask]
+        indptr = numpy.zeros(self.num_vertices + 1, dtype=INDEX_TYPE)
+        numpy.cumsum(
+            numpy.bincount(rows, minlength=self.num_vertices),
+            out=indptr[1:])
+        return WeightMatrix(
+            indptr, self.__indices[mask], self.__data[mask],
+            self.__influences)
+
+    def prune(self, tolerance=0.001):
+        """
+        Remove small weights.
+
+        Args:
+            tolerance(float): Weights smaller than this are removed.
+
+        Returns:
+            WeightMatrix
+
+        """
+        return self.__filter(self.__data >= tolerance)
+
+    def normalize(self):
+        """
+        Scale the weights of each vertex so they sum to 1.0.
+        Vertices without weights are left empty.
+
+        Returns:
+            WeightMatrix
+
+        """
+        sums = self.get_row_sums()[self.get_rows()]
+        data = numpy.divide(
+            self.__data, sums, out=numpy.zeros_like(self.__data),
+            where=sums != 0)
+        return WeightMatrix(
+            self.__indptr.copy(), self.__indices.copy(), data,
+            self.__influences)
+
+    def limit_influences(self, max_influences):
+        """
+        Keep only the largest weights of each vertex.
+        The weights are not normalized.
+
+        Args:
+            max_influences(int): The max number of influences per vertex.
+
+        Returns:
+            WeightMatrix
+
+        """
+        rows = self.get_rows()
+        # order by vertex, then by descending weight
+        order = numpy.lexsort((-self.__data, rows))
+        rank = numpy.arange(self.nnz) - self.__indptr[rows[order]]
+        keep = numpy.sort(order[rank < max_influences])
+        mask = numpy.zeros(self.nnz, dtype=bool)
+        mask[keep] = True
+        return self.__filter(mask)
+
+    def reorder(self, influences):
+        """
+        Re-order the influence columns.
+
+        Args:
+            influences(list): The new influence names. Influences not in
+                this matrix are added without weights.
+
+        Returns:
+            WeightMatrix
+
+        Raises:
+            ValueError: If influences with weights are left out.
+
+        """
+        influences = list(influences)
+        new_index = dict((x, i) for i, x in enumerate(influences))
+        col_map = numpy.array(
+            [new_index.get(x, -1) for x in self.__influences],
+            dtype=numpy.int64)
+        cols = col_map[self.__indices]
+        if numpy.any(cols < 0):
+            missing = set(
+                self.__influences[i] for i in self.__indices[cols < 0])
+            raise ValueError(
+                'Influences with weights are left out: {}'.format(
+                    ', '.join(sorted(missing))))
+        return WeightMatrix.from_coo(
+            self.get_rows(), cols, self.__data, self.num_vertices,
+            influences)
+
+    def rename(self, name_map):
+        """
+        Rename influences.
+
+        Args:
+            name_map(dict): (old name : new name) pairs.
+
+        Returns:
+            WeightMatrix
+
+        """
+        return WeightMatrix(
+            self.__indptr.copy(), self.__indices.copy(), self.__data.copy(),
+            [name_map.get(x, x) for x in self.__influences])
+
+    def merge(self, other, influences=None, weight_threshold=None,
+              normalize=True):
+        """
+        Merge the weights of influences from another matrix.
+
+        The weights of the merged influences are replaced by the weights
+        in the other matrix. Influences not in this matrix are added.
+
+        Args:
+            other(WeightMatrix): The matrix to merge weights from.
+                Must have the same number of vertices.
+            influences(list or None): The influence names to merge.
+                If None, merge all influences of the other matrix.
+            weight_threshold(float or None): If not None, only merge
+                weights not smaller than this. The existing weights are
+                kept on the other vertices.
+            normalize(bool): If True, scale the other weights of each
+                merged vertex so the weights sum to 1.0.
+
+        Returns:
+            WeightMatrix
+
+        Raises:
+            ValueError: If the number of vertices doesn't match.
+
+        """
+        if other.num_vertices != self.num_vertices:
+            raise ValueError(
+                'Vertex count mismatch: {} vs {}'.format(
+                    self.num_vertices, other.num_vertices))
+        if influences is None:
+            influences = other.influences
+        influences = [x for x in influences
+                      if other.influence_index(x) is not None]
+
+        names = self.__influences + [
+            x for x in influences if x not in self.__influence_index]
+        num_cols = len(names)
+        new_index = dict((x, i) for i, x in enumerate(names))
+        merged_cols = numpy.zeros(num_cols, dtype=bool)
+        merged_cols[[new_index[x] for x in influences]] = True
+
+        # the merged weights in the result columns
+        col_map = numpy.array(
+            [new_index[x] if x in influences else -1
+             for x in other.influences], dtype=numpy.int64)
+        o_rows = other.get_rows()
+        o_cols = col_map[other.indices]
+        o_vals = other.data
+        mask = o_cols >= 0
+        if weight_threshold is not None and weight_threshold > 0:
+            mask &= o_vals >= weight_threshold
+        o_rows, o_cols, o_vals = o_rows[mask], o_cols[mask], o_vals[mask]
+
+        # remove the replaced weights of this matrix
+        s_rows = self.get_rows()
+        s_cols = self.__indices.astype(numpy.int64)
+        if weight_threshold is not None and weight_threshold > 0:
+            merged_rows = numpy.zeros(self.num_vertices, dtype=bool)
+            merged_rows[o_rows] = True
+            keep = ~numpy.isin(
+                s_rows * num_cols + s_cols, o_rows * num_cols + o_cols)
+        else:
+            merged_rows = numpy.ones(self.num_vertices, dtype=bool)
+            keep = ~merged_cols[s_cols]
+
+        rows = numpy.concatenate((s_rows[keep], o_rows))
+        cols = numpy.concatenate((s_cols[keep], o_cols))
+        vals = numpy.concatenate((self.__data[keep], o_vals))
+
+        if normalize and vals.size:
+            # scale the other weights to fill up the rest of 1.0
+            is_merged = merged_cols[cols]
+            merged_sum = numpy.bincount(
+                rows[is_merged], weights=vals[is_merged],
+                minlength=self.num_vertices)
+            other_sum = numpy.bincount(
+                rows[~is_merged], weights=vals[~is_merged],
+                minlength=self.num_vertices)
+            scale = numpy.divide(
+                numpy.clip(1.0 - merged_sum, 0.0, None), other_sum,
+                out=numpy.ones_like(other_sum), where=other_sum != 0)
+            scale[~merged_rows] = 1.0
+            vals[~is_merged] *= scale[rows[~is_merged]]
+
+            # normalize rows not filled up by the other weights
+            sums = numpy.bincount(
+                rows, weights=vals, minlength=self.num_vertices)
+            sums[~merged_rows] = 1.0
+            sums[sums == 0] = 1.0
+            vals /= sums[rows]
+
+            mask = vals != 0
+            rows, cols, vals = rows[mask], cols[mask], vals[mask]
+
+        return WeightMatrix.from_coo(
+            rows, cols, vals, self.num_vertices, names)
@@ -0,0 +1,77 @@
+import os
+import json
+import gzip
+import random
+import shutil
+import tempfile
+import unittest
+
+import mhy.maya.data_container as container
+
+
+class TestNodeDataContainer(unittest.TestCase):
+    """
+    Test the binary node data container without Maya
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        num_vtx = 500
+        num_inf = 20
+        weights = [0.0] * (num_vtx * num_inf)
+        for i in range(num_vtx):
+            for j in random.sample(range(num_inf), 3):
+                weights[i * num_inf + j] = random.random()
+        self.data = {'nodes': [{
+            'name': 'skinCluster1',
+            'type': 'skinCluster',
+            'weights': weights,
+            'influences': ['joint{}'.format(i) for i in range(num_inf)],
+            'indices': list(range(num_vtx)),
+            'mixed': [1, 0.5] * 50,
+            'points': [[random.random(), 0.0, 1.0]
+                       for _ in range(100)]}]}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_write_read(self):
+        path = os.path.join(self.root, 'skin.bnzd')
+        for compress in (True, False):
+            container.write_node_data(
+                self.data, path, compress=compress, chunk_size=1000)
+            self.assertTrue(container.is_binary_data_file(path))
+            self.assertEqual(container.read_node_data(path), self.data)
+
+        with container.NodeDataReader(path) as reader:
+            self.assertEqual(reader.array_count, 2)
+            info = reader.get_array_info(0)
+            self.assertEqual(info['type'], '<f8')
+            self.assertIn('indices', info)
+            indices, values = reader.get_sparse_array(0)
+            self.assertEqual(len(indices), 1500)
+            self.assertEqual(
+                list(reader.get_array(0)), self.data['nodes'][0]['weights'])
+            self.assertEqual(
+                reader.header_data['nodes'][0]['indices'],
+                {container.ARRAY_KEY: 1})
+
+        # float32 arrays
+        container.write_node_data(self.data, path, float_type='<f4')
+        data = container.read_node_data(path)
+        for a, b in zip(data['nodes'][0]['weights'],
+                        self.data['nodes'][0]['weights']):
+            self.assertAlmostEqual(a, b, places=6)
+
+    def test_convert(self):
+        src = os.path.join(self.root, 'skin.gnzd')
+        with gzip.open(src, 'wb') as f:
+            f.write(json.dumps(self.data).encode('utf-8'))
+
+        path = container.convert_data_file(src)
+        self.assertEqual(path, os.path.join(self.root, 'skin.bnzd'))
+        self.assertEqual(container.read_node_data(path), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
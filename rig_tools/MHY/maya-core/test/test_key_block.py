@@ -0,0 +1,81 @@
+import unittest
+
+from mhy.maya.key_block import KeyBlock
+
+
+KEYS = [
+    {'input': 0.0, 'value': 0.0, 'itt': 2, 'ott': 2,
+     'it': (1.0, 0.0), 'ot': (1.0, 0.0)},
+    {'input': 0.5, 'value': 2.0, 'itt': 2, 'ott': 2,
+     'it': (1.0, 0.5), 'ot': (1.0, 0.5)},
+    {'input': 1.0, 'value': 1.0, 'itt': 2, 'ott': 1,
+     'it': (1.0, -1.0), 'ot': (1.0, 0.0)},
+]
+
+
+class TestKeyBlock(unittest.TestCase):
+    """
+    Test the key block conversions without Maya
+    """
+
+    def setUp(self):
+        self.block = KeyBlock.from_keys(KEYS)
+
+    def test_layout(self):
+        block = self.block
+        self.assertEqual(len(block), 3)
+        self.assertTrue(block.has_tangents)
+        self.assertEqual(block.inputs.tolist(), [0.0, 0.5, 1.0])
+        self.assertEqual(block.out_types.tolist(), [2, 2, 1])
+        self.assertEqual(block.in_y.tolist(), [0.0, 0.5, -1.0])
+        self.assertEqual(block.locked.tolist(), [1, 1, 1])
+        self.assertEqual(block.to_keys(), KEYS)
+
+        with self.assertRaises(ValueError):
+            KeyBlock([0, 1], [0, 1, 2], 2, 2)
+        with self.assertRaises(ValueError):
+            KeyBlock([0, 1], [0, 1], 2, 2, in_x=[1, 1])
+
+    def test_data(self):
+        data = self.block.to_data()
+        # uniform columns are stored as a single value
+        self.assertEqual(data['itt'], 2)
+        self.assertEqual(data['ott'], [2, 2, 1])
+        self.assertEqual(data['ix'], 1.0)
+        self.assertIs(data['lock'], True)
+        self.assertEqual(KeyBlock.from_data(data), self.block)
+
+        data = self.block.to_data(tangents=False)
+        self.assertEqual(
+            sorted(data), ['input', 'itt', 'ott', 'value'])
+        block = KeyBlock.from_data(data)
+        self.assertFalse(block.has_tangents)
+        self.assertNotIn('it', block.to_key_dict()[0.5])
+
+        empty = KeyBlock.from_data(KeyBlock([], [], 2, 2).to_data())
+        self.assertEqual(len(empty), 0)
+
+    def test_key_dict(self):
+        key_dict = self.block.to_key_dict()
+        self.assertEqual(sorted(key_dict), [0.0, 0.5, 1.0])
+        self.assertEqual(KeyBlock.from_key_dict(key_dict), self.block)
+        self.assertEqual(
+            KeyBlock.from_key_dict({'1': {'value': 1, 'itt': 1, 'ott': 1}})
+            .inputs.tolist(), [1.0])
+
+    def test_range(self):
+        block = self.block.get_range(0.1)
+        self.assertEqual(block.inputs.tolist(), [0.5, 1.0])
+        self.assertEqual(block.out_x.tolist(), [1.0, 1.0])
+        self.assertEqual(len(self.block.get_range(0.6, 0.9)), 0)
+
+        block = self.block.scale_values(2)
+        self.assertEqual(block.values.tolist(), [0.0, 4.0, 2.0])
+        self.assertEqual(block.out_y.tolist(), [0.0, 1.0, 0.0])
+        self.assertEqual(block.in_x, self.block.in_x)
+        block = self.block.scale_values(2, tangents=False)
+        self.assertEqual(block.out_y, self.block.out_y)
+
+
+if __name__ == '__main__':
+    unittest.main()
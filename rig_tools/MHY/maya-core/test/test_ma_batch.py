@@ -0,0 +1,143 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import mhy.maya.ma_batch as ma_batch
+import mhy.maya.ma_parser as ma_parser
+
+
+def get_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class TestMABatch(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.files = {
+            'shot.ma': [
+                'file -r -ns "char" "assets/char.ma";',
+                'file -r -ns "prop" "assets/prop.mb";'],
+            'assets/char.ma': [
+                'file -r -ns "rig" "rig.ma";',
+                'createNode file -n "skinFile";',
+                '\tsetAttr ".ftn" -type "string" "D:/tex/skin.png";'],
+            'assets/rig.ma': [
+                'createNode file -n "eyeFile";',
+                '\tsetAttr ".ftn" -type "string" "D:/tex/eye.png";',
+                'createNode file -n "eyeFile_old";',
+                '\tsetAttr ".ftn" -type "string" "missing.tga";']}
+        for path, lines in self.files.items():
+            self.write(path, lines)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def path(self, path):
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def write(self, path, lines):
+        path = self.path(path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('\n'.join(['//Maya ASCII 2018 scene'] + lines) + '\n')
+
+    def read(self, path):
+        with open(self.path(path)) as f:
+            return f.read()
+
+    def test_rewrite_files(self):
+        files = ma_batch.find_ma_files(self.root)
+        self.assertEqual(
+            files, sorted(self.path(x) for x in self.files))
+
+        output = os.path.join(self.root, 'output')
+        for workers in (0, 2):
+            results = ma_batch.rewrite_files(
+                files, {'D:/tex': 'E:/textures', 'eyeFile': 'eye'},
+                output_folder=output, root_dir=self.root, workers=workers)
+            self.assertEqual([x.file_path for x in results], files)
+            self.assertTrue(all(x.success for x in results))
+            self.assertEqual([x.count for x in results], [1, 3, 0])
+            data = self.read('output/assets/rig.ma')
+            self.assertIn('"E:/textures/eye.png"', data)
+            self.assertIn('-n "eye_old"', data)
+
+        results = ma_batch.rewrite_files(
+            [self.path('assets/rig.ma')], {'eyeFile': 'eye'},
+            whole_word=True)
+        self.assertEqual(results[0].count, 1)
+        self.assertIn('-n "eyeFile_old"', self.read('assets/rig.ma'))
+
+        results = ma_batch.rewrite_files(
+            [self.path('missing.ma')], {'a': 'b'}, workers=0)
+        self.assertFalse(results[0].success)
+
+    def test_dependency_scanner(self):
+        cache_path = os.path.join(self.root, 'cache.json')
+        scanner = ma_batch.DependencyScanner(cache_path)
+        for workers in (2, 0):
+            scanner.scan(self.root, workers=workers)
+            self.assertEqual(
+                scanner.files, sorted(self.path(x) for x in self.files))
+            self.assertEqual(
+                scanner.get_references(self.path('shot.ma')),
+                [self.path('assets/char.ma'), self.path('assets/prop.mb')])
+            self.assertEqual(
+                scanner.get_textures(self.path('shot.ma'), recursive=True),
+                sorted(['D:/tex/eye.png', 'D:/tex/skin.png',
+                        self.path('assets/missing.tga')]))
+            self.assertEqual(
+                scanner.get_dependents(self.path('assets/rig.ma')),
+                [self.path('assets/char.ma')])
+            self.assertEqual(
+                scanner.get_dependents(
+                    'D:/tex/eye.png', recursive=True),
+                [self.path(x)
+                 for x in ('assets/char.ma', 'assets/rig.ma', 'shot.ma')])
+            self.assertIn(
+                self.path('assets/prop.mb'),
+                scanner.get_missing()[self.path('shot.ma')])
+            scanner.save()
+
+        # only changed files are parsed again
+        scanner = ma_batch.DependencyScanner(cache_path)
+        self.assertEqual(scanner.scan(self.root), [])
+        self.write('assets/char.ma', ['file -r "rig.ma";', ''])
+        os.remove(self.path('shot.ma'))
+        self.assertEqual(
+            scanner.scan(self.root), [self.path('assets/char.ma')])
+        self.assertEqual(
+            scanner.files,
+            [self.path('assets/char.ma'), self.path('assets/rig.ma')])
+        self.assertEqual(
+            scanner.get_textures(self.path('assets/char.ma')), [])
+        self.assertEqual(scanner.errors, {})
+
+    @unittest.skipIf(os.name == 'nt', 'posix permission bits only')
+    def test_file_mode(self):
+        rig_path = self.path('assets/rig.ma')
+        os.chmod(rig_path, 0o640)
+        output = os.path.join(self.root, 'output')
+        ma_batch.rewrite_files(
+            [rig_path], {'eyeFile': 'eye'}, output_folder=output, workers=0)
+        self.assertEqual(get_mode(os.path.join(output, 'rig.ma')), 0o640)
+
+        os.chmod(rig_path, 0o644)
+        ma_batch.rewrite_files([rig_path], {'eye': 'iris'}, workers=0)
+        self.assertEqual(get_mode(rig_path), 0o644)
+
+        cache_path = os.path.join(self.root, 'cache.json')
+        scanner = ma_batch.DependencyScanner(cache_path)
+        scanner.scan(self.root, workers=0)
+        scanner.save()
+        self.assertEqual(get_mode(cache_path), 0o666 & ~ma_parser._UMASK)
+        os.chmod(cache_path, 0o664)
+        scanner.save()
+        self.assertEqual(get_mode(cache_path), 0o664)
+
+
+if __name__ == '__main__':
+    unittest.main()
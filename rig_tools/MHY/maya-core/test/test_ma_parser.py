@@ -0,0 +1,146 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import mhy.maya.ma_parser as ma_parser
+
+
+MA_FILE = '''//Maya ASCII 2018 scene
+//Name: scene.ma
+file -rdi 1 -ns "rig" -rfn "rigRN" -typ "mayaAscii"
+\t\t"/path/to/rig.ma";
+file -r -ns "rig" -dr 1 -rfn "rigRN" -typ "mayaAscii" "/path/to/rig.ma";
+requires maya "2018";
+requires -nodeType "stereoRigCamera" "stereoCamera" "10.0";
+currentUnit -l centimeter -a degree -t ntsc;
+fileInfo "application" "maya";
+createNode transform -n "L_arm_JNT_grp";
+\trename -uid "A";
+\tsetAttr ".t" -type "double3" 0 1 2 ;
+createNode joint -n "L_arm_JNT" -p "L_arm_JNT_grp";
+\tsetAttr ".nts" -type "string" "a; \\"quoted\\" note;\\n";
+createNode joint -n "L_arm_JNT_end" -p "L_arm_JNT";
+createNode file -n "colorFile";
+\tsetAttr ".ftn" -type "string"
+\t\t"/textures/color.png";
+createNode file -n "bumpFile";
+\tsetAttr ".ftn" -type "string" "/textures/bump.TGA";
+createNode script -n "sceneConfigurationScriptNode";
+\tsetAttr ".b" -type "string"
+\t\t"playbackOptions -min 1 -max 120 -ast -5 -aet 200 ";
+\tsetAttr ".st" 6;
+select -ne :time1;
+\tsetAttr ".o" 1;
+connectAttr "L_arm_JNT_grp.t" "L_arm_JNT.t";
+connectAttr "L_arm_JNT.s"
+\t\t"L_arm_JNT_end.is";
+// End of scene.ma
+'''
+
+
+def get_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class TestMAParser(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'scene.ma')
+        with open(self.path, 'w') as f:
+            f.write(MA_FILE)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_queries(self):
+        for parser in (ma_parser.MAParser(self.path),
+                       ma_parser.MAParser('', file_contents=MA_FILE)):
+            self.assertEqual(
+                parser.get_units(),
+                {'linear': 'centimeter', 'angle': 'degree', 'time': 'ntsc'})
+            self.assertEqual(parser.get_references(), ['/path/to/rig.ma'])
+            self.assertEqual(
+                parser.get_requires(),
+                [('maya', '2018'), ('stereoCamera', '10.0')])
+            self.assertEqual(parser.get_file_info(), {'application': 'maya'})
+            self.assertEqual(
+                parser.get_nodes('arm', type_='joint'),
+                ['L_arm_JNT', 'L_arm_JNT_end'])
+            self.assertEqual(
+                parser.get_nodes('File'), ['colorFile', 'bumpFile'])
+            self.assertEqual(
+                parser.get_textures(),
+                ['/textures/bump.TGA', '/textures/color.png'])
+            self.assertEqual(
+                parser.get_playback_options(),
+                {'minTime': 1, 'maxTime': 120,
+                 'animationStartTime': -5, 'animationEndTime': 200})
+            self.assertEqual(
+                list(parser.iter_connections()),
+                [('L_arm_JNT_grp.t', 'L_arm_JNT.t'),
+                 ('L_arm_JNT.s', 'L_arm_JNT_end.is')])
+
+            node = parser.get_node('L_arm_JNT')
+            self.assertEqual(node.parent, 'L_arm_JNT_grp')
+            block = parser.get_node_block(node)
+            self.assertTrue(block.startswith('createNode joint'))
+            self.assertTrue(block.endswith('note;\\n";\n'))
+            self.assertEqual(
+                parser.get_node_block('sceneConfigurationScriptNode')
+                .count('setAttr'), 2)
+
+    def test_replace_node_names(self):
+        parser = ma_parser.MAParser(self.path)
+        parser.replace_node_names({'L_': 'R_', 'colorFile': 'color'})
+        copy_path = os.path.join(self.root, 'scene_copy.ma')
+        with open(copy_path) as f:
+            data = f.read()
+        self.assertIn('"R_arm_JNT_end.is"', data)
+        self.assertIn('-n "R_arm_JNT" -p "R_arm_JNT_grp"', data)
+        self.assertIn('createNode file -n "color"', data)
+        # names not created in the file are kept
+        self.assertIn('"/path/to/rig.ma"', data)
+
+        parser.replace_node_names({'L_': 'R_'}, as_copy=False)
+        self.assertEqual(
+            parser.get_nodes('arm'),
+            ['R_arm_JNT_grp', 'R_arm_JNT', 'R_arm_JNT_end'])
+        self.assertEqual(
+            [x for x in os.listdir(self.root) if x.endswith('.tmp')], [])
+
+        parser = ma_parser.MAParser(copy_path)
+        parser.replace_node_names({'missing': 'name'})
+        with open(copy_path) as f:
+            self.assertEqual(f.read(), data)
+
+    @unittest.skipIf(os.name == 'nt', 'posix permission bits only')
+    def test_rewrite_file_mode(self):
+        os.chmod(self.path, 0o640)
+        parser = ma_parser.MAParser(self.path)
+        parser.replace_node_names({'L_': 'R_'})
+        copy_path = os.path.join(self.root, 'scene_copy.ma')
+        self.assertEqual(get_mode(copy_path), 0o640)
+
+        os.chmod(self.path, 0o644)
+        parser.replace_node_names({'L_': 'R_'}, as_copy=False)
+        self.assertEqual(get_mode(self.path), 0o644)
+
+        tmp_path = os.path.join(self.root, 'new.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(MA_FILE)
+        os.chmod(tmp_path, 0o600)
+        new_path = os.path.join(self.root, 'new.ma')
+        ma_parser.replace_file(tmp_path, new_path)
+        self.assertEqual(get_mode(new_path), 0o666 & ~ma_parser._UMASK)
+
+    def test_invalid_file(self):
+        with self.assertRaises(ValueError):
+            ma_parser.MAParser('/path/to/scene.mb')
+        with self.assertRaises(ValueError):
+            ma_parser.MAParser('/path/to/missing.ma').get_units()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import json
+import gzip
+import shutil
+import tempfile
+import unittest
+
+import mhy.maya.data_container as container
+import mhy.maya.nodezoo.utils as nutil
+
+
+class TestNodeDataContainer(unittest.TestCase):
+    """
+    Test reading binary node data containers through nodezoo
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data = {'nodes': [{
+            'name': 'skinCluster1',
+            'type': 'skinCluster',
+            'weights': [0.0, 0.25, 0.75, 0.0] * 100,
+            'indices': list(range(100))}]}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_read_data_file(self):
+        path = os.path.join(self.root, 'skin.bnzd')
+        nutil.write_data_file(self.data, path)
+        self.assertTrue(container.is_binary_data_file(path))
+        self.assertEqual(nutil.read_data_file(path), self.data)
+
+        src = os.path.join(self.root, 'skin.gnzd')
+        with gzip.open(src, 'wb') as f:
+            f.write(json.dumps(self.data).encode('utf-8'))
+        path = container.convert_data_file(src)
+        self.assertEqual(
+            nutil.load_node_data_from_file(path), self.data['nodes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy
 from maya import cmds, OpenMaya
 
 # import mhy.maya.nodezoo as nz
@@ -160,6 +161,52 @@ class TestMesh(unittest.TestCase):
             points.append(OpenMaya.MPoint(normals[i].x, normals[i].y, normals[i].z))
         self.mesh.set_points(points)
 
+    def test_arrays(self):
+        self.setup()
+        mesh = self.mesh
+        xform = mesh.get_parent()
+        cmds.move(1, 2, 3, xform.name)
+
+        points = mesh.get_point_array(space='object')
+        self.assertEqual(points.shape, (9, 3))
+        self.assertEqual(points.tolist(), mesh.get_points(space='object'))
+        world_points = mesh.get_point_array()
+        self.assertTrue(numpy.allclose(world_points - points, [1, 2, 3]))
+
+        mesh.set_point_array(points * 2, space='object')
+        self.assertEqual(
+            mesh.get_point_array(space='object').tolist(),
+            (points * 2).tolist())
+        self.assertEqual(mesh.get_normal_array().shape, (9, 3))
+
+        # other point sequences are set point by point
+        mesh.set_points(
+            [OpenMaya.MPoint(*x) for x in points.tolist()], space='object')
+        self.assertEqual(
+            mesh.get_point_array(space='object').tolist(), points.tolist())
+        mesh.set_points(
+            [x + [1.0] for x in (points * 3).tolist()], space='object')
+        self.assertEqual(
+            mesh.get_point_array(space='object').tolist(),
+            (points * 3).tolist())
+
+        counts, connects = mesh.get_face_arrays()
+        self.assertEqual(counts.tolist(), [4] * 4)
+        self.assertEqual(len(mesh.polygon_vertices), 4)
+        self.assertEqual(
+            sorted(mesh.polygon_vertices[0]), [0, 1, 3, 4])
+        uvs, uv_counts, uv_ids = mesh.get_uv_arrays()
+        self.assertEqual(uvs.shape, (9, 2))
+
+        data = mesh.export_creation_data()
+        self.assertEqual(len(data['points']), 27)
+        self.assertEqual(data['polygon_connects'], connects.tolist())
+        copy = Node.create('mesh', **data)
+        self.assertEqual(
+            copy.get_point_array(space='object').tolist(),
+            (points * 2).tolist())
+        self.assertEqual(copy.get_uvs(), mesh.get_uvs())
+
 
 class TestFollicle(unittest.TestCase):
     """
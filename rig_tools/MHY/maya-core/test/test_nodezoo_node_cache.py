@@ -0,0 +1,87 @@
+import unittest
+
+from maya import cmds
+
+from mhy.maya.nodezoo.node import Node
+from mhy.maya.nodezoo.exceptions import ObjectNotFoundError
+import mhy.maya.nodezoo.node.node_ as node_
+
+
+class TestNodeCache(unittest.TestCase):
+    """
+    Test the Node instance cache and the batch name resolution
+    """
+
+    def setUp(self):
+        cmds.file(newFile=True, force=True)
+        node_.clear_cache()
+        self.grp = cmds.createNode('transform', name='grp')
+        self.joint = cmds.createNode('joint', name='jnt', parent=self.grp)
+        self.mult = cmds.createNode('multiplyDivide', name='md')
+
+    def test_identity(self):
+        joint = Node(self.joint)
+        self.assertIs(Node('jnt'), joint)
+        self.assertIs(Node('|grp|jnt'), joint)
+        self.assertIs(Node('jnt.translateX'), joint)
+        self.assertIs(Node(joint.object()), joint)
+        self.assertIs(Node(joint), joint)
+        self.assertIs(Node(self.mult), Node('md'))
+
+    def test_invalidation(self):
+        joint = Node(self.joint)
+        cmds.rename(self.joint, 'jnt_renamed')
+        self.assertIs(Node('jnt_renamed'), joint)
+        with self.assertRaises(ObjectNotFoundError):
+            Node('jnt')
+
+        # a new node with the old name is not the renamed node
+        other = Node(cmds.createNode('joint', name='jnt'))
+        self.assertIsNot(other, joint)
+        self.assertEqual(Node('jnt').long_name, '|jnt')
+
+        cmds.parent('jnt_renamed', world=True)
+        self.assertIsNot(Node('jnt_renamed'), joint)
+        self.assertEqual(Node('jnt_renamed').long_name, '|jnt_renamed')
+
+        mult = Node(self.mult)
+        cmds.delete(self.mult)
+        self.assertFalse(mult.is_valid)
+        new_mult = Node(cmds.createNode('multiplyDivide', name='md'))
+        self.assertIsNot(new_mult, mult)
+        self.assertTrue(Node('md').is_valid)
+
+    def test_ancestor_reparent(self):
+        joint = Node(self.joint)
+        self.assertEqual(joint.long_name, '|grp|jnt')
+        other = cmds.createNode('transform', name='other')
+        cmds.parent(self.grp, other)
+
+        # the descendants of a reparented node get fresh paths
+        new_joint = Node('jnt')
+        self.assertIsNot(new_joint, joint)
+        self.assertEqual(new_joint.long_name, '|other|grp|jnt')
+        self.assertIs(Node('|other|grp|jnt'), new_joint)
+        self.assertIs(Node(new_joint.object()), new_joint)
+
+    def test_from_names(self):
+        grp = Node(self.grp)
+        names = ['md', self.joint, 'grp', grp, 'md.input1X', '|grp|jnt']
+        nodes = Node.from_names(names)
+        self.assertEqual(len(nodes), len(names))
+        self.assertEqual(
+            [x.name for x in nodes], ['md', 'jnt', 'grp', 'grp', 'md', 'jnt'])
+        self.assertIs(nodes[2], grp)
+        self.assertIs(nodes[0], nodes[4])
+        self.assertIs(nodes[1], nodes[5])
+        self.assertIs(Node('md'), nodes[0])
+
+        cmds.createNode('joint', name='jnt')
+        with self.assertRaises(ObjectNotFoundError):
+            Node.from_names(['grp', 'missing'])
+        with self.assertRaises(ObjectNotFoundError):
+            Node.from_names(['jnt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mhy.maya.nodezoo.pipeline as pipeline
+
+
+class TestNodeDataPipeline(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data = {'nodes': [
+            {'name': 'skinCluster1',
+             'weights': [float(i) for i in range(1000)]}]}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_export_import(self):
+        paths = [os.path.join(self.root, 'sub', 'mesh{}.{}'.format(i, ext))
+                 for i in range(6) for ext in ('nzd', 'gnzd', 'bnzd')]
+        for workers in (0, 3):
+            with pipeline.ExportPipeline(
+                    workers=workers, max_pending=2) as export_pipeline:
+                for path in paths:
+                    export_pipeline.submit(
+                        self.data, path, compress=not path.endswith('.nzd'))
+            results = export_pipeline.results
+            self.assertEqual([x.file_path for x in results], paths)
+            self.assertTrue(all(x.success for x in results))
+            self.assertGreater(export_pipeline.time, 0)
+
+            read = list(pipeline.iter_data_files(paths, workers=workers))
+            self.assertEqual([x[0] for x in read], paths)
+            for _, data, error in read:
+                self.assertIsNone(error)
+                self.assertEqual(data, self.data)
+
+    def test_failures(self):
+        path = os.path.join(self.root, 'mesh.gnzd')
+        with open(os.path.join(self.root, 'file'), 'w') as f:
+            f.write('')
+        bad_path = os.path.join(self.root, 'file', 'mesh.gnzd')
+
+        export_pipeline = pipeline.ExportPipeline(workers=2)
+        export_pipeline.submit(self.data, bad_path)
+        export_pipeline.submit(self.data, path)
+        export_pipeline.join()
+        self.assertEqual(
+            [x.file_path for x in export_pipeline.failed], [bad_path])
+        self.assertIn(bad_path, export_pipeline.report())
+        with self.assertRaises(RuntimeError):
+            export_pipeline.submit(self.data, path)
+
+        read = list(pipeline.iter_data_files([bad_path, path], prefetch=1))
+        self.assertIsNone(read[0][1])
+        self.assertTrue(read[0][2])
+        self.assertEqual(read[1][1], self.data)
+
+        # stop reading early
+        for _ in pipeline.iter_data_files([path] * 5, prefetch=1):
+            break
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from maya import cmds
+
+from mhy.maya.nodezoo.node import Node
+from mhy.maya.nodezoo.attribute import Attribute
+import mhy.maya.nodezoo.snapshot as snapshot
+
+
+class TestAttributeSnapshot(unittest.TestCase):
+    """
+    Test the attribute snapshot against exporting Attribute instances
+    """
+
+    def setUp(self):
+        cmds.file(newFile=True, force=True)
+        snapshot.clear_cache()
+        self.node = Node(cmds.createNode('transform', name='ctrl'))
+        self.node.add_attr('enum', name='mode', enumName='a:b')
+        joint = cmds.createNode('joint', name='jnt')
+        cmds.connectAttr('ctrl.translate', 'jnt.translate')
+        cmds.connectAttr('ctrl.rotateX', 'jnt.scaleY')
+        decompose = cmds.createNode('decomposeMatrix')
+        cmds.connectAttr('ctrl.worldMatrix[0]', decompose + '.inputMatrix')
+        self.joint = Node(joint)
+
+    def test_export(self):
+        for node in (self.node, self.joint):
+            for with_connection in (True, False):
+                expected = []
+                for attr in node.top_level_attrs():
+                    data = attr.export(
+                        withConnection=with_connection, isNested=True)
+                    if data:
+                        expected.append(data)
+                data = snapshot.AttributeSnapshot(
+                    with_connection=with_connection).export_node(node)
+                self.assertEqual(data, expected)
+
+        data = snapshot.AttributeSnapshot().export_node(self.joint)
+        data = dict((x['name'], x) for x in data)
+        scale_y = data['scale']['children'][1]
+        self.assertEqual(scale_y['src'], 'ctrl.rotateX')
+        self.assertIn('unit_conversion', scale_y)
+
+    def test_ignore(self):
+        attrs = ['translate', 'mode', 'nodeState', 'visibility', Attribute(
+            self.node, 'scale')]
+        data = snapshot.AttributeSnapshot().export_node(
+            self.node, attrs=attrs, ignore=['visibility', 'translateY'])
+        self.assertEqual(
+            [x['name'] for x in data], ['translate', 'mode', 'scale'])
+        self.assertEqual(
+            [x['name'] for x in data[0]['children']],
+            ['translateX', 'translateZ'])
+        self.assertEqual(data[1]['value'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mhy.maya.nodezoo.pipeline as pipeline
+import mhy.maya.nodezoo.stream as stream
+
+
+class TestNodeDataStream(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.nodes = []
+        for i in range(6):
+            self.nodes.append({
+                'attributes': [{'name': 'envelope', 'type': 'float'}],
+                'name': 'node"{}\\}}'.format(i),
+                'type': 'skinCluster' if i % 2 else 'cluster',
+                'weights': [i * 0.5] * 300,
+                'flags': [True, None, '[{']})
+        self.data = {'version': {'nodes': []}, 'nodes': self.nodes}
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_iter_node_data(self):
+        for ext in ('nzd', 'gnzd', 'bnzd'):
+            path = os.path.join(self.root, 'mesh.' + ext)
+            pipeline.write_data_file(
+                self.data, path, compress=ext != 'nzd')
+
+            for chunk_size in (16, 1000, stream.CHUNK_SIZE):
+                self.assertEqual(
+                    list(stream.iter_node_data(path, chunk_size=chunk_size)),
+                    self.nodes)
+
+            nodes = stream.iter_node_data(
+                path, types=['cluster'], chunk_size=64)
+            self.assertEqual(list(nodes), self.nodes[::2])
+            nodes = stream.iter_node_data(
+                path, names=[self.nodes[3]['name']],
+                filter_func=lambda name, type_: type_ == 'skinCluster')
+            self.assertEqual(list(nodes), [self.nodes[3]])
+
+    def test_invalid_data(self):
+        path = os.path.join(self.root, 'mesh.nzd')
+        with open(path, 'w') as f:
+            f.write('{"nodes": [{"name": "a"}, {"name": "b", "weights": [1')
+        nodes = stream.iter_node_data(path)
+        self.assertEqual(next(nodes), {'name': 'a'})
+        with self.assertRaises(ValueError):
+            next(nodes)
+
+    def test_prefetch(self):
+        self.assertEqual(
+            list(pipeline.iter_prefetched(iter(range(100)), prefetch=3)),
+            list(range(100)))
+
+        def fail():
+            yield 1
+            raise RuntimeError('Failed reading.')
+
+        items = pipeline.iter_prefetched(fail())
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(RuntimeError):
+            next(items)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+
+import numpy
+
+import mhy.maya.spatial_index as spatial_index
+
+
+def make_tube(count, noise=0.002):
+    """Returns the points and polygons of a wavy tube of quads with
+    a triangle and a pentagon cap."""
+    rng = numpy.random.RandomState(0)
+    u, v = numpy.meshgrid(
+        numpy.linspace(0, 1, count), numpy.linspace(0, 1, count))
+    angle = u * 2 * numpy.pi
+    points = numpy.stack(
+        [numpy.cos(angle) * (1 + 0.3 * v),
+         numpy.sin(angle) * (1 + 0.3 * v),
+         v * 2 + 0.1 * numpy.sin(5 * angle)], axis=-1).reshape(-1, 3)
+    points += rng.randn(*points.shape) * noise
+    ids = numpy.arange(count * count).reshape(count, count)
+    quads = numpy.stack(
+        [ids[:-1, :-1], ids[:-1, 1:], ids[1:, 1:], ids[1:, :-1]], axis=-1)
+    counts = [4] * ((count - 1) ** 2) + [3, 5]
+    connects = quads.ravel().tolist() + [0, 1, 2] + ids[-1, :5].tolist()
+    return points, counts, connects
+
+
+def brute_closest_points(index, points):
+    """Returns the closest surface distances by testing all triangles."""
+    triangles = index.triangles
+    corners = index.points[triangles]
+    count = len(triangles)
+    closest, _ = spatial_index.closest_points_on_triangles(
+        numpy.repeat(points, count, axis=0),
+        numpy.tile(corners[:, 0], (len(points), 1)),
+        numpy.tile(corners[:, 1], (len(points), 1)),
+        numpy.tile(corners[:, 2], (len(points), 1)))
+    dists = numpy.linalg.norm(
+        closest - numpy.repeat(points, count, axis=0), axis=1)
+    return dists.reshape(len(points), count).min(axis=1)
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """
+    Test the mesh spatial index against brute force queries without Maya
+    """
+
+    def setUp(self):
+        self.points, self.counts, self.connects = make_tube(30)
+        self.index = spatial_index.MeshSpatialIndex(
+            self.points, self.counts, self.connects)
+        self.queries = numpy.random.RandomState(1).randn(300, 3) * 1.2
+        self.dists = numpy.linalg.norm(
+            self.queries[:, None] - self.points[None], axis=-1)
+
+    def tearDown(self):
+        spatial_index.clear_cache()
+
+    def test_triangulate(self):
+        triangles, faces, corners = spatial_index.triangulate(
+            [3, 4, 5], [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
+        self.assertEqual(
+            triangles.tolist(),
+            [[0, 1, 2], [3, 4, 5], [3, 5, 6],
+             [7, 8, 9], [7, 9, 10], [7, 10, 11]])
+        self.assertEqual(faces.tolist(), [0, 1, 1, 2, 2, 2])
+        self.assertEqual(corners[-1].tolist(), [7, 10, 11])
+        index = self.index
+        self.assertEqual(index.num_vertices, 900)
+        self.assertEqual(index.num_triangles, 29 * 29 * 2 + 1 + 3)
+
+    def test_closest_points_on_triangles(self):
+        a = numpy.array([[0.0, 0, 0]] * 4)
+        b = numpy.array([[1.0, 0, 0]] * 3 + [[0.0, 0, 0]])
+        c = numpy.array([[0.0, 1, 0]] * 3 + [[2.0, 2, 2]])
+        points = numpy.array(
+            [[0.2, 0.2, 1], [-1, -1, 0], [1, 1, 0], [0.5, 0.5, 0.5]])
+        closest, weights = spatial_index.closest_points_on_triangles(
+            points, a, b, c)
+        self.assertTrue(numpy.allclose(
+            closest, [[0.2, 0.2, 0], [0, 0, 0], [0.5, 0.5, 0], [0, 0, 0]]))
+        self.assertTrue(numpy.allclose(weights.sum(axis=1), 1))
+        self.assertTrue(numpy.allclose(
+            (numpy.stack([a, b, c], axis=1) * weights[:, :, None])
+            .sum(axis=1), closest))
+
+    def test_closest_vertices(self):
+        vertex_ids, dists = self.index.closest_vertices(self.queries)
+        self.assertTrue(numpy.allclose(dists, self.dists.min(axis=1)))
+        self.assertTrue(numpy.allclose(
+            self.dists[numpy.arange(len(self.queries)), vertex_ids], dists))
+
+    def test_vertices_in_radius(self):
+        indptr, indices, dists = self.index.vertices_in_radius(
+            self.queries, 0.3)
+        for i, row in enumerate(self.dists):
+            found = indices[indptr[i]:indptr[i + 1]]
+            self.assertEqual(
+                sorted(found.tolist()), numpy.nonzero(row <= 0.3)[0].tolist())
+            self.assertTrue(
+                (numpy.diff(dists[indptr[i]:indptr[i + 1]]) >= 0).all())
+
+    def test_closest_points(self):
+        index = self.index
+        closest, triangle_ids, weights, dists = index.closest_points(
+            self.queries)
+        self.assertTrue(numpy.allclose(
+            dists, brute_closest_points(index, self.queries)))
+        self.assertTrue(numpy.allclose(weights.sum(axis=1), 1))
+        self.assertTrue((weights >= -1e-9).all())
+        self.assertTrue(numpy.allclose(
+            (index.points[index.triangles[triangle_ids]] *
+             weights[:, :, None]).sum(axis=1), closest))
+
+        # the vertices associate to themselves
+        association = index.get_association(self.points[:50])
+        self.assertEqual(len(association), 50)
+        for i, pairs in association.items():
+            self.assertAlmostEqual(dict(pairs).get(i, 0), 1)
+
+    def test_cache(self):
+        index = spatial_index.get_mesh_index(
+            self.points, self.counts, self.connects)
+        self.assertIs(
+            spatial_index.get_mesh_index(
+                self.points.copy(), self.counts, self.connects), index)
+        moved = spatial_index.get_mesh_index(
+            self.points + 1, self.counts, self.connects)
+        self.assertIsNot(moved, index)
+        # deformed meshes share the triangulation of the topology
+        self.assertIs(moved.triangles, index.triangles)
+
+
+if __name__ == '__main__':
+    unittest.main()
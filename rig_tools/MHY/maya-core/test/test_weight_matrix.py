@@ -0,0 +1,120 @@
+import unittest
+
+import numpy
+
+from mhy.maya.weight_matrix import WeightMatrix
+
+
+INFLUENCES = ['jntA', 'jntB', 'jntC', 'jntD']
+
+WEIGHTS = [
+    [0.5, 0.5, 0.0, 0.0],
+    [0.0, 0.2, 0.3, 0.5],
+    [0.0, 0.0, 0.0, 0.0],
+    [0.1, 0.0005, 0.6, 0.2995],
+]
+
+
+class TestWeightMatrix(unittest.TestCase):
+    """
+    Test the sparse weight matrix without Maya
+    """
+
+    def setUp(self):
+        self.matrix = WeightMatrix.from_dense(WEIGHTS, INFLUENCES)
+
+    def test_layout(self):
+        matrix = self.matrix
+        self.assertEqual(matrix.shape, (4, 4))
+        self.assertEqual(matrix.nnz, 9)
+        self.assertEqual(matrix.indptr.tolist(), [0, 2, 5, 5, 9])
+        self.assertEqual(matrix.indices.tolist(), [0, 1, 1, 2, 3, 0, 1, 2, 3])
+        self.assertEqual(matrix.to_dense().tolist(), WEIGHTS)
+        self.assertEqual(
+            matrix.to_list(), [x for row in WEIGHTS for x in row])
+        self.assertEqual(
+            WeightMatrix.from_dense(matrix.to_list(), INFLUENCES).to_dense()
+            .tolist(), WEIGHTS)
+        self.assertEqual(
+            matrix.get_influence_weights('jntC').tolist(),
+            [0.0, 0.3, 0.0, 0.6])
+        cols, values = matrix.get_vertex_weights(1)
+        self.assertEqual(cols.tolist(), [1, 2, 3])
+        self.assertEqual(matrix.get_influence_counts().tolist(), [2, 3, 0, 4])
+
+        data = {'influences': (INFLUENCES, [0, 1, 2, 3]),
+                'weights': matrix.to_list()}
+        self.assertTrue(WeightMatrix.from_data(data).is_equivalent(matrix))
+
+        with self.assertRaises(ValueError):
+            WeightMatrix([0, 1], [4], [1.0], INFLUENCES)
+        with self.assertRaises(ValueError):
+            WeightMatrix.from_coo([0, 0], [1, 1], [1, 1], 1, INFLUENCES)
+
+    def test_prune_normalize(self):
+        matrix = self.matrix.prune(0.001)
+        self.assertEqual(matrix.nnz, 8)
+        self.assertEqual(matrix.get_influence_weights('jntB')[3], 0)
+
+        matrix = matrix.normalize()
+        sums = matrix.get_row_sums()
+        numpy.testing.assert_allclose(sums, [1, 1, 0, 1])
+
+        matrix = self.matrix.limit_influences(2)
+        self.assertEqual(
+            matrix.to_dense().tolist(),
+            [[0.5, 0.5, 0.0, 0.0],
+             [0.0, 0.0, 0.3, 0.5],
+             [0.0, 0.0, 0.0, 0.0],
+             [0.0, 0.0, 0.6, 0.2995]])
+
+    def test_reorder(self):
+        influences = ['jntD', 'jntE', 'jntC', 'jntB', 'jntA']
+        matrix = self.matrix.reorder(influences)
+        self.assertEqual(matrix.influences, influences)
+        self.assertEqual(
+            matrix.get_influence_weights('jntE').tolist(), [0, 0, 0, 0])
+        self.assertTrue(matrix.is_equivalent(self.matrix.reorder(
+            INFLUENCES + ['jntE'])))
+        with self.assertRaises(ValueError):
+            self.matrix.reorder(['jntA', 'jntB'])
+
+        matrix = self.matrix.rename({'jntA': 'jntX'})
+        self.assertEqual(matrix.influences[0], 'jntX')
+
+    def test_merge(self):
+        other = WeightMatrix.from_dense(
+            [[0.0, 0.4],
+             [0.5, 0.0],
+             [1.0, 0.0],
+             [0.0, 0.0005]],
+            ['jntE', 'jntA'])
+
+        # replace and normalize
+        matrix = self.matrix.merge(other)
+        self.assertEqual(matrix.influences, INFLUENCES + ['jntE'])
+        dense = matrix.to_dense()
+        numpy.testing.assert_allclose(dense[:, 4], [0, 0.5, 1, 0])
+        numpy.testing.assert_allclose(dense[:, 0], [0.4, 0, 0, 0.0005])
+        numpy.testing.assert_allclose(
+            dense[0], [0.4, 0.6, 0, 0, 0])
+        numpy.testing.assert_allclose(
+            dense[1], [0, 0.1, 0.15, 0.25, 0.5])
+        numpy.testing.assert_allclose(
+            matrix.get_row_sums(), [1, 1, 1, 1])
+
+        # merge only some influences above a threshold
+        matrix = self.matrix.merge(
+            other, influences=['jntA'], weight_threshold=0.01,
+            normalize=False)
+        self.assertEqual(matrix.influences, INFLUENCES)
+        dense = matrix.to_dense()
+        numpy.testing.assert_allclose(dense[0], [0.4, 0.5, 0, 0])
+        numpy.testing.assert_allclose(dense[3], WEIGHTS[3])
+
+        with self.assertRaises(ValueError):
+            self.matrix.merge(WeightMatrix.from_dense([[1]], ['jntA']))
+
+
+if __name__ == '__main__':
+    unittest.main()
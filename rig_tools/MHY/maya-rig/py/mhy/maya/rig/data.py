@@ -16,6 +16,7 @@ from mhy.maya.nodezoo.node import Node
 from mhy.maya.standard.name import NodeName
 from mhy.maya.utils import undoable
 import mhy.maya.nodezoo.utils as nutil
+import mhy.maya.nodezoo.pipeline as npipe
 from mhy.maya.nodezoo.constant import SurfaceAssociation
 
 import mhy.maya.rig.marker_system as ms
@@ -459,7 +460,9 @@ def import_set_data(data_file):
 # --- deformer data
 
 
-def export_deformer_data(mesh, data_file, uncompressed=False, compressed=True):
+def export_deformer_data(
+        mesh, data_file, uncompressed=False, compressed=True,
+        export_pipeline=None):
     """Exports deformer data to a given file.
 
     Only supports skinCluster and custer for now.
@@ -469,6 +472,8 @@ def export_deformer_data(mesh, data_file, uncompressed=False, compressed=True):
         data_file (str): Path to a weights file.
         uncompressed (bool): If True, export an uncompressed data file.
         compressed (bool): If True, export an compressed data file.
+        export_pipeline (ExportPipeline): If not None, write the files
+            on the pipeline workers.
 
     Returns:
         bool: True if the export was successful.
@@ -507,17 +512,22 @@ def export_deformer_data(mesh, data_file, uncompressed=False, compressed=True):
 
     if uncompressed:
         p = '{}.{}'.format(data_file, _EXT_DEFORMER_UNCOMP)
-        nutil.export_node_data(deformers, p, compress=False)
+        nutil.export_node_data(
+            deformers, p, compress=False, export_pipeline=export_pipeline)
     if compressed:
         p = '{}.{}'.format(data_file, _EXT_DEFORMER_COMP)
-        nutil.export_node_data(deformers, p, compress=True)
+        nutil.export_node_data(
+            deformers, p, compress=True, export_pipeline=export_pipeline)
     return True
 
 
 def import_deformer_data(
-        data_file, method=SurfaceAssociation.vertex_id, clean_up=True):
+        data_file, method=SurfaceAssociation.vertex_id, clean_up=True,
+        types=None):
     """Loads deformer weights data from a given data file.
 
+    Deformers are streamed from the file and applied one at a time.
+
     # TODO hook up method kwarg.
 
     Args:
@@ -525,6 +535,7 @@ def import_deformer_data(
         method (SurfaceAssociation): The import surface association method.
         clean_up (bool): If True, clean up the imported deformer.
             Currently ONLY works for clusters.
+        types (list): If not None, only import deformers of these types.
 
     Returns:
         Node: The deformer node.
@@ -533,50 +544,76 @@ def import_deformer_data(
             'Deformer', data_file,
             ext=(_EXT_DEFORMER_COMP, _EXT_DEFORMER_UNCOMP)):
         return
-    for node in nutil.import_node_data(data_file, surface_association=method):
+    for node in nutil.import_node_data(
+            data_file, types=types, surface_association=method):
         if clean_up and hasattr(node, 'clean_up'):
             node.clean_up()
     OpenMaya.MGlobal.displayInfo(
         'Imported deformers from {}'.format(data_file))
 
 
-def export_rig_deformer_data(data_path, uncompressed=False, compressed=True):
+def export_rig_deformer_data(
+        data_path, uncompressed=False, compressed=True,
+        workers=npipe.DEFAULT_WORKERS):
     """Exports all rig mesh weight files into a data dir.
 
+    Deformer data is extracted on the main thread while the files are
+    serialized, compressed and written on background threads.
+
     Args:
         uncompressed (bool): If True, export an uncompressed data file.
         compressed (bool): If True, export an compressed data file.
+        workers (int): The number of threads writing files.
 
     Returns:
-        None
+        list: A list of ExportResult of each file.
     """
     roots = cmds.ls(const.RIGMESH_ROOT) or []
     roots += cmds.ls('*_' + const.WS_NODE) or []
 
     processed = set()
-    for root in roots:
-        for each in cmds.listRelatives(
-                root, allDescendents=True, type='mesh') or []:
-            each = Node(each)
-            xform = each.get_parent()
-            if xform not in processed:
-                data_file = os.path.join(
-                    data_path, xform.name + '.' + _EXT_DEFORMER_COMP)
-                export_deformer_data(
-                    xform, data_file,
-                    uncompressed=uncompressed, compressed=compressed)
-                processed.add(xform)
+    export_pipeline = npipe.ExportPipeline(workers=workers)
+    try:
+        for root in roots:
+            for each in cmds.listRelatives(
+                    root, allDescendents=True, type='mesh') or []:
+                each = Node(each)
+                xform = each.get_parent()
+                if xform not in processed:
+                    data_file = os.path.join(
+                        data_path, xform.name + '.' + _EXT_DEFORMER_COMP)
+                    export_deformer_data(
+                        xform, data_file,
+                        uncompressed=uncompressed, compressed=compressed,
+                        export_pipeline=export_pipeline)
+                    processed.add(xform)
+    finally:
+        export_pipeline.join()
+
+    for result in export_pipeline.failed:
+        OpenMaya.MGlobal.displayError(
+            'Failed exporting deformers to {}:\n{}'.format(
+                result.file_path, result.error))
+    OpenMaya.MGlobal.displayInfo(export_pipeline.report().splitlines()[0])
+    return export_pipeline.results
 
 
 @undoable
 def import_rig_deformer_data(
-        data_path, method=SurfaceAssociation.vertex_id, clean_up=True):
-    """Imports rig mesh weight files in a data dir."""
+        data_path, method=SurfaceAssociation.vertex_id, clean_up=True,
+        types=None):
+    """Imports rig mesh weight files in a data dir.
+
+    Deformers are streamed from the files one at a time, and the next
+    deformers are read on a background thread while the current one
+    is applied.
+    """
     if not data_path or not os.path.isdir(data_path):
         cmds.warning('Deformer path not valid: {}'.format(data_path))
         return
 
     processed = set()
+    paths = []
     for each in os.listdir(data_path):
 
         comp = None
@@ -607,9 +644,17 @@ def import_rig_deformer_data(
             resolved_path = uncomp
 
         if resolved_path not in processed:
-            import_deformer_data(resolved_path, method=method, clean_up=clean_up)
+            paths.append(resolved_path)
             processed.add(resolved_path)
 
+    for node in nutil.import_node_data(
+            paths, types=types, surface_association=method):
+        if clean_up and hasattr(node, 'clean_up'):
+            node.clean_up()
+    OpenMaya.MGlobal.displayInfo(
+        'Imported deformers from {} file(s) in {}'.format(
+            len(paths), data_path))
+
 
 # --- connection data
 
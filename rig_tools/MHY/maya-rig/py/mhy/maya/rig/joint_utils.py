@@ -3,6 +3,11 @@ from operator import sub
 
 from maya import cmds
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from mhy.maya.standard.name import NodeName
 from mhy.maya.nodezoo.node import Node
 import mhy.maya.nodezoo.utils as nutil
@@ -253,9 +258,7 @@ def get_position_tag(joint, base_geometry):
         TODO: Change from adding attrs on joint to writing out data to joints.json
     """
     joint = Node(joint)
-    cpom = Node.create('closestPointOnMesh')
     shape = Node(base_geometry).get_shapes()[0]
-    shape.worldMesh >> cpom.inMesh
 
     attrs = (TAG_POSITION,
              'offsetX', 'offsetY', 'offsetZ',
@@ -276,17 +279,13 @@ def get_position_tag(joint, base_geometry):
     '''
     
     # get closest point on dag geo
-    cpom.inPosition.value = joint.get_translation(space='world')
-    cpoint = cpom.closestVertexIndex.value
+    cpoint, u, v = _get_closest_vertex_and_uv(
+        shape, joint.get_translation(space='world'))
     p_tag = 'vtx[{}]'.format(str(cpoint))
 
     # get offset values
     offset = get_position_offset(joint, '{}.{}'.format(base_geometry, p_tag) )
 
-    # get uv point
-    u = cpom.parameterU.value
-    v = cpom.parameterV.value
-
     '''
     # set attributes
     for attr, val in zip(
@@ -301,13 +300,40 @@ def get_position_tag(joint, base_geometry):
     for attr, val in zip(
             attrs, (p_tag, offset[0], offset[1], offset[2], u, v)):
         out_data[attr] = val
-    
-    # cleanup
-    cpom.delete()
-    
+
     return out_data
 
 
+def _get_closest_vertex_and_uv(shape, position):
+    """Returns the closest vertex id and uv on a mesh to a world space
+    position, as a closestPointOnMesh node would: the vertex is the
+    closest vertex of the face holding the closest point.
+
+    Uses the cached spatial index of the mesh if numpy is available,
+    so tagging many joints on the same mesh doesn't create a node
+    per joint.
+    """
+    if numpy is None:
+        cpom = Node.create('closestPointOnMesh')
+        shape.worldMesh >> cpom.inMesh
+        cpom.inPosition.value = position
+        result = (cpom.closestVertexIndex.value,
+                  cpom.parameterU.value, cpom.parameterV.value)
+        cpom.delete()
+        return result
+
+    index = shape.get_spatial_index()
+    result = index.closest_points([position])
+    closest, triangle_ids, _, _ = result
+    face_id = int(index.triangle_faces[triangle_ids[0]])
+    vertex_ids = shape.get_polygon_vertices(face_id)
+    dists = ((index.points[vertex_ids] - closest[0]) ** 2).sum(axis=1)
+    # no uvs read as 0, like the node outputs
+    u, v = numpy.nan_to_num(
+        shape.get_closest_uvs([position], closest=result)[0])
+    return vertex_ids[int(dists.argmin())], float(u), float(v)
+
+
 def snap_to_position_tag(joint, geometry, offset=True):
     """
     [Transfer joints from one char to another]:
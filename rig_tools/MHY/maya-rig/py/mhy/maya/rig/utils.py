@@ -9,6 +9,7 @@ from maya import cmds, OpenMaya
 
 from mhy.maya.standard.name import NodeName
 from mhy.maya.nodezoo.node import Node
+from mhy.maya.nodezoo.node.anim_curve import AnimCurve
 from mhy.maya.nodezoo.node.transform import resolve_xform_attr_string
 import mhy.maya.rig.constants as const
 
@@ -429,13 +430,27 @@ def set_driven_keys(
         Node: The sdk node.
     """
 
-    # create sdk
-    for driver_value, driven_value in value_pairs:
+    # create sdk. The first key creates the sdk curve, the rest are
+    # added in bulk if the curve drives the driven attribute directly.
+    value_pairs = list(value_pairs)
+    for i, (driver_value, driven_value) in enumerate(value_pairs):
         cmds.setDrivenKeyframe(
             driven_attr, currentDriver=driver_attr,
             driverValue=driver_value, value=driven_value,
             inTangentType=in_tangent_type, outTangentType=out_tangent_type,
             insertBlend=insert_blend)
+        if i > 0 or len(value_pairs) < 2:
+            continue
+        curve = Node(cmds.listConnections(
+            driven_attr, source=True, destination=False, plugs=False)[0])
+        if isinstance(curve, AnimCurve) and \
+           curve.input_type == AnimCurve.InputType.Unitless_Input:
+            keys_data = dict(
+                (x, {'value': y, 'itt': in_tangent_type,
+                     'ott': out_tangent_type})
+                for x, y in value_pairs[1:])
+            curve.set_keys_data(keys_data, merge=True, set_tangent_val=False)
+            break
 
     # set pre/post infinity
     if pre_inf:
@@ -3,6 +3,11 @@ import maya.mel as mel
 import maya.OpenMaya as OpenMaya
 import mhy.maya.nodezoo.node as node_api
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def created_dummy_deformer(class_object, node_data):
     # Need to create the a dummy mesh of orig mesh from the data
@@ -498,6 +503,9 @@ def copy_data_to_blend_shape(data, source_deformer, destination_shapes):
             continue
 
         vertex_association = target_shape.get_vtx_association_with_distance(out_objects[0])
+        if numpy is not None:
+            # convert once for all the weight lists
+            vertex_association = get_association_arrays(vertex_association)
         for attr in data['attributes']:
             if attr['name'] == 'inputTarget':
                 target_data = attr
@@ -520,7 +528,66 @@ def copy_data_to_blend_shape(data, source_deformer, destination_shapes):
         bs.load(data, make_connections=False)
 
 
+def get_association_arrays(vertex_association):
+    """
+    Converts a vertex association dict to arrays for update_weight_dict.
+
+    Args:
+        vertex_association(dict): A vertex association from
+            Mesh.get_vtx_association_with_distance
+
+    Returns:
+        tuple: The associated vertex ids, and the source vertex ids (n x 3)
+        and weights (n x 3) of each
+
+    """
+    vertices = list(vertex_association)
+    pairs = numpy.zeros((0, 3, 2))
+    if vertices:
+        pairs = numpy.array(
+            [vertex_association[i] for i in vertices],
+            dtype=numpy.float64).reshape(len(vertices), -1, 2)
+    return (numpy.array(vertices, dtype=numpy.int64),
+            pairs[:, :, 0].astype(numpy.int64), pairs[:, :, 1])
+
+
 def update_weight_dict(weight_dict, vertex_association):
+    """
+    Maps a weight list to the associated vertices. Source vertices
+    missing in the list weigh 1, and only the weights other than 1
+    are kept.
+
+    Args:
+        weight_dict(dict): A weight list attribute data
+        vertex_association(dict or tuple): A vertex association dict, or
+            the arrays of get_association_arrays
+
+    """
+    if numpy is None:
+        _update_weight_dict(weight_dict, vertex_association)
+        return
+    if isinstance(vertex_association, dict):
+        vertex_association = get_association_arrays(vertex_association)
+    vertices, source_ids, source_weights = vertex_association
+
+    elements = weight_dict['array']
+    indices = numpy.array([ele['index'] for ele in elements], dtype=numpy.int64)
+    size = max(indices.max() + 1 if len(indices) else 0,
+               source_ids.max() + 1 if source_ids.size else 0)
+    values = numpy.ones(size)
+    values[indices] = [ele['value'] for ele in elements]
+
+    # summed in the order of the loop version
+    result_weights = numpy.zeros(len(vertices))
+    for i in range(source_ids.shape[1]):
+        result_weights += values[source_ids[:, i]] * source_weights[:, i]
+    changed = numpy.nonzero(result_weights != 1)[0]
+    weight_dict['array'] = [
+        {'index': vtx, 'value': value} for vtx, value in zip(
+            vertices[changed].tolist(), result_weights[changed].tolist())]
+
+
+def _update_weight_dict(weight_dict, vertex_association):
     tmp_weight_dict = {}
     for ele in weight_dict['array']:
         tmp_weight_dict[ele['index']] = ele['value']
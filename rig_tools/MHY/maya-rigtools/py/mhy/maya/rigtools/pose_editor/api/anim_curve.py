@@ -3,6 +3,8 @@ The Influence class represents the pose drivens.
 """
 from decimal import Decimal
 from maya.api import OpenMayaAnim
+from mhy.maya.key_block import KeyBlock
+from mhy.maya.nodezoo.node import Node
 from mhy.maya.rigtools.pose_editor.api.utils import get_anim_curve_fn
 
 
@@ -16,46 +18,44 @@ class AnimCurve(object):
 
     def get_data(self, keys_range):
         """
-        Get a dictionary with all the information of the MFnAnimCurve
+        Get a dictionary with all the information of the MFnAnimCurve.
+        The keys are read at once in a key block, see AnimCurve.get_key_block()
         """
-        data = dict()
-        anim_curve_fn = get_anim_curve_fn(self.node_name)
-        if not anim_curve_fn:
+        if not get_anim_curve_fn(self.node_name):
             return {}
-        for index in range(anim_curve_fn.numKeys):
-            key = anim_curve_fn.input(index)
-            value = anim_curve_fn.value(index)
-            if keys_range and (key < keys_range[0] or key > keys_range[1]):
-                continue
-            tit = anim_curve_fn.inTangentType(index)
-            tot = anim_curve_fn.outTangentType(index)
+        block = Node(self.node_name).get_key_block(tangents=False)
+        if keys_range:
+            block = block.get_range(*keys_range)
+        linear = OpenMayaAnim.MFnAnimCurve.kTangentLinear
+        data = dict()
+        for key, key_data in block.to_key_dict(ordered=True):
+            tit = key_data['itt']
+            tot = key_data['ott']
             # linear tangent is the default tangent.
-            if tit == OpenMayaAnim.MFnAnimCurve.kTangentLinear and tot == OpenMayaAnim.MFnAnimCurve.kTangentLinear:
-                data[key] = {'v': value}
+            if tit == linear and tot == linear:
+                data[key] = {'v': key_data['value']}
             else:
-                data[key] = {'v': value, 'tt': [tit, tot]}
+                data[key] = {'v': key_data['value'], 'tt': [tit, tot]}
         return data
 
     def load(self, data, keys_range):
         """
         update the AnimCurve node from a dictionary.
+        The keys are set at once in a key block, see AnimCurve.set_key_block()
         """
-        anim_curve_fn = get_anim_curve_fn(self.node_name)
         keys = []
         for key_pos, key_data in data.items():
-            key = Decimal(key_pos)
-            # Then we round it to 2 places
-            key = round(key, 2)
             value = key_data.get('v')
             if value is None:
                 continue
-            if keys_range and (key < keys_range[0] or key > keys_range[1]):
-                continue
-            value = float(value)
+            # Then we round it to 2 places
+            key = float(round(Decimal(key_pos), 2))
             # linear tangent is equal to 2, which is default.
             tit, tot = key_data.get('tt', [OpenMayaAnim.MFnAnimCurve.kTangentLinear,
                                            OpenMayaAnim.MFnAnimCurve.kTangentLinear])
-            anim_curve_fn.addKey(
-                key, value, tangentInType=tit, tangentOutType=tot)
-            keys.append(key)
-        return sorted(keys)
+            keys.append((key, {'value': float(value), 'itt': tit, 'ott': tot}))
+        block = KeyBlock.from_key_dict(keys)
+        if keys_range:
+            block = block.get_range(*keys_range)
+        Node(self.node_name).set_key_block(block, replace=False, set_tangents=False)
+        return list(block.inputs)
@@ -1,24 +1,26 @@
 import os
 import pymel.core as pm
 
-def replace_string_in_files(source_folder, output_folder, source_string, target_string):
+import mhy.maya.ma_batch as ma_batch
+
+def replace_string_in_files(source_folder, output_folder, source_string, target_string, workers=ma_batch.DEFAULT_WORKERS):
+    """Stream-rewrites the .ma files of a folder in a process pool.
+    Returns a list of ma_batch.RewriteResult."""
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
-    
-    for file_name in os.listdir(source_folder):
-        if file_name.endswith('.ma'):
-            source_file_path = os.path.join(source_folder, file_name)
-            output_file_path = os.path.join(output_folder, file_name)
-            
-            with open(source_file_path, 'r', encoding='utf-8') as file:
-                file_contents = file.read()
-            
-            modified_contents = file_contents.replace(source_string, target_string)
-            
-            with open(output_file_path, 'w', encoding='utf-8') as file:
-                file.write(modified_contents)
-            
+
+    files = ma_batch.find_ma_files(source_folder, recursive=False)
+    results = ma_batch.rewrite_files(
+        files, {source_string: target_string}, output_folder=output_folder,
+        workers=workers)
+
+    for result in results:
+        file_name = os.path.basename(result.file_path)
+        if result.success:
             print(f"Processed {file_name}")
+        else:
+            print(f"Failed processing {file_name}:\n{result.error}")
+    return results
 
 def show_ui():
     window_id = 'replaceStringUI'
@@ -3,7 +3,7 @@ from maya import cmds
 from mhy.maya.nodezoo.node import Node
 import mhy.maya.rigtools.pose_editor.api.pose_controller as pose_controller
 from mhy.maya.rig.utils import add_influence_tag_attribute
-from mhy.maya.rigtools.pose_editor.api.influence import get_influence_names
+from mhy.maya.rigtools.pose_editor.api.influence import Influence, get_influence_names
 
 class TestPose(unittest.TestCase):
     """
@@ -71,6 +71,41 @@ class TestPose(unittest.TestCase):
         self.assertAlmostEqual(Node(loc1).ty.value, 5, delta=0.1)
         self.assertAlmostEqual(Node(loc1).rx.value, 15, delta=0.1)
 
+    def test_split_influence_data(self):
+        self.setUp()
+        loc = cmds.spaceLocator()[0]
+        add_influence_tag_attribute(loc)
+        self.l_pose.add_influence(loc)
+        self.l_pose.add_neutral_key()
+        self.l_pose.weight = 10
+        Node(loc).ty.value = 10
+        self.l_pose.add_key()
+
+        # the influence data keeps a dictionary per key
+        data = self.l_pose.get_influences_data()[loc]
+        self.assertEqual(data['ty'][10.0], {'v': 10.0})
+
+        # drivers at the same distance split the deltas in half
+        drivers = []
+        for x in (-5, 5):
+            driver = Node(cmds.spaceLocator()[0])
+            driver.set_translation((x, 10, 0), space='world')
+            drivers.append(driver)
+        split_data = pose_controller.PoseController._PoseController__split_influence_data(
+            self.l_pose, drivers)
+        neutral_values = Influence.get_neutral_values()
+        for driver in drivers:
+            driver_data = split_data[driver.name][loc]
+            self.assertEqual(sorted(driver_data), sorted(data))
+            for attr, keys in data.items():
+                neutral = neutral_values.get(attr, 0)
+                for key, value in keys.items():
+                    self.assertAlmostEqual(
+                        driver_data[attr][key]['v'],
+                        neutral + (value['v'] - neutral) * 0.5)
+        self.assertAlmostEqual(
+            split_data[drivers[0].name][loc]['ty'][10.0]['v'], 5)
+
     def test_multiple_pc(self):
         self.setUp()
         self.pc2 = pose_controller.PoseController.create(name='test_pose2', out_mesh=self.mesh)
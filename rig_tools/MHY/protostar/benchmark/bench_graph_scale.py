@@ -0,0 +1,416 @@
+"""
+Benchmarks how the action graph engine scales with graph size.
+
+Builds synthetic graphs of different shapes and sizes, and times the
+core graph operations on each of them:
+
+    + build: Creating the graph objects and connections.
+    + write: Serializing the graph to an .agraph file.
+    + read: Reading the graph back from the file (parse cache cleared).
+    + sort: ``get_sorted_objects()`` with the sort cache invalidated.
+    + copy: Copying the whole graph.
+    + equivalent: ``is_equivalent()`` between the graph and its copy.
+    + script: Evaluating every parameter script once.
+    + execute: A no-op execution of the graph.
+
+Graph shapes:
+
+    + wide: Unconnected actions.
+    + deep: A single chain of connected actions.
+    + diamond: Layers of fan-out/fan-in connections.
+    + scripted: Actions driven by scripts referencing other actions.
+    + iter: A graph iterating over an iter parameter, with every action
+      reading the iteration value.
+    + nested: References of a library graph which itself references
+      another library graph.
+
+Sizes are the approximate number of objects (actions and graphs,
+including objects in referenced graphs). Once a run of a shape takes
+longer than the time budget, larger sizes of that shape are skipped.
+Results are saved as JSON so regressions can be compared between commits.
+
+Usage:
+
+.. code:: bash
+
+    python bench_graph_scale.py --sizes 100 1000 10000 --output head.json
+    python bench_graph_scale.py --shapes deep scripted --sizes 100000
+    python bench_graph_scale.py --output new.json --compare head.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# Add the protostar and python-core packages if not in the path yet
+root = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+for path in (
+        os.path.join(root, 'py'),
+        os.path.join(os.path.dirname(root), 'python-core', 'py')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.core.graph as ag
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+path = os.path.join(root, 'py', 'mhy', 'protostar', 'userlib')
+os.environ[LIB_ENV_VAR] = path
+
+
+SHAPES = ('wide', 'deep', 'diamond', 'scripted', 'iter', 'nested')
+OPERATIONS = (
+    'build', 'write', 'read', 'sort', 'copy',
+    'equivalent', 'script', 'execute')
+SIZES = (100, 1000, 10000)
+
+# the benchmark library team
+TEAM = 'bench'
+
+# the fan-out width of diamond graphs
+DIAMOND_WIDTH = 8
+
+# the number of iterations of iter graphs
+ITER_COUNT = 4
+
+# the nested library graphs: (name, number of child actions,
+# [(referenced graph, number of references)])
+NESTED_GRAPHS = (
+    ('bench_leaf', 4, []),
+    ('bench_mid', 1, [('bench_leaf', 4)]),
+)
+NESTED_SIZE = 1 + 1 + 4 * 5
+
+
+def _create_action(graph, name):
+    return alib.create_action('NullAction', name=name, graph=graph)
+
+
+def _add_io(action):
+    in_param = action.add_dynamic_param('int', name='in_value')
+    out_param = action.add_dynamic_param(
+        'int', name='out_value', output=True, default=1)
+    return in_param, out_param
+
+
+def build_wide(graph, size):
+    """Builds ``size`` unconnected actions."""
+    for i in range(size):
+        action = _create_action(graph, 'a{}'.format(i))
+        _add_io(action)
+
+
+def build_deep(graph, size):
+    """Builds a chain of ``size`` connected actions."""
+    prev = None
+    for i in range(size):
+        action = _create_action(graph, 'a{}'.format(i))
+        in_param, out_param = _add_io(action)
+        if prev is not None:
+            prev >> in_param
+        prev = out_param
+
+
+def build_diamond(graph, size):
+    """Builds layers of actions: a source action fanning out to
+    ``DIAMOND_WIDTH`` actions fanning back into a sink action,
+    which is the source of the next layer."""
+    _, source = _add_io(_create_action(graph, 'src0'))
+    count = 1
+    layer = 0
+    while count < size:
+        sink = _create_action(graph, 'sink{}'.format(layer))
+        for i in range(DIAMOND_WIDTH):
+            action = _create_action(graph, 'l{}_{}'.format(layer, i))
+            in_param, out_param = _add_io(action)
+            source >> in_param
+            out_param >> sink.add_dynamic_param(
+                'int', name='in{}'.format(i))
+        source = sink.add_dynamic_param(
+            'int', name='out_value', output=True)
+        count += DIAMOND_WIDTH + 1
+        layer += 1
+
+
+def build_scripted(graph, size):
+    """Builds ``size`` actions each with a script referencing
+    the previous action and an action half way up the graph."""
+    for i in range(size):
+        action = _create_action(graph, 'a{}'.format(i))
+        action.add_dynamic_param('int', name='seed', default=i)
+        param = action.add_dynamic_param('int', name='value')
+        if i == 0:
+            script = '{{{}.seed}} * 2'.format(pb.THIS_OBJECT)
+        else:
+            script = '{{a{}.seed}} * 2 + {{a{}.seed}}'.format(i - 1, i // 2)
+        param.set_script(script, quiet=True)
+
+
+def build_iter(graph, size):
+    """Builds ``size`` actions reading the iteration value
+    of the owner graph."""
+    iter_param = graph.add_dynamic_param('iter', name='items')
+    iter_param.value = list(range(ITER_COUNT))
+    for i in range(size):
+        action = _create_action(graph, 'a{}'.format(i))
+        param = action.add_dynamic_param('str', name='item')
+        param.set_script(
+            'str({{{}.items}})'.format(pb.OWNER_GRAPH), quiet=True)
+
+
+def build_nested(graph, size):
+    """Builds references of the nested library graph."""
+    for i in range(max(1, size // NESTED_SIZE)):
+        alib.create_graph(
+            'bench_mid', team=TEAM, name='ref{}'.format(i), graph=graph)
+
+
+BUILDERS = {
+    'wide': build_wide,
+    'deep': build_deep,
+    'diamond': build_diamond,
+    'scripted': build_scripted,
+    'iter': build_iter,
+    'nested': build_nested,
+}
+
+
+def create_nested_lib(lib_path):
+    """Writes the nested library graphs into a temp library."""
+    graph_path = os.path.join(lib_path, 'graphs')
+    os.makedirs(graph_path)
+    with open(os.path.join(lib_path, 'team_config.json'), 'w') as f:
+        json.dump({'team_name': TEAM}, f)
+
+    os.environ[LIB_ENV_VAR] = os.pathsep.join((path, lib_path))
+    for name, count, references in NESTED_GRAPHS:
+        alib.refresh()
+        graph = alib.create_graph(name=name)
+        build_deep(graph, count)
+        for source, ref_count in references:
+            for i in range(ref_count):
+                alib.create_graph(
+                    source, team=TEAM, name='ref{}'.format(i), graph=graph)
+        graph.write(os.path.join(graph_path, name + '.agraph'))
+    alib.refresh()
+
+
+def _count_objects(graph):
+    count = 1
+    for obj in graph.iter_objects():
+        count += _count_objects(obj) if obj.is_graph else 1
+    return count
+
+
+def _iter_script_params(graph):
+    for obj in graph.iter_objects():
+        if obj.is_graph:
+            for param in _iter_script_params(obj):
+                yield param
+        for param in obj.get_params():
+            if param.script_enabled and param.script:
+                yield param
+
+
+def _timed(results, key, func, *args, **kwargs):
+    t = time.time()
+    value = func(*args, **kwargs)
+    results[key] = time.time() - t
+    return value
+
+
+def run_one(shape, size, folder):
+    """Times all operations on one graph and returns the results."""
+    results = {}
+    graph = _timed(results, 'build', _build, shape, size)
+    results['objects'] = _count_objects(graph)
+
+    file_path = os.path.join(folder, '{}_{}.agraph'.format(shape, size))
+    _timed(results, 'write', graph.write, file_path)
+
+    read_graph = alib.create_graph()
+    ag.clear_graph_cache()
+    _timed(results, 'read', read_graph.read, file_path)
+
+    graph._topology_changed()
+    _timed(results, 'sort', graph.get_sorted_objects)
+
+    dup = _timed(results, 'copy', graph.copy, name=graph.name, graph=None)
+
+    status = _timed(results, 'equivalent', read_graph.is_equivalent, graph)
+    if not status:
+        raise RuntimeError('Graphs not equivalent: {} {}'.format(shape, size))
+
+    params = list(_iter_script_params(graph))
+    results['scripts'] = len(params)
+    t = time.time()
+    for param in params:
+        param.script.evaluate()
+    results['script'] = time.time() - t
+
+    status = _timed(results, 'execute', graph.execute)
+    if not status:
+        raise RuntimeError('Execution failed: {} {}'.format(shape, size))
+
+    del dup
+    return results
+
+
+def _build(shape, size):
+    graph = alib.create_graph(name='bench')
+    BUILDERS[shape](graph, size)
+    return graph
+
+
+def get_commit():
+    """Returns the current git commit hash, or None."""
+    try:
+        out = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=root,
+            stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode('utf-8').strip()
+
+
+def run(shapes=SHAPES, sizes=SIZES, repeat=1, budget=60.0):
+    """Runs the benchmark and returns the timing results.
+
+    For each operation, the fastest of ``repeat`` runs is kept.
+    Once a run takes longer than ``budget`` seconds, larger sizes of
+    the same shape are skipped. If budget is None, run all sizes.
+    """
+    folder = tempfile.mkdtemp()
+    # action logs would dominate large executions
+    logging.disable(logging.WARNING)
+    try:
+        create_nested_lib(os.path.join(folder, 'lib'))
+        results = {}
+        for shape in shapes:
+            results[shape] = {}
+            skipped = False
+            for size in sorted(sizes):
+                if skipped:
+                    results[shape][str(size)] = None
+                    continue
+                best = {}
+                for _ in range(repeat):
+                    t = time.time()
+                    for key, value in run_one(shape, size, folder).items():
+                        if key in OPERATIONS:
+                            value = min(value, best.get(key, value))
+                        best[key] = value
+                    skipped = budget is not None and time.time() - t > budget
+                results[shape][str(size)] = best
+    finally:
+        logging.disable(logging.NOTSET)
+        os.environ[LIB_ENV_VAR] = path
+        alib.refresh()
+        shutil.rmtree(folder)
+
+    return {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'repeat': repeat,
+        'budget': budget,
+        'results': results,
+    }
+
+
+def compare(data, baseline, threshold=1.2):
+    """Compares benchmark results against a baseline.
+
+    Returns:
+        list: A list of (shape, size, operation, ratio) tuples where
+            the time ratio (current/baseline) exceeds the threshold.
+    """
+    regressions = []
+    print('\nCompared to {}:'.format(baseline.get('commit')))
+    for shape, sizes in sorted(data['results'].items()):
+        base_sizes = baseline['results'].get(shape, {})
+        for size, results in sorted(sizes.items(), key=lambda x: int(x[0])):
+            base = base_sizes.get(size)
+            if not base or not results:
+                continue
+            ratios = []
+            for op in OPERATIONS:
+                if base.get(op) and op in results:
+                    ratio = results[op] / base[op]
+                    ratios.append('{} {:.2f}x'.format(op, ratio))
+                    # ignore noise on very short timings
+                    if ratio > threshold and results[op] > 0.01:
+                        regressions.append((shape, size, op, ratio))
+            print('{:>10} {:>7}: {}'.format(shape, size, ', '.join(ratios)))
+
+    if regressions:
+        print('\nRegressions (> {:.2f}x):'.format(threshold))
+        for shape, size, op, ratio in regressions:
+            print('{:>10} {:>7}: {} {:.2f}x'.format(shape, size, op, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument(
+        '--budget', type=float, default=60.0,
+        help='Skip larger sizes of a shape once a run exceeds this '
+        'many seconds. 0 to run all sizes.')
+    parser.add_argument('--output', help='Save results to a JSON file.')
+    parser.add_argument(
+        '--compare', help='Compare results with a baseline JSON file.')
+    parser.add_argument(
+        '--threshold', type=float, default=1.2,
+        help='Time ratio reported as a regression when comparing.')
+    args = parser.parse_args()
+
+    data = run(
+        shapes=args.shapes, sizes=args.sizes, repeat=args.repeat,
+        budget=args.budget or None)
+
+    header = '{:>10} {:>7} {:>7}'.format('shape', 'size', 'objects')
+    for op in OPERATIONS:
+        header += ' {:>10}'.format(op)
+    print(header)
+    for shape in args.shapes:
+        for size, results in sorted(
+                data['results'][shape].items(), key=lambda x: int(x[0])):
+            if not results:
+                print('{:>10} {:>7} skipped'.format(shape, size))
+                continue
+            line = '{:>10} {:>7} {:>7}'.format(
+                shape, size, results['objects'])
+            for op in OPERATIONS:
+                line += ' {:>9.3f}s'.format(results[op])
+            print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        print('\nResults saved to {}'.format(args.output))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(data, baseline, threshold=args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmarks parameter script evaluation.
+
+Builds a graph with N scripted parameters and compares the compiled
+script evaluation against the legacy substitute-and-eval path.
+
+Usage:
+
+.. code:: bash
+
+    python bench_script_eval.py --count 10000 --reads 3
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the protostar and python-core packages if not in the path yet
+root = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+for path in (
+        os.path.join(root, 'py'),
+        os.path.join(os.path.dirname(root), 'python-core', 'py')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.constants as const
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+path = os.path.join(root, 'py', 'mhy', 'protostar', 'userlib')
+os.environ[LIB_ENV_VAR] = path
+
+
+SCRIPTS = (
+    '{src.int_a} * 2 + {src.int_b}',
+    '[{src.int_a}, {src.float_a}, "c"]',
+    """
+    if {src.int_a} > {src.int_b}:
+        return {src.float_a}
+    return 0.0""",
+)
+
+
+def _legacy_evaluate(script, driven_param):
+    """Evaluates a script the way PythonScript.evaluate() did before
+    scripts were compiled: substitute references and re-parse every call."""
+    graph = script.owner_graph
+    code = script.code
+    vars = {}
+    for param in script.input_params:
+        if param.name == const.SELF_PARAM_NAME:
+            key = param.owner.name
+            pstring = param.owner.name
+        else:
+            key = param.full_name.replace('.', '_')
+            pstring = param.full_name
+            if param.owner == driven_param.owner:
+                pstring = '{}.{}'.format(pb.THIS_OBJECT, param.name)
+            elif param.owner == graph:
+                pstring = '{}.{}'.format(pb.OWNER_GRAPH, param.name)
+        vars[key] = param.value
+        code = code.replace('{{{}}}'.format(pstring), key)
+    return pb._eval_python_script(code, globals_=vars, locals_={})
+
+
+def build_graph(count):
+    """Builds a graph with a source action and ``count`` scripted params."""
+    graph = alib.create_graph(name='bench')
+    src = alib.create_action('NullAction', name='src', graph=graph)
+    src.add_dynamic_param('int', name='int_a', default=3)
+    src.add_dynamic_param('int', name='int_b', default=2)
+    src.add_dynamic_param('float', name='float_a', default=1.5)
+
+    params = []
+    per_action = 50
+    action = None
+    for i in range(count):
+        if i % per_action == 0:
+            action = alib.create_action(
+                'NullAction', name='target', graph=graph)
+        script = SCRIPTS[i % len(SCRIPTS)]
+        type_ = 'list' if script.startswith('[') else 'float'
+        param = action.add_dynamic_param(type_, name='p')
+        param.set_script(script, quiet=True)
+        params.append(param)
+    return graph, params
+
+
+def run(count=10000, reads=3):
+    """Runs the benchmark and returns the timing results."""
+    alib.refresh()
+
+    t = time.time()
+    graph, params = build_graph(count)
+    build_time = time.time() - t
+
+    # legacy path
+    t = time.time()
+    for _ in range(reads):
+        for param in params:
+            _legacy_evaluate(param.script, param)
+    legacy_time = time.time() - t
+
+    # compiled path (first read includes compilation)
+    pb.clear_script_cache()
+    t = time.time()
+    for param in params:
+        param.script.evaluate()
+    first_time = time.time() - t
+
+    t = time.time()
+    for _ in range(reads):
+        for param in params:
+            param.script.evaluate()
+    compiled_time = time.time() - t
+
+    return {
+        'count': count,
+        'reads': reads,
+        'build': build_time,
+        'legacy': legacy_time,
+        'compiled_first_read': first_time,
+        'compiled': compiled_time,
+        'speedup': legacy_time / compiled_time if compiled_time else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--reads', type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(count=args.count, reads=args.reads)
+    print('Scripted parameters: {count} ({reads} reads each)'.format(**result))
+    print('Graph build:         {build:.3f}s'.format(**result))
+    print('Legacy evaluation:   {legacy:.3f}s'.format(**result))
+    print('Compile (1st read):  {compiled_first_read:.3f}s'.format(**result))
+    print('Compiled evaluation: {compiled:.3f}s'.format(**result))
+    print('Speedup:             {speedup:.1f}x'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
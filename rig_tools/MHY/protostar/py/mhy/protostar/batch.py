@@ -0,0 +1,605 @@
+"""
+The headless batch runner that builds action graphs in worker processes.
+
+Each job executes one action graph file in its own worker interpreter,
+so builds are isolated from each other and run in parallel up to the
+configured concurrency. Failed jobs are retried, and the status, timing
+and log of each job are collected into a summary report.
+
+Jobs are either a list of graph files, or one graph plus a manifest
+of assets. For manifest jobs, the graph iter parameter is set to a
+single asset per job, so each asset is built by a separate worker.
+
+The worker launch command is pluggable. By default workers run the
+current Python interpreter, use a DCC interpreter (e.g. mayapy) to
+build graphs containing DCC actions:
+
+.. code:: bash
+
+    python -m mhy.protostar.batch run rigA.agraph rigB.agraph -j 4
+    python -m mhy.protostar.batch run rig.agraph \\
+        --manifest assets.json --iter-param assets \\
+        --worker-command "mayapy -m mhy.protostar.batch" \\
+        --retries 2 --summary summary.json
+
+A manifest is a JSON file containing either a list of assets, or a
+dict of (asset name : asset value) pairs.
+
+Usage in Python:
+
+.. code:: python
+
+    from mhy.protostar.batch import BatchRunner, BatchJob
+
+    runner = BatchRunner(concurrency=4, retries=1)
+    jobs = runner.run([BatchJob('/path/to/rig.agraph')])
+    print(runner.report())
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import subprocess
+import argparse
+import tempfile
+import threading
+import multiprocessing
+import traceback
+from collections import OrderedDict
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+__all__ = [
+    'BatchJob', 'BatchRunner', 'JobStatus',
+    'load_manifest', 'jobs_from_manifest', 'run_worker']
+
+
+# environment variable overriding the default worker launch command
+WORKER_ENV_VAR = 'PROTOSTAR_BATCH_WORKER'
+
+# the number of log lines kept in the summary of a failed job
+LOG_TAIL_COUNT = 20
+
+
+class JobStatus():
+    """Batch job status enum."""
+
+    kPending = 'pending'
+    kRunning = 'running'
+    kSuccess = 'success'
+    kFail = 'fail'
+    kTimeout = 'timeout'
+
+
+def get_worker_command():
+    """Returns the default worker launch command.
+
+    The command is read from environment variable
+    ``PROTOSTAR_BATCH_WORKER`` if set. Otherwise the current
+    Python interpreter is used.
+
+    Returns:
+        list: The command arguments.
+    """
+    command = os.environ.get(WORKER_ENV_VAR)
+    if command:
+        return shlex.split(command)
+    return [sys.executable, '-m', 'mhy.protostar.batch']
+
+
+def _get_worker_env():
+    """Returns the worker environment, with the root paths of the
+    mhy packages added to ``PYTHONPATH``."""
+    import mhy
+    env = os.environ.copy()
+    paths = [os.path.dirname(x) for x in mhy.__path__]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+    return env
+
+
+class BatchJob(object):
+    """A graph build job."""
+
+    def __init__(
+            self, path, params=None, name=None,
+            exec_name='main', mode='new'):
+        """Initializes a new job object.
+
+        Args:
+            path (str): The action graph file to execute.
+            params (dict): A dict of (parameter name : value) pairs to
+                set on the graph before executing it.
+            name (str): The job name. If None, use the graph file name.
+            exec_name (str): The execution name.
+            mode (str): The graph execution mode.
+        """
+        self.path = path
+        self.params = params if params else {}
+        self.name = name if name else \
+            os.path.splitext(os.path.basename(path))[0]
+        self.exec_name = exec_name
+        self.mode = mode
+
+        self.status = JobStatus.kPending
+        self.attempts = 0
+        self.time = 0.0
+        self.return_code = None
+        self.error = None
+        self.log_paths = []
+
+    def __repr__(self):
+        return 'BatchJob ({}: {})'.format(self.name, self.status)
+
+    __str__ = __repr__
+
+    @property
+    def log_path(self):
+        """The log file of the last attempt.
+
+        :type: str or None
+        """
+        return self.log_paths[-1] if self.log_paths else None
+
+    def get_log_tail(self, count=LOG_TAIL_COUNT):
+        """Returns the last lines of the last attempt log.
+
+        Args:
+            count (int): The max number of lines to return.
+
+        Returns:
+            list
+        """
+        path = self.log_path
+        if not path or not os.path.isfile(path):
+            return []
+        with open(path, 'r') as f:
+            return [x.rstrip('\n') for x in f.readlines()[-count:]]
+
+    def _get_spec(self):
+        """Returns the job spec passed to the worker process."""
+        return {
+            'name': self.name,
+            'path': self.path,
+            'params': self.params,
+            'exec_name': self.exec_name,
+            'mode': self.mode}
+
+    def get_summary(self):
+        """Returns the summary data of this job.
+
+        Returns:
+            dict
+        """
+        data = OrderedDict()
+        data['name'] = self.name
+        data['path'] = self.path
+        data['params'] = self.params
+        data['status'] = self.status
+        data['attempts'] = self.attempts
+        data['time'] = self.time
+        data['return_code'] = self.return_code
+        data['error'] = self.error
+        data['logs'] = self.log_paths
+        if self.status != JobStatus.kSuccess:
+            data['log_tail'] = self.get_log_tail()
+        return data
+
+
+class BatchRunner(object):
+    """Runs graph build jobs in a pool of worker processes."""
+
+    def __init__(
+            self, concurrency=None, retries=0, timeout=None,
+            command=None, log_dir=None):
+        """Initializes a new batch runner.
+
+        Args:
+            concurrency (int): The max number of concurrent workers.
+                If None, use the number of CPUs.
+            retries (int): The number of times to retry a failed job.
+            timeout (float): Max seconds a worker can run before it's
+                killed. If None, workers never time out.
+            command (list or str): The worker launch command. The job
+                arguments are appended to it.
+                If None, use ``get_worker_command()``.
+            log_dir (str): The folder to write job logs to.
+                If None, use a new temp folder.
+        """
+        if isinstance(command, str):
+            command = shlex.split(command)
+        self.__concurrency = max(1, concurrency or multiprocessing.cpu_count())
+        self.__retries = max(0, retries)
+        self.__timeout = timeout
+        self.__command = list(command) if command else get_worker_command()
+        self.__log_dir = log_dir
+        self.__jobs = []
+        self.__lock = threading.Lock()
+        self.__time = 0.0
+
+    @property
+    def concurrency(self):
+        """The max number of concurrent workers.
+
+        :type: int
+        """
+        return self.__concurrency
+
+    @property
+    def command(self):
+        """The worker launch command.
+
+        :type: list
+        """
+        return list(self.__command)
+
+    @property
+    def jobs(self):
+        """The jobs of the last run.
+
+        :type: list
+        """
+        return list(self.__jobs)
+
+    @property
+    def log_dir(self):
+        """The folder job logs are written to.
+
+        :type: str or None
+        """
+        return self.__log_dir
+
+    def run(self, jobs):
+        """Runs a list of jobs and waits for all of them to finish.
+
+        Args:
+            jobs (list): A list of BatchJob objects.
+
+        Returns:
+            list: The finished jobs.
+        """
+        self.__jobs = list(jobs)
+        if not self.__log_dir:
+            self.__log_dir = tempfile.mkdtemp(prefix='protostar_batch_')
+        elif not os.path.isdir(self.__log_dir):
+            os.makedirs(self.__log_dir)
+
+        tasks = queue.Queue()
+        for job in self.__jobs:
+            tasks.put(job)
+
+        start = time.time()
+        workers = []
+        for i in range(min(self.__concurrency, len(self.__jobs))):
+            tasks.put(None)
+            thread = threading.Thread(target=self.__worker, args=(tasks,))
+            thread.daemon = True
+            thread.start()
+            workers.append(thread)
+        for thread in workers:
+            thread.join()
+        self.__time = time.time() - start
+        return self.jobs
+
+    def __worker(self, tasks):
+        """Worker thread loop launching jobs from the task queue."""
+        while True:
+            job = tasks.get()
+            if job is None:
+                return
+            while True:
+                self.__run_job(job)
+                if job.status == JobStatus.kSuccess or \
+                   job.attempts > self.__retries:
+                    break
+
+    def __run_job(self, job):
+        """Runs one attempt of a job in a worker process."""
+        job.attempts += 1
+        job.status = JobStatus.kRunning
+        job.error = None
+
+        # make the job files unique in case of duplicated job names
+        with self.__lock:
+            index = self.__jobs.index(job)
+        base = os.path.join(
+            self.__log_dir, '{:03d}_{}'.format(index, job.name))
+        spec_path = base + '.job.json'
+        result_path = '{}.{}.result.json'.format(base, job.attempts)
+        log_path = '{}.{}.log'.format(base, job.attempts)
+        job.log_paths.append(log_path)
+        with open(spec_path, 'w') as f:
+            json.dump(job._get_spec(), f)
+
+        command = self.__command + ['worker', spec_path, result_path]
+        start = time.time()
+        with open(log_path, 'w') as log:
+            try:
+                proc = subprocess.Popen(
+                    command, stdout=log, stderr=subprocess.STDOUT,
+                    env=_get_worker_env())
+            except OSError as e:
+                job.time = time.time() - start
+                job.status = JobStatus.kFail
+                job.error = 'Failed launching worker {}: {}'.format(
+                    command, e)
+                return
+
+            timed_out = False
+            while proc.poll() is None:
+                if self.__timeout is not None and \
+                   time.time() - start > self.__timeout:
+                    proc.kill()
+                    proc.wait()
+                    timed_out = True
+                    break
+                time.sleep(0.05)
+
+        job.time = time.time() - start
+        job.return_code = proc.returncode
+        if timed_out:
+            job.status = JobStatus.kTimeout
+            job.error = 'Timed out after {}s.'.format(self.__timeout)
+            return
+
+        result = {}
+        if os.path.isfile(result_path):
+            try:
+                with open(result_path, 'r') as f:
+                    result = json.load(f)
+            except (IOError, OSError, ValueError) as e:
+                # e.g. a worker crashed while writing the result
+                job.status = JobStatus.kFail
+                job.error = 'Failed reading the worker result {}: {}'.format(
+                    result_path, e)
+                return
+            if not isinstance(result, dict):
+                result = {}
+        if proc.returncode == 0 and result.get('success'):
+            job.status = JobStatus.kSuccess
+        else:
+            job.status = JobStatus.kFail
+            job.error = result.get('error') or \
+                'Worker exited with code {}.'.format(proc.returncode)
+
+    def get_summary(self):
+        """Returns the summary data of the last run.
+
+        Returns:
+            dict
+        """
+        counts = OrderedDict()
+        for job in self.__jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        data = OrderedDict()
+        data['time'] = self.__time
+        data['concurrency'] = self.__concurrency
+        data['retries'] = self.__retries
+        data['command'] = self.__command
+        data['log_dir'] = self.__log_dir
+        data['counts'] = counts
+        data['jobs'] = [x.get_summary() for x in self.__jobs]
+        return data
+
+    def write_summary(self, path):
+        """Writes the summary of the last run to a JSON file.
+
+        Args:
+            path (str): The output file path.
+
+        Returns:
+            None
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(path, 'w') as f:
+            json.dump(self.get_summary(), f, indent=4)
+
+    def report(self):
+        """Returns a summary string of the last run.
+
+        Returns:
+            str
+        """
+        lines = ['Ran {} jobs in {:.2f}s with {} workers:'.format(
+            len(self.__jobs), self.__time, self.__concurrency)]
+        lines.append('{:>10} {:>10} {:>10}  {}'.format(
+            'status', 'attempts', 'time(s)', 'name'))
+        for job in self.__jobs:
+            lines.append('{:>10} {:>10} {:>10.2f}  {}'.format(
+                job.status, job.attempts, job.time, job.name))
+        for job in self.__jobs:
+            if job.status != JobStatus.kSuccess:
+                lines.append('')
+                lines.append('{} failed: {}'.format(job.name, job.error))
+                lines.append('Log: {}'.format(job.log_path))
+                lines.extend('    ' + x for x in job.get_log_tail())
+        return '\n'.join(lines)
+
+    def clear_logs(self):
+        """Removes the log folder of this runner.
+
+        Returns:
+            None
+        """
+        if self.__log_dir and os.path.isdir(self.__log_dir):
+            shutil.rmtree(self.__log_dir)
+
+
+# --- manifests
+
+
+def load_manifest(path):
+    """Loads an asset manifest file.
+
+    Args:
+        path (str): A JSON file containing either a list of assets,
+            or a dict of (asset name : asset value) pairs.
+
+    Returns:
+        list: A list of (asset name, asset value) tuples.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f, object_pairs_hook=OrderedDict)
+    if isinstance(data, dict):
+        return [(str(k), v) for k, v in data.items()]
+    elif isinstance(data, list):
+        return [(str(x), x) for x in data]
+    raise ValueError('Invalid manifest file: {}'.format(path))
+
+
+def jobs_from_manifest(path, iter_param, assets, **kwargs):
+    """Returns a job per asset, each building one graph with
+    the graph iter parameter set to a single asset.
+
+    Args:
+        path (str): The action graph file to execute.
+        iter_param (str): Name of the graph iter parameter.
+        assets (list): A list of (asset name, asset value) tuples.
+            See ``load_manifest()``.
+        kwargs: Job keyword arguments.
+
+    Returns:
+        list: A list of BatchJob objects.
+    """
+    graph_name = os.path.splitext(os.path.basename(path))[0]
+    jobs = []
+    for name, value in assets:
+        jobs.append(BatchJob(
+            path, params={iter_param: [value]},
+            name='{}_{}'.format(graph_name, name), **kwargs))
+    return jobs
+
+
+# --- worker
+
+
+def run_worker(spec_path, result_path):
+    """Executes a job in the current process. This is the entry point
+    of worker processes.
+
+    Args:
+        spec_path (str): The job spec file written by the runner.
+        result_path (str): The file to write the job result to.
+
+    Returns:
+        bool: True if the graph executed successfully.
+    """
+    from mhy.protostar.lib import ActionLibrary as alib
+
+    start = time.time()
+    result = {'success': False, 'error': None}
+    try:
+        with open(spec_path, 'r') as f:
+            spec = json.load(f)
+        path = spec['path']
+        if not os.path.isfile(path):
+            raise IOError('Graph file not found: {}'.format(path))
+
+        alib.refresh()
+        graph = alib.create_graph(name=spec['name'])
+        graph.read(path)
+        for name, value in spec.get('params', {}).items():
+            param = graph.param(name)
+            if param is None:
+                raise ValueError(
+                    'Parameter not found: {}.{}'.format(graph.name, name))
+            param.value = value
+
+        success = graph.execute(
+            exec_name=spec.get('exec_name', 'main'),
+            mode=spec.get('mode', 'new'), no_break=True)
+        result['success'] = bool(success)
+        if not success:
+            result['error'] = 'Graph execution failed: {}'.format(path)
+    except BaseException:
+        result['error'] = traceback.format_exc()
+        traceback.print_exc()
+    result['time'] = time.time() - start
+
+    with open(result_path, 'w') as f:
+        json.dump(result, f)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return result['success']
+
+
+def main(args=None):
+    """The command line entry point.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        description='Builds action graphs in worker processes.')
+    sub_parsers = parser.add_subparsers(dest='command')
+
+    run_parser = sub_parsers.add_parser('run', help='Run a batch of jobs.')
+    run_parser.add_argument(
+        'graphs', nargs='+', help='Action graph files to execute.')
+    run_parser.add_argument(
+        '--manifest', help=('An asset manifest file. Requires a single '
+                            'graph and --iter-param.'))
+    run_parser.add_argument(
+        '--iter-param', help='The graph iter parameter to set per asset.')
+    run_parser.add_argument(
+        '-j', '--concurrency', type=int, default=None,
+        help='Max number of concurrent workers.')
+    run_parser.add_argument(
+        '--retries', type=int, default=0,
+        help='Number of times to retry a failed job.')
+    run_parser.add_argument(
+        '--timeout', type=float, default=None,
+        help='Max seconds per job attempt.')
+    run_parser.add_argument(
+        '--exec-name', default='main', help='The execution name.')
+    run_parser.add_argument(
+        '--worker-command', default=None,
+        help='The worker launch command.')
+    run_parser.add_argument('--log-dir', help='The job log folder.')
+    run_parser.add_argument('--summary', help='The summary JSON file.')
+
+    worker_parser = sub_parsers.add_parser(
+        'worker', help='Execute a single job (used by the runner).')
+    worker_parser.add_argument('spec', help='The job spec file.')
+    worker_parser.add_argument('result', help='The job result file.')
+
+    args = parser.parse_args(args)
+    if args.command == 'worker':
+        return 0 if run_worker(args.spec, args.result) else 1
+    elif args.command != 'run':
+        parser.print_help()
+        return 2
+
+    if args.manifest:
+        if len(args.graphs) != 1 or not args.iter_param:
+            parser.error(
+                '--manifest requires a single graph and --iter-param.')
+        jobs = jobs_from_manifest(
+            args.graphs[0], args.iter_param, load_manifest(args.manifest),
+            exec_name=args.exec_name)
+    else:
+        jobs = [BatchJob(x, exec_name=args.exec_name) for x in args.graphs]
+
+    runner = BatchRunner(
+        concurrency=args.concurrency, retries=args.retries,
+        timeout=args.timeout, command=args.worker_command,
+        log_dir=args.log_dir)
+    runner.run(jobs)
+    print(runner.report())
+    if args.summary:
+        runner.write_summary(args.summary)
+    failed = [x for x in jobs if x.status != JobStatus.kSuccess]
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,7 @@
 Global constants.
 """
 import os
+import multiprocessing
 
 # Action namespace separator
 SEP = ':'
@@ -59,6 +60,20 @@ TAG_ACTION = 'action'
 TAG_GRAPH = 'action graph'
 
 
+# Actions for these apps/DCCs always run on the main thread
+MAIN_THREAD_APPS = ('maya', 'houdini')
+# The max number of worker threads used by concurrent graph executions.
+# Actions often wait on IO, so use a few more threads than cpu cores.
+try:
+    EXEC_MAX_WORKERS = min(32, multiprocessing.cpu_count() + 4)
+except NotImplementedError:
+    EXEC_MAX_WORKERS = 8
+
+# Default limits of the action result cache used by incremental executions
+RESULT_CACHE_MAX_SIZE = 512 * 1024 * 1024  # in bytes
+RESULT_CACHE_MAX_AGE = 30 * 24 * 3600  # in seconds
+
+
 class ExecStatus():
     """Execution status enum."""
 
@@ -4,6 +4,7 @@ This module contains the base Action class for all custom actions to inherit.
 
 import sys
 import abc
+import copy
 import webbrowser
 import traceback
 import inspect
@@ -17,6 +18,8 @@ from mhy.protostar.core.base import BaseObject
 import mhy.protostar.core.parameter_base as pb
 import mhy.protostar.core.parameter as pa
 import mhy.protostar.core.exception as exp
+import mhy.protostar.core.tracer as trc
+import mhy.protostar.core.journal as jnl
 import mhy.protostar.constants as const
 import mhy.protostar.utils as util
 
@@ -76,6 +79,115 @@ class ExecProgress(object):
             self.__prog_id = self.__max_id
 
 
+class ActionMeta(object):
+    """
+    Class-level metadata of an action or action graph class.
+
+    It is built once per class (when the class is registered in the
+    action library, or on first use), so that object creation and
+    execution dispatch don't need to introspect the class again.
+    """
+
+    def __init__(self, cls):
+        """Initializes a new metadata object.
+
+        Args:
+            cls (type): An ActionBase sub-class.
+        """
+        self.__cls = cls
+
+        # collect class attributes in the same resolution order
+        # as getattr(): sub-class attributes override base attributes
+        attrs = {}
+        for klass in reversed(cls.__mro__):
+            attrs.update(vars(klass))
+
+        params = []
+        exec_names = []
+        for name, attr in attrs.items():
+            if isinstance(attr, pb.base_parameter):
+                params.append(attr)
+            elif hasattr(getattr(attr, '__func__', attr), '_is_custom_exec'):
+                exec_names.append(name)
+
+        self.__param_descriptors = tuple(
+            sorted(params, key=attrgetter('uuid')))
+        self.__custom_exec_names = tuple(sorted(exec_names))
+        self.__custom_exec_set = frozenset(exec_names)
+
+        tags = getattr(cls, '_TAGS', None)
+        if tags is None:
+            self.__tags = None
+        else:
+            if not isinstance(tags, (list, tuple)):
+                tags = set((tags,))
+            else:
+                tags = set(tags)
+            tags.add(const.TAG_ACTION)
+            self.__tags = tuple(sorted(list(tags)))
+
+        # exec method argument specs: {method name: arg spec}
+        self.__arg_specs = {}
+        for name in ('run',) + self.__custom_exec_names:
+            if hasattr(cls, name):
+                self.get_arg_spec(name)
+
+    def __repr__(self):
+        return 'ActionMeta ({})'.format(self.__cls.__name__)
+
+    __str__ = __repr__
+
+    @property
+    def param_descriptors(self):
+        """The static parameter descriptors in creation order.
+
+        :type: tuple
+        """
+        return self.__param_descriptors
+
+    @property
+    def custom_exec_names(self):
+        """The sorted custom execution method names.
+
+        :type: tuple
+        """
+        return self.__custom_exec_names
+
+    @property
+    def tags(self):
+        """The action tags, or None for classes without tags.
+
+        :type: tuple or None
+        """
+        return self.__tags
+
+    def is_custom_exec(self, name):
+        """Checks if a method name is a custom execution method.
+
+        Args:
+            name (str): The method name.
+
+        Returns:
+            bool
+        """
+        return name in self.__custom_exec_set
+
+    def get_arg_spec(self, name):
+        """Returns the argument spec of an execution method.
+
+        Args:
+            name (str): The method name.
+
+        Returns:
+            tuple: See ``compatible.get_arg_spec()``.
+        """
+        spec = self.__arg_specs.get(name)
+        if spec is None:
+            spec = compat.get_arg_spec(getattr(self.__cls, name))
+            self.__arg_specs[name] = spec
+        return spec
+
+
 class ActionBase(BaseObject):
     """Base abstract class inherited by ``Action`` and ``ActionGraph``.
 
@@ -118,15 +230,8 @@ class ActionBase(BaseObject):
         self.graph = graph
         self.name = name if name else self.class_name
 
-        # find static parameter descriptors
-        params = []
-        for name in dir(self.__class__):
-            param = getattr(self.__class__, name)
-            if isinstance(param, pb.base_parameter):
-                params.append(param)
-
         # create static parameters in order
-        for param in sorted(params, key=attrgetter('uuid')):
+        for param in self._get_meta().param_descriptors:
             data = param._get_data()
             kwargs = data['creation']
             kwargs['name'] = data['name']
@@ -140,6 +245,19 @@ class ActionBase(BaseObject):
         """Full string representation."""
         return '{} (type: {})'.format(self.long_name, self.class_name)
 
+    @classmethod
+    def _get_meta(cls):
+        """Returns the metadata of this class, built on first use.
+
+        Returns:
+            ActionMeta: The class metadata.
+        """
+        meta = cls.__dict__.get('_META')
+        if meta is None:
+            meta = ActionMeta(cls)
+            cls._META = meta
+        return meta
+
     def __str__(self):
         """Short string representation."""
         return self.name
@@ -192,6 +310,16 @@ class ActionBase(BaseObject):
     @ui_data.setter
     def ui_data(self, data):
         self.__ui_data = data
+        self._edited()
+
+    def _edited(self):
+        """Records an edit of this object in the edit journal of
+        the root graph, if any.
+
+        Call this after modifying ``ui_data`` in place.
+        """
+        if jnl._JOURNALS:
+            jnl._record_edit(self)
 
     @compat.classproperty
     def doc(cls):
@@ -228,6 +356,8 @@ class ActionBase(BaseObject):
             # update owner graph
             if self.graph:
                 self.graph._sync_object_key(old_name)
+                if jnl._JOURNALS:
+                    jnl._record_objects_edit(self.graph)
 
             # update references in downstream scripts
             for param in self.get_params():
@@ -235,6 +365,7 @@ class ActionBase(BaseObject):
                     s = op.script
                     if s:
                         s._replace_string(old_name, new_name)
+                        op._edited()
 
     @property
     def long_name(self):
@@ -497,6 +628,7 @@ class ActionBase(BaseObject):
         param = pa._create_parameter(param_type, **kwargs)
         self.__param_dict[param.name] = param
         self.__param_ordered_dict[param.uuid] = param
+        self._edited()
         return param
 
     def remove_dynamic_param(self, param, force=False):
@@ -537,6 +669,7 @@ class ActionBase(BaseObject):
             self.__param_dict.pop(param.name)
             self.__param_ordered_dict.pop(param.uuid)
         param._set_owner(None)
+        self._edited()
         return param
 
     def clear_dynamic_params(self, force=False):
@@ -819,6 +952,10 @@ class ActionBase(BaseObject):
     def copy(self, name=None, graph=pb.OWNER_GRAPH, bake_script=False):
         """Returns a copy of this object.
 
+        The copy is cloned from this object directly, without serializing
+        it. For graphs, scripts and connections of the objects inside are
+        remapped to the copied objects.
+
         Args:
             name (str): Name of the copied object.
                 If None, use the next available name.
@@ -840,12 +977,22 @@ class ActionBase(BaseObject):
 
         name = name if name else self.name
         dup = self.__class__(name=name, graph=graph)
-        data = self._get_data()
+        param_map = {}
+        self._clone_params(dup, param_map)
 
-        for pdata in data['parameters']:
+        # scripts of this object are resolved in the target graph
+        for param in self.iter_params():
+            # skip static outputs, these are set by the action execution.
+            if param.is_output and not param.is_dynamic:
+                continue
+            dup_param = dup.param(param.name)
+            if not dup_param:
+                continue
+
+            pdata = param._get_data(creation=False)
             if bake_script:
                 # bake script values
-                pdata['value'] = self.param(pdata['name']).value
+                pdata['value'] = param.value
                 pdata['script_enabled'] = False
                 if 'script' in pdata:
                     pdata.pop('script')
@@ -855,10 +1002,58 @@ class ActionBase(BaseObject):
                 if 'script' in pdata:
                     pdata['script'] = pdata['script'].replace(
                         pb.THIS_OBJECT, self.name)
+            dup_param._set_data(pdata, creation=False, value=True)
 
-        dup._set_data(data)
+        if self.is_graph:
+            self._clone_object_value_data(dup, param_map)
         return dup
 
+    def _clone_params(self, dup, param_map, param=True, **kwargs):
+        """Clones the parameters of this object to another object of
+        the same type. Value data is skipped.
+
+        Args:
+            dup (ActionBase): The object to clone to.
+            param_map (dict): A dict to add (parameter: cloned parameter)
+                pairs to.
+            param (bool): If False, skip creating dynamic parameters.
+
+        Returns:
+            None
+        """
+        dup.ui_data = copy.deepcopy(self.__ui_data) if self.__ui_data else {}
+        if param:
+            dup.clear_dynamic_params(force=True)
+
+        dup_params = dup.__param_dict
+        for each in self.iter_params():
+            name = each.name
+            if param and each.is_dynamic and name not in dup_params:
+                creation = each._get_data(creation=True)['creation']
+                dup.add_dynamic_param(each.param_type, name=name, **creation)
+            dup_param = dup_params.get(name)
+            if dup_param is not None:
+                param_map[each] = dup_param
+
+    def _clone_value_data(self, dup, param_map):
+        """Clones the value data (values and scripts) of this object to
+        another object. Script inputs are remapped with param_map.
+
+        Args:
+            dup (ActionBase): The object to clone to.
+            param_map (dict): A dict mapping parameters to their clones.
+
+        Returns:
+            None
+        """
+        dup_params = dup.__param_dict
+        for param in self.iter_params():
+            if param.is_output and not param.is_dynamic:
+                continue
+            dup_param = dup_params.get(param.name)
+            if dup_param is not None:
+                dup_param._clone_value_data(param, param_map)
+
     def _get_data(self):
         """Returns the serialized data of this object.
 
@@ -1124,6 +1319,10 @@ class Action(ActionBase):
     # specify the required app/DCC to run this action
     _APP = None
 
+    # If False, incremental graph executions always run this action
+    # instead of restoring its outputs from the result cache.
+    _CACHEABLE = True
+
     # category tags
     _TAGS = []
 
@@ -1136,6 +1335,10 @@ class Action(ActionBase):
     # This is handled by the factory class. Do NOT override.
     _UI_ICON_PATH = None
 
+    # The cached class metadata.
+    # This is handled by the factory class. Do NOT override.
+    _META = None
+
     def __init__(self, name=None, graph=None):
         """Initializes a new action object.
 
@@ -1157,12 +1360,7 @@ class Action(ActionBase):
 
         :type: list
         """
-        if not isinstance(cls._TAGS, (list, tuple)):
-            tags = set((cls._TAGS,))
-        else:
-            tags = set(cls._TAGS)
-        tags.add(const.TAG_ACTION)
-        return tuple(sorted(list(tags)))
+        return cls._get_meta().tags
 
     @tags.setter
     def tags(cls, _):
@@ -1329,6 +1527,35 @@ class Action(ActionBase):
         Returns:
             ExecStatus: The final execution status.
         """
+        run, exec_method, info_name = self._begin_execute(exec_name)
+        if run:
+            try:
+                # execute ths action
+                self._run_exec_method(exec_method, args, kwargs, exec_name)
+
+                # set status to success
+                self.set_status(const.ExecStatus.kSuccess, exec_name=exec_name)
+            except BaseException:
+                # set status to fail and print traceback
+                self.set_status(const.ExecStatus.kFail, exec_name=exec_name)
+                traceback.print_exc()
+                raise exp.ActionError('Action failed... {}'.format(info_name))
+
+        return self.get_status(exec_name)
+
+    def _begin_execute(self, exec_name='main'):
+        """Resets the status and prepares an execution of this action.
+        If the action should run, prints the starting log and sets the
+        status to running.
+
+        Args:
+            exec_name (str): Name of this execution.
+
+        Returns:
+            tuple: (bool: True if the action should run,
+                    the custom execution method or None,
+                    the name used in logs)
+        """
         # resets the status of this action
         self.reset_status(exec_name)
 
@@ -1342,43 +1569,62 @@ class Action(ActionBase):
 
         # no method matching exec_name, pass
         if exec_name != 'main' and not hasattr(self, exec_name):
-            pass
+            return False, exec_method, info_name
         # no custom execution method found, pass
         elif exec_name != 'main' and not exec_method:
-            pass
-        elif self.enabled.value:
-            # print starting log
-            if exec_name == 'main':
-                self.info('-------------', title=False, format_='simple')
-            self.info('Action started... {}'.format(info_name))
+            return False, exec_method, info_name
+        elif not self.enabled.value:
+            self.info('Action skipped... {}'.format(info_name))
+            return False, exec_method, info_name
 
-            # set status to running
-            self.set_status(const.ExecStatus.kRunning, exec_name=exec_name)
+        # print starting log
+        if exec_name == 'main':
+            self.info('-------------', title=False, format_='simple')
+        self.info('Action started... {}'.format(info_name))
 
-            try:
-                # execute ths action
-                if not exec_method:
-                    self.start()
-                    obj_args, obj_kwargs = compat.filter_args(
-                        self.run, args, kwargs)
-                    self.run(*obj_args, **obj_kwargs)
-                    self.end()
-                else:
-                    obj_args, obj_kwargs = compat.filter_args(
-                        exec_method, args, kwargs)
-                    exec_method(*obj_args, **obj_kwargs)
+        # set status to running
+        self.set_status(const.ExecStatus.kRunning, exec_name=exec_name)
+        return True, exec_method, info_name
 
-                # set status to success
-                self.set_status(const.ExecStatus.kSuccess, exec_name=exec_name)
-            except BaseException:
-                # set status to fail and print traceback
-                self.set_status(const.ExecStatus.kFail, exec_name=exec_name)
-                traceback.print_exc()
-                raise exp.ActionError('Action failed... {}'.format(info_name))
-        else:
-            self.info('Action skipped... {}'.format(info_name))
+    def _run_exec_method(self, exec_method, args, kwargs, exec_name='main'):
+        """Runs the main execution (``start()``, ``run()``, ``end()``)
+        or a custom execution method. The status is left untouched.
 
-        return self.get_status(exec_name)
+        If tracing is on, the execution is recorded by the active tracer.
+
+        Args:
+            exec_method (function or None): The custom execution method.
+                If None, run the main execution.
+            args (tuple): Arguments to pass into the execution method.
+            kwargs (dict): Keyword arguments to pass into the
+                execution method.
+            exec_name (str): Name of this execution.
+
+        Returns:
+            None
+        """
+        tracer = trc._TRACER
+        span = None if tracer is None else tracer.begin(self, exec_name)
+        meta = self._get_meta()
+        try:
+            if not exec_method:
+                self.start()
+                obj_args, obj_kwargs = compat.filter_args(
+                    self.run, args, kwargs,
+                    arg_spec=meta.get_arg_spec('run'))
+                self.run(*obj_args, **obj_kwargs)
+                self.end()
+            else:
+                obj_args, obj_kwargs = compat.filter_args(
+                    exec_method, args, kwargs,
+                    arg_spec=meta.get_arg_spec(exec_name))
+                exec_method(*obj_args, **obj_kwargs)
+        except BaseException:
+            if span is not None:
+                tracer.end(span, const.ExecStatus.kFail)
+            raise
+        if span is not None:
+            tracer.end(span, const.ExecStatus.kSuccess)
 
     def _get_custom_exec_method(self, method_name):
         """Returns custom execute method in this class.
@@ -1389,12 +1635,8 @@ class Action(ActionBase):
         Returns:
             function or None: The custom execution method or None if not found.
         """
-        try:
-            method = getattr(self, method_name)
-            if hasattr(method, '_is_custom_exec'):
-                return method
-        except BaseException:
-            return
+        if self._get_meta().is_custom_exec(method_name):
+            return getattr(self, method_name, None)
 
     def get_custom_exec_names(self):
         """Returns a list of custom execution method names.
@@ -1402,11 +1644,7 @@ class Action(ActionBase):
         Returns:
             list: A list of custom execution method names.
         """
-        exec_names = []
-        for each in dir(self):
-            if self._get_custom_exec_method(each):
-                exec_names.append(each)
-        return exec_names
+        return list(self._get_meta().custom_exec_names)
 
     @abc.abstractmethod
     def run(self):
@@ -1439,6 +1677,10 @@ class MayaAction(Action):
 
     _APP = 'maya'
 
+    # Maya actions modify the scene, which can't be restored from
+    # the result cache. Sub-classes with no side effects may opt in.
+    _CACHEABLE = False
+
     def execute(self, exec_name='main', exec_progress=None, *args, **kwargs):
         """Re-implement the main execution method to pop a Maya progress
         window during execution and allow user to interrupt with ESC key."""
@@ -1501,3 +1743,7 @@ class HoudiniAction(Action):
     """
 
     _APP = 'houdini'
+
+    # Houdini actions modify the scene, which can't be restored from
+    # the result cache. Sub-classes with no side effects may opt in.
+    _CACHEABLE = False
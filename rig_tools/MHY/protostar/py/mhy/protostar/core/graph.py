@@ -3,13 +3,23 @@ The Action Graph class.
 """
 
 import os
+import sys
 import json
+import heapq
+import threading
 import traceback
-from collections import OrderedDict
+from collections import OrderedDict, deque
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 from mhy.python.core.signal import Signal
 
 import mhy.protostar.core.action as act
+import mhy.protostar.core.result_cache as rc
+import mhy.protostar.core.tracer as trc
+import mhy.protostar.core.journal as jnl
 import mhy.protostar.core.exception as exp
 import mhy.protostar.utils as util
 import mhy.protostar.constants as const
@@ -18,6 +28,89 @@ import mhy.protostar.constants as const
 __all__ = ['ActionGraph']
 
 
+# parsed graph documents as (path : ((mtime, size), data))
+_GRAPH_FILE_CACHE = {}
+_GRAPH_FILE_CACHE_MAX = 1000
+
+
+def _copy_data(data):
+    """Returns a copy of json data. Much faster than ``copy.deepcopy()``
+    as only dicts and lists need to be copied."""
+    if isinstance(data, dict):
+        return dict((k, _copy_data(v)) for k, v in data.items())
+    elif isinstance(data, list):
+        return [_copy_data(x) for x in data]
+    return data
+
+
+def _read_graph_file(path):
+    """Returns the parsed data of an action graph file, with its edit
+    journal replayed (see ``journal``).
+
+    Parsed documents are cached process-wide by path, and re-parsed
+    only if the mtime or size of the file or its journal changes.
+    A copy is returned so the caller is free to modify it.
+    """
+    path = os.path.normpath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size)
+    journal_path = jnl.get_journal_path(path)
+    if os.path.isfile(journal_path):
+        stat = os.stat(journal_path)
+        key += (stat.st_mtime, stat.st_size)
+    cached = _GRAPH_FILE_CACHE.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        data = jnl.apply_journal(data, path)
+        if len(_GRAPH_FILE_CACHE) >= _GRAPH_FILE_CACHE_MAX:
+            _GRAPH_FILE_CACHE.clear()
+        cached = (key, data)
+        _GRAPH_FILE_CACHE[path] = cached
+    return _copy_data(cached[1])
+
+
+def clear_graph_cache():
+    """Clears the process-wide parsed graph file cache."""
+    _GRAPH_FILE_CACHE.clear()
+
+
+def _is_concurrent(obj):
+    """Checks if an object can be executed on a worker thread.
+
+    Sub-graphs, actions for an app/DCC in ``MAIN_THREAD_APPS`` and
+    actions re-implementing ``execute()`` always run on the main thread.
+    """
+    if obj.is_graph or obj.app in const.MAIN_THREAD_APPS:
+        return False
+    for cls in type(obj).__mro__:
+        if cls is act.Action:
+            return True
+        if 'execute' in cls.__dict__:
+            return False
+    return False
+
+
+def _exec_worker(tasks, results):
+    """Worker thread loop executing actions from a task queue.
+
+    Each task is an (action, exec name, exec method, info name, args,
+    kwargs) tuple. The action, info name and the error traceback (or None)
+    are put into the result queue once done. Exits when a None task
+    is received.
+    """
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        obj, exec_name, exec_method, info_name, args, kwargs = task
+        try:
+            obj._run_exec_method(exec_method, args, kwargs, exec_name)
+            results.put((obj, info_name, None))
+        except BaseException:
+            results.put((obj, info_name, traceback.format_exc()))
+
+
 class ActionGraph(act.ActionBase):
     """Action graph class.
 
@@ -42,12 +135,26 @@ class ActionGraph(act.ActionBase):
         self.__source = None
         self.__source_path = None
         self.__referenced = False
+        # object data of a lazily loaded referenced graph as
+        # (object data list, apply value) or None.
+        # objects are created on first access.
+        self.__pending_objects = None
         # a dict to store objects as (name : object) pairs
         # used for fast object query by name
         self.__object_dict = {}
         # an ordered dict to store objects as (uuid : object) paris
         # used to query objects in creation order
         self.__object_ordered_dict = OrderedDict()
+        # object-level adjacency index as (object : [objects]) pairs
+        # and the cached topological order. The index is updated in place
+        # when objects are added or removed and connections change, and
+        # rebuilt lazily after objects are reordered. The order is
+        # recomputed lazily after any change.
+        self.__input_index = None
+        self.__output_index = None
+        self.__positions = None
+        self.__last_position = -1
+        self.__sorted_objects = None
 
         # signals
         self.status_changed = Signal(str, int)
@@ -79,6 +186,7 @@ class ActionGraph(act.ActionBase):
     @doc.setter
     def doc(self, doc):
         self.__doc = str(doc)
+        self._edited()
 
     @property
     def tags(self):
@@ -90,6 +198,7 @@ class ActionGraph(act.ActionBase):
 
     @tags.setter
     def tags(self, tags):
+        self._edited()
         if not tags:
             self.__tags = []
             return
@@ -126,6 +235,7 @@ class ActionGraph(act.ActionBase):
 
     @ui_color.setter
     def ui_color(self, color):
+        self._edited()
         if not color:
             self.__ui_color = None
             return
@@ -155,6 +265,7 @@ class ActionGraph(act.ActionBase):
     @ui_icon.setter
     def ui_icon(self, icon):
         self.__ui_icon = str(icon)
+        self._edited()
 
     @property
     def icon_path(self):
@@ -199,6 +310,10 @@ class ActionGraph(act.ActionBase):
         Returns:
             ExecStatus: The execution status.
         """
+        # objects not loaded yet are never executed
+        if self.__pending_objects is not None:
+            return const.ExecStatus.kNone
+
         success_count = 0
         total_count = 0
 
@@ -242,6 +357,7 @@ class ActionGraph(act.ActionBase):
 
         :type: int
         """
+        self.__load_pending_objects()
         return len(self.__object_dict)
 
     # --- Referencing
@@ -266,6 +382,15 @@ class ActionGraph(act.ActionBase):
         """
         return bool(self.__source and self.__referenced)
 
+    @property
+    def objects_loaded(self):
+        """False if this is a lazily loaded referenced graph whose
+        objects are not created yet. Objects are created on first access.
+
+        :type: bool
+        """
+        return self.__pending_objects is None
+
     def import_reference(self):
         """If referenced, imports/dereferences this graph so that
         the user can make changes.
@@ -276,7 +401,10 @@ class ActionGraph(act.ActionBase):
         if not self.__referenced:
             self.warn('{} is not referenced.'.format(self))
         else:
+            self.__load_pending_objects()
             self.__referenced = False
+            if jnl._JOURNALS:
+                jnl._record_replace(self)
 
     def revert_reference(self):
         """Reverts this graph to the referenced state.
@@ -305,8 +433,8 @@ class ActionGraph(act.ActionBase):
             self.warn('Graph source not found: {}'.format(path))
             return
 
-        # read data
-        self.read(path)
+        # read data, objects in this graph are created on first access
+        self.__read(path, lazy=True)
 
         # re-apply referenced state as reading data will reset it
         self.__referenced = True
@@ -314,6 +442,8 @@ class ActionGraph(act.ActionBase):
         # re-apply data. only param values/scripts will be applied
         # this is because refereced state is on
         self._set_data(data)
+        if jnl._JOURNALS:
+            jnl._record_replace(self)
 
     # --- Methods for interacting with objects in this graph
 
@@ -355,6 +485,7 @@ class ActionGraph(act.ActionBase):
         Raises:
             ActionError: If the object is not found.
         """
+        self.__load_pending_objects()
         obj = self.__object_dict.get(str(name))
         if not obj:
             raise exp.ActionError('{} not found in {}.'.format(name, self))
@@ -369,6 +500,7 @@ class ActionGraph(act.ActionBase):
         Yields:
             Action or ActionGraph: The action object or graph object.
         """
+        self.__load_pending_objects()
         if not skip_self:
             yield self
         for _, obj in self.__object_ordered_dict.items():
@@ -394,49 +526,223 @@ class ActionGraph(act.ActionBase):
         return roots
     '''
 
-    def __mark_object(
-            self, obj, sorted_objects, marked_objects,
-            skipped_objects, skip_disabled):
-        """Marks an object in this graph.
-        Used internally for traversing the graph.
+    def _topology_changed(self):
+        """Invalidates the adjacency index and the cached object order.
+
+        Called whenever objects are reordered.
+        """
+        self.__input_index = None
+        self.__output_index = None
+        self.__positions = None
+        self.__sorted_objects = None
+
+    def _inputs_changed(self, obj):
+        """Updates the adjacency index after the input connections of
+        an object in this graph have changed, and invalidates the cached
+        object order.
+
+        Only the entries of the given object and its old and new input
+        objects are updated.
+        """
+        self.__sorted_objects = None
+        input_index = self.__input_index
+        if input_index is None:
+            return
+        if obj not in input_index:
+            self._topology_changed()
+            return
+
+        positions = self.__positions
+        output_index = self.__output_index
+        old_inputs = input_index[obj]
+        new_inputs = self.__get_input_objects(obj, positions)
+        if new_inputs == old_inputs:
+            return
+        for in_obj in old_inputs:
+            if in_obj not in new_inputs:
+                output_index[in_obj].remove(obj)
+        for in_obj in new_inputs:
+            if in_obj not in old_inputs:
+                out_objects = output_index[in_obj]
+                out_objects.append(obj)
+                out_objects.sort(key=lambda x: positions[x])
+        input_index[obj] = new_inputs
+
+    def __index_object_added(self, obj):
+        """Adds a new object to the adjacency index, after all the
+        existing objects."""
+        self.__sorted_objects = None
+        input_index = self.__input_index
+        if input_index is None:
+            return
+        positions = self.__positions
+        self.__last_position += 1
+        positions[obj] = self.__last_position
+        input_index[obj] = self.__get_input_objects(obj, positions)
+        self.__output_index[obj] = []
+        for in_obj in input_index[obj]:
+            self.__output_index[in_obj].append(obj)
+        # objects may still refer to the parameters of a re-added object
+        for param in obj.iter_params():
+            for out_param in param.output_params:
+                out_param._topology_changed()
+
+    def __index_object_removed(self, obj):
+        """Removes an object from the adjacency index."""
+        self.__sorted_objects = None
+        input_index = self.__input_index
+        if input_index is None:
+            return
+        output_index = self.__output_index
+        for in_obj in input_index.pop(obj, []):
+            output_index[in_obj].remove(obj)
+        for out_obj in output_index.pop(obj, []):
+            input_index[out_obj].remove(obj)
+        self.__positions.pop(obj, None)
+
+    @staticmethod
+    def __get_input_objects(obj, positions):
+        """Returns the indexed objects an object directly depends on,
+        in creation order."""
+        in_objects = set()
+        for param in obj.iter_params():
+            for in_param in param.input_params:
+                owner = in_param.owner
+                if owner is not None and owner is not obj and \
+                   owner in positions:
+                    in_objects.add(owner)
+        return sorted(in_objects, key=lambda x: positions[x])
+
+    def __build_index(self):
+        """Builds the object-level adjacency index of this graph.
+
+        Input and output objects are stored in creation order.
+        Connections from/to objects outside this graph, as well as
+        self-connections, are ignored.
+        """
+        self.__load_pending_objects()
+        objects = list(self.__object_ordered_dict.values())
+        positions = dict((obj, i) for i, obj in enumerate(objects))
+        input_index = OrderedDict((obj, []) for obj in objects)
+        output_index = OrderedDict((obj, []) for obj in objects)
+
+        for obj in objects:
+            in_objects = self.__get_input_objects(obj, positions)
+            input_index[obj] = in_objects
+            for in_obj in in_objects:
+                output_index[in_obj].append(obj)
+
+        self.__input_index = input_index
+        self.__output_index = output_index
+        self.__positions = positions
+        self.__last_position = len(objects) - 1
+
+    def __get_index(self, output=False):
+        """Returns the input or output adjacency index."""
+        if self.__input_index is None:
+            self.__build_index()
+        return self.__output_index if output else self.__input_index
+
+    def get_input_objects(self, obj):
+        """Returns the objects in this graph that the given object
+        directly depends on, in creation order.
+
+        Args:
+            obj (Action or ActionGraph): An object in this graph.
 
         Returns:
-            bool: Returns False if skip_disabled is True and this
-                object or any of the upstream objects are disabled.
-                In this case this object won't get marked.
+            list: A list of objects.
         """
-        if obj in marked_objects:
-            return True
-        if obj in skipped_objects:
-            return False
+        return list(self.__get_index().get(obj, []))
 
-        status = True
-        if skip_disabled and \
-           (not obj.enabled.value or obj._force_disable):
-            status = False
-
-        # mark all input objects are marked before this object
-        for in_obj in obj.get_connected_objects(
-                input_=True, output=False, as_set=True):
-            if in_obj not in (self, obj):
-                if in_obj not in marked_objects:
-                    self.__mark_object(
-                        in_obj, sorted_objects,
-                        marked_objects, skipped_objects, skip_disabled)
-
-        # mark this object
-        if status:
-            sorted_objects.append(obj)
-            marked_objects.add(obj)
-        else:
-            skipped_objects.add(obj)
+    def get_output_objects(self, obj):
+        """Returns the objects in this graph that directly depend
+        on the given object, in creation order.
 
-        return status
+        Args:
+            obj (Action or ActionGraph): An object in this graph.
+
+        Returns:
+            list: A list of objects.
+        """
+        return list(self.__get_index(output=True).get(obj, []))
+
+    def _find_path(self, source, target):
+        """Returns a list of objects forming a connection path from
+        the source object to the target object, or None if the target
+        is not downstream of the source."""
+        output_index = self.__get_index(output=True)
+        if source not in output_index or target not in output_index:
+            return
+        parents = {source: None}
+        pending = deque([source])
+        while pending:
+            obj = pending.popleft()
+            if obj == target:
+                path = []
+                while obj is not None:
+                    path.append(obj)
+                    obj = parents[obj]
+                return path[::-1]
+            for out_obj in output_index[obj]:
+                if out_obj not in parents:
+                    parents[out_obj] = obj
+                    pending.append(out_obj)
+
+    def __sort_objects(self):
+        """Sorts all objects by connection dependencies and creation order.
+
+        Upstream objects are visited depth-first in creation order,
+        so that every object comes after all of its input objects.
+
+        Returns:
+            tuple: (a list of sorted objects, a list of objects forming
+                a connection cycle or None)
+        """
+        input_index = self.__get_index()
+        sorted_objects = []
+        # 1: visiting, 2: sorted
+        states = {}
+        for root in input_index:
+            if root in states:
+                continue
+            states[root] = 1
+            stack = [(root, iter(input_index[root]))]
+            while stack:
+                obj, in_objects = stack[-1]
+                for in_obj in in_objects:
+                    state = states.get(in_obj)
+                    if state is None:
+                        states[in_obj] = 1
+                        stack.append((in_obj, iter(input_index[in_obj])))
+                        break
+                    elif state == 1:
+                        # reached an object that is still being visited.
+                        # the stack holds the loop in upstream order.
+                        loop = [x for x, _ in stack]
+                        loop = loop[loop.index(in_obj):]
+                        return sorted_objects, loop[:1] + loop[:0:-1]
+                else:
+                    stack.pop()
+                    states[obj] = 2
+                    sorted_objects.append(obj)
+        return sorted_objects, None
+
+    def find_cycle(self):
+        """Returns a list of objects forming a connection cycle.
+
+        Returns:
+            list or None: The objects in the cycle, in data flow order,
+                or None if this graph has no cycles.
+        """
+        return self.__sort_objects()[1]
 
     def get_sorted_objects(self, skip_disabled=True):
         """Traverses the graph and return a list of objects sorted by
         connection dependencies and the creation order.
 
+        The sorted order is cached until the graph topology changes.
+
         Note:
             auto-skipping downstream objects from a disabled object is
             not allowed. This is because complex connections might not
@@ -448,15 +754,23 @@ class ActionGraph(act.ActionBase):
 
         Return:
             list: A list of sorted objects.
+
+        Raises:
+            PConnectionError: If the graph contains a connection cycle.
         """
-        sorted_objects = []
-        marked_objects = set()
-        skipped_objects = set()
-        for obj in self.iter_objects(skip_self=True):
-            self.__mark_object(
-                obj, sorted_objects,
-                marked_objects, skipped_objects, skip_disabled)
-        return sorted_objects
+        if self.__sorted_objects is None:
+            sorted_objects, cycle = self.__sort_objects()
+            if cycle:
+                raise exp.PConnectionError(
+                    'Connection cycle found in {}: {}'.format(
+                        self, ' -> '.join(
+                            [str(x) for x in cycle + cycle[:1]])))
+            self.__sorted_objects = sorted_objects
+
+        if not skip_disabled:
+            return list(self.__sorted_objects)
+        return [obj for obj in self.__sorted_objects
+                if obj.enabled.value and not obj._force_disable]
 
     def get_iter_count(self):
         """Returns the number of iterations this graph needs to perform.
@@ -507,6 +821,7 @@ class ActionGraph(act.ActionBase):
         Returns:
             bool
         """
+        self.__load_pending_objects()
         if isinstance(obj, act.ActionBase):
             return obj.name in self.__object_dict
         return str(obj) in self.__object_dict
@@ -542,6 +857,9 @@ class ActionGraph(act.ActionBase):
             self.__object_dict[obj.name] = obj
             self.__object_ordered_dict[obj.uuid] = obj
             obj.graph = self
+            self.__index_object_added(obj)
+            if jnl._JOURNALS:
+                jnl._record_objects_edit(self)
             if not self.__app and obj.app:
                 self.__app = obj.app
 
@@ -595,6 +913,9 @@ class ActionGraph(act.ActionBase):
                 new_dict[uuid] = obj
 
         self.__object_ordered_dict = new_dict
+        self._topology_changed()
+        if jnl._JOURNALS:
+            jnl._record_objects_edit(self)
 
     def _sync_object_key(self, key):
         """Updates a parameter entry in the internal dict."""
@@ -640,6 +961,9 @@ class ActionGraph(act.ActionBase):
         obj = self.__object_dict.pop(obj.name)
         self.__object_ordered_dict.pop(obj.uuid)
         obj.graph = None
+        self.__index_object_removed(obj)
+        if jnl._JOURNALS:
+            jnl._record_objects_edit(self)
 
         # update the compatible app
         self.__app = None
@@ -657,20 +981,47 @@ class ActionGraph(act.ActionBase):
             force (bool):
                 If True, raise error if any object has output connections.
         """
+        # objects not loaded yet can be discarded right away
+        self.__pending_objects = None
         objects = list(self.__object_dict.values())
         for obj in objects:
             self.remove_object(obj, force=force)
 
-    # --- Data methods
+    def __load_pending_objects(self):
+        """Creates the objects of a lazily loaded referenced graph."""
+        pending = self.__pending_objects
+        if pending is None:
+            return
+        self.__pending_objects = None
+        objects, value = pending
+
+        # objects are created the same way as an eager read:
+        # with this graph and its owner graphs unreferenced.
+        states = []
+        graph = self
+        while graph is not None:
+            states.append((graph, graph.__referenced))
+            graph.__referenced = False
+            graph = graph.graph
+        try:
+            self.__create_objects(objects)
+            if value:
+                for odata in objects:
+                    self.get_object(odata['name'])._set_value_data(odata)
+        except BaseException:
+            traceback.print_exc()
+            raise RuntimeError(
+                'Failed reading action graph: {}'.format(self.source_path))
+        finally:
+            for graph, state in states:
+                graph.__referenced = state
 
-    def _get_data(self):
-        """Returns the serialized data of this object.
+    # --- Data methods
 
-        Returns:
-            dict
-        """
-        data = super(ActionGraph, self)._get_data()
-        data['source'] = self.__source
+    def __get_attr_data(self):
+        """Returns the serialized graph attributes (excluding parameters
+        and objects)."""
+        data = {'source': self.__source}
         doc = self.__doc
         if doc and doc not in ('None', const.DEFAULT_DOC):
             data['doc'] = doc
@@ -684,6 +1035,42 @@ class ActionGraph(act.ActionBase):
         if ui_icon:
             data['ui_icon'] = ui_icon
         data['referenced'] = self.__referenced
+        return data
+
+    def __set_attr_data(self, data):
+        """Applies serialized graph attributes."""
+        doc = data.get('doc')
+        if not doc:
+            doc = ''
+        self.doc = doc
+
+        tags = data.get('tags', [])
+        self.tags = tags
+
+        self.ui_color = data.get('ui_color')
+        self.ui_icon = data.get('ui_icon')
+
+        if jnl._JOURNALS and (
+                self.__source != data['source'] or
+                self.__referenced != data['referenced']):
+            jnl._record_replace(self)
+        self.__source = data['source']
+        self.__referenced = data['referenced']
+
+    def _get_data(self, objects=True):
+        """Returns the serialized data of this object.
+
+        Args:
+            objects (bool): If False, skip serializing objects
+                in this graph.
+
+        Returns:
+            dict
+        """
+        data = super(ActionGraph, self)._get_data()
+        data.update(self.__get_attr_data())
+        if not objects:
+            return data
         data['objects'] = []
 
         if not self.referenced:
@@ -692,31 +1079,19 @@ class ActionGraph(act.ActionBase):
 
         return data
 
-    def _set_data(self, data, value=True, **kwargs):
+    def _set_data(self, data, value=True, lazy=False, **kwargs):
         """Applies serialized data to this object.
 
         Args:
             data (dict): Serialized action graph data.
             value (bool): If False, skip setting value data.
+            lazy (bool): If True, objects in this graph are created
+                on first access, instead of right away.
 
         Returns:
             None
         """
-        from mhy.protostar.lib import ActionLibrary as alib
-
-        doc = data.get('doc')
-        if not doc:
-            doc = ''
-        self.doc = doc
-
-        tags = data.get('tags', [])
-        self.tags = tags
-
-        self.ui_color = data.get('ui_color')
-        self.ui_icon = data.get('ui_icon')
-
-        self.__source = data['source']
-        self.__referenced = data['referenced']
+        self.__set_attr_data(data)
 
         # load data for this graph
         # skip all value data
@@ -728,46 +1103,80 @@ class ActionGraph(act.ActionBase):
         # skip all value data
         if not self.referenced:
             self.clear_objects(force=True)
-
-            for odata in data['objects']:
-                src = odata['source']
-                is_graph = 'objects' in odata
-
-                try:
-                    if is_graph:
-                        if not odata['referenced']:
-                            src = None
-                        if src and not alib.has_graph(src):
-                            self.warn(
-                                ('Graph "{}" not found! '
-                                 'Loading "{}" as an empty graph.').format(
-                                     src, odata['name']))
-                            src = None
-                            odata['source'] = None
-                            odata['referenced'] = False
-                        obj = alib.create_graph(
-                            source=src, name=odata['name'], graph=self)
-                    else:
-                        if not alib.has_action(src):
-                            self.warn(
-                                ('Action "{}" not found! '
-                                 'Loading "{}" as a NullAction.').format(
-                                     src, odata['name']))
-                            src = 'default:NullAction'
-                        obj = alib.create_action(
-                            src, name=odata['name'], graph=self)
-                    obj._set_data(odata, value=False)
-                except BaseException as e:
-                    self.error(
-                        'Failed loading {} {}'.format(
-                            'graph' if is_graph else 'action',
-                            src if src else odata['name']))
-                    raise e
+            if lazy:
+                self.__pending_objects = (data['objects'], value)
+            else:
+                self.__create_objects(data['objects'])
 
         # apply all value data after all objects are loaded
         # so that scripts can be properly resolved
         if value:
-            self._set_value_data(data)
+            if lazy:
+                # object values are applied when objects are loaded
+                super(ActionGraph, self)._set_value_data(data)
+            else:
+                self._set_value_data(data)
+
+    def __create_object(self, data):
+        """Creates an object in this graph from its serialized graph
+        attributes or action source. Value data is skipped.
+
+        Args:
+            data (dict): The object data containing the name and source,
+                as well as the referenced state for graphs. If a source
+                graph is not found, the data is updated to load it as an
+                empty graph.
+
+        Returns:
+            Action or ActionGraph: The new object.
+        """
+        from mhy.protostar.lib import ActionLibrary as alib
+
+        src = data['source']
+        is_graph = 'referenced' in data
+        try:
+            if is_graph:
+                if not data['referenced']:
+                    src = None
+                if src and not alib.has_graph(src):
+                    self.warn(
+                        ('Graph "{}" not found! '
+                         'Loading "{}" as an empty graph.').format(
+                             src, data['name']))
+                    src = None
+                    data['source'] = None
+                    data['referenced'] = False
+                return alib.create_graph(
+                    source=src, name=data['name'], graph=self)
+            else:
+                if not alib.has_action(src):
+                    self.warn(
+                        ('Action "{}" not found! '
+                         'Loading "{}" as a NullAction.').format(
+                             src, data['name']))
+                    src = 'default:NullAction'
+                return alib.create_action(src, name=data['name'], graph=self)
+        except BaseException as e:
+            self.error(
+                'Failed loading {} {}'.format(
+                    'graph' if is_graph else 'action',
+                    src if src else data['name']))
+            raise e
+
+    def __create_objects(self, objects):
+        """Creates objects in this graph from serialized data.
+        Value data is skipped.
+        """
+        for odata in objects:
+            obj = self.__create_object(odata)
+            try:
+                obj._set_data(odata, value=False)
+            except BaseException as e:
+                self.error(
+                    'Failed loading {} {}'.format(
+                        'graph' if obj.is_graph else 'action',
+                        odata['source'] or odata['name']))
+                raise e
 
     def _set_value_data(self, data):
         """Applies serialized data to this object.
@@ -785,10 +1194,69 @@ class ActionGraph(act.ActionBase):
                 obj = self.get_object(odata['name'])
                 obj._set_value_data(odata)
 
+    def _clone_params(self, dup, param_map, data=None, **kwargs):
+        """Clones the graph attributes, parameters and objects of this
+        graph to another graph. Value data is skipped.
+
+        Args:
+            dup (ActionGraph): The graph to clone to.
+            param_map (dict): A dict to add (parameter: cloned parameter)
+                pairs to.
+            data (dict): The graph attributes to apply. If None,
+                use the attributes of this graph.
+
+        Returns:
+            None
+        """
+        if data is None:
+            data = self.__get_attr_data()
+        dup.__set_attr_data(data)
+        super(ActionGraph, self)._clone_params(
+            dup, param_map, param=not dup.referenced)
+        if dup.referenced:
+            return
+
+        dup.clear_objects(force=True)
+        if self.referenced:
+            return
+        for obj in self.iter_objects():
+            if obj.is_graph:
+                odata = obj.__get_attr_data()
+            else:
+                odata = {'source': obj.type_name}
+            odata['name'] = obj.name
+            dup_obj = dup.__create_object(odata)
+            obj._clone_params(dup_obj, param_map, data=odata)
+
+    def _clone_value_data(self, dup, param_map):
+        """Clones the value data (values and scripts) of this graph and
+        the objects in it. See ``ActionBase._clone_value_data()``.
+        """
+        super(ActionGraph, self)._clone_value_data(dup, param_map)
+        self._clone_object_value_data(dup, param_map)
+
+    def _clone_object_value_data(self, dup, param_map):
+        """Clones the value data of the objects in this graph to
+        the objects in another graph.
+
+        Args:
+            dup (ActionGraph): The graph to clone to.
+            param_map (dict): A dict mapping parameters to their clones.
+
+        Returns:
+            None
+        """
+        if self.referenced or dup.referenced:
+            return
+        for obj in self.iter_objects():
+            if dup.has_object(obj.name):
+                obj._clone_value_data(dup.get_object(obj.name), param_map)
+
     def write(self, path):
         """Serializes this graph and writes the data to a JSON file on disc.
 
         The file must use the custom extension ``.agraph``.
+        The edit journal of this file, if any, is reset.
 
         Args:
             path (str): Path to a JSON file.
@@ -803,20 +1271,80 @@ class ActionGraph(act.ActionBase):
             d = os.path.split(path)[0]
             if not os.path.isdir(d):
                 os.makedirs(d)
+            _GRAPH_FILE_CACHE.pop(os.path.normpath(path), None)
             with open(path, 'w+') as f:
                 json.dump(data, f, indent=2)
                 self.info(
                     'Saved action graph "{}" to {}'.format(self.name, path))
+            jnl._snapshot_written(self, path)
 
     def read(self, path):
         """Reads data from the given JSON file and applies it to this graph.
 
+        Parsed files are cached, so reading the same file again only
+        re-parses it if the file has changed.
+
         Args:
             path (str): Path to a JSON file.
 
         Returns:
             None
         """
+        self.__read(path)
+
+    @property
+    def journal(self):
+        """The active edit journal of this graph.
+
+        :type: EditJournal or None
+        """
+        return jnl._JOURNALS.get(self)
+
+    def start_journal(self, path, compact_interval=jnl.COMPACT_INTERVAL):
+        """Starts journaling edits of this graph to an action graph file.
+
+        The full graph is written to the file first. After that, each
+        ``journal.save()`` only appends the edited objects to the
+        journal file next to it, until the journal is compacted.
+        ``read()`` replays the journal on top of the file.
+
+        Args:
+            path (str): Path to a JSON file.
+            compact_interval (int): The number of saves before the
+                journal is compacted into the graph file.
+
+        Returns:
+            EditJournal: The active journal.
+
+        Raises:
+            ActionError: If this is not a root graph.
+        """
+        if self.graph:
+            raise exp.ActionError(
+                'Only root graphs can be journaled: {}'.format(self))
+        return jnl.EditJournal(self, path, compact_interval=compact_interval)
+
+    def stop_journal(self, save=True):
+        """Stops journaling edits of this graph.
+
+        Args:
+            save (bool): If True, save pending edits first.
+
+        Returns:
+            None
+        """
+        journal = self.journal
+        if journal is not None:
+            journal.stop(save=save)
+
+    def __read(self, path, lazy=False):
+        """Reads data from the given JSON file.
+
+        Args:
+            path (str): Path to a JSON file.
+            lazy (bool): If True, objects in this graph are created
+                on first access.
+        """
         if not path.endswith(const.GRAPH_EXT):
             self.warn('Not an action graph file: {}'.format(path))
             return
@@ -824,16 +1352,15 @@ class ActionGraph(act.ActionBase):
             self.warn('File not found: {}'.format(path))
             return
 
-        with open(path, 'r') as f:
-            data = json.load(f)
-            try:
-                self._set_data(data)
-                self.info(
-                    'Loaded action graph "{}" from {}'.format(self.name, path))
-            except BaseException:
-                traceback.print_exc()
-                raise RuntimeError(
-                    'Failed reading action graph: {}'.format(path))
+        data = _read_graph_file(path)
+        try:
+            self._set_data(data, lazy=lazy)
+            self.info(
+                'Loaded action graph "{}" from {}'.format(self.name, path))
+        except BaseException:
+            traceback.print_exc()
+            raise RuntimeError(
+                'Failed reading action graph: {}'.format(path))
 
     def print_detail(self, verbose=False):
         """Prints nicely formatted details about this graph.
@@ -912,6 +1439,15 @@ class ActionGraph(act.ActionBase):
                 + "new": A new execution that runs through all objects.
                 + "resume": Pick up the execution from where it left last time.
                 + "step": Execute the next object down the line.
+                + "concurrent": A new execution that runs independent
+                  actions concurrently. Actions not bound to an app/DCC
+                  run on worker threads as soon as all their inputs are
+                  done. The rest run on the calling thread.
+                  Use "resume" to continue from a break point.
+                + "incremental": A new execution that skips actions whose
+                  inputs, source code and upstream objects are unchanged
+                  since their last successful run. Their outputs are
+                  restored from the result cache (see ``result_cache``).
             no_break (bool): If True, ignore break points.
             args: Arguments to pass into each object's execution method.
             kwargs: Keyword arguments to pass into each object's
@@ -923,8 +1459,25 @@ class ActionGraph(act.ActionBase):
         Raises:
             ActionError: If the execution mode is invalid.
         """
+        tracer = trc._TRACER
+        if tracer is None:
+            return self.__execute(
+                exec_name, exec_progress, mode, no_break, *args, **kwargs)
+
+        span = tracer.begin(self, exec_name)
+        result = False
+        try:
+            result = self.__execute(
+                exec_name, exec_progress, mode, no_break, *args, **kwargs)
+        finally:
+            tracer.end(span, self.get_status(exec_name=exec_name))
+        return result
+
+    def __execute(self, exec_name, exec_progress, mode, no_break,
+                  *args, **kwargs):
+        """Executes all the objects in this graph. See ``execute()``."""
         # validate execution mode
-        if mode not in ('new', 'resume', 'step'):
+        if mode not in ('new', 'resume', 'step', 'concurrent', 'incremental'):
             raise exp.ActionError('Invalide execution mode: {}'.format(mode))
 
         # get the name of this graph to use in logs.
@@ -942,9 +1495,16 @@ class ActionGraph(act.ActionBase):
             each._disable_unselected_inputs()
 
         # reset all object status
-        if mode == 'new':
+        if mode in ('new', 'concurrent', 'incremental'):
             self.reset_status(exec_name)
 
+        # reset cache stats in root incremental executions
+        cache = None
+        if mode == 'incremental':
+            cache = rc.get_cache()
+            if not self.graph:
+                cache.reset_stats()
+
         old_status = self.get_status(exec_name=exec_name)
 
         # if this is a root graph, make a new ExecProgress object.
@@ -958,68 +1518,274 @@ class ActionGraph(act.ActionBase):
 
         is_first = True
         exec_objects = self.get_sorted_objects(skip_disabled=True)
+        tracer = trc._TRACER
         for i in range(iter_count):
+            if tracer is not None and iter_count > 1:
+                tracer.begin_iteration(self, exec_name, i)
+
             # update iter param values
             for param in iter_params:
                 param.iter_id = i
 
             # reset object status
-            if mode == 'new':
+            if mode in ('new', 'concurrent', 'incremental'):
                 self.reset_status(exec_name)
 
-            # execute objects in dependency order
-            for obj in exec_objects:
-                status = obj.get_status(exec_name)
-                if status == const.ExecStatus.kSuccess and mode != 'new':
-                    continue
-
-                # check break point
-                if not no_break and obj.break_point.value and \
-                   mode != 'step' and (mode == 'new' or not is_first):
-                    obj.break_point_reached.emit()
+            # a dict of (object : execution fingerprint)
+            fingerprints = {}
+
+            # execute objects concurrently up to the first break point
+            if mode == 'concurrent':
+                objects = exec_objects
+                break_obj = None
+                if not no_break:
+                    for j, obj in enumerate(exec_objects):
+                        if obj.break_point.value:
+                            objects = exec_objects[:j]
+                            break_obj = obj
+                            break
+
+                done = self.__execute_concurrent(
+                    objects, exec_name, exec_progress, no_break, args, kwargs)
+                if done and break_obj is not None:
+                    break_obj.break_point_reached.emit()
                     self.warn(('Reached break point at {}. Graph '
-                               'execution paused... {}').format(obj, info_name))
+                               'execution paused... {}').format(
+                                   break_obj, info_name))
+                if not done or break_obj is not None:
                     new_status = self.get_status(exec_name=exec_name)
                     if old_status != new_status:
                         self.status_changed.emit(exec_name, new_status)
                     return False
 
-                is_first = False
-
-                # gather exec kwargs
-                obj_kwargs = kwargs.copy()
-                obj_kwargs['exec_name'] = exec_name
-                prog = None if mode == 'step' else exec_progress
-                obj_kwargs['exec_progress'] = prog
-                obj_kwargs['no_break'] = no_break
-
-                # execute the object
-                if obj.is_graph:
-                    obj_kwargs['mode'] = mode
-                    if not obj.execute(*args, **obj_kwargs):
+            else:
+                # execute objects in dependency order
+                for obj in exec_objects:
+                    status = obj.get_status(exec_name)
+                    if status == const.ExecStatus.kSuccess and \
+                       mode not in ('new', 'incremental'):
+                        continue
+
+                    # check break point
+                    if not no_break and obj.break_point.value and \
+                       mode != 'step' and \
+                       (mode in ('new', 'incremental') or not is_first):
+                        obj.break_point_reached.emit()
+                        self.warn(('Reached break point at {}. Graph '
+                                   'execution paused... {}').format(
+                                       obj, info_name))
                         new_status = self.get_status(exec_name=exec_name)
                         if old_status != new_status:
                             self.status_changed.emit(exec_name, new_status)
                         return False
-                else:
-                    status = obj.execute(*args, **obj_kwargs)
-                    if status == const.ExecStatus.kSuccess:
-                        exec_progress.increment()
 
-                # check step execution
-                if mode == 'step':
-                    self.warn('Graph execution paused... {}'.format(info_name))
-                    new_status = self.get_status(exec_name=exec_name)
-                    if old_status != new_status:
-                        self.status_changed.emit(exec_name, new_status)
-                    return False
+                    is_first = False
+
+                    # gather exec kwargs
+                    obj_kwargs = kwargs.copy()
+                    obj_kwargs['exec_name'] = exec_name
+                    prog = None if mode == 'step' else exec_progress
+                    obj_kwargs['exec_progress'] = prog
+                    obj_kwargs['no_break'] = no_break
+
+                    # fingerprint the object for incremental executions
+                    fingerprint = None
+                    if cache:
+                        fingerprint = cache.fingerprint(
+                            obj, exec_name=exec_name,
+                            upstream=self.__get_upstream_fingerprints(
+                                obj, fingerprints, cache,
+                                exec_name, args, kwargs),
+                            args=args, kwargs=kwargs)
+                        fingerprints[obj] = fingerprint
+
+                    # execute the object
+                    if obj.is_graph:
+                        obj_kwargs['mode'] = mode
+                        if not obj.execute(*args, **obj_kwargs):
+                            new_status = self.get_status(
+                                exec_name=exec_name)
+                            if old_status != new_status:
+                                self.status_changed.emit(
+                                    exec_name, new_status)
+                            return False
+                    elif cache and cache.load(obj, fingerprint, exec_name):
+                        self.info('Action restored from cache... {}'.format(
+                            obj.long_name))
+                        exec_progress.increment()
+                    else:
+                        status = obj.execute(*args, **obj_kwargs)
+                        if status == const.ExecStatus.kSuccess:
+                            exec_progress.increment()
+                            if cache:
+                                cache.save(obj, fingerprint)
+
+                    # check step execution
+                    if mode == 'step':
+                        self.warn(
+                            'Graph execution paused... {}'.format(info_name))
+                        new_status = self.get_status(exec_name=exec_name)
+                        if old_status != new_status:
+                            self.status_changed.emit(exec_name, new_status)
+                        return False
 
             info = 'Graph execution complete: {}'.format(info_name)
             if iter_count > 1:
                 info += ' (Iteration {})'.format(i)
             self.info(info)
 
+        # report and clean up the cache in root incremental executions
+        if cache and not self.graph:
+            self.info(cache.report())
+            cache.evict()
+
         new_status = self.get_status(exec_name=exec_name)
         if old_status != new_status:
             self.status_changed.emit(exec_name, new_status)
         return True
+
+    def __get_upstream_fingerprints(
+            self, obj, fingerprints, cache, exec_name, args, kwargs):
+        """Returns the fingerprints of the input objects of an object.
+
+        Input objects skipped in this execution, e.g. disabled ones,
+        are fingerprinted as skipped objects on first use, so that
+        their downstream objects can still be restored from the cache.
+        """
+        upstream = []
+        for in_obj in self.get_input_objects(obj):
+            if in_obj not in fingerprints:
+                fingerprints[in_obj] = cache.fingerprint(
+                    in_obj, exec_name=exec_name,
+                    upstream=self.__get_upstream_fingerprints(
+                        in_obj, fingerprints, cache,
+                        exec_name, args, kwargs),
+                    args=args, kwargs=kwargs, skipped=True)
+            upstream.append(fingerprints[in_obj])
+        return upstream
+
+    def __execute_concurrent(
+            self, exec_objects, exec_name, exec_progress,
+            no_break, args, kwargs):
+        """Executes a list of sorted objects with a ready-queue.
+
+        An object becomes ready once all its input objects are done.
+        Ready actions that can run concurrently are sent to a pool of
+        worker threads. Other objects are executed on the calling thread,
+        in sorted order. Status updates, progress increments and
+        signals are always handled on the calling thread.
+
+        When an object fails, no more objects are started. Running
+        actions are allowed to finish before the error is raised.
+
+        Returns:
+            bool: False if a sub-graph execution is paused.
+
+        Raises:
+            ActionError: If any object fails.
+        """
+        positions = dict((obj, i) for i, obj in enumerate(exec_objects))
+        waiting = {}
+        for obj in exec_objects:
+            waiting[obj] = len(
+                [x for x in self.get_input_objects(obj) if x in positions])
+        # a heap of (sorted position, object) of ready objects
+        ready = [(positions[obj], obj)
+                 for obj in exec_objects if not waiting[obj]]
+
+        obj_kwargs = kwargs.copy()
+        obj_kwargs['exec_progress'] = exec_progress
+        obj_kwargs['no_break'] = no_break
+
+        tasks = queue.Queue()
+        results = queue.Queue()
+        workers = []
+        state = {'running': 0, 'error': None}
+
+        def finish(obj):
+            for out_obj in self.get_output_objects(obj):
+                if out_obj in waiting:
+                    waiting[out_obj] -= 1
+                    if not waiting[out_obj]:
+                        heapq.heappush(ready, (positions[out_obj], out_obj))
+
+        def collect(block):
+            while state['running']:
+                try:
+                    obj, info_name, error = results.get(block=block)
+                except queue.Empty:
+                    return
+                block = False
+                state['running'] -= 1
+                if error is None:
+                    obj.set_status(
+                        const.ExecStatus.kSuccess, exec_name=exec_name)
+                    if exec_progress:
+                        exec_progress.increment()
+                    finish(obj)
+                else:
+                    obj.set_status(const.ExecStatus.kFail, exec_name=exec_name)
+                    sys.stderr.write(error)
+                    if state['error'] is None:
+                        state['error'] = exp.ActionError(
+                            'Action failed... {}'.format(info_name))
+
+        paused = False
+        try:
+            while (ready or state['running']) and \
+                    state['error'] is None and not paused:
+                # send ready actions to the worker threads
+                main_obj = None
+                while ready:
+                    obj = heapq.heappop(ready)[1]
+                    if not _is_concurrent(obj):
+                        main_obj = obj
+                        break
+
+                    run, exec_method, info_name = obj._begin_execute(exec_name)
+                    if not run:
+                        finish(obj)
+                        continue
+                    if len(workers) < const.EXEC_MAX_WORKERS and \
+                       len(workers) <= state['running']:
+                        worker = threading.Thread(
+                            target=_exec_worker, args=(tasks, results))
+                        worker.daemon = True
+                        worker.start()
+                        workers.append(worker)
+                    tasks.put((obj, exec_name, exec_method, info_name,
+                               args, obj_kwargs))
+                    state['running'] += 1
+
+                # execute the next main thread object
+                if main_obj is not None:
+                    main_kwargs = obj_kwargs.copy()
+                    main_kwargs['exec_name'] = exec_name
+                    try:
+                        if main_obj.is_graph:
+                            main_kwargs['mode'] = 'concurrent'
+                            if not main_obj.execute(*args, **main_kwargs):
+                                paused = True
+                        else:
+                            status = main_obj.execute(*args, **main_kwargs)
+                            if status == const.ExecStatus.kSuccess and \
+                               exec_progress:
+                                exec_progress.increment()
+                    except BaseException as e:
+                        state['error'] = e
+                    else:
+                        if not paused:
+                            finish(main_obj)
+
+                # collect finished actions.
+                # wait for one if there's nothing else to do.
+                collect(block=main_obj is None and not ready)
+        finally:
+            # let running actions finish, then stop the workers
+            collect(block=True)
+            for _ in workers:
+                tasks.put(None)
+
+        if state['error'] is not None:
+            raise state['error']
+        return not paused
@@ -0,0 +1,428 @@
+"""
+The edit journal used for incremental saves of action graphs.
+
+Instead of re-serializing the whole graph on every save, a journaled
+graph tracks which objects were edited and appends only their data to
+a sidecar journal file (``<graph file>.journal``). Each save appends
+one batch of records:
+
+    + objects: The new object list of a graph whose objects were added,
+      removed, renamed or re-ordered. Existing objects are referred to
+      by name, only new objects are serialized.
+    + data: The serialized data of an edited object. For graphs, the
+      objects inside are excluded.
+
+Reading a graph file replays its journal on top of the snapshot data,
+so the result is the same as if the full graph was written on every
+save. Once the journal grows past the compaction interval, the full
+graph is written back to the snapshot and the journal is reset.
+
+Usage:
+
+.. code:: python
+
+    journal = graph.start_journal('/path/to/rig.agraph')
+    # ... edit the graph
+    journal.save()
+    # ... edit the graph
+    journal.save()
+    graph.stop_journal()
+"""
+
+import os
+import json
+
+import mhy.python.core.logger as logger
+
+
+__all__ = ['EditJournal', 'get_journal_path', 'apply_journal']
+
+
+JOURNAL_EXT = '.journal'
+JOURNAL_VERSION = 1
+
+# the default number of saves before the journal is compacted
+COMPACT_INTERVAL = 50
+
+# active journals as (root graph : EditJournal) pairs
+_JOURNALS = {}
+
+
+def get_journal_path(path):
+    """Returns the journal file path of an action graph file.
+
+    Args:
+        path (str): The action graph file path.
+
+    Returns:
+        str
+    """
+    return path + JOURNAL_EXT
+
+
+def _get_stamp(path):
+    """Returns the (mtime, size) stamp of a file as a list."""
+    stat = os.stat(path)
+    return [stat.st_mtime, stat.st_size]
+
+
+# --- replay
+
+
+def _find_data(data, path):
+    """Returns the object data at a path of object names, or None."""
+    for name in path:
+        for odata in data.get('objects', []):
+            if odata['name'] == name:
+                data = odata
+                break
+        else:
+            return
+    return data
+
+
+def _apply_record(data, record):
+    """Applies a journal record to the graph data in place."""
+    target = _find_data(data, record['path'])
+    if target is None:
+        logger.warn('Journal record target not found: {}'.format(
+            ':'.join(record['path'])))
+        return
+
+    if record['op'] == 'objects':
+        old_objects = dict((x['name'], x) for x in target.get('objects', []))
+        objects = []
+        for entry in record['objects']:
+            if 'data' in entry:
+                objects.append(entry['data'])
+                continue
+            odata = old_objects.get(entry['name'])
+            if odata is not None:
+                if 'rename' in entry:
+                    odata['name'] = entry['rename']
+                objects.append(odata)
+        target['objects'] = objects
+
+    elif record['op'] == 'data':
+        objects = target.get('objects')
+        target.clear()
+        target.update(record['data'])
+        if objects is not None and 'objects' not in target:
+            target['objects'] = objects
+
+
+def apply_journal(data, path):
+    """Replays the journal of an action graph file on top of its
+    snapshot data.
+
+    The journal is ignored if it was not started from the current
+    snapshot. An incomplete batch at the end of the journal
+    (e.g. from an interrupted save) is skipped.
+
+    Args:
+        data (dict): The parsed snapshot data. Modified in place.
+        path (str): The action graph file path.
+
+    Returns:
+        dict: The graph data.
+    """
+    journal_path = get_journal_path(path)
+    if not os.path.isfile(journal_path):
+        return data
+
+    with open(journal_path, 'r') as f:
+        lines = f.read().splitlines()
+    try:
+        header = json.loads(lines[0])
+    except (IndexError, ValueError):
+        logger.warn('Invalid journal file: {}'.format(journal_path))
+        return data
+    if header.get('snapshot') != _get_stamp(path):
+        logger.warn('Journal out of sync with snapshot, skipped: {}'.format(
+            journal_path))
+        return data
+
+    for line in lines[1:]:
+        try:
+            batch = json.loads(line)
+        except ValueError:
+            logger.warn('Skipped incomplete journal batch: {}'.format(
+                journal_path))
+            break
+        for record in batch['records']:
+            _apply_record(data, record)
+    return data
+
+
+# --- edit tracking
+
+
+def _get_journal(obj):
+    """Returns the active journal of the root graph of an object."""
+    while obj.graph is not None:
+        obj = obj.graph
+    return _JOURNALS.get(obj)
+
+
+def _record_edit(obj):
+    """Records an edit of the data of an object."""
+    journal = _get_journal(obj)
+    if journal is not None:
+        journal._edited[obj.uuid] = obj
+
+
+def _record_objects_edit(graph):
+    """Records an edit of the object list of a graph."""
+    journal = _get_journal(graph)
+    if journal is not None:
+        journal._objects_edited[graph.uuid] = graph
+
+
+def _record_replace(obj):
+    """Records that an object needs to be serialized in full."""
+    journal = _get_journal(obj)
+    if journal is not None:
+        if obj.graph is None:
+            journal._full = True
+        else:
+            journal._replaced.add(obj.uuid)
+            journal._objects_edited[obj.graph.uuid] = obj.graph
+
+
+def _snapshot_written(graph, path):
+    """Called after a graph is fully written to a file.
+    Resets the journal of this file."""
+    journal = _JOURNALS.get(graph)
+    if journal is not None and \
+       os.path.normpath(journal.path) == os.path.normpath(path):
+        journal._reset()
+        return
+
+    journal_path = get_journal_path(path)
+    if os.path.isfile(journal_path):
+        os.remove(journal_path)
+
+
+class EditJournal(object):
+    """Appends edits of a root graph to the journal of a graph file."""
+
+    def __init__(self, graph, path, compact_interval=COMPACT_INTERVAL):
+        """Initializes a new journal and writes the graph snapshot.
+
+        Use ``ActionGraph.start_journal()`` instead of calling this
+        directly.
+
+        Args:
+            graph (ActionGraph): The root graph to journal.
+            path (str): The action graph file path.
+            compact_interval (int): The number of saves before the
+                journal is compacted into the snapshot.
+        """
+        self.__graph = graph
+        self.__path = path
+        self.__compact_interval = compact_interval
+        self.__batch_count = 0
+        # (object uuid : name) pairs and (graph uuid : object uuid set)
+        # pairs of the persisted graph state.
+        self.__names = {}
+        self.__children = {}
+
+        # edits since the last save
+        self._edited = {}
+        self._objects_edited = {}
+        self._replaced = set()
+        self._full = False
+
+        previous = _JOURNALS.get(graph)
+        if previous is not None:
+            previous.stop(save=False)
+        _JOURNALS[graph] = self
+        self.compact()
+
+    def __repr__(self):
+        return 'EditJournal ({}: {} batches)'.format(
+            self.__path, self.__batch_count)
+
+    __str__ = __repr__
+
+    @property
+    def graph(self):
+        """The journaled root graph.
+
+        :type: ActionGraph
+        """
+        return self.__graph
+
+    @property
+    def path(self):
+        """The action graph file path.
+
+        :type: str
+        """
+        return self.__path
+
+    @property
+    def journal_path(self):
+        """The journal file path.
+
+        :type: str
+        """
+        return get_journal_path(self.__path)
+
+    @property
+    def batch_count(self):
+        """The number of batches in the journal.
+
+        :type: int
+        """
+        return self.__batch_count
+
+    @property
+    def is_active(self):
+        """If True, edits of the graph are tracked by this journal.
+
+        :type: bool
+        """
+        return _JOURNALS.get(self.__graph) is self
+
+    @property
+    def has_edits(self):
+        """If True, there are edits not saved yet.
+
+        :type: bool
+        """
+        return bool(self._full or self._edited or self._objects_edited)
+
+    def stop(self, save=True):
+        """Stops tracking edits of the graph.
+
+        Args:
+            save (bool): If True, save pending edits first.
+
+        Returns:
+            None
+        """
+        if not self.is_active:
+            return
+        if save and self.has_edits:
+            self.save()
+        _JOURNALS.pop(self.__graph)
+
+    def compact(self):
+        """Writes the full graph to the snapshot file and
+        resets the journal.
+
+        Returns:
+            None
+        """
+        self.__graph.write(self.__path)
+
+    def _reset(self):
+        """Resets the journal after the snapshot is written."""
+        with open(self.journal_path, 'w') as f:
+            f.write(json.dumps({
+                'version': JOURNAL_VERSION,
+                'snapshot': _get_stamp(self.__path)}) + '\n')
+        self.__batch_count = 0
+        self.__names = {}
+        self.__children = {}
+        self.__register(self.__graph)
+        self._edited = {}
+        self._objects_edited = {}
+        self._replaced = set()
+        self._full = False
+
+    def __register(self, obj):
+        """Registers an object and its sub-objects as persisted."""
+        self.__names[obj.uuid] = obj.name
+        if obj.is_graph and not obj.referenced:
+            children = list(obj.iter_objects())
+            self.__children[obj.uuid] = set(x.uuid for x in children)
+            for child in children:
+                self.__register(child)
+
+    def __get_path(self, obj):
+        """Returns the names and uuids of an object and its owner graphs
+        in the journaled graph, or (None, None) if the object is not
+        persisted (removed or in a referenced graph)."""
+        names = []
+        uuids = [obj.uuid]
+        while obj.graph is not None:
+            if obj.graph.referenced:
+                return None, None
+            names.append(obj.name)
+            obj = obj.graph
+            uuids.append(obj.uuid)
+        if obj is not self.__graph:
+            return None, None
+        names.reverse()
+        return names, uuids
+
+    def save(self):
+        """Appends the edits since the last save to the journal.
+        The journal is compacted once it reaches the compaction interval.
+
+        Returns:
+            bool: True if anything is saved.
+        """
+        if not self.has_edits:
+            return False
+        if self._full or self.__batch_count >= self.__compact_interval:
+            self.compact()
+            return True
+
+        records = []
+        # objects serialized in full in this save
+        new = set()
+
+        # object list edits, owner graphs first
+        graphs = []
+        for graph in self._objects_edited.values():
+            names, uuids = self.__get_path(graph)
+            if names is not None and not graph.referenced:
+                graphs.append((len(names), names, uuids, graph))
+        graphs.sort(key=lambda x: x[0])
+
+        for _, names, uuids, graph in graphs:
+            if new.intersection(uuids):
+                continue
+            persisted = self.__children.get(graph.uuid, set())
+            entries = []
+            children = set()
+            for obj in graph.iter_objects():
+                if obj.uuid in persisted and obj.uuid not in self._replaced:
+                    entry = {'name': self.__names[obj.uuid]}
+                    if obj.name != entry['name']:
+                        entry['rename'] = obj.name
+                        self.__names[obj.uuid] = obj.name
+                else:
+                    entry = {'data': obj._get_data()}
+                    new.add(obj.uuid)
+                    self.__register(obj)
+                entries.append(entry)
+                children.add(obj.uuid)
+            self.__children[graph.uuid] = children
+            records.append(
+                {'op': 'objects', 'path': names, 'objects': entries})
+
+        # object data edits
+        for obj in self._edited.values():
+            names, uuids = self.__get_path(obj)
+            if names is None or new.intersection(uuids):
+                continue
+            if obj.is_graph:
+                data = obj._get_data(objects=False)
+            else:
+                data = obj._get_data()
+            records.append({'op': 'data', 'path': names, 'data': data})
+
+        self._edited = {}
+        self._objects_edited = {}
+        self._replaced = set()
+        if not records:
+            return False
+
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps({'records': records}) + '\n')
+        self.__batch_count += 1
+        return True
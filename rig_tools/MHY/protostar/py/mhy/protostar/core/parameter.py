@@ -70,6 +70,10 @@ __all__ = [
 ]
 
 
+# parameter classes cached by type name
+_PARAM_CLASS_DICT = {}
+
+
 def _create_parameter(type_name, *args, **kwargs):
     """Creates a parameter object of a given type.
 
@@ -84,10 +88,19 @@ def _create_parameter(type_name, *args, **kwargs):
     Raises:
         ParameterError: If the given type_name is not found.
     """
-    for _, obj in inspect.getmembers(sys.modules[__name__], inspect.isclass):
-        if issubclass(obj, pb.base_parameter) and obj._TYPE_STR == type_name:
-            return obj(*args, **kwargs)
-    raise exp.ParameterError('Parameter type not found: {}'.format(type_name))
+    param_cls = _PARAM_CLASS_DICT.get(type_name)
+    if param_cls is None:
+        for _, obj in inspect.getmembers(
+                sys.modules[__name__], inspect.isclass):
+            if issubclass(obj, pb.base_parameter) and \
+               obj._TYPE_STR == type_name:
+                param_cls = obj
+                _PARAM_CLASS_DICT[type_name] = obj
+                break
+        else:
+            raise exp.ParameterError(
+                'Parameter type not found: {}'.format(type_name))
+    return param_cls(*args, **kwargs)
 
 
 class pyobject_param(pb.base_parameter):
@@ -99,6 +112,8 @@ class pyobject_param(pb.base_parameter):
     """
 
     _TYPE_STR = 'pyobject'
+    # python objects may be modified in place
+    _CACHEABLE = False
 
     def __init__(self, **kwargs):
         """Initializes a new numeric parameter object.
@@ -226,6 +241,7 @@ class numeric_param(pb.base_parameter):
             self.__min = None
         else:
             self.__min = self._convert_value(value)
+        self._edited()
 
     @property
     def max_value(self):
@@ -239,6 +255,7 @@ class numeric_param(pb.base_parameter):
             self.__max = None
         else:
             self.__max = self._convert_value(value)
+        self._edited()
 
     @property
     def value(self):
@@ -450,6 +467,8 @@ class enum_param(int_param):
         if not items:
             raise exp.ParameterError('{}: Enum values are empty.'.format(self))
         self.__items = items
+        self._mark_dirty()
+        self._edited()
 
     @property
     def min_value(self):
@@ -659,6 +678,8 @@ class callback_param(pb.base_parameter):
     """
 
     _TYPE_STR = 'callback'
+    # callback results may change on every call
+    _CACHEABLE = False
 
     def __init__(self, **kwargs):
         """Initializes a new numeric parameter object.
@@ -805,6 +826,7 @@ class item_param(pb.base_parameter):
             self.__min = None
         else:
             self.__min = int(value)
+        self._edited()
 
     @property
     def max_count(self):
@@ -818,6 +840,7 @@ class item_param(pb.base_parameter):
             self.__max = None
         else:
             self.__max = int(value)
+        self._edited()
 
     @property
     def item_type(self):
@@ -833,6 +856,8 @@ class item_param(pb.base_parameter):
             self.__item_type = value
         else:
             raise exp.ParameterError('Invalid item type {}'.format(value))
+        self._mark_dirty()
+        self._edited()
 
     @property
     def value(self):
@@ -1050,6 +1075,7 @@ class iter_param(list_param):
     @iter_id.setter
     def iter_id(self, i):
         self.__iter_id = int(i)
+        self._mark_dirty()
 
     @property
     def iter_value(self):
@@ -1104,6 +1130,8 @@ class dict_param(item_param):
             self.__key_type = value
         else:
             raise exp.ParameterError('Invalid key type {}'.format(value))
+        self._mark_dirty()
+        self._edited()
 
     @property
     def _type_func(self):
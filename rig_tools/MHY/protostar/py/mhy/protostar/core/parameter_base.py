@@ -8,11 +8,14 @@ import re
 import ast
 import abc
 import copy
+import types
 from collections import OrderedDict
 from functools import wraps
 
 import mhy.python.core.logger as logger
 import mhy.protostar.core.exception as exp
+import mhy.protostar.core.tracer as trc
+import mhy.protostar.core.journal as jnl
 import mhy.protostar.utils as utils
 import mhy.protostar.constants as const
 
@@ -80,6 +83,10 @@ def _eval_python_script(code, globals_={}, locals_={}):
     It handles 2 types of scripts:
         1. eval a single-line scrpit directly as a Python expression.
         2. eval a multi-line script as if it's a Python function body.
+
+    Note:
+        This re-compiles the script on every call. PythonScript objects
+        use ``_compile_python_script()`` instead, which caches the result.
     """
     # for single-line expression, run eval directly
     if re.search(r'\b(?:OrderedDict)\b', code):
@@ -103,6 +110,182 @@ def _eval_python_script(code, globals_={}, locals_={}):
     return eval('_wrapper_func()', globals_, locals_)
 
 
+# A process-wide cache of compiled scripts as
+# (substituted code string : (code object, is function block, needs OrderedDict))
+# Scripts that share the same substituted code share the same code object.
+_CODE_CACHE = {}
+_CODE_CACHE_MAX = 100000
+
+
+def _compile_python_script(code):
+    """Compiles a substituted python script into a cached code object.
+
+    The same 2 script types as ``_eval_python_script()`` are supported.
+    For function blocks, the returned code object is the body of the
+    wrapper function, which can be bound to a globals dict with
+    ``types.FunctionType``.
+
+    Args:
+        code (str): A script with all references replaced by variable names.
+
+    Returns:
+        tuple: (code object, is function block, needs OrderedDict)
+
+    Raises:
+        SyntaxError: If the script can't be compiled.
+    """
+    result = _CODE_CACHE.get(code)
+    if result is not None:
+        return result
+
+    use_odict = bool(re.search(r'\b(?:OrderedDict)\b', code))
+    is_func_block = bool(re.search(r'\b(?:return)\b', code))
+    if not is_func_block:
+        code_obj = compile(code.replace('\n', ''), '<string>', 'eval')
+    else:
+        new_code = 'def _wrapper_func():\n'
+        new_code += code.replace('\n', '\n    ')
+        module = compile(ast.parse(new_code, mode='exec'), '<string>', 'exec')
+        code_obj = [c for c in module.co_consts
+                    if isinstance(c, types.CodeType)][0]
+
+    result = (code_obj, is_func_block, use_odict)
+    if len(_CODE_CACHE) >= _CODE_CACHE_MAX:
+        _CODE_CACHE.clear()
+    _CODE_CACHE[code] = result
+    return result
+
+
+def clear_script_cache():
+    """Clears the process-wide compiled script cache."""
+    _CODE_CACHE.clear()
+
+
+# Set this environment variable to disable the parameter value cache
+VALUE_CACHE_ENV_VAR = 'PROTOSTAR_DISABLE_VALUE_CACHE'
+_VALUE_CACHE_ENABLED = not os.environ.get(VALUE_CACHE_ENV_VAR)
+
+
+def set_value_cache_enabled(state):
+    """Turns the parameter value cache on or off.
+
+    When turned off, scripted parameters re-evaluate their scripts on
+    every read, which can be handy for debugging.
+
+    Args:
+        state (bool): The enabled state.
+
+    Returns:
+        None
+    """
+    global _VALUE_CACHE_ENABLED
+    _VALUE_CACHE_ENABLED = bool(state)
+
+
+def is_value_cache_enabled():
+    """Checks if the parameter value cache is enabled.
+
+    Returns:
+        bool
+    """
+    return _VALUE_CACHE_ENABLED
+
+
+# input slot kinds used by compiled scripts
+_SLOT_VALUE = 0
+_SLOT_ITER = 1
+_SLOT_MESSAGE = 2
+
+
+class _CompiledScript(object):
+    """A compiled PythonScript with pre-resolved variable slots.
+
+    Evaluating a compiled script fills a dict with the input values
+    and runs a cached code object, without any string substitution or
+    regex checks.
+    """
+
+    __slots__ = (
+        'code', 'param_slots', 'env_slots',
+        'raw_template', 'code_obj', 'is_func_block', 'use_odict', 'error')
+
+    def __init__(self, code, param_slots, env_slots, raw_template):
+        """Initializes a new compiled script.
+
+        Args:
+            code (str): The substituted script.
+            param_slots (list): A list of (variable name, param, slot kind).
+            env_slots (list): A list of (variable name, env var name).
+            raw_template (str): A format string used to build the raw
+                string result for string parameters.
+        """
+        self.code = code
+        self.param_slots = param_slots
+        self.env_slots = env_slots
+        self.raw_template = raw_template
+        self.error = None
+        try:
+            self.code_obj, self.is_func_block, self.use_odict = \
+                _compile_python_script(code)
+        except BaseException as e:
+            self.code_obj = None
+            self.is_func_block = False
+            self.use_odict = False
+            self.error = e
+
+    def get_values(self):
+        """Returns the variable dict and a list of raw values in slot order."""
+        vars = {}
+        values = []
+        for key, param, kind in self.param_slots:
+            if kind == _SLOT_ITER:
+                val = param.iter_value
+            elif kind == _SLOT_MESSAGE:
+                val = param.owner
+            else:
+                val = param.value
+            vars[key] = val
+            values.append(val)
+
+        for key, env_var in self.env_slots:
+            if env_var not in os.environ:
+                logger.warn(
+                    'Environment variable not found: {}'.format(env_var))
+            val = os.environ.get(env_var, '')
+            vars[key] = val
+            values.append(val)
+
+        return vars, values
+
+    def run(self, vars):
+        """Runs the compiled code object with the given variables."""
+        if self.error is not None:
+            raise self.error
+        if self.use_odict:
+            vars['OrderedDict'] = OrderedDict
+        if self.is_func_block:
+            return types.FunctionType(self.code_obj, vars)()
+        return eval(self.code_obj, vars)
+
+    def is_cacheable(self):
+        """Checks if the last evaluation result can be cached.
+
+        A result is cacheable if the script has no environment variable
+        references, and all input parameters hold clean values.
+        """
+        if self.error is not None or self.env_slots:
+            return False
+        for _, param, kind in self.param_slots:
+            if kind != _SLOT_MESSAGE and not param._is_value_clean():
+                return False
+        return True
+
+    def raw_string(self, values):
+        """Returns the raw script string with references replaced by
+        the string representation of their values."""
+        return self.raw_template.format(*[str(v) for v in values])
+
+
 class PythonScript(object):
     """A class interfacing parameter script overrides.
     It handles 2 types of scripts:
@@ -155,6 +338,8 @@ class PythonScript(object):
         self.__env_var_refs = set()
         self.__code = str(code)
         self.__cache_completed = False
+        # the compiled script, reset whenever the code or inputs change
+        self.__compiled = None
 
         # cache the input parameters
         self.__cache_reference_strings()
@@ -226,6 +411,7 @@ class PythonScript(object):
         """Returns a set of strings referncing other parameters
         or environment variables.
         """
+        self.__compiled = None
         self.__input_param_refs = set()
         self.__env_var_refs = set()
         param_ref_to_fix = []
@@ -272,6 +458,8 @@ class PythonScript(object):
         if not graph:
             return
 
+        self.__compiled = None
+        self.__driven_param._mark_dirty()
         params = copy.copy(self.__input_param_refs)
 
         # cache parameter references
@@ -327,6 +515,9 @@ class PythonScript(object):
         """Removes input parameter caches."""
         self.__input_params = set()
         self.__cache_completed = False
+        self.__compiled = None
+        self.__driven_param._mark_dirty()
+        self.__driven_param._topology_changed()
 
     def __validate_cache(self):
         """Makes sure input parameter caches are still good."""
@@ -335,26 +526,19 @@ class PythonScript(object):
                 self.__remove_cache()
                 return
 
-    def evaluate(self):
-        """Evaluates this script and return the result.
+    def __compile(self):
+        """Compiles this script into a _CompiledScript object.
 
-        Raises:
-            PScriptError: If the evaluation fails.
+        All parameter and environment variable references are resolved
+        into variable slots once, so that evaluating the compiled script
+        only needs to fill in the slot values.
         """
-        is_str = self.__driven_param.is_str
-        code = self.code
-        raw_str = self.code if is_str else ''
-
-        # cache input params again if not completed yet
-        self.__validate_cache()
-        if not self.__cache_completed:
-            self.__cache_parameter_references(quiet=False)
-
         graph = self.owner_graph
+        code = self.code
+        raw = self.code.replace('{', '{{').replace('}', '}}')
 
-        # replace parameter references with their values
-        vars = {}
-        for param in self.__input_params:
+        param_slots = []
+        for i, param in enumerate(self.__input_params):
             if param.name == const.SELF_PARAM_NAME:
                 key = param.owner.name
             else:
@@ -362,39 +546,66 @@ class PythonScript(object):
 
             # for iterator parameters, resolve to the current iter value
             if param.param_type == 'iter':
-                val = param.iter_value
+                kind = _SLOT_ITER
             elif param.param_type == 'message':
-                val = param.owner
+                kind = _SLOT_MESSAGE
             else:
-                val = param.value
-            vars[key] = val
+                kind = _SLOT_VALUE
+            param_slots.append((key, param, kind))
 
             # param name is sufficient for self connection
             pstring = self.__resolve_param_ref_string(graph, param)
             code = code.replace('{{{}}}'.format(pstring), key)
-            if is_str:
-                raw_str = raw_str.replace('{{{}}}'.format(pstring), str(val))
+            raw = raw.replace('{{{{{}}}}}'.format(pstring), '{{{}}}'.format(i))
 
-        # replace env variable references with their values
-        for env_var in self.__env_var_refs:
-            if env_var not in os.environ:
-                logger.warn(
-                    'Environment variable not found: {}'.format(env_var))
-            val = os.environ.get(env_var, '')
+        env_slots = []
+        for i, env_var in enumerate(self.__env_var_refs, len(param_slots)):
             key = 'ENV_' + env_var
-            vars[key] = val
-
+            env_slots.append((key, env_var))
             code = code.replace('{{${}}}'.format(env_var), key)
-            if is_str:
-                raw_str = raw_str.replace('{{${}}}'.format(env_var), str(val))
+            raw = raw.replace(
+                '{{{{${}}}}}'.format(env_var), '{{{}}}'.format(i))
+
+        self.__compiled = _CompiledScript(code, param_slots, env_slots, raw)
+        return self.__compiled
+
+    def evaluate(self):
+        """Evaluates this script and return the result.
+
+        The script is compiled on first evaluation and the compiled
+        result is reused until the script code or its inputs change.
+
+        Raises:
+            PScriptError: If the evaluation fails.
+        """
+        tracer = trc._TRACER
+        if tracer is None:
+            return self.__evaluate()
+        token = tracer.begin_script()
+        try:
+            return self.__evaluate()
+        finally:
+            tracer.end_script(token)
+
+    def __evaluate(self):
+        """Evaluates this script. See ``evaluate()``."""
+        # cache input params again if not completed yet
+        self.__validate_cache()
+        if not self.__cache_completed:
+            self.__cache_parameter_references(quiet=False)
+
+        compiled = self.__compiled
+        if compiled is None:
+            compiled = self.__compile()
 
         # evaluate the final script
+        vars, values = compiled.get_values()
         try:
-            return _eval_python_script(code, globals_=vars)
+            return compiled.run(vars)
         except BaseException as e:
             # for string params, return the raw string directly
-            if is_str:
-                return raw_str
+            if self.__driven_param.is_str:
+                return compiled.raw_string(values)
 
             exp.PScriptError(
                 'Script eval failed on {}: {}'.format(self.__driven_param, e))
@@ -416,9 +627,53 @@ class PythonScript(object):
         for param in self.__input_params:
             param._remove_output(self.__driven_param)
 
+    def _clone(self, driven_param, param_map):
+        """Returns a copy of this script driving another parameter.
+
+        The input parameters are remapped directly instead of being
+        resolved from the script code again.
+
+        Args:
+            driven_param (Parameter): The parameter driven by the copy.
+            param_map (dict): A dict mapping parameters to their copies.
+
+        Returns:
+            PythonScript or None: The copied script, or None if any input
+                parameter is unresolved or not found in param_map.
+        """
+        if not self.__cache_completed:
+            return
+        input_params = set()
+        for param in self.__input_params:
+            new_param = param_map.get(param)
+            if new_param is None:
+                return
+            input_params.add(new_param)
+
+        dup = self.__class__.__new__(self.__class__)
+        dup.__driven_param = driven_param
+        dup.__input_params = input_params
+        dup.__input_objects = set()
+        dup.__input_param_refs = set(self.__input_param_refs)
+        dup.__env_var_refs = set(self.__env_var_refs)
+        dup.__code = self.__code
+        dup.__cache_completed = True
+        dup.__compiled = None
+
+        driven_param._mark_dirty()
+        for param in input_params:
+            param._add_output(driven_param)
+        return dup
+
     def _replace_string(self, old_string, new_string):
         """Replaces a sub-string in the script."""
         self.__code = self.code.replace(old_string, new_string)
+        self.__compiled = None
+        self.__driven_param._mark_dirty()
+
+    def _is_result_cacheable(self):
+        """Checks if the last evaluation result can be cached."""
+        return self.__compiled is not None and self.__compiled.is_cacheable()
 
 
 class base_parameter(object):
@@ -426,6 +681,9 @@ class base_parameter(object):
 
     # the string type name of this parameter
     _TYPE_STR = ''
+    # if False, downstream scripts never cache values computed from
+    # this parameter (e.g. values that may change without notice)
+    _CACHEABLE = True
 
     def __init__(
             self,
@@ -491,6 +749,10 @@ class base_parameter(object):
         self.__script_enabled = False
         self.__script = None
 
+        # the cached script evaluation result
+        self.__cached_value = None
+        self.__cache_valid = False
+
         # a set to track output parameters
         self.__outputs = set()
 
@@ -652,12 +914,14 @@ class base_parameter(object):
             # update owner action
             if self.owner:
                 self.owner._sync_param_key(old_name)
+            self._edited()
 
             # update downstream scripts / connections
             for param in self.output_params:
                 s = param.script
                 if s:
                     s._replace_string('.' + old_name, '.' + new_name)
+                    param._edited()
 
     @property
     def full_name(self):
@@ -693,10 +957,26 @@ class base_parameter(object):
                 obj.is_graph
             except BaseException:
                 raise exp.ActionError('Invalid owner object {}'.format(obj))
+        old_owner = self.__owner
         self.__owner = obj
+        # the index entries of both owners and of the objects
+        # this parameter drives may refer to this parameter
+        for owner in (old_owner, obj):
+            graph = owner.graph if owner is not None else None
+            if graph is not None:
+                graph._inputs_changed(owner)
+        for out_param in self.__outputs:
+            out_param._topology_changed()
+        self._mark_dirty()
         # if obj is not None and not isinstance(obj, base_parameter):
         #     self.name = self.name
 
+    def _edited(self):
+        """Records an edit of this parameter in the edit journal of
+        the root graph, if any."""
+        if jnl._JOURNALS and self.__owner is not None:
+            self.__owner._edited()
+
     @property
     def in_reference_graph(self):
         """Checks if this parameter is in a referenced graph."""
@@ -731,6 +1011,8 @@ class base_parameter(object):
             self.__user_default = None
         else:
             self.__user_default = value
+        self._mark_dirty()
+        self._edited()
 
     @property
     def ui_label(self):
@@ -752,6 +1034,7 @@ class base_parameter(object):
                 self.__ui_label = None
             else:
                 self.__ui_label = label
+        self._edited()
 
     @property
     def editable(self):
@@ -765,6 +1048,7 @@ class base_parameter(object):
     @editable.setter
     def editable(self, state):
         self.__editable = bool(state)
+        self._edited()
 
     @property
     def ui_visible(self):
@@ -778,6 +1062,7 @@ class base_parameter(object):
     @ui_visible.setter
     def ui_visible(self, state):
         self.__ui_visible = bool(state)
+        self._edited()
 
     @property
     def group(self):
@@ -792,6 +1077,7 @@ class base_parameter(object):
     @_check_editable
     def group(self, group):
         self.__group = str(group) if group else None
+        self._edited()
 
     @property
     def priority(self):
@@ -806,6 +1092,7 @@ class base_parameter(object):
     @_check_editable
     def priority(self, priority):
         self.__priority = int(priority)
+        self._edited()
 
     @property
     def doc(self):
@@ -820,6 +1107,7 @@ class base_parameter(object):
     @_check_static_editable
     def doc(self, doc):
         self.__doc = utils.format_doc(doc, indent=0, prefix='')
+        self._edited()
 
     @property
     def is_output(self):
@@ -857,12 +1145,21 @@ class base_parameter(object):
                return the default value.
             3. Return the user-specified value.
 
+        Script evaluation results are cached until this parameter or
+        any of its upstream parameters changes.
+
         :setter: Sets the parameter value.
         """
         if self.__script_enabled:
             if not self.__script:
                 return self.default
-            return self._convert_value(self.__script.evaluate())
+            if self.__cache_valid and _VALUE_CACHE_ENABLED:
+                return self.__cached_value
+            value = self._convert_value(self.__script.evaluate())
+            if _VALUE_CACHE_ENABLED and self.__script._is_result_cacheable():
+                self.__cached_value = value
+                self.__cache_valid = True
+            return value
         return self._get_pure_value()
 
     @value.setter
@@ -874,16 +1171,51 @@ class base_parameter(object):
                  'The new value won\'t take effect until '
                  'the script override is turned off.').format(self))
 
+        self.__set_value(value)
+
+    def __set_value(self, value):
+        """Converts and stores a parameter value."""
         if value is not None:
             value = self._convert_value(value)
         if value is None or value is self.default:
             self.__value = None
         else:
             self.__value = value
+        self._mark_dirty()
+        self._edited()
 
     def reset_value(self):
         """Resets the value to default."""
         self.__value = None
+        self._mark_dirty()
+        self._edited()
+
+    def _is_value_clean(self):
+        """Checks if downstream parameters can cache values computed
+        from this parameter's current value."""
+        if not self._CACHEABLE:
+            return False
+        if self.__script_enabled and self.__script:
+            return self.__cache_valid
+        return True
+
+    def _mark_dirty(self):
+        """Invalidates the cached value of this parameter and pushes
+        the dirty state to all downstream parameters.
+
+        Propagation stops at parameters that are already dirty, as a
+        parameter only caches a value if all its inputs are clean.
+        """
+        self.__cache_valid = False
+        self.__cached_value = None
+        params = list(self.__outputs)
+        while params:
+            param = params.pop()
+            if not param.__cache_valid:
+                continue
+            param.__cache_valid = False
+            param.__cached_value = None
+            params.extend(param.__outputs)
 
     # --- script/connection methods
 
@@ -903,6 +1235,9 @@ class base_parameter(object):
     @_check_static_editable
     def script_enabled(self, state):
         self.__script_enabled = bool(state)
+        self._mark_dirty()
+        self._topology_changed()
+        self._edited()
 
     @property
     def script(self):
@@ -943,6 +1278,9 @@ class base_parameter(object):
         if not code:
             self.__script = None
             self.__script_enabled = False
+            self._mark_dirty()
+            self._topology_changed()
+            self._edited()
             return
 
         # apply new script object
@@ -951,6 +1289,9 @@ class base_parameter(object):
         else:
             self.__script = PythonScript(code, self, quiet=quiet)
         self.__script_enabled = True
+        self._mark_dirty()
+        self._topology_changed()
+        self._edited()
 
         # evaluate the script so that the user can see potential errors
         if not quiet:
@@ -1107,11 +1448,20 @@ class base_parameter(object):
 
         # checks for connection cycles
         # self-connections are allowed
-        if not is_exp_a and not is_exp_b and other_object != this_object and \
-           other_object in this_object.get_connected_objects(
-               output=False, as_set=True):
-            raise exp.PConnectionError(
-                'Connecting {} to {} causes a cycle!'.format(self, other))
+        if not is_exp_a and not is_exp_b and other_object != this_object:
+            graph = this_object.graph
+            if graph is not None:
+                path = graph._find_path(other_object, this_object)
+            elif other_object in this_object.get_connected_objects(
+                    output=False, as_set=True):
+                path = [other_object, this_object]
+            else:
+                path = None
+            if path:
+                raise exp.PConnectionError(
+                    'Connecting {} to {} causes a cycle: {}'.format(
+                        self, other,
+                        ' -> '.join([str(x) for x in path + path[:1]])))
 
         if this_object == other_object:
             name = '{}.{}'.format(THIS_OBJECT, self.name)
@@ -1132,11 +1482,22 @@ class base_parameter(object):
     def _add_output(self, out_param):
         """Adds an output parameter."""
         self.__outputs.add(out_param)
+        out_param._topology_changed()
 
     def _remove_output(self, out_param):
         """Removes an output parameter."""
         if out_param in self.__outputs:
             self.__outputs.remove(out_param)
+            out_param._topology_changed()
+
+    def _topology_changed(self):
+        """Notifies the graph of the owner object that the
+        connections of this parameter have changed."""
+        owner = self.__owner
+        if owner is not None:
+            graph = owner.graph
+            if graph is not None:
+                graph._inputs_changed(owner)
 
     # --- data methods
 
@@ -1223,6 +1584,43 @@ class base_parameter(object):
                 else:
                     self.value = None
 
+    def _clone_value_data(self, other, param_map):
+        """Copies the value data (value and script override) of another
+        parameter. This is equivalent to
+        ``self._set_data(other._get_data(creation=False), creation=False)``
+        without the serialization round trip.
+
+        Args:
+            other (Parameter): The parameter to copy from.
+            param_map (dict): A dict mapping parameters to their copies,
+                used to remap script inputs. Scripts that can't be
+                remapped are resolved from their code instead.
+
+        Returns:
+            None
+        """
+        if other.param_type == 'callback':
+            self._set_data(other._get_data(creation=False), creation=False)
+            return
+        if not self.editable:
+            return
+
+        # apply script, skip the builtin "self" parameter
+        if self.name != const.SELF_PARAM_NAME:
+            script = other.__script
+            if script:
+                dup = script._clone(self, param_map)
+                self.set_script(dup if dup else script.code, quiet=True)
+            else:
+                self.set_script(None)
+            self.__script_enabled = other.__script_enabled
+            self._mark_dirty()
+            self._topology_changed()
+
+        # apply value, skip all message parameters
+        if self.param_type != 'message':
+            self.__set_value(other.__value)
+
     def copy(self, name=None, owner=None):
         """Returns a copy of this parameter.
         The copied parameter can **ONLY** be dynamic.
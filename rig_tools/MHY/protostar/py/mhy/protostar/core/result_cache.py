@@ -0,0 +1,417 @@
+"""
+The action result cache used by incremental graph executions.
+
+Each action execution is identified by a fingerprint hashed from:
+
+    + The action type and its source code.
+    + The execution name and arguments.
+    + The input parameter values.
+    + The fingerprints of its upstream objects.
+
+After a successful execution, the output parameter values are
+saved under this fingerprint. Next time the same fingerprint comes up,
+the action is skipped and its outputs are restored from the cache.
+"""
+
+import os
+import json
+import time
+import inspect
+import hashlib
+import tempfile
+
+import mhy.protostar.constants as const
+
+
+__all__ = ['ActionResultCache', 'get_cache', 'set_cache']
+
+
+# Set this environment variable to change the default cache location
+CACHE_ENV_VAR = 'PROTOSTAR_CACHE_PATH'
+
+CACHE_EXT = '.json'
+
+# parameters that don't affect the execution result
+_SKIPPED_PARAMS = (const.SELF_PARAM_NAME, const.EXEC_PARAM_NAME, 'break_point')
+# graph data keys that don't affect the execution result
+_SKIPPED_GRAPH_KEYS = ('ui_data', 'ui_color', 'ui_icon', 'doc', 'tags')
+
+
+def _default_cache_path():
+    """Returns the default cache directory."""
+    path = os.environ.get(CACHE_ENV_VAR)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), 'protostar_cache')
+    return path
+
+
+def _json_default(obj):
+    """Serializes protostar objects by name, rejects everything else."""
+    if hasattr(obj, 'long_name'):
+        return obj.long_name
+    raise TypeError('{} is not serializable.'.format(obj))
+
+
+def _strip_graph_data(data):
+    """Removes UI-only entries from serialized graph data."""
+    data = dict((k, v) for k, v in data.items()
+                if k not in _SKIPPED_GRAPH_KEYS)
+    if 'objects' in data:
+        data['objects'] = [_strip_graph_data(x) for x in data['objects']]
+    return data
+
+
+def _to_json(data):
+    """Serializes data into a stable json string, or None on failure."""
+    try:
+        return json.dumps(data, sort_keys=True, default=_json_default)
+    except (TypeError, ValueError):
+        return
+
+
+class ActionResultCache(object):
+    """A disk cache of action output values keyed by execution fingerprints.
+
+    Actions can opt out by setting the class attribute ``_CACHEABLE``
+    to False.
+    """
+
+    def __init__(
+            self, path=None,
+            max_size=const.RESULT_CACHE_MAX_SIZE,
+            max_age=const.RESULT_CACHE_MAX_AGE):
+        """Initializes a new result cache object.
+
+        Args:
+            path (str): The cache directory. If None, use the path in
+                the environment variable "PROTOSTAR_CACHE_PATH", or
+                a folder in the temp directory.
+            max_size (int): The max total cache size in bytes used by
+                ``evict()``. If None, no size limit.
+            max_age (float): The max age in seconds of unused cache
+                entries used by ``evict()``. If None, no age limit.
+        """
+        self.__path = path if path else _default_cache_path()
+        self.max_size = max_size
+        self.max_age = max_age
+        # source file hash cache as (path : ((mtime, size), hash))
+        self.__source_hashes = {}
+        self.__hits = []
+        self.__misses = []
+
+    def __repr__(self):
+        return 'ActionResultCache ({})'.format(self.__path)
+
+    __str__ = __repr__
+
+    @property
+    def path(self):
+        """The cache directory.
+
+        :type: str
+        """
+        return self.__path
+
+    @property
+    def hits(self):
+        """A list of long names of the actions restored from the cache
+        since the last ``reset_stats()`` call.
+
+        :type: list
+        """
+        return list(self.__hits)
+
+    @property
+    def misses(self):
+        """A list of long names of the cacheable actions that are
+        executed since the last ``reset_stats()`` call.
+
+        :type: list
+        """
+        return list(self.__misses)
+
+    def reset_stats(self):
+        """Resets the cache hit/miss records."""
+        self.__hits = []
+        self.__misses = []
+
+    def report(self):
+        """Returns a cache hit/miss summary string."""
+        count = len(self.__hits) + len(self.__misses)
+        rate = 100.0 * len(self.__hits) / count if count else 0.0
+        return ('Result cache: {} hit(s), {} miss(es) '
+                '({:.1f}% hit rate)').format(
+                    len(self.__hits), len(self.__misses), rate)
+
+    # --- fingerprints
+
+    def is_cacheable(self, obj):
+        """Checks if an object's results can be cached.
+
+        Args:
+            obj (Action or ActionGraph): The object to check.
+
+        Returns:
+            bool
+        """
+        return not obj.is_graph and getattr(obj, '_CACHEABLE', False)
+
+    def __get_source_hash(self, obj):
+        """Returns a hash of the source file of an object's class."""
+        try:
+            path = inspect.getfile(obj.__class__)
+        except TypeError:
+            return ''
+        if path.endswith(('.pyc', '.pyo')):
+            path = path[:-1]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ''
+
+        key = (stat.st_mtime, stat.st_size)
+        cached = self.__source_hashes.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+        self.__source_hashes[path] = (key, source_hash)
+        return source_hash
+
+    def fingerprint(
+            self, obj, exec_name='main',
+            upstream=None, args=None, kwargs=None, skipped=False):
+        """Returns the execution fingerprint of an object.
+
+        Args:
+            obj (Action or ActionGraph): The object to fingerprint.
+            exec_name (str): The execution name.
+            upstream (list): The fingerprints of the upstream objects.
+            args (tuple): Execution arguments.
+            kwargs (dict): Execution keyword arguments.
+            skipped (bool): If True, the object is not executed,
+                e.g. it is disabled. Its fingerprint never matches
+                the fingerprint of an executed object.
+
+        Returns:
+            str or None: The fingerprint, or None if it can't be computed,
+                e.g. if an input value is not serializable.
+        """
+        upstream = upstream if upstream else []
+        if None in upstream:
+            return
+
+        data = {
+            'type': obj.type_name,
+            'exec_name': exec_name,
+            'upstream': list(upstream),
+            'args': list(args) if args else [],
+            'kwargs': kwargs if kwargs else {}}
+        if skipped:
+            data['skipped'] = True
+
+        if obj.is_graph:
+            # for graphs, use the whole graph data
+            data['graph'] = _strip_graph_data(obj._get_data())
+        else:
+            data['source'] = self.__get_source_hash(obj)
+            data['params'] = params = {}
+            for param in obj.iter_params(output=False):
+                if param.name in _SKIPPED_PARAMS or \
+                   param.param_type in ('message', 'callback'):
+                    continue
+                params[param.name] = param.value
+
+        data = _to_json(data)
+        if data is None:
+            return
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    # --- cache entries
+
+    def __entry_path(self, fingerprint):
+        """Returns the cache file path of a fingerprint."""
+        return os.path.join(
+            self.__path, fingerprint[:2], fingerprint + CACHE_EXT)
+
+    def load(self, obj, fingerprint, exec_name='main'):
+        """Restores an object's output values from the cache.
+
+        On success, the object's status is set to success.
+
+        Args:
+            obj (Action): The action to restore.
+            fingerprint (str): The execution fingerprint.
+            exec_name (str): The execution name.
+
+        Returns:
+            bool: True if the cache is hit.
+        """
+        if not self.is_cacheable(obj):
+            return False
+        if not fingerprint:
+            self.__misses.append(obj.long_name)
+            return False
+
+        path = self.__entry_path(fingerprint)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            self.__misses.append(obj.long_name)
+            return False
+
+        obj.reset_status(exec_name)
+        try:
+            for name, value in data['outputs'].items():
+                obj.param(name).value = value
+        except BaseException:
+            # the output params may have changed, treat it as a miss
+            obj.reset_status(exec_name)
+            self.__misses.append(obj.long_name)
+            return False
+
+        # touch the entry for age-based eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        obj.set_status(const.ExecStatus.kSuccess, exec_name=exec_name)
+        self.__hits.append(obj.long_name)
+        return True
+
+    def save(self, obj, fingerprint):
+        """Saves an object's output values into the cache.
+
+        Args:
+            obj (Action): The action to save.
+            fingerprint (str): The execution fingerprint.
+
+        Returns:
+            bool: False if the outputs are not serializable, or
+                the cache file can't be written.
+        """
+        if not fingerprint or not self.is_cacheable(obj):
+            return False
+
+        outputs = {}
+        for param in obj.iter_params(input_=False, output=True):
+            if param.param_type != 'message':
+                outputs[param.name] = param.value
+        data = _to_json({
+            'type': obj.type_name,
+            'name': obj.long_name,
+            'outputs': outputs})
+        if data is None:
+            return False
+
+        path = self.__entry_path(fingerprint)
+        folder = os.path.dirname(path)
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            # write to a temp file first so readers never see a partial file
+            tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            if os.path.isfile(path):
+                os.remove(path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            obj.warn('Failed writing result cache {}: {}'.format(path, e))
+            return False
+        return True
+
+    def __iter_entries(self):
+        """Yields (path, size, mtime) of all cache entries."""
+        if not os.path.isdir(self.__path):
+            return
+        for root, _, files in os.walk(self.__path):
+            for name in files:
+                if not name.endswith(CACHE_EXT):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def get_size(self):
+        """Returns the total size of all cache entries in bytes."""
+        return sum([size for _, size, _ in self.__iter_entries()])
+
+    def evict(self, max_size=None, max_age=None):
+        """Removes cache entries by age and size.
+
+        Entries not used for longer than max_age are removed first.
+        Then the least recently used entries are removed until the
+        total size is under max_size.
+
+        Args:
+            max_size (int): The max total size in bytes.
+                If None, use self.max_size.
+            max_age (float): The max age in seconds.
+                If None, use self.max_age.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        max_age = self.max_age if max_age is None else max_age
+
+        entries = sorted(self.__iter_entries(), key=lambda x: x[2])
+        now = time.time()
+        total = sum([x[1] for x in entries])
+        removed = 0
+        for path, size, mtime in entries:
+            too_old = max_age is not None and now - mtime > max_age
+            too_big = max_size is not None and total > max_size
+            if not too_old and not too_big:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Removes all cache entries.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        return self.evict(max_size=0)
+
+
+_CACHE = None
+
+
+def get_cache():
+    """Returns the result cache used by incremental graph executions.
+
+    Returns:
+        ActionResultCache
+    """
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ActionResultCache()
+    return _CACHE
+
+
+def set_cache(cache):
+    """Sets the result cache used by incremental graph executions.
+
+    Args:
+        cache (ActionResultCache or None): The cache to use.
+            If None, a default cache will be created on demand.
+
+    Returns:
+        None
+    """
+    global _CACHE
+    _CACHE = cache
@@ -0,0 +1,453 @@
+"""
+The execution tracer used to profile action and graph executions.
+
+When tracing is on, each action execution, graph execution and
+graph iteration is recorded as a span with:
+
+    + The wall time and the CPU time of the executing thread.
+    + The time spent evaluating parameter scripts within the span.
+    + Optionally, the memory delta (process RSS if ``psutil`` is
+      available, otherwise memory allocated by Python).
+
+Traces can be exported as Chrome trace-event JSON (open it in
+``chrome://tracing`` or https://ui.perfetto.dev), or summarized as
+a list of the slowest actions.
+
+Usage:
+
+.. code:: python
+
+    import mhy.protostar.core.tracer as trc
+
+    with trc.tracing() as tracer:
+        graph.execute()
+    tracer.write_chrome_trace('/tmp/build_trace.json')
+    print(tracer.report(count=10))
+
+When tracing is off, the only overhead is a global variable check
+per execution.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+__all__ = [
+    'ExecTracer', 'TraceSpan', 'get_tracer',
+    'start_tracing', 'stop_tracing', 'tracing']
+
+
+if hasattr(time, 'perf_counter'):
+    _wall_time = time.perf_counter
+else:
+    _wall_time = time.time
+
+if hasattr(time, 'thread_time'):
+    _cpu_time = time.thread_time
+elif hasattr(time, 'process_time'):
+    _cpu_time = time.process_time
+else:
+    _cpu_time = time.clock
+
+
+class TraceSpan(object):
+    """A recorded execution span."""
+
+    __slots__ = (
+        'name', 'category', 'type_name', 'exec_name', 'iteration',
+        'thread_id', 'depth', 'start', 'end', 'cpu', 'script',
+        'memory', 'status', '_cpu_start', '_mem_start')
+
+    def __init__(
+            self, name, category, type_name, exec_name,
+            iteration, thread_id, depth):
+        self.name = name
+        self.category = category
+        self.type_name = type_name
+        self.exec_name = exec_name
+        self.iteration = iteration
+        self.thread_id = thread_id
+        self.depth = depth
+        self.start = 0.0
+        self.end = None
+        self.cpu = 0.0
+        self.script = 0.0
+        self.memory = None
+        self.status = None
+        self._cpu_start = 0.0
+        self._mem_start = None
+
+    def __repr__(self):
+        return 'TraceSpan ({} {}: {:.3f}s)'.format(
+            self.category, self.name, self.wall)
+
+    __str__ = __repr__
+
+    @property
+    def wall(self):
+        """The wall time in seconds.
+
+        :type: float
+        """
+        if self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+class ExecTracer(object):
+    """Records execution spans of actions and graphs.
+
+    Spans are recorded per thread, so actions running on worker threads
+    in concurrent executions are traced as well.
+    """
+
+    def __init__(self, memory=False):
+        """Initializes a new tracer object.
+
+        Args:
+            memory (bool): If True, record the memory delta of each span.
+        """
+        self.__memory = memory
+        self.__started_tracemalloc = False
+        self.__spans = []
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__origin = _wall_time()
+
+    def __repr__(self):
+        return 'ExecTracer ({} spans)'.format(len(self.__spans))
+
+    __str__ = __repr__
+
+    @property
+    def spans(self):
+        """A list of recorded spans in start order.
+
+        :type: list
+        """
+        return sorted(self.__spans, key=lambda x: x.start)
+
+    @property
+    def memory(self):
+        """If True, the memory delta of each span is recorded.
+
+        :type: bool
+        """
+        return self.__memory
+
+    def clear(self):
+        """Clears all recorded spans."""
+        with self.__lock:
+            self.__spans = []
+        self.__origin = _wall_time()
+
+    # --- recording
+
+    def _start(self):
+        """Prepares memory tracking."""
+        if self.__memory and psutil is None and tracemalloc and \
+           not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+
+    def _stop(self):
+        """Stops memory tracking started by this tracer."""
+        if self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+
+    def __get_memory(self):
+        """Returns the current memory usage in bytes, or None."""
+        if psutil is not None:
+            return psutil.Process(os.getpid()).memory_info().rss
+        elif tracemalloc and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+
+    def __get_stack(self):
+        """Returns the open span stack of the current thread."""
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = []
+            self.__local.script_depth = 0
+        return stack
+
+    def begin(self, obj, exec_name='main', category=None, iteration=None):
+        """Opens a new span for an object on the current thread.
+
+        Args:
+            obj (Action or ActionGraph): The object being executed.
+            exec_name (str): The execution name.
+            category (str): The span category. If None, use "graph"
+                or "action" depending on the object type.
+            iteration (int): The graph iteration index. If None, use
+                the iteration of the enclosing span.
+
+        Returns:
+            TraceSpan: The new span.
+        """
+        stack = self.__get_stack()
+        if category is None:
+            category = 'graph' if obj.is_graph else 'action'
+        if iteration is None and stack:
+            iteration = stack[-1].iteration
+        span = TraceSpan(
+            obj.long_name, category, obj.type_name, exec_name,
+            iteration, threading.current_thread().ident, len(stack))
+        if self.__memory:
+            span._mem_start = self.__get_memory()
+        stack.append(span)
+        span._cpu_start = _cpu_time()
+        span.start = _wall_time()
+        return span
+
+    def end(self, span, status=None):
+        """Closes a span, as well as any span opened after it on
+        the same thread.
+
+        Args:
+            span (TraceSpan): The span to close.
+            status (ExecStatus or None): The final status.
+
+        Returns:
+            None
+        """
+        end = _wall_time()
+        cpu_end = _cpu_time()
+        stack = self.__get_stack()
+        if span not in stack:
+            return
+        while stack:
+            each = stack.pop()
+            each.end = end
+            each.cpu = cpu_end - each._cpu_start
+            if each is span:
+                each.status = status
+            if each._mem_start is not None:
+                memory = self.__get_memory()
+                if memory is not None:
+                    each.memory = memory - each._mem_start
+            with self.__lock:
+                self.__spans.append(each)
+            if each is span:
+                break
+
+    def begin_iteration(self, graph, exec_name, iteration):
+        """Opens a span for a graph iteration, closing the previous
+        iteration span of the same graph.
+
+        Args:
+            graph (ActionGraph): The graph being executed.
+            exec_name (str): The execution name.
+            iteration (int): The iteration index.
+
+        Returns:
+            TraceSpan: The new span.
+        """
+        stack = self.__get_stack()
+        name = graph.long_name
+        if stack and stack[-1].category == 'iteration' and \
+           stack[-1].name == name:
+            self.end(stack[-1])
+        return self.begin(
+            graph, exec_name, category='iteration', iteration=iteration)
+
+    def begin_script(self):
+        """Marks the start of a script evaluation on the current thread.
+
+        Returns:
+            float or None: A start time token to pass to ``end_script()``,
+                None for nested evaluations.
+        """
+        self.__get_stack()
+        local = self.__local
+        local.script_depth += 1
+        if local.script_depth == 1:
+            return _wall_time()
+
+    def end_script(self, token):
+        """Marks the end of a script evaluation on the current thread,
+        and adds its duration to the innermost open span.
+
+        Args:
+            token (float or None): The token returned by ``begin_script()``.
+
+        Returns:
+            None
+        """
+        stack = self.__get_stack()
+        self.__local.script_depth -= 1
+        if token is not None and stack:
+            stack[-1].script += _wall_time() - token
+
+    # --- export
+
+    def to_chrome_trace(self):
+        """Returns the recorded spans as Chrome trace-event data.
+
+        Returns:
+            dict
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = {
+                'type': span.type_name,
+                'exec_name': span.exec_name,
+                'cpu_ms': span.cpu * 1000.0,
+                'script_ms': span.script * 1000.0}
+            if span.iteration is not None:
+                args['iteration'] = span.iteration
+            if span.memory is not None:
+                args['memory'] = span.memory
+            if span.status is not None:
+                args['status'] = int(span.status)
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self.__origin) * 1e6,
+                'dur': span.wall * 1e6,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        """Writes the recorded spans to a Chrome trace-event JSON file.
+
+        Args:
+            path (str): The output file path.
+
+        Returns:
+            None
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def get_top_spans(self, count=10, key='wall', category='action'):
+        """Returns the slowest spans.
+
+        Args:
+            count (int): The max number of spans to return.
+                If None, return all spans.
+            key (str): The sorting key: "wall", "cpu", "script"
+                or "memory".
+            category (str): Only return spans in this category
+                ("action", "graph" or "iteration"). If None,
+                return spans in all categories.
+
+        Returns:
+            list: A list of TraceSpan objects, slowest first.
+        """
+        spans = [x for x in self.__spans
+                 if category is None or x.category == category]
+        spans.sort(key=lambda x: getattr(x, key) or 0, reverse=True)
+        return spans if count is None else spans[:count]
+
+    def report(self, count=10, key='wall', category='action'):
+        """Returns a summary string of the slowest spans.
+
+        Args:
+            count (int): The max number of spans to list.
+            key (str): The sorting key. See ``get_top_spans()``.
+            category (str): The span category. See ``get_top_spans()``.
+
+        Returns:
+            str
+        """
+        spans = self.get_top_spans(count=count, key=key, category=category)
+        lines = ['Top {} {} spans by {}:'.format(
+            len(spans), category if category else 'all', key)]
+        lines.append('{:>10} {:>10} {:>10} {:>10}  {}'.format(
+            'wall(ms)', 'cpu(ms)', 'script(ms)', 'mem(KB)', 'name'))
+        for span in spans:
+            name = span.name
+            if span.exec_name != 'main':
+                name += '.' + span.exec_name
+            if span.iteration is not None:
+                name += ' [{}]'.format(span.iteration)
+            memory = '-' if span.memory is None else \
+                '{:.1f}'.format(span.memory / 1024.0)
+            lines.append('{:>10.2f} {:>10.2f} {:>10.2f} {:>10}  {}'.format(
+                span.wall * 1000.0, span.cpu * 1000.0,
+                span.script * 1000.0, memory, name))
+        return '\n'.join(lines)
+
+
+# the active tracer. None if tracing is off.
+_TRACER = None
+
+
+def get_tracer():
+    """Returns the active tracer, or None if tracing is off.
+
+    Returns:
+        ExecTracer or None
+    """
+    return _TRACER
+
+
+def start_tracing(memory=False, tracer=None):
+    """Starts tracing executions.
+
+    Args:
+        memory (bool): If True, record the memory delta of each span.
+        tracer (ExecTracer): A tracer to use. If None, create a new one.
+
+    Returns:
+        ExecTracer: The active tracer.
+    """
+    global _TRACER
+    if _TRACER is not None:
+        _TRACER._stop()
+    _TRACER = tracer if tracer else ExecTracer(memory=memory)
+    _TRACER._start()
+    return _TRACER
+
+
+def stop_tracing():
+    """Stops tracing executions.
+
+    Returns:
+        ExecTracer or None: The tracer that was active.
+    """
+    global _TRACER
+    tracer = _TRACER
+    _TRACER = None
+    if tracer is not None:
+        tracer._stop()
+    return tracer
+
+
+@contextmanager
+def tracing(memory=False):
+    """A context manager that traces executions within its scope.
+
+    Args:
+        memory (bool): If True, record the memory delta of each span.
+
+    Yields:
+        ExecTracer: The active tracer.
+    """
+    tracer = start_tracing(memory=memory)
+    try:
+        yield tracer
+    finally:
+        if _TRACER is tracer:
+            stop_tracing()
@@ -17,6 +17,7 @@ import mhy.protostar.core.graph as ag
 import mhy.protostar.core.exception as exp
 import mhy.protostar.constants as const
 import mhy.protostar.utils as util
+import mhy.protostar.lib_index as li
 
 
 __all__ = ['ActionLibrary']
@@ -64,12 +65,16 @@ class ActionLibrary(object):
     _MODULE_SET = set()
     _TAG_LIST = []
     _ICON_DICT = {}
+    # persistent library indices as (lib path : LibraryIndex)
+    _INDEX_DICT = {}
 
     @classmethod
     def refresh(cls, verbose=False):
         """Refreshes the action library by going through each userlib path
         registered in environment variable ``PROTOSTAR_LIB_PATH``,
-        then reload and cache action classes and action graph paths
+        then re-index action classes and cache action graph paths.
+
+        Action modules are not imported until an action is requested.
 
         Returns: None
         """
@@ -104,9 +109,13 @@ class ActionLibrary(object):
 
     @classmethod
     def process_lib_path(cls, lib_path, verbose=False):
-        """Processes content in a given library path and load all
+        """Processes content in a given library path and index all
         contained actions and action graphs into the Action Library.
 
+        Action modules are scanned statically and cached in a persistent
+        index, only new or changed modules are re-scanned. Modules that
+        can't be indexed statically are imported right away.
+
         Args:
             lib_path (string): A library path to register.
             verbose (bool): If True, print details of each action/graph loaded.
@@ -142,39 +151,36 @@ class ActionLibrary(object):
         if os.path.isdir(root):
             paths = []
             _get_files(root, 'py', paths)
-            for module_path in paths:
-                if module_path.endswith('__init__.py'):
-                    continue
-
-                try:
-                    with tryimp.tryimport():
-                        module = compat.import_module_from_path(module_path)
-                except BaseException:
-                    logger.warn(
-                        'Failed loading action module: {}'.format(module_path),
-                        format_='[Protostar] [WARN]: %(message)s')
-                    traceback.print_exc()
-                    continue
-
-                # cache action classes
-                cls._MODULE_SET.add(module.__name__)
-                for cname, action_cls in inspect.getmembers(
-                        module, inspect.isclass):
-                    if not inspect.isabstract(action_cls) and \
-                       issubclass(action_cls, act.Action) and \
-                       action_cls.__module__ == module.__name__:
-                        action_cls._SOURCE = '{}:{}'.format(team_name, cname)
-                        action_cls._UI_ICON_PATH = cls.get_icon_path(
-                            action_cls, action_cls.__name__)
-                        cls._ACTION_DICT[team_name][cname] = action_cls
-                        cls._TAG_LIST += action_cls.tags
-
-                        if verbose:
-                            logger.info(
-                                'Action loaded: {}:{} ({})'.format(
-                                    team_name, cname, module_path),
-                                format_='[Protostar]: %(message)s')
-                        action_count += 1
+            paths = [x for x in paths if not x.endswith('__init__.py')]
+
+            # index action classes without importing them
+            index = cls._INDEX_DICT.get(lib_path)
+            if not index:
+                index = li.LibraryIndex(lib_path)
+                cls._INDEX_DICT[lib_path] = index
+            actions, unresolved = index.update(paths)
+            index.save()
+
+            for module_path, data in actions:
+                info = li.ActionInfo(module_path, data)
+                cls._register_action(team_name, info)
+                if verbose:
+                    logger.info(
+                        'Action indexed: {}:{} ({})'.format(
+                            team_name, info.__name__, module_path),
+                        format_='[Protostar]: %(message)s')
+                action_count += 1
+
+            # modules that can't be indexed are imported right away
+            for module_path in unresolved:
+                names = cls._load_module(team_name, module_path)
+                if verbose:
+                    for name in names:
+                        logger.info(
+                            'Action loaded: {}:{} ({})'.format(
+                                team_name, name, module_path),
+                            format_='[Protostar]: %(message)s')
+                action_count += len(names)
 
         # cache action graphs
         root = os.path.join(lib_path, 'graphs')
@@ -202,6 +208,54 @@ class ActionLibrary(object):
             'Loaded {} actions and {} action graphs from {}.'.format(
                 action_count, graph_count, lib_path))
 
+    @classmethod
+    def _register_action(cls, team_name, action_cls):
+        """Registers an action class or an ActionInfo object.
+        The class metadata of action classes is built here."""
+        name = action_cls.__name__
+        if not isinstance(action_cls, li.ActionInfo):
+            action_cls._get_meta()
+        action_cls._SOURCE = '{}:{}'.format(team_name, name)
+        action_cls._UI_ICON_PATH = cls.get_icon_path(action_cls, name)
+        cls._ACTION_DICT[team_name][name] = action_cls
+        cls._TAG_LIST = sorted(set(cls._TAG_LIST) | set(action_cls.tags))
+
+    @classmethod
+    def _load_module(cls, team_name, module_path):
+        """Imports an action module and registers its action classes.
+
+        Indexed entries from this module are replaced by the actual
+        classes, or removed if they turn out not to be actions.
+
+        Returns:
+            list: The names of the registered actions.
+        """
+        try:
+            with tryimp.tryimport():
+                module = compat.import_module_from_path(module_path)
+        except BaseException:
+            logger.warn(
+                'Failed loading action module: {}'.format(module_path),
+                format_='[Protostar] [WARN]: %(message)s')
+            traceback.print_exc()
+            return []
+
+        team_lib = cls._ACTION_DICT.setdefault(team_name, {})
+        for name, action_cls in list(team_lib.items()):
+            if isinstance(action_cls, li.ActionInfo) and \
+               action_cls.module_path == module_path:
+                del team_lib[name]
+
+        cls._MODULE_SET.add(module.__name__)
+        names = []
+        for cname, action_cls in inspect.getmembers(module, inspect.isclass):
+            if not inspect.isabstract(action_cls) and \
+               issubclass(action_cls, act.Action) and \
+               action_cls.__module__ == module.__name__:
+                cls._register_action(team_name, action_cls)
+                names.append(cname)
+        return names
+
     @classmethod
     def process_icon_path(cls, icon_path):
         """Processes content in a given icon path and caches all
@@ -418,12 +472,54 @@ class ActionLibrary(object):
         Returns:
             Action: The action class found.
         """
+        team, action_cls = cls._find_action(
+            source, team, app, tag, name_match_str)
+        if isinstance(action_cls, li.ActionInfo):
+            cls._load_module(team, action_cls.module_path)
+            action_cls = cls._ACTION_DICT[team].get(action_cls.__name__)
+            if action_cls is None or \
+               isinstance(action_cls, li.ActionInfo):
+                raise exp.ActionError(
+                    'Failed loading action: {}'.format(source))
+        return action_cls
+
+    @classmethod
+    def get_action_info(
+            cls, source, team=None, app=None, tag=None, name_match_str=None):
+        """Returns an action class registered in the library, or an
+        ActionInfo object if the action module is not imported yet.
+
+        Use this instead of ``get_action()`` to query action properties
+        (doc, tags, icon, parameters, etc.) without importing the module.
+
+        Args:
+            source (string): Source name of an action in the library.
+            team (None or string): If specified, only search under this team.
+            app (None or string):
+                If specified, only iterate objects compatible with this app/DCC.
+            tags (None or str or list):
+                If specified, only iterate objects associated with the tag(s).
+            name_match_str (None or str):
+                If specified, only iterate objects match the search string
+                (wild card ok).
+
+        Raises:
+            ActionError: If requested action doesn't exist in the library.
+
+        Returns:
+            Action or ActionInfo: The action class or info object found.
+        """
+        return cls._find_action(source, team, app, tag, name_match_str)[1]
+
+    @classmethod
+    def _find_action(cls, source, team, app, tag, name_match_str):
+        """Returns the (team, action class or ActionInfo) found."""
         action_name, teams = cls._resolve_args(source, team)
         for team in teams:
             action_cls = cls._ACTION_DICT[team].get(action_name)
             if action_cls:
                 if _action_filer(action_cls, app, tag, name_match_str):
-                    return action_cls
+                    return team, action_cls
         raise exp.ActionError('Action not found: {}'.format(action_name))
 
     @classmethod
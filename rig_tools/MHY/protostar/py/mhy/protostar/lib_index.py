@@ -0,0 +1,702 @@
+"""
+A persistent, statically scanned index of the actions in a library path.
+
+Listing the library used to import every action module, which pulls in
+heavy DCC modules at start-up. Instead, each module is parsed with
+``ast`` and the following are recorded for each action class,
+without running any user code:
+
+    + The class name, source module and docstring.
+    + The app, tags, ui icon and ui color.
+    + The static parameter names, types, docs and literal defaults.
+
+Base classes are resolved statically across modules in ``sys.path``,
+or from the live class if the base module is already imported.
+
+The scan results are saved to an index file keyed on each source file's
+mtime and size, so only changed files are re-scanned on refresh.
+Modules that can't be resolved statically (e.g. a dynamic base class or
+a non-literal ``_TAGS``) are reported so the caller can import them.
+"""
+
+import os
+import sys
+import ast
+import json
+import inspect
+import hashlib
+import tempfile
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+import mhy.protostar.core.action as act
+import mhy.protostar.core.parameter as pa
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.constants as const
+import mhy.protostar.utils as util
+
+
+__all__ = ['ActionInfo', 'LibraryIndex', 'scan_module']
+
+
+# Set this environment variable to change the default index location
+INDEX_ENV_VAR = 'PROTOSTAR_INDEX_PATH'
+
+# bump this when the scan data format changes
+INDEX_VERSION = 1
+
+# class attributes recorded by the index
+_ATTR_NAMES = ('_APP', '_TAGS', '_UI_ICON', '_UI_COLOR')
+
+_FUNC_TYPES = tuple(
+    getattr(ast, x) for x in ('FunctionDef', 'AsyncFunctionDef')
+    if hasattr(ast, x))
+_BLOCK_TYPES = tuple(
+    getattr(ast, x) for x in ('If', 'Try', 'TryExcept', 'TryFinally')
+    if hasattr(ast, x))
+
+
+def _default_index_path():
+    """Returns the default index directory."""
+    path = os.environ.get(INDEX_ENV_VAR)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), 'protostar_index')
+    return path
+
+
+def _stat(path):
+    """Returns [mtime, size] of a file, or None if not found."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    return [stat.st_mtime, stat.st_size]
+
+
+def _dotted_name(node):
+    """Returns the dotted name of a Name/Attribute node, or None."""
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        value = _dotted_name(node.value)
+        if value:
+            return value + '.' + node.attr
+
+
+def _literal(node):
+    """Evaluates a literal node into a json value.
+
+    Returns:
+        tuple: (success, value)
+    """
+    try:
+        value = ast.literal_eval(node)
+        if isinstance(value, (tuple, set, frozenset)):
+            value = list(value)
+        json.dumps(value)
+    except (ValueError, TypeError, SyntaxError):
+        return False, None
+    return True, value
+
+
+def _iter_statements(body):
+    """Yields module-level statements, including those nested
+    in if/try blocks."""
+    for node in body:
+        yield node
+        if isinstance(node, _BLOCK_TYPES):
+            for attr in ('body', 'orelse', 'finalbody'):
+                for each in _iter_statements(getattr(node, attr, [])):
+                    yield each
+            for handler in getattr(node, 'handlers', []):
+                for each in _iter_statements(handler.body):
+                    yield each
+
+
+def _scan_class(node):
+    """Scans a class definition node."""
+    data = {
+        'name': node.name,
+        'lineno': node.lineno,
+        'bases': [_dotted_name(x) for x in node.bases],
+        'doc': ast.get_docstring(node),
+        'attrs': {},
+        'dynamic': False,
+        'defined': [],
+        'abstract': [],
+        'params': []}
+
+    for item in node.body:
+        if isinstance(item, _FUNC_TYPES):
+            decorators = [
+                x.func if isinstance(x, ast.Call) else x
+                for x in item.decorator_list]
+            names = [(_dotted_name(x) or '').split('.')[-1]
+                     for x in decorators]
+            if [x for x in names if x.startswith('abstract')]:
+                data['abstract'].append(item.name)
+            else:
+                data['defined'].append(item.name)
+
+            # static parameters
+            for dec in item.decorator_list:
+                if not isinstance(dec, ast.Call):
+                    continue
+                type_name = (_dotted_name(dec.func) or '').split('.')[-1]
+                if not type_name.endswith('_param'):
+                    continue
+                param_cls = getattr(pa, type_name, None)
+                if inspect.isclass(param_cls) and \
+                   issubclass(param_cls, pb.base_parameter):
+                    type_name = param_cls._TYPE_STR
+                else:
+                    type_name = type_name[:-6]
+                param = {
+                    'name': item.name,
+                    'type': type_name,
+                    'doc': ast.get_docstring(item),
+                    'output': False}
+                for kw in dec.keywords:
+                    if kw.arg in ('output', 'default'):
+                        success, value = _literal(kw.value)
+                        if success:
+                            param[kw.arg] = value
+                data['params'].append(param)
+
+        elif isinstance(item, ast.Assign):
+            for target in item.targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                data['defined'].append(target.id)
+                if target.id in _ATTR_NAMES:
+                    success, value = _literal(item.value)
+                    if success:
+                        data['attrs'][target.id] = value
+                    else:
+                        data['dynamic'] = True
+
+        elif isinstance(item, ast.ClassDef):
+            data['defined'].append(item.name)
+
+    return data
+
+
+def scan_module(path):
+    """Statically scans a python module file.
+
+    Args:
+        path (str): The python module file path.
+
+    Returns:
+        dict: The scan data with keys:
+            + "imports": a dict of (local name : import target).
+              Relative targets start with dots.
+            + "classes": a dict of (class name : class data).
+            + "error": an error string if the file failed to parse.
+    """
+    data = {'imports': {}, 'classes': {}, 'error': None}
+    try:
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), path)
+    except BaseException as e:
+        data['error'] = str(e)
+        return data
+
+    for node in _iter_statements(tree.body):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    data['imports'][alias.asname] = alias.name
+                else:
+                    head = alias.name.split('.')[0]
+                    data['imports'][head] = head
+        elif isinstance(node, ast.ImportFrom):
+            prefix = '.' * (node.level or 0)
+            if node.module:
+                prefix += node.module + '.'
+            for alias in node.names:
+                if alias.name == '*':
+                    continue
+                name = alias.asname if alias.asname else alias.name
+                data['imports'][name] = prefix + alias.name
+        elif isinstance(node, ast.ClassDef):
+            data['classes'][node.name] = _scan_class(node)
+    return data
+
+
+def _live_info(obj):
+    """Returns resolved class info from a live object, or None."""
+    if not inspect.isclass(obj):
+        return
+    info = {
+        'is_action': issubclass(obj, act.Action),
+        'abstract': set(getattr(obj, '__abstractmethods__', ())),
+        'attrs': {},
+        'params': [],
+        'dynamic': False}
+    if not info['is_action']:
+        return info
+
+    for attr in _ATTR_NAMES:
+        value = getattr(obj, attr, None)
+        if isinstance(value, tuple):
+            value = list(value)
+        info['attrs'][attr] = value
+
+    params = []
+    for name in dir(obj):
+        param = getattr(obj, name)
+        if isinstance(param, pb.base_parameter):
+            params.append(param)
+    for param in sorted(params, key=lambda x: x.uuid):
+        data = {
+            'name': param.name,
+            'type': param.param_type,
+            'doc': param.doc,
+            'output': param.is_output}
+        if util.is_jsonable(param.default):
+            data['default'] = param.default
+        info['params'].append(data)
+    return info
+
+
+class ActionInfo(object):
+    """Stands in for an indexed action class until it is imported.
+
+    It exposes the same class-level properties used to list and
+    filter actions, so the library can be browsed without importing
+    any action module.
+    """
+
+    # These are handled by the factory class. Do NOT override.
+    _SOURCE = None
+    _UI_ICON_PATH = None
+
+    def __init__(self, module_path, data):
+        """Initializes a new action info object.
+
+        Args:
+            module_path (str): The source module path.
+            data (dict): The indexed class data.
+        """
+        self.__module_path = module_path
+        self.__data = data
+        self.__name__ = data['name']
+
+    def __repr__(self):
+        return 'ActionInfo ({})'.format(self.__name__)
+
+    __str__ = __repr__
+
+    @property
+    def module_path(self):
+        """The source module path.
+
+        :type: str
+        """
+        return self.__module_path
+
+    @property
+    def type_name(self):
+        """The type name of this action (including the team prefix).
+
+        :type: str
+        """
+        return self._SOURCE
+
+    @property
+    def app(self):
+        """The intented app/DCC name of this action.
+
+        :type: str
+        """
+        return self.__data.get('app')
+
+    @property
+    def tags(self):
+        """The tags associated with this action.
+
+        :type: list
+        """
+        tags = self.__data.get('tags') or []
+        if not isinstance(tags, list):
+            tags = [tags]
+        tags = set(tags)
+        tags.add(const.TAG_ACTION)
+        return tuple(sorted(list(tags)))
+
+    def has_tag(self, tags):
+        """Checks if a tag is associated with this action.
+
+        Args:
+            tag (str): A tag to check.
+
+        Returns:
+            bool
+        """
+        if not isinstance(tags, (list, tuple)):
+            tags = [tags]
+        return bool(set(tags) & set(self.tags))
+
+    @property
+    def doc(self):
+        """The formatted docstring.
+
+        :type: str
+        """
+        return util.format_doc(self.__data.get('doc'), indent=0, prefix='')
+
+    @property
+    def ui_color(self):
+        """The UI display color (RGB in 0 ~ 255 range).
+
+        :type: tuple
+        """
+        color = self.__data.get('ui_color')
+        if color:
+            return tuple(color)
+        return const.DEFAULT_ACTION_UI_COLOR
+
+    @property
+    def ui_icon(self):
+        """The UI icon file name.
+
+        :type: str
+        """
+        return self.__data.get('ui_icon')
+
+    @property
+    def icon_path(self):
+        """The UI icon file path.
+
+        :type: str
+        """
+        if not self._UI_ICON_PATH:
+            return const.DEF_ACTION_ICON
+        return self._UI_ICON_PATH
+
+    @property
+    def params(self):
+        """A list of static parameter data, each is a dict with keys
+        "name", "type", "doc", "output" and optionally "default".
+
+        :type: list
+        """
+        return [dict(x) for x in self.__data.get('params', [])]
+
+
+class LibraryIndex(object):
+    """The persistent action index of a library path."""
+
+    def __init__(self, lib_path, index_path=None):
+        """Initializes a new library index object.
+
+        Args:
+            lib_path (str): The library path to index.
+            index_path (str): The index directory. If None, use the path
+                in the environment variable "PROTOSTAR_INDEX_PATH", or
+                a folder in the temp directory.
+        """
+        self.__lib_path = lib_path.replace('\\', '/')
+        index_path = index_path if index_path else _default_index_path()
+        key = hashlib.sha1(self.__lib_path.encode('utf-8')).hexdigest()
+        self.__file = os.path.join(index_path, key[:16] + '.json')
+
+        # scan cache as (path : {"stat": [mtime, size], "data": scan})
+        self.__scans = {}
+        self.__dirty = False
+        self.__loaded = False
+
+        # per-update caches
+        self.__checked = set()
+        self.__module_paths = {}
+        self.__resolved = {}
+        self.__scanned = []
+
+    def __repr__(self):
+        return 'LibraryIndex ({})'.format(self.__lib_path)
+
+    __str__ = __repr__
+
+    @property
+    def lib_path(self):
+        """The indexed library path.
+
+        :type: str
+        """
+        return self.__lib_path
+
+    @property
+    def file_path(self):
+        """The index file path.
+
+        :type: str
+        """
+        return self.__file
+
+    @property
+    def scanned(self):
+        """A list of module paths re-scanned in the last update.
+
+        :type: list
+        """
+        return list(self.__scanned)
+
+    # --- persistence
+
+    def load(self):
+        """Loads the index file, if it exists and is valid."""
+        self.__loaded = True
+        try:
+            with open(self.__file, 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if data.get('version') != INDEX_VERSION or \
+           data.get('lib_path') != self.__lib_path:
+            return
+        self.__scans = data.get('scans', {})
+
+    def save(self):
+        """Writes the index file if it has changed.
+
+        Returns:
+            bool: True if the file is written.
+        """
+        if not self.__dirty:
+            return False
+        data = {
+            'version': INDEX_VERSION,
+            'lib_path': self.__lib_path,
+            'scans': self.__scans}
+        folder = os.path.dirname(self.__file)
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            # write to a temp file first so readers never see a partial file
+            tmp_path = '{}.{}.tmp'.format(self.__file, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            if os.path.isfile(self.__file):
+                os.remove(self.__file)
+            os.rename(tmp_path, self.__file)
+        except (IOError, OSError):
+            return False
+        self.__dirty = False
+        return True
+
+    # --- scanning
+
+    def __get_scan(self, path):
+        """Returns the scan data of a file, re-scanning it if changed."""
+        entry = self.__scans.get(path)
+        if path not in self.__checked:
+            self.__checked.add(path)
+            stat = _stat(path)
+            if stat is None:
+                self.__scans.pop(path, None)
+                self.__dirty = self.__dirty or entry is not None
+                return
+            if not entry or entry['stat'] != stat:
+                entry = {'stat': stat, 'data': scan_module(path)}
+                self.__scans[path] = entry
+                self.__scanned.append(path)
+                self.__dirty = True
+        return entry['data'] if entry else None
+
+    def __find_module(self, parts):
+        """Finds the source file of an absolute module name."""
+        name = '.'.join(parts)
+        if name in self.__module_paths:
+            return self.__module_paths[name]
+        path = None
+        for root in sys.path:
+            if not isinstance(root, str):
+                continue
+            base = os.path.join(root or os.getcwd(), *parts)
+            for each in (base + '.py', os.path.join(base, '__init__.py')):
+                if os.path.isfile(each):
+                    path = each.replace('\\', '/')
+                    break
+            if path:
+                break
+        self.__module_paths[name] = path
+        return path
+
+    @staticmethod
+    def __find_relative_module(from_path, level, parts):
+        """Finds the source file of a relative module name."""
+        base = os.path.dirname(from_path)
+        for _ in range(level - 1):
+            base = os.path.dirname(base)
+        base = os.path.join(base, *parts)
+        candidates = [os.path.join(base, '__init__.py')]
+        if parts:
+            candidates.insert(0, base + '.py')
+        for each in candidates:
+            if os.path.isfile(each):
+                return each.replace('\\', '/')
+
+    def __resolve_target(self, target, from_path, seen):
+        """Resolves an import target into class info."""
+        stripped = target.lstrip('.')
+        level = len(target) - len(stripped)
+        parts = stripped.split('.')
+        for i in range(len(parts) - 1, -1, -1):
+            mod_parts, attrs = parts[:i], parts[i:]
+            if level:
+                mod_path = self.__find_relative_module(
+                    from_path, level, mod_parts)
+            else:
+                if not mod_parts:
+                    break
+                # prefer already imported modules
+                module = sys.modules.get('.'.join(mod_parts))
+                if module is not None:
+                    obj = module
+                    for attr in attrs:
+                        obj = getattr(obj, attr, None)
+                    return _live_info(obj)
+                mod_path = self.__find_module(mod_parts)
+            if mod_path:
+                return self.__resolve_name('.'.join(attrs), mod_path, seen)
+
+    def __resolve_name(self, name, from_path, seen):
+        """Resolves a (dotted) name in a module into class info."""
+        scan = self.__get_scan(from_path)
+        if not scan:
+            return
+        parts = name.split('.')
+        head, rest = parts[0], parts[1:]
+        if not rest and head in scan['classes']:
+            return self.__resolve_class(from_path, head, seen)
+        elif head in scan['imports']:
+            target = scan['imports'][head]
+            if rest:
+                target += '.' + '.'.join(rest)
+            return self.__resolve_target(target, from_path, seen)
+        elif not rest and hasattr(builtins, head):
+            return _live_info(getattr(builtins, head))
+
+    def __resolve_class(self, path, name, seen=None):
+        """Resolves a class defined in a module, merging in
+        the info inherited from its base classes.
+
+        Returns:
+            dict or None: The class info with keys "is_action"
+                (None if unknown), "abstract", "attrs", "params"
+                and "dynamic".
+        """
+        key = (path, name)
+        if key in self.__resolved:
+            return self.__resolved[key]
+        seen = set(seen) if seen else set()
+        if key in seen:
+            return
+        seen.add(key)
+
+        data = self.__get_scan(path)['classes'][name]
+        is_action = False
+        unknown = False
+        dynamic = data['dynamic']
+        abstract = set()
+        attrs = {}
+        params = []
+        # walk bases in reverse so the first base wins, like the MRO
+        for base in reversed(data['bases']):
+            info = self.__resolve_name(base, path, seen) if base else None
+            if info is None:
+                unknown = True
+                continue
+            if info['is_action'] is None:
+                unknown = True
+            is_action = is_action or bool(info['is_action'])
+            dynamic = dynamic or info['dynamic']
+            abstract |= info['abstract']
+            attrs.update(info['attrs'])
+            names = set([x['name'] for x in info['params']])
+            params = [x for x in params if x['name'] not in names]
+            params += info['params']
+
+        abstract -= set(data['defined'])
+        abstract |= set(data['abstract'])
+        attrs.update(data['attrs'])
+        names = set([x['name'] for x in data['params']])
+        params = [x for x in params if x['name'] not in names]
+        params += data['params']
+
+        info = {
+            'is_action': True if is_action else (None if unknown else False),
+            'abstract': abstract,
+            'attrs': attrs,
+            'params': params,
+            'dynamic': dynamic}
+        self.__resolved[key] = info
+        return info
+
+    def update(self, module_paths):
+        """Brings the index up to date with a list of action modules.
+        Only new or changed files are re-scanned.
+
+        Args:
+            module_paths (list): The action module paths in the library.
+
+        Returns:
+            tuple: (actions, unresolved)
+                + actions: a list of (module path, action data) tuples
+                  found in the modules that are fully resolved.
+                + unresolved: a list of module paths that can't be
+                  indexed statically, these need to be imported.
+        """
+        if not self.__loaded:
+            self.load()
+        self.__checked = set()
+        self.__module_paths = {}
+        self.__resolved = {}
+        self.__scanned = []
+
+        actions = []
+        unresolved = []
+        for path in module_paths:
+            path = path.replace('\\', '/')
+            scan = self.__get_scan(path)
+            if not scan or scan['error']:
+                unresolved.append(path)
+                continue
+
+            found = []
+            for name in sorted(
+                    scan['classes'],
+                    key=lambda x: scan['classes'][x]['lineno']):
+                info = self.__resolve_class(path, name)
+                if info is None or info['is_action'] is None or \
+                   info['dynamic']:
+                    found = None
+                    break
+                if not info['is_action'] or info['abstract']:
+                    continue
+                attrs = info['attrs']
+                found.append((path, {
+                    'name': name,
+                    'doc': scan['classes'][name]['doc'],
+                    'app': attrs.get('_APP'),
+                    'tags': attrs.get('_TAGS'),
+                    'ui_icon': attrs.get('_UI_ICON'),
+                    'ui_color': attrs.get('_UI_COLOR'),
+                    'params': info['params']}))
+
+            if found is None:
+                unresolved.append(path)
+            else:
+                actions += found
+
+        # drop files that are no longer used
+        for path in list(self.__scans.keys()):
+            if path not in self.__checked:
+                del self.__scans[path]
+                self.__dirty = True
+
+        return actions, unresolved
@@ -464,23 +464,29 @@ class GraphicScene(NodeGraphScene):
     def sync_ui_data(self):
         """
         This method will fetch ui data and cache it in each
-        item in the current scene
+        item in the current scene.
+        Only objects with changed ui data are updated, so that
+        journaled graphs only save these objects.
 
         """
         parameter_node_pos = {}
         for item in self.items():
             if item.type_name == 'node':
-                item.instance.ui_data['pos'] = [
-                    item.pos().x(),
-                    item.pos().y()
-                ]
-                item.instance.ui_data['LOD'] = item.current_priority
+                ui_data = item.instance.ui_data
+                pos = [item.pos().x(), item.pos().y()]
+                lod = item.current_priority
+                if ui_data.get('pos') != pos or ui_data.get('LOD') != lod:
+                    ui_data['pos'] = pos
+                    ui_data['LOD'] = lod
+                    item.instance._edited()
             elif item.type_name == 'parameter':
                 parameter_node_pos[item.full_name] = [
                     item.pos().x(),
                     item.pos().y()
                 ]
-        self.graph.ui_data['parameter_node'] = parameter_node_pos
+        if self.graph.ui_data.get('parameter_node') != parameter_node_pos:
+            self.graph.ui_data['parameter_node'] = parameter_node_pos
+            self.graph._edited()
 
     def populate_graph(self):
         for node in self.__graph.iter_objects():
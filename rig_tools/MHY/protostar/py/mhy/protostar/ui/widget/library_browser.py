@@ -49,7 +49,7 @@ class LibraryWidget(QtWidgets.QWidget):
                 name_match_str=filter_text
         ):
             item = QtWidgets.QListWidgetItem()
-            cls_ = action_lib.get_action(name)
+            cls_ = action_lib.get_action_info(name)
             item.setData(QtCore.Qt.ToolTipRole, str(cls_.doc))
             item.setData(QtCore.Qt.DisplayRole, name)
             item.setIcon(QtGui.QIcon(cls_.icon_path))
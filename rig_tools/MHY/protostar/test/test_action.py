@@ -1,4 +1,5 @@
 import os
+import random
 import unittest
 import shutil
 from collections import OrderedDict
@@ -6,6 +7,7 @@ from collections import OrderedDict
 import mhy.protostar.core.parameter_base as pb
 import mhy.protostar.core.parameter as pa
 import mhy.protostar.core.exception as exp
+import mhy.protostar.core.graph as ag
 import mhy.protostar.constants as const
 from mhy.protostar.constants import DEFAULT_TEAM, ExecStatus
 from mhy.protostar.lib import LIB_ENV_VAR, ICON_ENV_VAR
@@ -446,6 +448,127 @@ class TestAction(unittest.TestCase):
         self.assertEqual(actionE.get_status(), ExecStatus.kSuccess)
         self.assertEqual(actionG.get_status(), ExecStatus.kSuccess)
 
+    def test_graph_topology(self):
+        graph = alib.create_graph()
+        actionA = alib.create_action('NullAction', name='actionA', graph=graph)
+        actionB = alib.create_action('NullAction', name='actionB', graph=graph)
+        actionC = alib.create_action('NullAction', name='actionC', graph=graph)
+        paramA = actionA.add_dynamic_param('int', name='paramA')
+        paramB = actionB.add_dynamic_param('int', name='paramB')
+        paramC = actionC.add_dynamic_param('int', name='paramC')
+
+        # C >> B >> A
+        paramC >> paramB
+        paramB >> paramA
+        self.assertEqual(graph.get_input_objects(actionA), [actionB])
+        self.assertEqual(graph.get_output_objects(actionC), [actionB])
+        sorted_objects = graph.get_sorted_objects()
+        self.assertEqual(sorted_objects, [actionC, actionB, actionA])
+        self.assertIsNone(graph.find_cycle())
+
+        # the index is updated on script changes
+        paramB.script_enabled = False
+        self.assertEqual(
+            graph.get_sorted_objects(), [actionB, actionA, actionC])
+        paramB.script_enabled = True
+        self.assertEqual(graph.get_sorted_objects(), sorted_objects)
+
+        # connections update the index in place instead of rebuilding it
+        index = graph._ActionGraph__input_index
+        paramA2 = actionA.add_dynamic_param('int', name='paramA2')
+        paramC >> paramA2
+        self.assertIs(graph._ActionGraph__input_index, index)
+        self.assertEqual(graph.get_input_objects(actionA), [actionB, actionC])
+        self.assertEqual(graph.get_output_objects(actionC), [actionA, actionB])
+        paramA2.script = None
+        self.assertEqual(graph.get_input_objects(actionA), [actionB])
+        self.assertEqual(graph.get_output_objects(actionC), [actionB])
+        self.assertIs(graph._ActionGraph__input_index, index)
+
+        # connections causing cycles are rejected
+        with self.assertRaises(exp.PConnectionError):
+            paramA >> paramC
+
+        # cycles created via scripts are reported
+        paramC.set_script('{actionA.paramA}', quiet=True)
+        self.assertEqual(graph.find_cycle(), [actionA, actionC, actionB])
+        with self.assertRaises(exp.PConnectionError):
+            graph.get_sorted_objects()
+        paramC.script = None
+
+        # the index is updated on object removal
+        graph.remove_object(actionB, force=True)
+        self.assertEqual(graph.get_input_objects(actionA), [])
+        self.assertEqual(graph.get_sorted_objects(), [actionA, actionC])
+
+    def test_graph_index_sync(self):
+        def get_index(graph):
+            return [(graph.get_input_objects(x), graph.get_output_objects(x))
+                    for x in graph.iter_objects()]
+
+        def assert_synced(graph):
+            index = get_index(graph)
+            graph._topology_changed()
+            self.assertEqual(index, get_index(graph))
+
+        graph = alib.create_graph()
+        actionA = alib.create_action('NullAction', name='actionA', graph=graph)
+        actionB = alib.create_action('NullAction', name='actionB', graph=graph)
+        paramA = actionA.add_dynamic_param('int', name='paramA')
+        paramB = actionB.add_dynamic_param('int', name='paramB')
+        graph.get_sorted_objects()
+
+        # removing a driving parameter removes the connection
+        paramA >> paramB
+        actionA.remove_dynamic_param(paramA, force=True)
+        self.assertEqual(graph.get_input_objects(actionB), [])
+        assert_synced(graph)
+        paramB2 = actionB.add_dynamic_param('int', name='paramB2')
+        paramA2 = actionA.add_dynamic_param('int', name='paramA2')
+        paramB2 >> paramA2
+
+        # re-adding a driving object restores the connection
+        graph.remove_object(actionB, force=True)
+        self.assertEqual(graph.get_input_objects(actionA), [])
+        graph.add_object(actionB)
+        self.assertEqual(graph.get_input_objects(actionA), [actionB])
+        assert_synced(graph)
+
+        # random edits keep the index in sync with a rebuild
+        rand = random.Random(0)
+        graph = alib.create_graph()
+        actions = [alib.create_action('NullAction', name='action', graph=graph)
+                   for _ in range(4)]
+        params = [x.add_dynamic_param('int', name='param')
+                  for x in actions for _ in range(2)]
+        removed = []
+        for _ in range(100):
+            params = [x for x in params
+                      if x.owner is not None and x.owner.graph is graph]
+            op = rand.randrange(5)
+            try:
+                if op < 2 and len(params) > 1:
+                    source, target = rand.sample(params, 2)
+                    if source.owner is not target.owner:
+                        source >> target
+                elif op == 2 and params:
+                    rand.choice(params).script = None
+                elif op == 3 and params:
+                    param = rand.choice(params)
+                    action = param.owner
+                    action.remove_dynamic_param(param, force=True)
+                    params.append(action.add_dynamic_param(
+                        'int', name='param'))
+                elif removed:
+                    graph.add_object(removed.pop())
+                else:
+                    action = rand.choice(list(graph.iter_objects()))
+                    graph.remove_object(action, force=True)
+                    removed.append(action)
+            except exp.PConnectionError:
+                pass
+            assert_synced(graph)
+
     def test_action_data(self):
         graph = alib.create_graph()
         actionA = alib.create_action('NullAction', name='actionA', graph=graph)
@@ -703,6 +826,59 @@ class TestAction(unittest.TestCase):
         self.assertFalse(p.script_enabled)
         self.assertEqual(p.value, 0)
 
+    def test_graph_clone(self):
+        root = alib.create_graph(name='root')
+        graph = alib.create_graph(name='graph', graph=root)
+        graph.ui_data = {'pos': [1, 2]}
+        gparam = graph.add_dynamic_param('int', name='gparam', default=2)
+        sub_graph = alib.create_graph(name='sub', graph=graph)
+        actionA = alib.create_action('NullAction', name='actionA', graph=graph)
+        intp = actionA.add_dynamic_param('int', name='intp', default=1)
+        intp.script = '{{{}.gparam}} + 1'.format(pb.OWNER_GRAPH)
+        listp = actionA.add_dynamic_param('list', name='listp')
+        listp.script = '[{{{}.intp}}, 3]'.format(pb.THIS_OBJECT)
+        actionB = alib.create_action(
+            'NullAction', name='actionB', graph=sub_graph)
+        strp = actionB.add_dynamic_param('str', name='strp', default='abc')
+        subp = sub_graph.add_dynamic_param('int', name='subp')
+        intp >> subp
+        strp.script = '{{{}.subp}}'.format(pb.OWNER_GRAPH)
+        actionA.enabled >> sub_graph.enabled
+
+        # the clone matches a serialized copy
+        dup = graph.copy(graph=None)
+        self.assertTrue(dup.is_equivalent(graph))
+        legacy = alib.create_graph(name='graph')
+        legacy._set_data(graph._get_data())
+        self.assertEqual(dup._get_data(), legacy._get_data())
+        self.assertEqual(dup.ui_data, {'pos': [1, 2]})
+        self.assertIsNot(dup.ui_data, graph.ui_data)
+
+        # internal connections are remapped to the copy
+        dup_a = dup.get_object('actionA')
+        dup_sub = dup.get_object('sub')
+        dup_b = dup_sub.get_object('actionB')
+        self.assertEqual(
+            [x.owner for x in dup_sub.subp.input_params], [dup_a])
+        self.assertEqual(
+            [x.owner for x in dup_b.strp.input_params], [dup_sub])
+        self.assertEqual(
+            [x.owner for x in dup_a.intp.input_params], [dup])
+        self.assertEqual(dup_b.strp.value, '3')
+        dup.gparam.value = 5
+        self.assertEqual(dup_b.strp.value, '6')
+        self.assertEqual(dup_a.listp.value, [6, 3])
+        self.assertEqual(actionB.strp.value, '3')
+        self.assertFalse(gparam in dup_a.intp.input_params)
+
+        # an action copied within the same graph keeps
+        # reading from the original objects
+        actionC = actionA.copy(name='actionC')
+        self.assertEqual(
+            actionC.listp.script.code, '[{actionA.intp}, 3]')
+        gparam.value = 4
+        self.assertEqual(actionC.listp.value, [5, 3])
+
     def test_action_execution2(self):
         graph = alib.create_graph()
 
@@ -840,6 +1016,82 @@ class TestAction(unittest.TestCase):
         if os.path.exists(path):
             os.remove(path)
 
+    def test_graph_lazy_reference(self):
+
+        lib_graph = alib.create_graph(name='lib_graph')
+        null_act = alib.create_action('NullAction', name='null', graph=lib_graph)
+        null_act.add_dynamic_param('int', name='dyn_input')
+        null_act.promote('dyn_input')
+
+        lib_path = os.path.split(os.path.realpath(__file__))[0]
+        lib_path = os.path.join(lib_path, 'lazy_lib_graph.agraph')
+        lib_graph.write(lib_path)
+        alib._GRAPH_DICT['test_team'] = {'lazy_graph': lib_path}
+
+        root_graph = alib.create_graph(name='root_graph')
+        for i in range(3):
+            sub_graph = alib.create_graph(
+                'lazy_graph', name='sub_graph', graph=root_graph)
+            sub_graph.dyn_input.value = i
+
+        path = os.path.split(os.path.realpath(__file__))[0]
+        path = os.path.join(path, 'test_lazy.agraph')
+        root_graph.write(path)
+
+        # the library graph file is parsed only once
+        key = os.path.normpath(lib_path)
+        data = ag._GRAPH_FILE_CACHE[key][1]
+        new_graph = alib.create_graph(name='new_graph')
+        new_graph.read(path)
+        self.assertIs(ag._GRAPH_FILE_CACHE[key][1], data)
+
+        # referenced graph objects are created on first access
+        sub_graphs = list(new_graph.iter_objects())
+        self.assertEqual(len(sub_graphs), 3)
+        for i, sub_graph in enumerate(sub_graphs):
+            self.assertTrue(sub_graph.referenced)
+            self.assertFalse(sub_graph.objects_loaded)
+            self.assertEqual(sub_graph.dyn_input.value, i)
+            self.assertEqual(sub_graph.get_status(), ExecStatus.kNone)
+
+        sub_graph = sub_graphs[1]
+        self.assertEqual(sub_graph.get_object('null').dyn_input.value, 1)
+        self.assertTrue(sub_graph.objects_loaded)
+        self.assertTrue(sub_graph.referenced)
+        self.assertFalse(sub_graphs[2].objects_loaded)
+        with self.assertRaises(exp.ActionError):
+            alib.create_action('NullAction', graph=sub_graph)
+
+        # executing loads all objects
+        new_graph.execute()
+        self.assertEqual(new_graph.get_status(), ExecStatus.kSuccess)
+        for sub_graph in sub_graphs:
+            self.assertTrue(sub_graph.objects_loaded)
+        self.assertTrue(new_graph.is_equivalent(root_graph))
+
+        # changed files are parsed again
+        alib.create_action('NullAction', name='null2', graph=lib_graph)
+        lib_graph.write(lib_path)
+        sub_graph = alib.create_graph('lazy_graph', graph=root_graph)
+        self.assertEqual(sub_graph.object_count, 2)
+
+        # files changed behind the cache are detected by mtime and size
+        self.assertIn(key, ag._GRAPH_FILE_CACHE)
+        alib.create_action('NullAction', name='null3', graph=lib_graph)
+        new_path = os.path.join(
+            os.path.dirname(lib_path), 'lazy_lib_graph_new.agraph')
+        lib_graph.write(new_path)
+        shutil.copyfile(new_path, lib_path)
+        mtime = os.stat(lib_path).st_mtime + 10
+        os.utime(lib_path, (mtime, mtime))
+        self.assertIn(key, ag._GRAPH_FILE_CACHE)
+        sub_graph = alib.create_graph('lazy_graph', graph=root_graph)
+        self.assertEqual(sub_graph.object_count, 3)
+
+        for each in (lib_path, new_path, path):
+            if os.path.exists(each):
+                os.remove(each)
+
     def test_icon(self):
 
         alib.refresh()
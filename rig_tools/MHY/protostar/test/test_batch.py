@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.batch as bat
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+WRITE_SCRIPT = '''
+import os
+with open(os.path.join(folder, asset), 'w') as f:
+    f.write(asset)
+'''
+
+RETRY_SCRIPT = '''
+import os
+marker = os.path.join(folder, 'marker')
+if not os.path.isfile(marker):
+    open(marker, 'w').close()
+    raise RuntimeError('First attempt fails.')
+'''
+
+SLEEP_SCRIPT = '''
+import time
+time.sleep(30)
+'''
+
+
+class TestBatchRunner(unittest.TestCase):
+    """
+    Test the headless batch runner
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.log_dir = os.path.join(self.root, 'logs')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def make_graph(self, name, script, iter_values=None):
+        """Writes a graph running a script action to a file."""
+        graph = alib.create_graph(name=name)
+        action = alib.create_action(
+            'ScriptAction', name='script', graph=graph)
+        action.input_script.value = script
+        folder = action.add_dynamic_param('str', name='folder')
+        folder.value = self.root
+        asset = action.add_dynamic_param('str', name='asset', default=name)
+        if iter_values is not None:
+            param = graph.add_dynamic_param('iter', name='assets')
+            param.value = iter_values
+            asset.script = '{{{}.assets}}'.format(pb.OWNER_GRAPH)
+        path = os.path.join(self.root, name + '.agraph')
+        graph.write(path)
+        return path
+
+    def test_graph_jobs(self):
+        paths = [self.make_graph('rig{}'.format(i), WRITE_SCRIPT)
+                 for i in range(3)]
+        runner = bat.BatchRunner(concurrency=2, log_dir=self.log_dir)
+        jobs = runner.run([bat.BatchJob(x) for x in paths])
+
+        self.assertEqual(
+            [x.status for x in jobs], [bat.JobStatus.kSuccess] * 3)
+        for i, job in enumerate(jobs):
+            self.assertEqual(job.name, 'rig{}'.format(i))
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.time, 0)
+            self.assertTrue(os.path.isfile(job.log_path))
+            self.assertTrue(
+                os.path.isfile(os.path.join(self.root, job.name)))
+
+        # summary report
+        path = os.path.join(self.root, 'summary.json')
+        runner.write_summary(path)
+        with open(path, 'r') as f:
+            summary = json.load(f)
+        self.assertEqual(summary['counts'], {bat.JobStatus.kSuccess: 3})
+        self.assertEqual(summary['concurrency'], 2)
+        self.assertEqual(
+            [x['name'] for x in summary['jobs']], ['rig0', 'rig1', 'rig2'])
+        self.assertIn('rig2', runner.report())
+
+    def test_manifest_jobs(self):
+        path = self.make_graph('rig', WRITE_SCRIPT, iter_values=['none'])
+        manifest = os.path.join(self.root, 'assets.json')
+        with open(manifest, 'w') as f:
+            json.dump(['assetA', 'assetB'], f)
+
+        jobs = bat.jobs_from_manifest(
+            path, 'assets', bat.load_manifest(manifest))
+        self.assertEqual([x.name for x in jobs], ['rig_assetA', 'rig_assetB'])
+        self.assertEqual(jobs[0].params, {'assets': ['assetA']})
+
+        # run from the command line
+        summary = os.path.join(self.root, 'summary.json')
+        code = bat.main([
+            'run', path, '--manifest', manifest, '--iter-param', 'assets',
+            '-j', '2', '--log-dir', self.log_dir, '--summary', summary])
+        self.assertEqual(code, 0)
+        for asset in ('assetA', 'assetB'):
+            self.assertTrue(os.path.isfile(os.path.join(self.root, asset)))
+        self.assertFalse(os.path.isfile(os.path.join(self.root, 'none')))
+        with open(summary, 'r') as f:
+            self.assertEqual(
+                json.load(f)['counts'], {bat.JobStatus.kSuccess: 2})
+
+    def test_retry(self):
+        path = self.make_graph('rig', RETRY_SCRIPT)
+
+        runner = bat.BatchRunner(concurrency=1, log_dir=self.log_dir)
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kFail)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('Action failed', job.error)
+        self.assertTrue(
+            any('First attempt fails.' in x for x in job.get_log_tail()))
+        self.assertIn('rig failed', runner.report())
+
+        os.remove(os.path.join(self.root, 'marker'))
+        runner = bat.BatchRunner(
+            concurrency=1, retries=2, log_dir=self.log_dir)
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kSuccess)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(job.log_paths), 2)
+
+    def test_worker_command(self):
+        path = self.make_graph('rig', WRITE_SCRIPT)
+
+        # a custom launch command
+        command = '"{}" -m mhy.protostar.batch'.format(sys.executable)
+        runner = bat.BatchRunner(command=command, log_dir=self.log_dir)
+        self.assertEqual(
+            runner.command, [sys.executable, '-m', 'mhy.protostar.batch'])
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kSuccess)
+
+        # a missing interpreter
+        runner = bat.BatchRunner(
+            command=['missing_interpreter_exe'], log_dir=self.log_dir)
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kFail)
+        self.assertIn('Failed launching worker', job.error)
+
+    def test_corrupt_result(self):
+        path = self.make_graph('rig', WRITE_SCRIPT)
+
+        # a worker crashing while writing its result file
+        code = ('import sys\n'
+                'open(sys.argv[-1], "w").write(\'{"succ\')\n'
+                'sys.exit(1)')
+        runner = bat.BatchRunner(
+            command=[sys.executable, '-c', code], retries=1,
+            log_dir=self.log_dir)
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kFail)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('Failed reading the worker result', job.error)
+        self.assertIn('rig failed', runner.report())
+
+    def test_timeout(self):
+        path = self.make_graph('rig', SLEEP_SCRIPT)
+        runner = bat.BatchRunner(timeout=0.5, log_dir=self.log_dir)
+        job = runner.run([bat.BatchJob(path)])[0]
+        self.assertEqual(job.status, bat.JobStatus.kTimeout)
+        self.assertLess(job.time, 10)
@@ -0,0 +1,144 @@
+import os
+import time
+import threading
+import unittest
+
+import mhy.protostar.core.exception as exp
+import mhy.protostar.core.parameter as pa
+from mhy.protostar.core.action import Action, ExecProgress
+from mhy.protostar.constants import DEFAULT_TEAM, ExecStatus
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+# a log of action names in execution order
+_EXEC_LOG = []
+
+
+class SleepAction(Action):
+    """A pure-Python action that sleeps for a while."""
+
+    @pa.float_param(default=0.2)
+    def duration(self):
+        """Sleep duration."""
+
+    @pa.bool_param(default=False)
+    def fail(self):
+        """If True, raises an error."""
+
+    @pa.int_param(output=True)
+    def thread_id(self):
+        """The thread id this action ran on."""
+
+    def run(self):
+        time.sleep(self.duration.value)
+        if self.fail.value:
+            raise RuntimeError('Failed on purpose.')
+        self.thread_id.value = threading.current_thread().ident
+        _EXEC_LOG.append(self.name)
+
+
+class DCCSleepAction(SleepAction):
+    """A sleep action that claims to need a DCC."""
+
+    _APP = 'maya'
+
+
+class TestConcurrentExecution(unittest.TestCase):
+    """
+    Test concurrent graph executions
+    """
+
+    def setUp(self):
+        alib._ACTION_DICT[DEFAULT_TEAM]['SleepAction'] = SleepAction
+        alib._ACTION_DICT[DEFAULT_TEAM]['DCCSleepAction'] = DCCSleepAction
+        del _EXEC_LOG[:]
+
+    def test_concurrent_branches(self):
+        graph = alib.create_graph()
+        # A >> B, C >> D, E (dcc) >> F
+        actions = {}
+        for name in 'ABCDF':
+            actions[name] = alib.create_action(
+                'SleepAction', name='action' + name, graph=graph)
+        actions['E'] = alib.create_action(
+            'DCCSleepAction', name='actionE', graph=graph)
+        actions['A'].execution >> actions['B'].execution
+        actions['C'].execution >> actions['D'].execution
+        actions['E'].execution >> actions['F'].execution
+
+        statuses = []
+        graph.status_changed.connect(lambda n, s: statuses.append(s))
+
+        start = time.time()
+        progress = ExecProgress(6)
+        self.assertTrue(
+            graph.execute(mode='concurrent', exec_progress=progress))
+        duration = time.time() - start
+
+        # 3 branches of 2 actions run in about 2 x 0.2 seconds
+        self.assertLess(duration, 1.0)
+        self.assertEqual(graph.get_status(), ExecStatus.kSuccess)
+        self.assertEqual(statuses[-1], ExecStatus.kSuccess)
+        self.assertEqual(progress.progress_id, progress.max_id)
+
+        # dependencies are respected
+        log = list(_EXEC_LOG)
+        for up, down in ('AB', 'CD', 'EF'):
+            self.assertLess(
+                log.index('action' + up), log.index('action' + down))
+
+        # DCC actions stay on the main thread
+        main_id = threading.current_thread().ident
+        self.assertEqual(actions['E'].thread_id.value, main_id)
+        self.assertNotEqual(actions['A'].thread_id.value, main_id)
+
+    def test_concurrent_fail_fast(self):
+        graph = alib.create_graph()
+        actionA = alib.create_action('SleepAction', name='actionA', graph=graph)
+        actionB = alib.create_action('SleepAction', name='actionB', graph=graph)
+        actionC = alib.create_action('SleepAction', name='actionC', graph=graph)
+        actionA.fail.value = True
+        actionA.duration.value = 0.05
+        actionA.execution >> actionC.execution
+
+        with self.assertRaises(exp.ActionError):
+            graph.execute(mode='concurrent')
+
+        # the running branch finishes, the downstream action never starts
+        self.assertEqual(actionA.get_status(), ExecStatus.kFail)
+        self.assertEqual(actionB.get_status(), ExecStatus.kSuccess)
+        self.assertEqual(actionC.get_status(), ExecStatus.kNone)
+
+    def test_concurrent_break_point(self):
+        graph = alib.create_graph()
+        actionA = alib.create_action('SleepAction', name='actionA', graph=graph)
+        actionB = alib.create_action('SleepAction', name='actionB', graph=graph)
+        actionC = alib.create_action('SleepAction', name='actionC', graph=graph)
+        for action in (actionA, actionB, actionC):
+            action.duration.value = 0.01
+        actionB.break_point.value = True
+
+        reached = []
+        actionB.break_point_reached.connect(lambda: reached.append(1))
+
+        self.assertFalse(graph.execute(mode='concurrent'))
+        self.assertEqual(reached, [1])
+        self.assertEqual(actionA.get_status(), ExecStatus.kSuccess)
+        self.assertEqual(actionB.get_status(), ExecStatus.kNone)
+        self.assertEqual(actionC.get_status(), ExecStatus.kNone)
+
+        self.assertTrue(graph.execute(mode='resume'))
+        self.assertEqual(graph.get_status(), ExecStatus.kSuccess)
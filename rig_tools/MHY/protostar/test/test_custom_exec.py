@@ -1,6 +1,8 @@
 import os
 import unittest
 
+import mhy.protostar.core.parameter as pa
+
 from mhy.protostar.core.action import custom_exec_method, Action
 from mhy.protostar.constants import DEFAULT_TEAM, ExecStatus
 from mhy.protostar.lib import LIB_ENV_VAR
@@ -67,3 +69,51 @@ class TestActionCustomExecution(unittest.TestCase):
         self.assertEqual(actionB.get_status(exec_name), ExecStatus.kSuccess)
         self.assertEqual(actionC.get_status(exec_name), ExecStatus.kSuccess)
         self.assertEqual(graph.get_status(exec_name), ExecStatus.kNone)
+
+    def test_class_meta(self):
+
+        class MetaAction(Action):
+
+            _TAGS = 'meta'
+
+            @pa.int_param(default=2)
+            def value(self):
+                """A value."""
+
+            @custom_exec_method
+            def my_custom_exec(self, a=1):
+                self.value.value = a
+
+            def run(self, b=0, *args):
+                self.value.value = b
+
+        class SubMetaAction(MetaAction):
+
+            @custom_exec_method
+            def other_exec(self, c=1):
+                self.value.value = c
+
+        meta = MetaAction._get_meta()
+        self.assertIs(MetaAction._get_meta(), meta)
+        self.assertEqual(meta.custom_exec_names, ('my_custom_exec',))
+        self.assertEqual(meta.tags, ('action', 'meta'))
+        self.assertEqual(MetaAction.tags, ('action', 'meta'))
+        self.assertEqual(meta.get_arg_spec('run'), (('b',), 'args', None))
+        self.assertEqual(
+            [x.name for x in meta.param_descriptors][-1], 'value')
+
+        # sub-classes have their own metadata
+        sub_meta = SubMetaAction._get_meta()
+        self.assertIsNot(sub_meta, meta)
+        self.assertEqual(
+            sub_meta.custom_exec_names, ('my_custom_exec', 'other_exec'))
+
+        # arguments are filtered with the cached specs
+        action = SubMetaAction()
+        self.assertEqual(action.value.value, 2)
+        action.execute(b=3, c=4)
+        self.assertEqual(action.value.value, 3)
+        action.execute(exec_name='other_exec', b=3, c=4)
+        self.assertEqual(action.value.value, 4)
+        action.execute(exec_name='my_custom_exec', a=5, c=4)
+        self.assertEqual(action.value.value, 5)
@@ -0,0 +1,210 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.core.journal as jnl
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+class TestEditJournal(unittest.TestCase):
+    """
+    Test incremental graph saves with the edit journal
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'rig.agraph')
+
+        self.graph = alib.create_graph(name='rig')
+        self.graph.add_dynamic_param('int', name='count', default=1)
+        self.sub = alib.create_graph(name='sub', graph=self.graph)
+        self.actions = []
+        for i in range(5):
+            action = alib.create_action(
+                'NullAction', name='action{}'.format(i), graph=self.sub)
+            action.add_dynamic_param('int', name='value')
+            self.actions.append(action)
+
+    def tearDown(self):
+        self.graph.stop_journal(save=False)
+        shutil.rmtree(self.root)
+
+    def read_graph(self):
+        graph = alib.create_graph(name='rig')
+        graph.read(self.path)
+        return graph
+
+    def read_batches(self):
+        with open(jnl.get_journal_path(self.path), 'r') as f:
+            return [json.loads(x) for x in f.read().splitlines()[1:]]
+
+    def assert_saved(self):
+        # compare with a full save
+        path = os.path.join(self.root, 'full.agraph')
+        self.graph.write(path)
+        full_graph = alib.create_graph(name='rig')
+        full_graph.read(path)
+        graph = self.read_graph()
+        self.assertEqual(graph._get_data(), full_graph._get_data())
+        self.assertTrue(graph.is_equivalent(self.graph))
+
+    def test_incremental_save(self):
+        journal = self.graph.start_journal(self.path)
+        self.assertIs(self.graph.journal, journal)
+        self.assertTrue(os.path.isfile(self.path))
+        self.assertTrue(os.path.isfile(journal.journal_path))
+        self.assertFalse(journal.save())
+
+        # parameter edits only save the edited object
+        self.actions[1].value.value = 3
+        self.assertTrue(journal.has_edits)
+        self.assertTrue(journal.save())
+        self.assertFalse(journal.has_edits)
+        records = self.read_batches()[-1]['records']
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['op'], 'data')
+        self.assertEqual(records[0]['path'], ['sub', 'action1'])
+        self.assert_saved()
+
+        # connections and scripts
+        self.actions[0].value >> self.actions[2].value
+        self.sub.add_dynamic_param('int', name='count')
+        self.graph.count >> self.sub.count
+        self.actions[3].value.script = '{{{}.count}} + 1'.format(
+            pb.OWNER_GRAPH)
+        self.actions[3].ui_data['pos'] = [1, 2]
+        self.actions[3]._edited()
+        journal.save()
+        paths = [x['path'] for x in self.read_batches()[-1]['records']]
+        self.assertEqual(
+            sorted(paths),
+            [['sub'], ['sub', 'action2'], ['sub', 'action3']])
+        self.assert_saved()
+
+        # object edits
+        new_action = alib.create_action(
+            'NullAction', name='new_action', graph=self.sub)
+        new_action.add_dynamic_param('int', name='value')
+        self.actions[2].value >> new_action.value
+        self.actions[0].name = 'renamed'
+        self.sub.remove_object(self.actions[4])
+        self.sub.move_objects(new_action, self.actions[1], after=False)
+        journal.save()
+        records = self.read_batches()[-1]['records']
+        self.assertEqual(records[0]['op'], 'objects')
+        self.assertEqual(
+            records[0]['objects'][:3],
+            [{'name': 'action0', 'rename': 'renamed'},
+             {'data': new_action._get_data()},
+             {'name': 'action1'}])
+        graph = self.read_graph()
+        self.assertEqual(
+            [x.name for x in graph.get_object('sub').iter_objects()],
+            ['renamed', 'new_action', 'action1', 'action2', 'action3'])
+        self.assertEqual(
+            graph.get_object('sub').get_object('action2').value.script.code,
+            '{renamed.value}')
+        self.assert_saved()
+
+        # graph attributes
+        self.graph.tags = ['rig']
+        self.sub.doc = 'A sub graph.'
+        journal.save()
+        self.assert_saved()
+        self.assertEqual(journal.batch_count, 4)
+
+    def test_compaction(self):
+        journal = self.graph.start_journal(self.path, compact_interval=2)
+        for i in range(2):
+            self.actions[0].value.value = i + 1
+            journal.save()
+        self.assertEqual(journal.batch_count, 2)
+
+        # the full graph is written once the interval is reached
+        self.actions[0].value.value = 10
+        journal.save()
+        self.assertEqual(journal.batch_count, 0)
+        self.assertEqual(self.read_batches(), [])
+        with open(self.path, 'r') as f:
+            self.assertEqual(json.load(f), self.graph._get_data())
+        self.assert_saved()
+
+        # a full write also resets the journal
+        self.actions[0].value.value = 11
+        journal.save()
+        self.graph.write(self.path)
+        self.assertEqual(journal.batch_count, 0)
+        self.assertFalse(journal.has_edits)
+        self.assert_saved()
+
+        # stop and save pending edits
+        self.actions[0].value.value = 12
+        self.graph.stop_journal()
+        self.assertIsNone(self.graph.journal)
+        self.assertFalse(journal.is_active)
+        self.assert_saved()
+        self.actions[0].value.value = 13
+        self.assertFalse(journal.has_edits)
+
+        # writing a graph without a journal removes the stale journal
+        self.graph.write(self.path)
+        self.assertFalse(os.path.isfile(journal.journal_path))
+
+    def test_invalid_journal(self):
+        journal = self.graph.start_journal(self.path)
+        self.actions[0].value.value = 1
+        journal.save()
+        self.actions[1].value.value = 2
+        journal.save()
+
+        # an incomplete batch is skipped
+        with open(journal.journal_path, 'r') as f:
+            content = f.read()
+        with open(journal.journal_path, 'w') as f:
+            f.write(content[:-20])
+        graph = self.read_graph()
+        sub = graph.get_object('sub')
+        self.assertEqual(sub.get_object('action0').value.value, 1)
+        self.assertEqual(sub.get_object('action1').value.value, 0)
+
+        # a journal started from another snapshot is skipped
+        with open(self.path, 'a') as f:
+            f.write(' ')
+        graph = self.read_graph()
+        sub = graph.get_object('sub')
+        self.assertEqual(sub.get_object('action0').value.value, 0)
+
+    def test_reference_edits(self):
+        journal = self.graph.start_journal(self.path)
+
+        # re-applying the root graph data
+        self.graph._set_data(self.graph._get_data())
+        self.assertTrue(journal.has_edits)
+        journal.save()
+        self.assert_saved()
+
+        # edits of objects not in the graph are ignored
+        action = alib.create_action('NullAction', name='free')
+        action.add_dynamic_param('int', name='value')
+        self.assertFalse(journal.has_edits)
+        self.sub.remove_object(self.actions[4])
+        journal.save()
+        self.actions[4].value.value = 5
+        self.assertFalse(journal.has_edits)
+        self.assert_saved()
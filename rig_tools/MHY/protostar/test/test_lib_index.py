@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+import mhy.protostar.core.exception as exp
+import mhy.protostar.lib_index as li
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+TEAM = 'index_test'
+
+# set by the test modules when imported
+IMPORTED_VAR = 'PROTOSTAR_INDEX_TEST_IMPORTED'
+
+BASE_MODULE = '''
+import os
+import abc
+from mhy.protostar.core.action import Action
+import mhy.protostar.core.parameter as pa
+
+os.environ['{var}'] = os.environ.get('{var}', '') + 'base;'
+
+
+class BaseTestAction(Action):
+    """An abstract base action."""
+
+    _TAGS = ['index']
+    _UI_ICON = 'index_icon'
+
+    @pa.int_param(default=3)
+    def base_value(self):
+        """A base value."""
+
+    @abc.abstractmethod
+    def build(self):
+        """Builds something."""
+
+    def run(self):
+        self.build()
+'''
+
+ACTION_MODULE = '''
+import os
+from index_test_base import BaseTestAction
+import mhy.protostar.core.parameter as pa
+import a_missing_dcc_module
+
+os.environ['{var}'] = os.environ.get('{var}', '') + 'actions;'
+
+
+class _Helper(object):
+    pass
+
+
+class IndexedAction(BaseTestAction):
+    """An indexed action."""
+
+    _APP = 'test_app'
+
+    @pa.str_param(default='abc')
+    def name_value(self):
+        """A name value."""
+
+    @pa.float_param(output=True)
+    def result(self):
+        """The result."""
+
+    def build(self):
+        pass
+'''
+
+
+class TestLibraryIndex(unittest.TestCase):
+    """
+    Test the statically scanned action library index
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.lib_path = os.path.join(self.root, 'lib').replace('\\', '/')
+        self.index_path = os.path.join(self.root, 'index')
+        os.environ[li.INDEX_ENV_VAR] = self.index_path
+        os.environ[IMPORTED_VAR] = ''
+
+        # the base module is importable from sys.path
+        self.py_path = os.path.join(self.root, 'py')
+        os.makedirs(self.py_path)
+        sys.path.insert(0, self.py_path)
+
+        os.makedirs(os.path.join(self.lib_path, 'actions'))
+        with open(os.path.join(self.lib_path, 'team_config.json'), 'w') as f:
+            json.dump({'team_name': TEAM}, f)
+        self.base_module = os.path.join(self.py_path, 'index_test_base.py')
+        self.action_module = os.path.join(
+            self.lib_path, 'actions', 'indexed.py')
+        self.write(self.base_module, BASE_MODULE)
+        self.write(self.action_module, ACTION_MODULE)
+
+    def tearDown(self):
+        alib._ACTION_DICT.pop(TEAM, None)
+        alib._GRAPH_DICT.pop(TEAM, None)
+        alib._INDEX_DICT.pop(self.lib_path, None)
+        del os.environ[li.INDEX_ENV_VAR]
+        del os.environ[IMPORTED_VAR]
+        sys.path.remove(self.py_path)
+        sys.modules.pop('index_test_base', None)
+        shutil.rmtree(self.root)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content.format(var=IMPORTED_VAR))
+
+    def test_lazy_import(self):
+        alib.process_lib_path(self.lib_path)
+
+        # actions are listed without importing their modules
+        self.assertEqual(
+            alib.list_actions(team=TEAM), [TEAM + ':IndexedAction'])
+        self.assertEqual(os.environ[IMPORTED_VAR], '')
+
+        info = alib.get_action_info(TEAM + ':IndexedAction')
+        self.assertIsInstance(info, li.ActionInfo)
+        self.assertEqual(info.app, 'test_app')
+        self.assertEqual(info.tags, ('action', 'index'))
+        self.assertEqual(info.ui_icon, 'index_icon')
+        self.assertEqual(info.doc, 'An indexed action.')
+        self.assertEqual(info.type_name, TEAM + ':IndexedAction')
+        params = dict((x['name'], x) for x in info.params)
+        self.assertEqual(params['base_value']['type'], 'int')
+        self.assertEqual(params['base_value']['default'], 3)
+        self.assertEqual(params['name_value']['doc'], 'A name value.')
+        self.assertTrue(params['result']['output'])
+        self.assertTrue(alib.has_action('IndexedAction', app='test_app'))
+        self.assertIn('index', alib.get_tags())
+        self.assertEqual(os.environ[IMPORTED_VAR], '')
+
+        # the module is imported on demand
+        action_cls = alib.get_action(TEAM + ':IndexedAction')
+        self.assertNotIsInstance(action_cls, li.ActionInfo)
+        self.assertEqual(action_cls.type_name, TEAM + ':IndexedAction')
+        self.assertEqual(action_cls.tags, info.tags)
+        self.assertIn('actions;', os.environ[IMPORTED_VAR])
+        self.assertIs(alib.get_action_info('IndexedAction'), action_cls)
+
+        action = alib.create_action(TEAM + ':IndexedAction')
+        self.assertEqual(action.base_value.value, 3)
+        self.assertEqual(action.name_value.value, 'abc')
+
+    def test_incremental_scan(self):
+        alib.process_lib_path(self.lib_path)
+        index = alib._INDEX_DICT[self.lib_path]
+        self.assertEqual(len(index.scanned), 2)
+        self.assertTrue(os.path.isfile(index.file_path))
+
+        # nothing changed
+        alib.process_lib_path(self.lib_path)
+        self.assertEqual(index.scanned, [])
+
+        # only the changed file is re-scanned
+        with open(self.action_module, 'a') as f:
+            f.write('\n\nclass OtherAction(BaseTestAction):\n'
+                    '    def build(self):\n'
+                    '        pass\n')
+        alib.process_lib_path(self.lib_path)
+        self.assertEqual(
+            index.scanned, [self.action_module.replace('\\', '/')])
+        self.assertEqual(
+            alib.list_actions(team=TEAM),
+            [TEAM + ':IndexedAction', TEAM + ':OtherAction'])
+
+        # the index persists across sessions
+        index = li.LibraryIndex(self.lib_path)
+        actions, unresolved = index.update([self.action_module])
+        self.assertEqual(index.scanned, [])
+        self.assertEqual(
+            sorted([x[1]['name'] for x in actions]),
+            ['IndexedAction', 'OtherAction'])
+        self.assertEqual(unresolved, [])
+        self.assertEqual(os.environ[IMPORTED_VAR], '')
+
+    def test_unresolved_module(self):
+        # a dynamic tag value can't be indexed statically
+        content = ACTION_MODULE.replace(
+            "_APP = 'test_app'", "_APP = 'test_app'\n    _TAGS = TAGS")
+        content = content.replace(
+            'class _Helper', 'TAGS = ["dynamic"]\n\n\nclass _Helper')
+        self.write(self.action_module, content)
+        alib.process_lib_path(self.lib_path)
+
+        # the module is imported right away instead
+        self.assertIn('actions;', os.environ[IMPORTED_VAR])
+        action_cls = alib.get_action_info(TEAM + ':IndexedAction')
+        self.assertNotIsInstance(action_cls, li.ActionInfo)
+
+    def test_failed_import(self):
+        with open(self.action_module, 'a') as f:
+            f.write('\nraise RuntimeError("Broken module.")\n')
+        alib.process_lib_path(self.lib_path)
+        self.assertTrue(alib.has_action(TEAM + ':IndexedAction'))
+        with self.assertRaises(exp.ActionError):
+            alib.get_action(TEAM + ':IndexedAction')
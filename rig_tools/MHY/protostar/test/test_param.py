@@ -7,6 +7,7 @@ from collections import OrderedDict
 from mhy.protostar.constants import ExecStatus
 import mhy.protostar.constants as const
 import mhy.protostar.core.parameter as pa
+import mhy.protostar.core.parameter_base as pb
 import mhy.protostar.core.exception as exp
 from mhy.protostar.lib import LIB_ENV_VAR
 from mhy.protostar.lib import ActionLibrary as alib
@@ -664,3 +665,106 @@ class TestParameter(unittest.TestCase):
 
         self.assertEqual(param.value, actionA)
         self.assertEqual(param.script.code, '{actionA}')
+
+    def test_param_script_compiled(self):
+        graph = alib.create_graph(name='my_graph')
+        actionA = alib.create_action('NullAction', name='actionA', graph=graph)
+        actionB = alib.create_action('NullAction', name='actionB', graph=graph)
+
+        paramA = actionA.add_dynamic_param('int', name='paramA', default=3)
+        paramB = actionB.add_dynamic_param('int', name='paramB')
+        paramC = actionB.add_dynamic_param('str', name='paramC')
+        paramD = actionB.add_dynamic_param('int', name='paramD')
+
+        # repeated evaluations reuse the same compiled code object
+        paramB.script = '{actionA.paramA} * 2'
+        paramD.script = '{actionA.paramA} * 2'
+        self.assertEqual(paramB.value, 6)
+        code = pb._CODE_CACHE.get('actionA_paramA * 2')
+        self.assertIsNotNone(code)
+        self.assertEqual(paramD.value, 6)
+        self.assertIs(pb._CODE_CACHE.get('actionA_paramA * 2'), code)
+
+        # compiled scripts pick up new input values
+        paramA.value = 5
+        self.assertEqual(paramB.value, 10)
+
+        # renaming inputs recompiles the script
+        actionA.name = 'actionX'
+        paramA.name = 'paramX'
+        self.assertEqual(paramB.script.code, '{actionX.paramX} * 2')
+        self.assertEqual(paramB.value, 10)
+
+        # function blocks
+        paramB.script = """
+    if {actionX.paramX} > 4:
+        return 1
+    return 0"""
+        self.assertEqual(paramB.value, 1)
+        paramA.value = 2
+        self.assertEqual(paramB.value, 0)
+
+        # string params fall back to the raw string
+        paramC.script = '{actionX.paramX}_{actionX}_suffix'
+        self.assertEqual(paramC.value, '2_actionX_suffix')
+        paramA.value = 7
+        self.assertEqual(paramC.value, '7_actionX_suffix')
+
+    def test_param_value_cache(self):
+        graph = alib.create_graph(name='my_graph')
+        actionA = alib.create_action('NullAction', name='actionA', graph=graph)
+        actionB = alib.create_action('NullAction', name='actionB', graph=graph)
+        actionC = alib.create_action('NullAction', name='actionC', graph=graph)
+
+        paramA = actionA.add_dynamic_param('int', name='paramA', default=1)
+        paramB = actionB.add_dynamic_param('int', name='paramB')
+        paramC = actionC.add_dynamic_param('int', name='paramC')
+        paramB.script = '{actionA.paramA} + 1'
+        paramC.script = '{actionB.paramB} * 10'
+
+        # repeated reads skip the script evaluation
+        calls = []
+        evaluate = paramC.script.evaluate
+
+        def counted():
+            calls.append(1)
+            return evaluate()
+
+        paramC.script.evaluate = counted
+        self.assertEqual(paramC.value, 20)
+        self.assertEqual(paramC.value, 20)
+        self.assertEqual(len(calls), 1)
+
+        # value changes are pushed downstream
+        paramA.value = 5
+        self.assertEqual(paramC.value, 60)
+        self.assertEqual(len(calls), 2)
+
+        # script and script enabled state changes
+        paramB.script_enabled = False
+        paramB.value = 3
+        self.assertEqual(paramC.value, 30)
+        paramB.script_enabled = True
+        self.assertEqual(paramC.value, 60)
+        paramB.script = '{actionA.paramA} + 2'
+        self.assertEqual(paramC.value, 70)
+        paramA.reset_value()
+        self.assertEqual(paramC.value, 30)
+
+        # iterator changes
+        iter_param = graph.add_dynamic_param('iter', name='iter_param')
+        iter_param.value = [1, 2, 3]
+        paramA.script = '{__graph__.iter_param}'
+        self.assertEqual(paramC.value, 30)
+        iter_param.iter_id = 2
+        self.assertEqual(paramC.value, 50)
+
+        # turning off the cache re-evaluates on every read
+        count = len(calls)
+        pb.set_value_cache_enabled(False)
+        try:
+            self.assertEqual(paramC.value, 50)
+            self.assertEqual(paramC.value, 50)
+            self.assertEqual(len(calls), count + 2)
+        finally:
+            pb.set_value_cache_enabled(True)
@@ -0,0 +1,157 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+import mhy.protostar.core.parameter as pa
+import mhy.protostar.core.result_cache as rc
+from mhy.protostar.core.action import Action
+from mhy.protostar.constants import DEFAULT_TEAM, ExecStatus
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+# a list of executed action names
+_EXEC_LOG = []
+
+
+class DoubleAction(Action):
+    """Doubles the input value."""
+
+    @pa.int_param(default=1)
+    def input_value(self):
+        """The input value."""
+
+    @pa.int_param(output=True)
+    def output_value(self):
+        """The doubled value."""
+
+    def run(self):
+        _EXEC_LOG.append(self.name)
+        self.output_value.value = self.input_value.value * 2
+
+
+class UncachedDoubleAction(DoubleAction):
+    """Doubles the input value, always executed."""
+
+    _CACHEABLE = False
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Test incremental executions with the action result cache
+    """
+
+    def setUp(self):
+        alib._ACTION_DICT[DEFAULT_TEAM]['DoubleAction'] = DoubleAction
+        alib._ACTION_DICT[DEFAULT_TEAM]['UncachedDoubleAction'] = \
+            UncachedDoubleAction
+        self.cache_path = tempfile.mkdtemp()
+        self.cache = rc.ActionResultCache(path=self.cache_path)
+        rc.set_cache(self.cache)
+        del _EXEC_LOG[:]
+
+    def tearDown(self):
+        rc.set_cache(None)
+        shutil.rmtree(self.cache_path)
+
+    def test_incremental_execution(self):
+        graph = alib.create_graph()
+        actionA = alib.create_action('DoubleAction', name='actionA', graph=graph)
+        actionB = alib.create_action('DoubleAction', name='actionB', graph=graph)
+        actionC = alib.create_action(
+            'UncachedDoubleAction', name='actionC', graph=graph)
+        actionD = alib.create_action('DoubleAction', name='actionD', graph=graph)
+        # A >> B >> C, D
+        actionA.output_value >> actionB.input_value
+        actionB.output_value >> actionC.input_value
+        actionA.input_value.value = 3
+
+        # first run misses
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(
+            _EXEC_LOG, ['actionA', 'actionB', 'actionC', 'actionD'])
+        self.assertEqual(len(self.cache.hits), 0)
+        self.assertEqual(len(self.cache.misses), 3)
+        self.assertEqual(actionC.output_value.value, 24)
+
+        # second run restores outputs from the cache,
+        # non-cacheable actions always run.
+        del _EXEC_LOG[:]
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(_EXEC_LOG, ['actionC'])
+        self.assertEqual(len(self.cache.hits), 3)
+        self.assertEqual(actionA.get_status(), ExecStatus.kSuccess)
+        self.assertEqual(actionB.output_value.value, 12)
+        self.assertEqual(actionC.output_value.value, 24)
+        self.assertEqual(graph.get_status(), ExecStatus.kSuccess)
+
+        # changing an input re-runs the action and its downstream
+        del _EXEC_LOG[:]
+        actionA.input_value.value = 4
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(_EXEC_LOG, ['actionA', 'actionB', 'actionC'])
+        self.assertEqual(self.cache.hits, [actionD.long_name])
+        self.assertEqual(actionC.output_value.value, 32)
+
+        # a "new" execution ignores the cache
+        del _EXEC_LOG[:]
+        graph.execute()
+        self.assertEqual(len(_EXEC_LOG), 4)
+
+    def test_disabled_upstream(self):
+        graph = alib.create_graph()
+        actionA = alib.create_action('DoubleAction', name='actionA', graph=graph)
+        actionB = alib.create_action('DoubleAction', name='actionB', graph=graph)
+        # A (disabled) >> B
+        actionA.output_value >> actionB.input_value
+        actionA.enabled.value = False
+
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(_EXEC_LOG, ['actionB'])
+        self.assertEqual(actionB.output_value.value, 0)
+
+        # actions below a disabled action are restored from the cache
+        del _EXEC_LOG[:]
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(_EXEC_LOG, [])
+        self.assertEqual(self.cache.hits, [actionB.long_name])
+
+        # enabling the upstream action invalidates the downstream
+        del _EXEC_LOG[:]
+        actionA.enabled.value = True
+        self.assertTrue(graph.execute(mode='incremental'))
+        self.assertEqual(_EXEC_LOG, ['actionA', 'actionB'])
+        self.assertEqual(actionB.output_value.value, 4)
+
+    def test_eviction(self):
+        graph = alib.create_graph()
+        for i in range(4):
+            action = alib.create_action(
+                'DoubleAction', name='action', graph=graph)
+            action.input_value.value = i
+        graph.execute(mode='incremental')
+        self.assertGreater(self.cache.get_size(), 0)
+
+        # evict by size
+        size = self.cache.get_size()
+        self.assertEqual(self.cache.evict(max_size=size), 0)
+        self.assertEqual(self.cache.evict(max_size=size - 1), 1)
+
+        # evict by age
+        time.sleep(0.05)
+        self.assertEqual(self.cache.evict(max_age=0.01), 3)
+        self.assertEqual(self.cache.get_size(), 0)
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+import mhy.protostar.core.parameter_base as pb
+import mhy.protostar.core.parameter as pa
+import mhy.protostar.core.tracer as trc
+from mhy.protostar.core.action import custom_exec_method, Action
+from mhy.protostar.constants import DEFAULT_TEAM, ExecStatus
+from mhy.protostar.lib import LIB_ENV_VAR
+from mhy.protostar.lib import ActionLibrary as alib
+
+
+# Add the userlib path in this module
+path = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(path, 'py', 'mhy', 'protostar', 'userlib')
+if LIB_ENV_VAR not in os.environ:
+    os.environ[LIB_ENV_VAR] = path
+else:
+    os.environ[LIB_ENV_VAR] += os.pathsep + path
+
+
+alib.refresh()
+
+
+class TraceAction(Action):
+    """Sleeps for a while and reads a scripted value."""
+
+    @pa.float_param(default=0.01)
+    def duration(self):
+        """Sleep duration."""
+
+    @pa.int_param()
+    def scripted(self):
+        """A scripted value."""
+
+    def run(self):
+        time.sleep(self.duration.value)
+        self.scripted.value
+
+    @custom_exec_method
+    def my_exec(self):
+        pass
+
+
+class TestTracer(unittest.TestCase):
+    """
+    Test the execution tracer
+    """
+
+    def setUp(self):
+        alib._ACTION_DICT[DEFAULT_TEAM]['TraceAction'] = TraceAction
+        self.graph = alib.create_graph(name='root')
+        self.sub_graph = alib.create_graph(name='sub', graph=self.graph)
+        self.slow = alib.create_action(
+            'TraceAction', name='slow', graph=self.graph)
+        self.slow.duration.value = 0.05
+        self.fast = alib.create_action(
+            'TraceAction', name='fast', graph=self.sub_graph)
+        value = self.sub_graph.add_dynamic_param('int', name='value')
+        self.slow.scripted >> value
+        self.fast.scripted.script = '{{{}.value}} + 1'.format(pb.OWNER_GRAPH)
+
+    def tearDown(self):
+        trc.stop_tracing()
+
+    def test_tracing_off(self):
+        self.assertIsNone(trc.get_tracer())
+        self.assertTrue(self.graph.execute())
+        tracer = trc.ExecTracer()
+        self.assertEqual(tracer.spans, [])
+
+    def test_trace_spans(self):
+        with trc.tracing(memory=True) as tracer:
+            self.assertIs(trc.get_tracer(), tracer)
+            self.assertTrue(self.graph.execute())
+        self.assertIsNone(trc.get_tracer())
+
+        spans = tracer.spans
+        self.assertEqual(
+            [(x.name, x.category, x.depth) for x in spans],
+            [('root', 'graph', 0),
+             ('root:slow', 'action', 1),
+             ('root:sub', 'graph', 1),
+             ('root:sub:fast', 'action', 2)])
+        root, slow, sub, fast = spans
+        self.assertGreaterEqual(slow.wall, 0.05)
+        self.assertGreaterEqual(root.wall, slow.wall + sub.wall)
+        self.assertGreater(fast.script, 0)
+        self.assertEqual(slow.script, 0)
+        self.assertEqual(slow.status, ExecStatus.kSuccess)
+        self.assertEqual(root.status, ExecStatus.kSuccess)
+        self.assertIsNotNone(slow.memory)
+
+        # top N summary
+        self.assertEqual(tracer.get_top_spans(count=1), [slow])
+        report = tracer.report(count=2)
+        self.assertIn('root:slow', report)
+        self.assertLess(report.index('root:slow'), report.index('fast'))
+
+        # chrome trace export
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'trace.json')
+            tracer.write_chrome_trace(path)
+            with open(path, 'r') as f:
+                data = json.load(f)
+        finally:
+            shutil.rmtree(folder)
+        events = data['traceEvents']
+        self.assertEqual(len(events), 4)
+        self.assertEqual(events[1]['name'], 'root:slow')
+        self.assertEqual(events[1]['ph'], 'X')
+        self.assertGreaterEqual(events[1]['dur'], 50000)
+        self.assertEqual(events[1]['args']['exec_name'], 'main')
+
+    def test_trace_iterations(self):
+        iter_param = self.graph.add_dynamic_param('iter', name='iter_param')
+        iter_param.value = [1, 2]
+        tracer = trc.start_tracing()
+        self.assertTrue(self.graph.execute(exec_name='my_exec'))
+        self.assertEqual(trc.stop_tracing(), tracer)
+
+        iterations = [x for x in tracer.spans if x.category == 'iteration']
+        self.assertEqual([x.iteration for x in iterations], [0, 1])
+        actions = tracer.get_top_spans(count=None)
+        self.assertEqual(len(actions), 4)
+        self.assertEqual(
+            sorted([(x.name, x.iteration) for x in actions]),
+            [('root:slow', 0), ('root:slow', 1),
+             ('root:sub:fast', 0), ('root:sub:fast', 1)])
+        for span in actions:
+            self.assertEqual(span.exec_name, 'my_exec')
+
+    def test_trace_concurrent(self):
+        with trc.tracing() as tracer:
+            self.assertTrue(self.graph.execute(mode='concurrent'))
+        names = [x.name for x in tracer.get_top_spans(count=None)]
+        self.assertEqual(sorted(names), ['root:slow', 'root:sub:fast'])
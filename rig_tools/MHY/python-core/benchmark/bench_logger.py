@@ -0,0 +1,107 @@
+"""
+Benchmarks the per-call cost of the logger convenience functions.
+
+Compares the cached logger fast path against the legacy path, which
+looked up the caller frame, created a new color formatter and
+re-installed it on every root handler for every message.
+Output is written to a null stream.
+
+Usage:
+
+.. code:: bash
+
+    python bench_logger.py --count 100000
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+# Add the python-core package if not in the path yet
+root = os.path.split(os.path.dirname(os.path.realpath(__file__)))[0]
+path = os.path.join(root, 'py')
+if path not in sys.path:
+    sys.path.insert(0, path)
+
+import mhy.python.core.logger as logger
+
+
+def _legacy_get_logger(log_name=None, use_color=None, format_='concise'):
+    """Returns a logger the way get_logger() did before loggers were
+    cached: resolve the caller name and re-install a new formatter."""
+    format_ = logger.FORMAT_PRESETS.get(format_, format_)
+    if not log_name:
+        frame = sys._getframe(2)
+        log_name = '{}, at line {}'.format(
+            frame.f_code.co_filename, frame.f_lineno)
+    log = logging.getLogger(log_name)
+    log.getEffectiveLevel()
+    logger._set_logger_level(log)
+    formatter = logger.ColorFormatter(format_, use_color=use_color)
+    for h in logging.getLogger().handlers:
+        h.setFormatter(formatter)
+    return log
+
+
+def _legacy_info(msg, **kwargs):
+    _legacy_get_logger(**kwargs).info(msg)
+
+
+def _legacy_debug(msg, **kwargs):
+    _legacy_get_logger(**kwargs).debug('{{blue}}{}{{reset}}'.format(msg))
+
+
+def _time_calls(func, count, *args):
+    t = time.time()
+    for i in range(count):
+        func(*args)
+    return (time.time() - t) / count * 1e6
+
+
+def run(count=100000):
+    """Runs the benchmark and returns the per-call cost in microseconds."""
+    # send all output to a null stream
+    stream = open(os.devnull, 'w')
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.StreamHandler(stream)]
+    os.environ.pop('DEBUG', None)
+    logger.clear_logger_cache()
+
+    try:
+        results = {
+            'count': count,
+            'legacy_info': _time_calls(_legacy_info, count, 'message'),
+            'info': _time_calls(logger.info, count, 'message'),
+            'legacy_debug': _time_calls(
+                _legacy_debug, count, 'message {}'.format(count)),
+            'debug': _time_calls(logger.debug, count, 'message %d', count),
+        }
+    finally:
+        root_logger.handlers = []
+        logger.clear_logger_cache()
+        stream.close()
+
+    results['info_speedup'] = results['legacy_info'] / results['info']
+    results['debug_speedup'] = results['legacy_debug'] / results['debug']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    result = run(count=args.count)
+    print('Calls:                  {count}'.format(**result))
+    print('Legacy info:            {legacy_info:.2f}us'.format(**result))
+    print('Cached info:            {info:.2f}us'.format(**result))
+    print('Info speedup:           {info_speedup:.1f}x'.format(**result))
+    print('Legacy debug (skipped): {legacy_debug:.2f}us'.format(**result))
+    print('Cached debug (skipped): {debug:.2f}us'.format(**result))
+    print('Debug speedup:          {debug_speedup:.1f}x'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -114,7 +114,27 @@ def import_module_from_path(module_path):
     return module
 
 
-def filter_args(func, args, kwargs):
+def get_arg_spec(func):
+    """Returns the argument spec of a function, excluding
+    the "self" or "cls" argument.
+
+    Args:
+        func (function): A function to work with.
+
+    Returns:
+        tuple: (a tuple of argument names, varargs name, varkw name)
+    """
+    if PYTHON_VER >= 3:
+        args, varargs, varkw, _, _, _, _ = inspect.getfullargspec(func)
+    else:
+        args, varargs, varkw, _ = inspect.getargspec(func)
+
+    if args and args[0] in ('self', 'cls'):
+        args = args[1:]
+    return tuple(args), varargs, varkw
+
+
+def filter_args(func, args, kwargs, arg_spec=None):
     """Given a function, filters a set of args and kwargs
     to make sure they can be passed in.
 
@@ -122,18 +142,19 @@ def filter_args(func, args, kwargs):
         func (function): A function to work with.
         args (tuple): A list of arguments to filter.
         kwargs (dict): A dict of keyword arguments to filter.
+        arg_spec (tuple): A cached argument spec of the function
+            returned by ``get_arg_spec()``. If None, inspect the function.
 
     Returns:
         tuple: (filtered_args, filtered_kwargs)
     """
     filtered_args = args[:]
-    if PYTHON_VER >= 3:
-        args, varargs, varkw, _, _, _, _ = inspect.getfullargspec(func)
-    else:
-        args, varargs, varkw, _ = inspect.getargspec(func)
+    if not args and not kwargs:
+        return filtered_args, {}
+    if arg_spec is None:
+        arg_spec = get_arg_spec(func)
+    args, varargs, varkw = arg_spec
 
-    if args and args[0] in ('self', 'cls'):
-        args.pop(0)
     if not varargs:
         valid_arg_count = len(args)
         arg_count = len(filtered_args)
@@ -5,14 +5,37 @@ Printing out simple strings looks like:
 
 >>> logger.info('Some info message')
 >>> logger.warn('Some warning message')
+
+Messages can be formatted lazily, so that the formatting only happens
+if the message is actually logged:
+
+>>> logger.debug('Built %d nodes in %.2fs', count, elapsed)
+
+Loggers are cached per call site, and a single color formatter is
+installed on the root handlers, so logging calls are cheap even when
+they are made in tight loops. File logging can be made asynchronous
+with ``async_=True``, in which case records are written by a
+background thread.
 """
 
 import logging
+import atexit
 import sys
 import os
 import re
 import _io
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    QueueHandler = None
+    QueueListener = None
+
 
 _USE_COLOR = isinstance(sys.stdout, _io.TextIOWrapper)
 
@@ -47,6 +70,31 @@ COLORS = {
 }
 
 
+# Logger format presets
+FORMAT_PRESETS = {
+    'full': '[%(levelname)s] (%(name)s): %(message)s',
+    'concise': '[%(levelname)s]: %(message)s',
+    'simple': '%(message)s',
+}
+
+_COLOR_REGEX = re.compile(r"{\w+}")
+
+# logger cache: {(caller key or log name, log file): logger}
+_LOGGER_CACHE = {}
+
+# cached "extra" dicts carrying the format settings of a record
+_EXTRA_CACHE = {}
+
+# root handlers the stream formatter was installed on
+_INSTALLED_HANDLERS = []
+
+# the stream formatter installed on root handlers
+_FORMATTER = None
+
+# running listeners of asynchronous file handlers
+_LISTENERS = []
+
+
 def _set_logger_level(logger):
     """Sets the log level based upon the current environment.
     The default level is INFO.
@@ -62,55 +110,86 @@ def _set_logger_level(logger):
     logger.setLevel(level)
 
 
-def _get_caller_info():
-    """Returns the caller's file name and line number."""
+def _get_caller_key(depth):
+    """Returns the (file name, line number) of a caller frame.
 
-    # Get info about what called the function that called this.
+    Args:
+        depth (int): The frame depth relative to the caller of
+            this function.
+
+    Returns:
+        tuple
+    """
     try:
-        frame = sys._getframe(4)
+        frame = sys._getframe(depth + 1)
     except ValueError:
-        # handle for the case where a client calls getLogger() directly
-        frame = sys._getframe(3)
+        frame = sys._getframe(depth)
+    return frame.f_code.co_filename, frame.f_lineno
 
-    # Get the filename (full path) and then use that to get the module name.
-    fileName = frame.f_code.co_filename
-    lineNumber = frame.f_lineno
 
-    return '{}, at line {}'.format(fileName, lineNumber)
+def _get_format(format_, log_file=None):
+    """Returns the format string of a format preset."""
+    if log_file:
+        return FORMAT_PRESETS['full']
+    return FORMAT_PRESETS.get(format_, format_)
 
 
-def _get_logger_without_handlers(log_name=None):
-    """Returns a logger without handlers or formatters."""
-    if not log_name:
-        log_name = _get_caller_info()
-    logger = logging.getLogger(log_name)
-    return logger, logger.getEffectiveLevel()
+def _get_extra(format_, use_color, log_file):
+    """Returns the cached "extra" dict passed to log records."""
+    key = (format_, use_color, log_file is not None)
+    extra = _EXTRA_CACHE.get(key)
+    if extra is None:
+        extra = {
+            'mhy_format': _get_format(format_, log_file),
+            'mhy_color': use_color}
+        _EXTRA_CACHE[key] = extra
+    return extra
+
+
+def _replace_color(match):
+    """Returns the TTY color code of a color placeholder match."""
+    return COLORS.get(match.group(0), '')
 
 
 class ColorFormatter(logging.Formatter):
+    """A formatter that swaps out color placeholders.
 
-    _colorRegex = re.compile(r"{\w+}")
+    The format string and color setting can be overridden per record
+    via the "mhy_format" and "mhy_color" record attributes, so that a
+    single formatter instance serves all logging calls.
+    """
+
+    _colorRegex = _COLOR_REGEX
 
     def __init__(self, *args, **kwargs):
         self.__use_color = None
         if 'use_color' in kwargs:
             self.__use_color = kwargs.pop('use_color')
         super(ColorFormatter, self).__init__(*args, **kwargs)
+        self.__default_format = getattr(self, '_fmt', None)
+        self.__formatters = {}
+
+    def set_default_format(self, format_, use_color=None):
+        """Sets the format used by records without format overrides.
 
-    def _color_replacer(self, match):
-        """Replaces anything matching _colorRegex with something from COLORS,
-        or return it as-is if it isn't in COLORS.
+        Args:
+            format_ (str): A format string or a format preset name.
+            use_color (bool): Using colored output?
+                If None, only use colored output in terminal.
+
+        Returns:
+            None
         """
-        if self.__use_color is not None and not self.__use_color:
-            return ''
-        elif self.__use_color is None and not _USE_COLOR:
-            return ''
+        self.__default_format = FORMAT_PRESETS.get(format_, format_)
+        self.__use_color = use_color
 
-        key = match.group(0)
-        if key in COLORS:
-            return COLORS[key]
-        else:
-            return ''
+    def __get_formatter(self, format_):
+        """Returns a cached plain formatter for a format string."""
+        formatter = self.__formatters.get(format_)
+        if formatter is None:
+            formatter = logging.Formatter(format_, self.datefmt)
+            self.__formatters[format_] = formatter
+        return formatter
 
     def format(self, record):
         """Swaps out color placeholders. Example:
@@ -120,15 +199,126 @@ class ColorFormatter(logging.Formatter):
         would print out a red "Hello" followed by the terminal's default
         color for "World".
         """
-        s = super(ColorFormatter, self).format(record)
-        return self._colorRegex.sub(self._color_replacer, s)
+        format_ = getattr(record, 'mhy_format', None)
+        if not format_:
+            format_ = self.__default_format
+        s = self.__get_formatter(format_).format(record)
+        if '{' not in s:
+            return s
+
+        use_color = getattr(record, 'mhy_color', None)
+        if use_color is None:
+            use_color = self.__use_color
+        if use_color is None:
+            use_color = _USE_COLOR
+        if use_color:
+            return self._colorRegex.sub(_replace_color, s)
+        return self._colorRegex.sub('', s)
+
+
+def _get_formatter():
+    """Returns the stream formatter installed on root handlers."""
+    global _FORMATTER
+    if _FORMATTER is None:
+        _FORMATTER = ColorFormatter(FORMAT_PRESETS['concise'])
+    return _FORMATTER
+
+
+def _install_formatter(force_new=False):
+    """Installs the stream formatter on all root handlers, or creates
+    a root stream handler if the root logger is not configured yet.
+
+    Returns:
+        bool: True if a new root stream handler is created.
+    """
+    root = logging.getLogger()
+    formatter = _get_formatter()
+    created = False
+    if root.handlers and not force_new:
+        # logger should have already been configured
+        for handler in root.handlers:
+            if handler.formatter is not formatter:
+                handler.setFormatter(formatter)
+    else:
+        # Set up the root logger for the first time - all child loggers
+        # will pick up this configuration
+        root.handlers = []
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+        _set_logger_level(root)
+        created = True
+    _INSTALLED_HANDLERS[:] = root.handlers
+    return created
+
+
+def _add_file_handler(logger, log_file, async_=False):
+    """Adds a file handler to a logger.
+
+    If async_ is True, records are written by a queue listener
+    running on a background thread.
+    """
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter(FORMAT_PRESETS['full']))
+    if async_ and QueueHandler is not None:
+        record_queue = queue.Queue(-1)
+        listener = QueueListener(record_queue, handler)
+        listener.start()
+        _LISTENERS.append(listener)
+        handler = QueueHandler(record_queue)
+    logger.addHandler(handler)
+
+
+def _get_cached_logger(key, log_file=None, force_new=False, async_=False):
+    """Returns a cached logger, or creates a new one.
+
+    Args:
+        key (str or tuple): A logger name or a caller key.
+        log_file (str): A path to the log file.
+        force_new (bool): Force creating a new logger?
+        async_ (bool): Log to the file asynchronously?
+
+    Returns:
+        Logger: the logger.
+    """
+    cache_key = (key, log_file)
+    logger = None if force_new else _LOGGER_CACHE.get(cache_key)
+    if logger is not None:
+        if not log_file and logging.root.handlers != _INSTALLED_HANDLERS:
+            _install_formatter()
+        return logger
+
+    if isinstance(key, tuple):
+        log_name = '{}, at line {}'.format(*key)
+    else:
+        log_name = key
+    logger = logging.getLogger(log_name)
+
+    # Log to file
+    if log_file:
+        if cache_key not in _LOGGER_CACHE:
+            _add_file_handler(logger, os.path.abspath(log_file), async_)
+
+    # Log to stream
+    elif _install_formatter(force_new=force_new):
+        logger.info('New logger created via: {}'.format(log_name))
+    else:
+        # in case some other code initialized the root logger,
+        # we set the log level here
+        _set_logger_level(logger)
+
+    _LOGGER_CACHE[cache_key] = logger
+    return logger
 
 
 def get_logger(
         log_name=None, log_file=None, force_new=False,
-        use_color=None, format_='concise'):
+        use_color=None, format_='concise', async_=False):
     """Returns a logger for the given log name, format, and/or log file.
 
+    Loggers are cached per log name (or per call site if no log name
+    is given), and log file.
+
     Args:
         log_name (str): The logger name. If None, a default name is generated.
         log_file (str): A path to the log file. If None, log to stream output.
@@ -140,77 +330,89 @@ def get_logger(
                 + "concise" - A concise format including level name and message.
                 + "full" - The most verbose format.
             Logging to file will always use the "full" preset.
+        async_ (bool): If True, write to the log file on a background
+            thread. Ignored if log_file is None, or in Python 2.
 
     Returns:
         Logger: the logger.
     """
-    if log_file or format_ == 'full':
-        format_ = '[%(levelname)s] (%(name)s): %(message)s'
-    elif format_ == 'concise':
-        format_ = '[%(levelname)s]: %(message)s'
-    elif format_ == 'simple':
-        format_ = '%(message)s'
+    key = log_name if log_name else _get_caller_key(2)
+    logger = _get_cached_logger(
+        key, log_file=log_file, force_new=force_new, async_=async_)
+    if not log_file:
+        _get_formatter().set_default_format(format_, use_color=use_color)
+    return logger
 
-    logger, level = _get_logger_without_handlers(log_name=log_name)
 
-    # Log to file
-    if log_file:
-        # Create file handler and formatter
-        log_file = os.path.abspath(log_file)
-        handler = logging.FileHandler(log_file)
-        formatter = logging.Formatter(format_)
+def clear_logger_cache():
+    """Clears cached loggers, so that log levels are re-read from the
+    environment when loggers are requested again.
 
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    Asynchronous file handlers are flushed and stopped.
+    """
+    stop_async_logging()
+    for (key, log_file), logger in _LOGGER_CACHE.items():
+        if log_file:
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+    _LOGGER_CACHE.clear()
+    _EXTRA_CACHE.clear()
+    del _INSTALLED_HANDLERS[:]
 
-    # Log to stream
-    else:
-        if logging.getLogger().handlers and not force_new:
-            # logger should have already been configured, but in case some
-            # other code initialized the root logger, we set the log level here
-            _set_logger_level(logger)
-            formatter = ColorFormatter(format_, use_color=use_color)
-            for h in logging.getLogger().handlers:
-                h.setFormatter(formatter)
-            return logger
-        else:
-            # Set up the root logger for the first time - all child loggers
-            # will pick up this configuration
-            root_stream_logger = logging.getLogger()
-
-            # Forces a new logger if requested
-            if root_stream_logger.handlers and force_new:
-                root_stream_logger.handlers = []
-
-            # Create stream handler and formatter
-            handler = logging.StreamHandler()
-            formatter = ColorFormatter(format_, use_color=use_color)
-
-            handler.setFormatter(formatter)
-            root_stream_logger.addHandler(handler)
-            _set_logger_level(root_stream_logger)
-
-        logger.info('New logger created via: {}'.format(_get_caller_info()))
-        return logger
+
+def stop_async_logging():
+    """Flushes and stops all asynchronous file handlers.
+
+    This is called automatically at exit.
+    """
+    while _LISTENERS:
+        listener = _LISTENERS.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_async_logging)
+
+
+def _log(level, color, msg, args, log_name=None, log_file=None,
+         force_new=False, use_color=None, format_='concise', async_=False):
+    """Logs a message through the cached logger of the caller.
+
+    The message is only formatted if the level is enabled.
+    """
+    key = log_name if log_name else _get_caller_key(2)
+    logger = None if force_new else _LOGGER_CACHE.get((key, log_file))
+    if logger is None or \
+       not log_file and logging.root.handlers != _INSTALLED_HANDLERS:
+        logger = _get_cached_logger(
+            key, log_file=log_file, force_new=force_new, async_=async_)
+    if not logger.isEnabledFor(level):
+        return
+    if color:
+        msg = '{{{}}}{}{{reset}}'.format(color, msg)
+    logger.log(level, msg, *args, extra=_get_extra(
+        format_, use_color, log_file))
 
 
 # --- Convenience functions
 
-def critical(msg, **kwargs):
-    get_logger(**kwargs).critical('{{red}}{}{{reset}}'.format(msg))
+def critical(msg, *args, **kwargs):
+    _log(logging.CRITICAL, 'red', msg, args, **kwargs)
 
 
-def error(msg, **kwargs):
-    get_logger(**kwargs).error('{{red}}{}{{reset}}'.format(msg))
+def error(msg, *args, **kwargs):
+    _log(logging.ERROR, 'red', msg, args, **kwargs)
 
 
-def warn(msg, **kwargs):
-    get_logger(**kwargs).warning('{{yellow}}{}{{reset}}'.format(msg))
+def warn(msg, *args, **kwargs):
+    _log(logging.WARNING, 'yellow', msg, args, **kwargs)
 
 
-def info(msg, **kwargs):
-    get_logger(**kwargs).info(msg)
+def info(msg, *args, **kwargs):
+    _log(logging.INFO, None, msg, args, **kwargs)
 
 
-def debug(msg, **kwargs):
-    get_logger(**kwargs).debug('{{blue}}{}{{reset}}'.format(msg))
+def debug(msg, *args, **kwargs):
+    _log(logging.DEBUG, 'blue', msg, args, **kwargs)